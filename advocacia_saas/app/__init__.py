@@ -144,6 +144,12 @@ def create_app(config_class=Config):
     mail.init_app(app)
     migrate.init_app(app, db)
 
+    # Queries por requisição/endpoint/tenant e detector de N+1 (antes dos
+    # demais before_request, para contar as queries deles também)
+    from app.services.query_profiler import query_profiler
+
+    query_profiler.init_app(app)
+
     # Initialize CSRF protection for all forms
     csrf.init_app(app)
 
@@ -164,7 +170,10 @@ def create_app(config_class=Config):
         limiter.storage_uri = storage_uri
         limiter.init_app(app)
 
-    # socketio.init_app(app, cors_allowed_origins="*")
+    # Socket.IO (fila no Redis) e long-poll para eventos em tempo real
+    from app.services.realtime import realtime
+
+    realtime.init_app(app)
 
     # Initialize cache
     if app.config.get("REDIS_URL"):
@@ -236,6 +245,11 @@ def create_app(config_class=Config):
         UserPlan,
     )
 
+    # Manter índice de busca global sincronizado com as entidades
+    from app.services.search_index import register_search_index_listeners
+
+    register_search_index_listeners()
+
     # Import roadmap voting models
     from app.models_roadmap_votes import (  # noqa: F401, E402
         RoadmapVote,
@@ -267,6 +281,10 @@ def create_app(config_class=Config):
 
     app.register_blueprint(notifications_api_bp)
 
+    from app.api.realtime import realtime_api_bp
+
+    app.register_blueprint(realtime_api_bp)
+
     # Global Search API
     from app.api.search import bp as search_api_bp
 
@@ -463,6 +481,11 @@ def create_app(config_class=Config):
     app.jinja_env.globals["entity_badge_config"] = get_entity_badge_config
     app.jinja_env.globals["action_badge_config"] = get_action_badge_config
 
+    # Snapshot de features/limites por plano (cache por requisição + Redis)
+    from app.services.entitlements import entitlement_resolver
+
+    entitlement_resolver.init_app(app)
+
     # Context processor para funções de features modulares
     @app.context_processor
     def inject_feature_helpers():
@@ -473,19 +496,19 @@ def create_app(config_class=Config):
             """Verifica se o usuário atual tem acesso a uma feature"""
             if not current_user.is_authenticated:
                 return False
-            return current_user.has_feature(feature_slug)
+            return current_user.entitlements.has_feature(feature_slug)
 
         def get_feature_limit(feature_slug):
             """Retorna o limite de uma feature para o usuário atual"""
             if not current_user.is_authenticated:
                 return 0
-            return current_user.get_feature_limit(feature_slug)
+            return current_user.entitlements.feature_limit(feature_slug)
 
         def get_monthly_credits(feature_slug):
             """Retorna os créditos mensais do usuário para uma feature"""
             if not current_user.is_authenticated:
                 return 0
-            return current_user.get_monthly_credits(feature_slug)
+            return current_user.entitlements.monthly_credits(feature_slug)
 
         return {
             "has_feature": has_feature,
@@ -493,6 +516,76 @@ def create_app(config_class=Config):
             "get_monthly_credits": get_monthly_credits,
         }
 
+    # Pool de jobs assíncronos de IA
+    from app.services.ai_jobs import ai_job_manager
+
+    ai_job_manager.init_app(app)
+
+    # Pool de renderização de PDF e cache de saída
+    from app.services.pdf_renderer import pdf_render_service
+
+    pdf_render_service.init_app(app)
+
+    # Extração de texto de uploads (cache por hash + pool para PDFs grandes)
+    from app.services.document_text import document_text_service
+
+    document_text_service.init_app(app)
+
+    # Templates Jinja2 dos modelos de petição (sandbox + cache de compilação)
+    from app.services.petition_templates import petition_template_engine
+
+    petition_template_engine.init_app(app)
+
+    # Cliente DataJud (pool de conexões + cache de respostas)
+    from app.services.datajud_service import datajud_client
+
+    datajud_client.init_app(app)
+
+    # Séries de índices do BCB em memória (calculadora jurídica)
+    from app.services.bcb_series import bcb_series_store
+
+    bcb_series_store.init_app(app)
+
+    # Calendário forense (dias úteis, feriados e recesso) para prazos
+    from app.services.business_calendar import business_calendar
+
+    business_calendar.init_app(app)
+
+    # Gravação em lote dos logs de auditoria
+    from app.services.audit_writer import audit_writer
+
+    audit_writer.init_app(app)
+
+    # Workers LibreOffice aquecidos para conversão de documentos Office em PDF
+    from app.services.office_converter import office_converter
+
+    office_converter.init_app(app)
+
+    # Exportações CSV/XLSX em streaming e jobs de exportação
+    from app.services.export_engine import export_service
+
+    export_service.init_app(app)
+
+    # Fila de saída de emails (alertas de prazo e demais envios em lote)
+    from app.services.outbound_email import outbound_email
+
+    outbound_email.init_app(app)
+
+    # Razão de créditos de IA (débitos atômicos, reservas e saldo em cache)
+    from app.services.credit_ledger import credit_ledger
+
+    credit_ledger.init_app(app)
+
+    # Sessão no servidor (só o id no cookie) e cache de blobs da sessão
+    from app.services.session_store import session_store
+
+    session_store.init_app(app)
+
+    # Cache das páginas públicas (landing, sitemap, roadmap) para anônimos
+    from app.services.page_cache import page_cache
+
+    page_cache.init_app(app)
+
     # Registrar comandos CLI
     from app import cli
 
@@ -13,7 +13,6 @@ from app.models import (
     AIGeneration,
     AIGenerationFeedback,
     AuditLog,
-    CreditTransaction,
     Payment,
     PetitionModel,
     PetitionModelSection,
@@ -27,7 +26,6 @@ from app.models import (
     SavedPetition,
     TemplateExample,
     User,
-    UserCredits,
 )
 
 # =============================================================================
@@ -136,20 +134,14 @@ class UserCreditsAdminRepository:
         user_id: int, amount: int, reason: str = "Bônus administrativo"
     ) -> int:
         """Adiciona créditos de IA para um usuário"""
-        user_credits = UserCredits.get_or_create(user_id)
-        new_balance = user_credits.add_credits(amount, source="bonus")
-
-        transaction = CreditTransaction(
-            user_id=user_id,
-            transaction_type="bonus",
-            amount=amount,
-            balance_after=new_balance,
-            description=f"Bônus admin: {reason}",
+        from app.services.credit_ledger import credit_ledger
+
+        transaction = credit_ledger.credit(
+            user_id, amount, "bonus", description=f"Bônus admin: {reason}"
         )
-        db.session.add(transaction)
         db.session.commit()
 
-        return new_balance
+        return transaction.balance_after
 
 
 # =============================================================================
@@ -3,15 +3,15 @@ Rotas de Administração de Usuários
 Dashboard completo para gerenciar usuários e métricas da plataforma.
 """
 
-import csv
 import json
 import logging
 import os
 import traceback
 import zipfile
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-from io import BytesIO, StringIO
+from io import BytesIO
 
 from flask import (
     Response,
@@ -22,6 +22,8 @@ from flask import (
     redirect,
     render_template,
     request,
+    send_file,
+    stream_with_context,
     url_for,
 )
 from flask_login import current_user, login_required
@@ -48,6 +50,9 @@ from app.decorators import master_required, validate_with_schema
 from app.models import (
     AICreditConfig,
     AIGeneration,
+    AnalyticsAIDaily,
+    AnalyticsPetitionDaily,
+    AnalyticsRevenueDaily,
     AuditLog,
     BillingPlan,
     Client,
@@ -77,6 +82,15 @@ from app.schemas import (
     RoadmapCategorySchema,
     RoadmapItemSchema,
 )
+from app.services import admin_analytics, export_engine
+from app.services.ai_cache import completion_cache
+from app.services.audit_writer import audit_writer
+from app.services.export_engine import export_service
+from app.services.office_converter import office_converter
+from app.services.petition_templates import (
+    petition_template_engine,
+    validate_template,
+)
 from app.utils.audit import AuditManager
 
 
@@ -180,25 +194,16 @@ def _get_dashboard_alerts():
     current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
 
-    current_revenue = (
-        db.session.query(func.coalesce(func.sum(Payment.amount), 0))
-        .filter(
-            Payment.paid_at >= current_month_start,
-            Payment.payment_status == "completed",
-        )
-        .scalar()
-        or 0
+    revenue_by_day = admin_analytics.daily_series(
+        AnalyticsRevenueDaily.amount,
+        fact=AnalyticsRevenueDaily,
+        start=last_month_start.date(),
     )
-
-    last_month_revenue = (
-        db.session.query(func.coalesce(func.sum(Payment.amount), 0))
-        .filter(
-            Payment.paid_at >= last_month_start,
-            Payment.paid_at < current_month_start,
-            Payment.payment_status == "completed",
-        )
-        .scalar()
-        or 0
+    current_revenue = admin_analytics.sum_window(
+        revenue_by_day, current_month_start.date(), now.date() + timedelta(days=1)
+    )
+    last_month_revenue = admin_analytics.sum_window(
+        revenue_by_day, last_month_start.date(), current_month_start.date()
     )
 
     if last_month_revenue > 0:
@@ -550,9 +555,6 @@ def dashboard():
     current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
 
-    # Data de 12 meses atrás para as queries agregadas
-    twelve_months_ago = now - timedelta(days=365)
-
     # === DADOS PARA GRÁFICOS - Últimos 12 meses ===
     chart_labels = []
     chart_revenue = []
@@ -568,91 +570,50 @@ def dashboard():
     chart_revenue_by_plan["Avulso"] = []
 
     # Gerar labels dos meses
-    month_ranges = []
+    month_keys = []
     for i in range(11, -1, -1):
         month_date = now - timedelta(days=i * 30)
-        month_start = month_date.replace(
-            day=1, hour=0, minute=0, second=0, microsecond=0
-        )
-        if i > 0:
-            next_month = month_date + timedelta(days=32)
-            month_end = next_month.replace(
-                day=1, hour=0, minute=0, second=0, microsecond=0
-            )
-        else:
-            month_end = now
-        chart_labels.append(month_start.strftime("%b/%y"))
-        month_ranges.append((month_start, month_end))
-
-    # Query agregada: Faturamento por mês
-    revenue_by_month = dict(
-        db.session.query(
-            _date_trunc_month(Payment.paid_at),
-            func.coalesce(func.sum(Payment.amount), 0),
-        )
-        .filter(
-            Payment.paid_at >= twelve_months_ago, Payment.payment_status == "completed"
-        )
-        .group_by(_date_trunc_month(Payment.paid_at))
-        .all()
-    )
+        chart_labels.append(month_date.strftime("%b/%y"))
+        month_keys.append(admin_analytics.month_key(month_date.date()))
 
-    # Query agregada: Uso de IA por mês
-    ai_by_month = dict(
-        db.session.query(
-            _date_trunc_month(AIGeneration.created_at),
-            func.count(AIGeneration.id),
-        )
-        .filter(AIGeneration.created_at >= twelve_months_ago)
-        .group_by(_date_trunc_month(AIGeneration.created_at))
-        .all()
+    # Séries diárias dos fatos de analytics, distribuídas por mês
+    first_month = month_keys[0]
+    revenue_by_day = admin_analytics.daily_series(
+        AnalyticsRevenueDaily.amount, fact=AnalyticsRevenueDaily, start=first_month
     )
-
-    # Query agregada: Custo de IA por mês
-    ai_cost_by_month = dict(
-        db.session.query(
-            _date_trunc_month(AIGeneration.created_at),
-            func.coalesce(func.sum(AIGeneration.cost_usd), 0),
-        )
-        .filter(AIGeneration.created_at >= twelve_months_ago)
-        .group_by(_date_trunc_month(AIGeneration.created_at))
-        .all()
+    ai_by_day = admin_analytics.daily_series(
+        AnalyticsAIDaily.generation_count,
+        AnalyticsAIDaily.cost_usd,
+        AnalyticsAIDaily.credits_purchased,
+        fact=AnalyticsAIDaily,
+        start=first_month,
     )
-
-    # Query agregada: Créditos vendidos por mês
-    credits_by_month = dict(
-        db.session.query(
-            _date_trunc_month(CreditTransaction.created_at),
-            func.coalesce(func.sum(CreditTransaction.amount), 0),
-        )
-        .filter(
-            CreditTransaction.created_at >= twelve_months_ago,
-            CreditTransaction.transaction_type == "purchase",
+    revenue_by_plan_month = admin_analytics.revenue_by_plan_and_month(first_month)
+
+    def _month_total(series, month, index=0):
+        return sum(
+            (
+                values[index]
+                for day, values in series.items()
+                if admin_analytics.month_key(day) == month
+            ),
+            0,
         )
-        .group_by(_date_trunc_month(CreditTransaction.created_at))
-        .all()
-    )
-
-    # Preencher arrays dos gráficos a partir das queries agregadas
-    for month_start, month_end in month_ranges:
-        month_key = month_start.replace(tzinfo=None)
-
-        # Faturamento
-        chart_revenue.append(float(revenue_by_month.get(month_key, 0)))
-
-        # Uso de IA
-        chart_ai_usage.append(int(ai_by_month.get(month_key, 0)))
 
-        # Custo de IA
-        chart_ai_cost.append(float(ai_cost_by_month.get(month_key, 0)))
+    # Preencher arrays dos gráficos
+    for month in month_keys:
+        chart_revenue.append(float(_month_total(revenue_by_day, month)))
+        chart_ai_usage.append(int(_month_total(ai_by_day, month, 0)))
+        chart_ai_cost.append(float(_month_total(ai_by_day, month, 1)))
+        chart_ai_credits_sold.append(int(_month_total(ai_by_day, month, 2)))
 
-        # Créditos vendidos
-        chart_ai_credits_sold.append(int(credits_by_month.get(month_key, 0)))
-
-        # Placeholder para faturamento por plano (simplificado)
         for plan in all_plans:
-            chart_revenue_by_plan[plan.name].append(0)
-        chart_revenue_by_plan["Avulso"].append(0)
+            chart_revenue_by_plan[plan.name].append(
+                float(revenue_by_plan_month.get((plan.id, month), 0))
+            )
+        chart_revenue_by_plan["Avulso"].append(
+            float(revenue_by_plan_month.get((admin_analytics.NO_PLAN, month), 0))
+        )
 
     # === Métricas de Usuários ===
     total_users = User.query.filter(User.user_type != "master").count()
@@ -674,59 +635,50 @@ def dashboard():
         Client.created_at >= current_month_start
     ).count()
 
-    # === Métricas de Petições ===
-    total_petitions = PetitionUsage.query.count()
-    petitions_month = PetitionUsage.query.filter(
-        PetitionUsage.generated_at >= current_month_start
-    ).count()
-    petitions_last_month = PetitionUsage.query.filter(
-        PetitionUsage.generated_at >= last_month_start,
-        PetitionUsage.generated_at < current_month_start,
-    ).count()
+    # === Métricas de Petições, IA e Financeiras (fatos de analytics) ===
+    month_day = current_month_start.date()
+    last_month_day = last_month_start.date()
 
-    # Valor total de petições no mês
-    petitions_value_month = db.session.query(
-        func.coalesce(func.sum(PetitionUsage.amount), 0)
-    ).filter(PetitionUsage.generated_at >= current_month_start).scalar() or Decimal(
-        "0.00"
+    (total_petitions,) = admin_analytics.window_totals(
+        AnalyticsPetitionDaily.petition_count, fact=AnalyticsPetitionDaily
     )
-
-    # === Métricas de IA ===
-    ai_generations_month = AIGeneration.query.filter(
-        AIGeneration.created_at >= current_month_start
-    ).count()
-
-    # Tokens usados no mês
-    tokens_month = (
-        db.session.query(func.coalesce(func.sum(AIGeneration.tokens_total), 0))
-        .filter(AIGeneration.created_at >= current_month_start)
-        .scalar()
-        or 0
+    petitions_by_day = admin_analytics.daily_series(
+        AnalyticsPetitionDaily.petition_count,
+        AnalyticsPetitionDaily.amount,
+        fact=AnalyticsPetitionDaily,
+        start=last_month_day,
+    )
+    tomorrow = now.date() + timedelta(days=1)
+    petitions_month = admin_analytics.sum_window(petitions_by_day, month_day, tomorrow)
+    petitions_last_month = admin_analytics.sum_window(
+        petitions_by_day, last_month_day, month_day
     )
 
-    # Custo de IA no mês (em USD)
-    ai_cost_month = db.session.query(
-        func.coalesce(func.sum(AIGeneration.cost_usd), 0)
-    ).filter(AIGeneration.created_at >= current_month_start).scalar() or Decimal("0.00")
-
-    # Créditos vendidos no mês
-    credits_sold_month = (
-        db.session.query(func.coalesce(func.sum(CreditTransaction.amount), 0))
-        .filter(
-            CreditTransaction.created_at >= current_month_start,
-            CreditTransaction.transaction_type == "purchase",
-        )
-        .scalar()
-        or 0
+    # Valor total de petições no mês
+    petitions_value_month = admin_analytics.sum_window(
+        petitions_by_day, month_day, tomorrow, index=1
+    ) or Decimal("0.00")
+
+    # IA no mês: gerações, tokens, custo (USD) e créditos vendidos
+    (
+        ai_generations_month,
+        tokens_month,
+        ai_cost_month,
+        credits_sold_month,
+    ) = admin_analytics.window_totals(
+        AnalyticsAIDaily.generation_count,
+        AnalyticsAIDaily.tokens_total,
+        AnalyticsAIDaily.cost_usd,
+        AnalyticsAIDaily.credits_purchased,
+        fact=AnalyticsAIDaily,
+        start=month_day,
     )
 
     # === Métricas Financeiras ===
     # Pagamentos do mês
-    payments_month = db.session.query(
-        func.coalesce(func.sum(Payment.amount), 0)
-    ).filter(
-        Payment.paid_at >= current_month_start, Payment.payment_status == "completed"
-    ).scalar() or Decimal("0.00")
+    (payments_month,) = admin_analytics.window_totals(
+        AnalyticsRevenueDaily.amount, fact=AnalyticsRevenueDaily, start=month_day
+    )
 
     # Usuários pagantes (com plano ativo)
     paying_users = (
@@ -736,41 +688,9 @@ def dashboard():
         .count()
     )
 
-    # === Top Usuários (mais petições no mês) ===
-    top_users_petitions = (
-        db.session.query(
-            User.id,
-            User.username,
-            User.full_name,
-            User.email,
-            func.count(PetitionUsage.id).label("petition_count"),
-            func.coalesce(func.sum(PetitionUsage.amount), 0).label("total_value"),
-        )
-        .join(PetitionUsage, User.id == PetitionUsage.user_id)
-        .filter(PetitionUsage.generated_at >= current_month_start)
-        .group_by(User.id, User.username, User.full_name, User.email)
-        .order_by(func.count(PetitionUsage.id).desc())
-        .limit(10)
-        .all()
-    )
-
-    # === Top Usuários (mais uso de IA no mês) ===
-    top_users_ai = (
-        db.session.query(
-            User.id,
-            User.username,
-            User.full_name,
-            func.count(AIGeneration.id).label("generation_count"),
-            func.coalesce(func.sum(AIGeneration.tokens_total), 0).label("total_tokens"),
-            func.coalesce(func.sum(AIGeneration.cost_usd), 0).label("total_cost"),
-        )
-        .join(AIGeneration, User.id == AIGeneration.user_id)
-        .filter(AIGeneration.created_at >= current_month_start)
-        .group_by(User.id, User.username, User.full_name)
-        .order_by(func.sum(AIGeneration.tokens_total).desc())
-        .limit(10)
-        .all()
-    )
+    # === Top Usuários (mais petições / mais uso de IA no mês) ===
+    top_users_petitions = admin_analytics.top_users_by_petitions(month_day)
+    top_users_ai = admin_analytics.top_users_by_ai(month_day)
 
     # === Usuários recentes ===
     recent_users = (
@@ -819,6 +739,7 @@ def dashboard():
         chart_ai_credits_sold=chart_ai_credits_sold,
         # Dashboard ativo
         active_dashboard="overview",
+        analytics_refreshed_at=admin_analytics.refreshed_at(),
     )
 
 
@@ -885,50 +806,11 @@ def dashboard_regional():
         users_query.group_by(User.uf).order_by(func.count(User.id).desc()).all()
     )
 
-    # === PETIÇÕES POR UF ===
-    petitions_query = (
-        db.session.query(
-            User.uf,
-            func.count(PetitionUsage.id).label("petition_count"),
-            func.coalesce(func.sum(PetitionUsage.amount), 0).label("total_value"),
-            func.avg(PetitionUsage.amount).label("avg_value"),
-        )
-        .join(PetitionUsage, User.id == PetitionUsage.user_id)
-        .filter(User.uf.isnot(None), User.uf != "")
-    )
-
-    if start_date:
-        petitions_query = petitions_query.filter(
-            PetitionUsage.generated_at >= start_date
-        )
-
-    petitions_by_uf = (
-        petitions_query.group_by(User.uf)
-        .order_by(func.count(PetitionUsage.id).desc())
-        .all()
-    )
-
-    # === RECEITA POR UF ===
-    revenue_query = (
-        db.session.query(
-            User.uf,
-            func.coalesce(func.sum(Payment.amount), 0).label("total_revenue"),
-            func.count(Payment.id).label("payment_count"),
-        )
-        .join(Payment, User.id == Payment.user_id)
-        .filter(
-            User.uf.isnot(None), User.uf != "", Payment.payment_status == "completed"
-        )
-    )
-
-    if start_date:
-        revenue_query = revenue_query.filter(Payment.paid_at >= start_date)
-
-    revenue_by_uf = (
-        revenue_query.group_by(User.uf)
-        .order_by(func.coalesce(func.sum(Payment.amount), 0).desc())
-        .all()
-    )
+    # === PETIÇÕES E RECEITA POR UF (fatos de analytics) ===
+    filters = admin_analytics.AnalyticsFilters(plan=plan_filter, status=status_filter)
+    start_day = start_date.date() if start_date else None
+    petitions_by_uf = admin_analytics.petitions_by_uf(start_day, filters)
+    revenue_by_uf = admin_analytics.revenue_by_uf(start_day, filters)
 
     # === TOP CIDADES ===
     cities_query = db.session.query(
@@ -1055,127 +937,33 @@ def dashboard_peticoes():
         start_date = now - timedelta(days=30)
         days_range = 30
 
-    # === PETIÇÕES POR TIPO ===
-    petitions_query = db.session.query(
-        PetitionUsage.petition_type,
-        func.count(PetitionUsage.id).label("count"),
-        func.coalesce(func.sum(PetitionUsage.amount), 0).label("total_value"),
-        func.avg(PetitionUsage.amount).label("avg_value"),
-    )
-
-    if start_date:
-        petitions_query = petitions_query.filter(
-            PetitionUsage.generated_at >= start_date
-        )
-
-    # Aplicar filtros de usuário se necessário
-    if plan_filter != "all" or status_filter != "all":
-        petitions_query = petitions_query.join(User, PetitionUsage.user_id == User.id)
-
-        if status_filter == "active":
-            petitions_query = petitions_query.filter(User.is_active.is_(True))
-        elif status_filter == "inactive":
-            petitions_query = petitions_query.filter(User.is_active.is_(False))
-
-        if plan_filter != "all":
-            if plan_filter == "free":
-                petitions_query = petitions_query.filter(~User.user_plans.any())
-            else:
-                petitions_query = (
-                    petitions_query.join(UserPlan)
-                    .join(BillingPlan)
-                    .filter(
-                        BillingPlan.name == plan_filter,
-                        UserPlan.status == "active",
-                        UserPlan.is_current.is_(True),
-                    )
-                )
-
-    petitions_by_type = (
-        petitions_query.group_by(PetitionUsage.petition_type)
-        .order_by(func.count(PetitionUsage.id).desc())
-        .all()
-    )
+    # === PETIÇÕES POR TIPO (fatos de analytics) ===
+    filters = admin_analytics.AnalyticsFilters(plan=plan_filter, status=status_filter)
+    start_day = start_date.date()
+    petitions_by_type = admin_analytics.petitions_by_type(start_day, filters)
 
     # === PETIÇÕES POR DIA ===
+    petitions_by_day = admin_analytics.daily_series(
+        AnalyticsPetitionDaily.petition_count,
+        AnalyticsPetitionDaily.amount,
+        fact=AnalyticsPetitionDaily,
+        start=(now - timedelta(days=days_range - 1)).date(),
+    )
     petitions_daily = []
     for days_back in range(days_range - 1, -1, -1):
-        date = now - timedelta(days=days_back)
-        date_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        date_end = date_start + timedelta(days=1)
-
-        count = PetitionUsage.query.filter(
-            PetitionUsage.generated_at >= date_start,
-            PetitionUsage.generated_at < date_end,
-        ).count()
-
-        value = (
-            db.session.query(func.coalesce(func.sum(PetitionUsage.amount), 0))
-            .filter(
-                PetitionUsage.generated_at >= date_start,
-                PetitionUsage.generated_at < date_end,
-            )
-            .scalar()
-            or 0
-        )
-
+        day = (now - timedelta(days=days_back)).date()
+        count, value = petitions_by_day.get(day, (0, 0))
         petitions_daily.append(
-            {"date": date.strftime("%Y-%m-%d"), "count": count, "value": float(value)}
+            {"date": day.strftime("%Y-%m-%d"), "count": int(count), "value": float(value)}
         )
 
     # === TOP PETIÇÕES POR USUÁRIO ===
-    top_users_query = db.session.query(
-        User.username,
-        User.full_name,
-        User.uf,
-        func.count(PetitionUsage.id).label("petition_count"),
-        func.coalesce(func.sum(PetitionUsage.amount), 0).label("total_value"),
-        func.max(PetitionUsage.generated_at).label("last_petition"),
-    ).join(PetitionUsage, User.id == PetitionUsage.user_id)
-
-    if start_date:
-        top_users_query = top_users_query.filter(
-            PetitionUsage.generated_at >= start_date
-        )
-
-    if status_filter == "active":
-        top_users_query = top_users_query.filter(User.is_active.is_(True))
-    elif status_filter == "inactive":
-        top_users_query = top_users_query.filter(User.is_active.is_(False))
-
-    if plan_filter != "all":
-        if plan_filter == "free":
-            top_users_query = top_users_query.filter(~User.user_plans.any())
-        else:
-            top_users_query = (
-                top_users_query.join(UserPlan)
-                .join(BillingPlan)
-                .filter(
-                    BillingPlan.name == plan_filter,
-                    UserPlan.status == "active",
-                    UserPlan.is_current.is_(True),
-                )
-            )
-
-    top_petition_users = (
-        top_users_query.group_by(User.id, User.username, User.full_name, User.uf)
-        .order_by(func.count(PetitionUsage.id).desc())
-        .limit(20)
-        .all()
+    top_petition_users = admin_analytics.top_users_by_petitions(
+        start_day, filters, limit=20
     )
 
     # === PETIÇÕES POR HORA DO DIA ===
-    petitions_by_hour = []
-    for hour in range(24):
-        hour_query = db.session.query(func.count(PetitionUsage.id)).filter(
-            func.extract("hour", PetitionUsage.generated_at) == hour
-        )
-
-        if start_date:
-            hour_query = hour_query.filter(PetitionUsage.generated_at >= start_date)
-
-        count = hour_query.scalar() or 0
-        petitions_by_hour.append({"hour": hour, "count": count})
+    petitions_by_hour = admin_analytics.petitions_by_hour(start_day)
 
     # === CONVERSÃO DE TRIAL PARA PAGO ===
     trial_conversions = (
@@ -1222,6 +1010,30 @@ def dashboard_peticoes():
     )
 
 
+def _monthly_revenue(now, months_range, filters):
+    """Receita das últimas `months_range` janelas de 30 dias"""
+    first_day = (now - timedelta(days=30 * (months_range - 1))).date()
+    revenue_by_day = admin_analytics.daily_series(
+        AnalyticsRevenueDaily.amount,
+        fact=AnalyticsRevenueDaily,
+        start=first_day,
+        filters=filters,
+    )
+
+    monthly_revenue = []
+    for months_back in range(months_range - 1, -1, -1):
+        start_date = now - timedelta(days=30 * months_back)
+        revenue = admin_analytics.sum_window(
+            revenue_by_day,
+            start_date.date(),
+            (start_date + timedelta(days=30)).date(),
+        )
+        monthly_revenue.append(
+            {"month": start_date.strftime("%Y-%m"), "revenue": float(revenue)}
+        )
+    return monthly_revenue
+
+
 @bp.route("/dashboard/financeiro")
 @login_required
 def dashboard_financeiro():
@@ -1246,145 +1058,20 @@ def dashboard_financeiro():
     else:
         months_range = 12
 
-    # === RECEITA POR MÊS ===
-    monthly_revenue = []
-    for months_back in range(months_range - 1, -1, -1):
-        start_date = now - timedelta(days=30 * months_back)
-        end_date = start_date + timedelta(days=30)
-
-        revenue_query = db.session.query(
-            func.coalesce(func.sum(Payment.amount), 0)
-        ).filter(
-            Payment.paid_at >= start_date,
-            Payment.paid_at < end_date,
-            Payment.payment_status == "completed",
-        )
+    filters = admin_analytics.AnalyticsFilters(plan=plan_filter, status=status_filter)
+    period_start = (now - timedelta(days=30 * months_range)).date()
 
-        # Aplicar filtros
-        if plan_filter != "all":
-            revenue_query = revenue_query.join(BillingPlan).filter(
-                BillingPlan.name == plan_filter
-            )
-
-        if status_filter != "all":
-            revenue_query = revenue_query.join(User).filter(
-                User.is_active.is_(True)
-                if status_filter == "active"
-                else User.is_active.is_(False)
-            )
-
-        revenue = revenue_query.scalar() or 0
-
-        monthly_revenue.append(
-            {"month": start_date.strftime("%Y-%m"), "revenue": float(revenue)}
-        )
+    # === RECEITA POR MÊS (janelas de 30 dias, fatos de analytics) ===
+    monthly_revenue = _monthly_revenue(now, months_range, filters)
 
     # === RECEITA POR PLANO ===
-    revenue_plan_query = (
-        db.session.query(
-            BillingPlan.name,
-            func.coalesce(func.sum(PetitionUsage.amount), 0).label("total_revenue"),
-            func.count(PetitionUsage.id).label("subscription_count"),
-        )
-        .join(PetitionUsage, BillingPlan.id == PetitionUsage.plan_id)
-        .filter(PetitionUsage.billable.is_(True))
-    )
-
-    if period != "all":
-        start_date_filter = now - timedelta(days=30 * months_range)
-        revenue_plan_query = revenue_plan_query.filter(
-            PetitionUsage.generated_at >= start_date_filter
-        )
-
-    if status_filter != "all":
-        revenue_plan_query = revenue_plan_query.join(
-            User, PetitionUsage.user_id == User.id
-        ).filter(
-            User.is_active.is_(True)
-            if status_filter == "active"
-            else User.is_active.is_(False)
-        )
-
-    revenue_by_plan = (
-        revenue_plan_query.group_by(BillingPlan.id, BillingPlan.name)
-        .order_by(func.coalesce(func.sum(PetitionUsage.amount), 0).desc())
-        .all()
-    )
+    revenue_by_plan = admin_analytics.petition_revenue_by_plan(period_start, filters)
 
     # === CHURN RATE ===
-    churn_data = []
-    for months_back in range(months_range - 1, -1, -1):
-        start_date = now - timedelta(days=30 * months_back)
-        end_date = start_date + timedelta(days=30)
-
-        # Usuários que cancelaram no mês
-        churn_query = UserPlan.query.filter(
-            UserPlan.renewal_date >= start_date,
-            UserPlan.renewal_date < end_date,
-            UserPlan.status == "canceled",
-        )
-
-        if plan_filter != "all":
-            churn_query = churn_query.join(BillingPlan).filter(
-                BillingPlan.name == plan_filter
-            )
-
-        churned = churn_query.count()
-
-        # Usuários ativos no início do mês
-        active_query = UserPlan.query.filter(
-            UserPlan.started_at < start_date,
-            db.or_(
-                UserPlan.renewal_date.is_(None), UserPlan.renewal_date >= start_date
-            ),
-            UserPlan.status.in_(["active", "canceled"]),
-        )
-
-        if plan_filter != "all":
-            active_query = active_query.join(BillingPlan).filter(
-                BillingPlan.name == plan_filter
-            )
-
-        active_start = active_query.count()
-
-        churn_rate = (churned / active_start * 100) if active_start > 0 else 0
-
-        churn_data.append(
-            {
-                "month": start_date.strftime("%Y-%m"),
-                "churned": churned,
-                "active_start": active_start,
-                "churn_rate": round(churn_rate, 2),
-            }
-        )
+    churn_data = admin_analytics.churn_series(now, months_range, filters)
 
     # === LTV (Lifetime Value) ===
-    ltv_query = db.session.query(
-        func.avg(Payment.amount).label("avg_payment"),
-        func.count(Payment.id).label("total_payments"),
-        func.count(Payment.user_id.distinct()).label("unique_users"),
-    ).filter(Payment.payment_status == "completed")
-
-    if period != "all":
-        start_date_filter = now - timedelta(days=30 * months_range)
-        ltv_query = ltv_query.filter(Payment.paid_at >= start_date_filter)
-
-    if plan_filter != "all":
-        ltv_query = (
-            ltv_query.join(User, Payment.user_id == User.id)
-            .join(UserPlan, User.id == UserPlan.user_id)
-            .join(BillingPlan, UserPlan.plan_id == BillingPlan.id)
-            .filter(BillingPlan.name == plan_filter)
-        )
-
-    if status_filter != "all":
-        ltv_query = ltv_query.join(User).filter(
-            User.is_active.is_(True)
-            if status_filter == "active"
-            else User.is_active.is_(False)
-        )
-
-    ltv_data = ltv_query.first()
+    ltv_data = admin_analytics.lifetime_value(period_start, filters)
 
     # === RECEITA RECORRENTE MENSAL (MRR) ===
     mrr_query = (
@@ -1446,9 +1133,14 @@ def dashboard_financeiro_alt():
 @bp.route("/dashboard/regional/export")
 @login_required
 def export_dashboard_regional():
-    """Exporta dados do dashboard regional em CSV"""
+    """Exporta dados do dashboard regional em CSV (ou XLSX com ?format=xlsx)"""
     _require_admin()
 
+    try:
+        fmt = export_engine.parse_format(request.args.get("format"))
+    except export_engine.ExportError as e:
+        return jsonify({"error": str(e)}), 400
+
     # Parâmetros de filtro
     period = request.args.get("period", "30days", type=str)
     plan_filter = request.args.get("plan", "all", type=str)
@@ -1471,72 +1163,86 @@ def export_dashboard_regional():
 
     start_date = now - timedelta(days=days)
 
-    # Query para dados regionais
-    query = (
-        db.session.query(
-            User.state,
-            func.count(User.id).label("user_count"),
-            func.count(Client.id).label("client_count"),
-            func.count(PetitionUsage.id).label("petition_count"),
-            func.coalesce(func.sum(Payment.amount), 0).label("revenue"),
-        )
-        .outerjoin(Client, User.id == Client.lawyer_id)
-        .outerjoin(PetitionUsage, User.id == PetitionUsage.user_id)
-        .outerjoin(Payment, User.id == Payment.user_id)
-        .filter(User.created_at >= start_date, User.user_type != "master")
-    )
-
-    # Aplicar filtros
-    if plan_filter != "all":
-        query = (
-            query.join(UserPlan)
-            .join(BillingPlan)
-            .filter(BillingPlan.name == plan_filter)
-        )
+    filters = admin_analytics.AnalyticsFilters(plan=plan_filter, status=status_filter)
+    start_day = start_date.date()
 
+    # Cada métrica é agregada separadamente por UF e só então combinada:
+    # juntar clientes, petições e pagamentos no mesmo JOIN multiplicaria as
+    # linhas e inflaria contagens e somas
+    users_query = db.session.query(User.uf, func.count(User.id)).filter(
+        User.created_at >= start_date, User.user_type != "master"
+    )
+    if status_filter != "all":
+        users_query = users_query.filter(User.is_active.is_(status_filter == "active"))
+    if plan_filter == "free":
+        users_query = users_query.filter(~User.user_plans.any())
+    elif plan_filter != "all":
+        users_query = (
+            users_query.join(UserPlan, UserPlan.user_id == User.id)
+            .join(BillingPlan, BillingPlan.id == UserPlan.plan_id)
+            .filter(BillingPlan.name == plan_filter, UserPlan.is_current.is_(True))
+        )
+    users_by_uf = dict(users_query.group_by(User.uf).all())
+
+    clients_query = (
+        db.session.query(User.uf, func.count(Client.id))
+        .join(User, User.id == Client.lawyer_id)
+        .filter(Client.created_at >= start_date)
+    )
     if status_filter != "all":
-        query = query.filter(
-            User.is_active.is_(True)
-            if status_filter == "active"
-            else User.is_active.is_(False)
+        clients_query = clients_query.filter(
+            User.is_active.is_(status_filter == "active")
         )
+    clients_by_uf = dict(clients_query.group_by(User.uf).all())
 
-    regional_data = (
-        query.group_by(User.state).order_by(func.count(User.id).desc()).all()
-    )
+    petitions_by_uf = {
+        row.uf: row.petition_count
+        for row in admin_analytics.petitions_by_uf(start_day, filters)
+    }
+    revenue_by_uf = {
+        row.uf: row.total_revenue
+        for row in admin_analytics.revenue_by_uf(start_day, filters)
+    }
 
-    # Criar CSV
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Estado", "Usuários", "Clientes", "Petições", "Receita (R$)"])
+    def _uf(value):
+        return (value or "").strip().upper()[:2]
 
-    for row in regional_data:
-        writer.writerow(
-            [
-                row.state or "Não informado",
-                row.user_count,
-                row.client_count,
-                row.petition_count,
-                f"{row.revenue:.2f}",
-            ]
-        )
+    regional_data = defaultdict(lambda: [0, 0, 0, Decimal("0.00")])
+    for uf, count in users_by_uf.items():
+        regional_data[_uf(uf)][0] += count
+    for uf, count in clients_by_uf.items():
+        regional_data[_uf(uf)][1] += count
+    for uf, count in petitions_by_uf.items():
+        regional_data[uf][2] += int(count)
+    for uf, revenue in revenue_by_uf.items():
+        regional_data[uf][3] += Decimal(str(revenue))
 
-    output.seek(0)
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={
-            "Content-Disposition": f"attachment; filename=dashboard_regional_{period}.csv"
-        },
+    rows = (
+        [uf or "Não informado", users, clients, petitions, f"{revenue:.2f}"]
+        for uf, (users, clients, petitions, revenue) in sorted(
+            regional_data.items(), key=lambda item: item[1][0], reverse=True
+        )
+    )
+    return export_engine.stream_response(
+        fmt,
+        f"dashboard_regional_{period}",
+        ["Estado", "Usuários", "Clientes", "Petições", "Receita (R$)"],
+        rows,
+        sheet_title="Regional",
     )
 
 
 @bp.route("/dashboard/peticoes/export")
 @login_required
 def export_dashboard_peticoes():
-    """Exporta dados do dashboard de petições em CSV"""
+    """Exporta dados do dashboard de petições em CSV (ou XLSX com ?format=xlsx)"""
     _require_admin()
 
+    try:
+        fmt = export_engine.parse_format(request.args.get("format"))
+    except export_engine.ExportError as e:
+        return jsonify({"error": str(e)}), 400
+
     # Parâmetros de filtro
     period = request.args.get("period", "30days", type=str)
     plan_filter = request.args.get("plan", "all", type=str)
@@ -1559,69 +1265,45 @@ def export_dashboard_peticoes():
 
     start_date = now - timedelta(days=days)
 
-    # Query para dados de petições
-    query = db.session.query(
-        PetitionUsage.petition_type,
-        func.count(PetitionUsage.id).label("usage_count"),
-        func.count(PetitionUsage.user_id.distinct()).label("unique_users"),
-        func.avg(PetitionUsage.credits_used).label("avg_credits"),
-    ).filter(PetitionUsage.created_at >= start_date)
-
-    # Aplicar filtros
-    if plan_filter != "all":
-        query = (
-            query.join(User)
-            .join(UserPlan)
-            .join(BillingPlan)
-            .filter(BillingPlan.name == plan_filter)
-        )
-
-    if status_filter != "all":
-        query = query.join(User).filter(
-            User.is_active.is_(True)
-            if status_filter == "active"
-            else User.is_active.is_(False)
-        )
-
-    petition_data = (
-        query.group_by(PetitionUsage.petition_type)
-        .order_by(func.count(PetitionUsage.id).desc())
-        .all()
+    # Petições por tipo (fatos de analytics)
+    petition_data = admin_analytics.petitions_by_type(
+        start_date.date(),
+        admin_analytics.AnalyticsFilters(plan=plan_filter, status=status_filter),
     )
 
-    # Criar CSV
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(
-        ["Tipo de Petição", "Uso Total", "Usuários Únicos", "Créditos Médios"]
+    rows = (
+        [
+            row.petition_type or "Não especificado",
+            row.count,
+            row.unique_users,
+            f"{row.avg_value:.2f}" if row.avg_value else "0.00",
+        ]
+        for row in petition_data
     )
-
-    for row in petition_data:
-        writer.writerow(
-            [
-                row.petition_type,
-                row.usage_count,
-                row.unique_users,
-                f"{row.avg_credits:.2f}" if row.avg_credits else "0.00",
-            ]
-        )
-
-    output.seek(0)
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={
-            "Content-Disposition": f"attachment; filename=dashboard_peticoes_{period}.csv"
-        },
+    return export_engine.stream_response(
+        fmt,
+        f"dashboard_peticoes_{period}",
+        ["Tipo de Petição", "Uso Total", "Usuários Únicos", "Valor Médio (R$)"],
+        rows,
+        sheet_title="Petições",
     )
 
 
 @bp.route("/dashboard/financeiro/export")
 @login_required
 def export_dashboard_financeiro():
-    """Exporta dados do dashboard financeiro em CSV"""
+    """
+    Exporta dados do dashboard financeiro.
+
+    CSV (padrão): ZIP com um CSV por tabela; XLSX: uma aba por tabela.
+    """
     _require_admin()
 
+    try:
+        fmt = export_engine.parse_format(request.args.get("format"))
+    except export_engine.ExportError as e:
+        return jsonify({"error": str(e)}), 400
+
     # Parâmetros de filtro
     period = request.args.get("period", "12months", type=str)
     plan_filter = request.args.get("plan", "all", type=str)
@@ -1638,191 +1320,243 @@ def export_dashboard_financeiro():
     else:
         months_range = 12
 
-    # Receita mensal
-    monthly_revenue = []
-    for months_back in range(months_range - 1, -1, -1):
-        start_date = now - timedelta(days=30 * months_back)
-        end_date = start_date + timedelta(days=30)
-
-        revenue_query = db.session.query(
-            func.coalesce(func.sum(Payment.amount), 0)
-        ).filter(
-            Payment.paid_at >= start_date,
-            Payment.paid_at < end_date,
-            Payment.payment_status == "completed",
-        )
-
-        # Aplicar filtros
-        if plan_filter != "all":
-            revenue_query = revenue_query.join(BillingPlan).filter(
-                BillingPlan.name == plan_filter
-            )
+    filters = admin_analytics.AnalyticsFilters(plan=plan_filter, status=status_filter)
+    period_start = (now - timedelta(days=30 * months_range)).date()
 
-        if status_filter != "all":
-            revenue_query = revenue_query.join(User).filter(
-                User.is_active.is_(True)
-                if status_filter == "active"
-                else User.is_active.is_(False)
-            )
+    # Mesmos números do dashboard financeiro
+    monthly_revenue = _monthly_revenue(now, months_range, filters)
+    revenue_by_plan = admin_analytics.petition_revenue_by_plan(period_start, filters)
+    churn_data = admin_analytics.churn_series(now, months_range, filters)
 
-        revenue = revenue_query.scalar() or 0
+    sheets = [
+        (
+            "receita_mensal",
+            ["Mês", "Receita (R$)"],
+            [[item["month"], f"{item['revenue']:.2f}"] for item in monthly_revenue],
+        ),
+        (
+            "receita_por_plano",
+            ["Plano", "Receita Total (R$)", "Assinaturas"],
+            [
+                [row.name, f"{row.total_revenue:.2f}", row.subscription_count]
+                for row in revenue_by_plan
+            ],
+        ),
+        (
+            "churn_rate",
+            ["Mês", "Cancelamentos", "Ativos Início", "Taxa Churn (%)"],
+            [
+                [
+                    item["month"],
+                    item["churned"],
+                    item["active_start"],
+                    f"{item['churn_rate']:.2f}",
+                ]
+                for item in churn_data
+            ],
+        ),
+    ]
 
-        monthly_revenue.append(
-            {"month": start_date.strftime("%Y-%m"), "revenue": float(revenue)}
+    if fmt == "xlsx":
+        return Response(
+            stream_with_context(export_engine.xlsx_chunks(sheets)),
+            mimetype=export_engine.MIMETYPES["xlsx"],
+            headers={
+                "Content-Disposition": f"attachment; filename=dashboard_financeiro_{period}.xlsx"
+            },
         )
 
-    # Receita por plano
-    revenue_plan_query = (
-        db.session.query(
-            BillingPlan.name,
-            func.coalesce(func.sum(Payment.amount), 0).label("total_revenue"),
-            func.count(Payment.id).label("subscription_count"),
-        )
-        .join(Payment, BillingPlan.id == Payment.plan_id)
-        .filter(Payment.payment_status == "completed")
+    # CSV com múltiplas abas (usando ZIP)
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for name, header, rows in sheets:
+            zip_file.writestr(
+                f"{name}.csv", b"".join(export_engine.csv_chunks(header, rows))
+            )
+
+    zip_buffer.seek(0)
+    return Response(
+        zip_buffer.getvalue(),
+        mimetype="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename=dashboard_financeiro_{period}.zip"
+        },
     )
 
-    if period != "all":
-        start_date_filter = now - timedelta(days=30 * months_range)
-        revenue_plan_query = revenue_plan_query.filter(
-            Payment.paid_at >= start_date_filter
-        )
 
-    if status_filter != "all":
-        revenue_plan_query = revenue_plan_query.join(
-            User, Payment.user_id == User.id
-        ).filter(
-            User.is_active.is_(True)
-            if status_filter == "active"
-            else User.is_active.is_(False)
-        )
+USER_EXPORT_HEADER = (
+    "ID",
+    "Usuário",
+    "Email",
+    "Nome",
+    "OAB",
+    "Tipo",
+    "Ativo",
+    "Status Cobrança",
+    "Cadastro",
+    "Plano",
+    "Dias na Plataforma",
+    "Dias Pagante",
+    "Clientes",
+    "Petições",
+    "Petições no Mês",
+    "Valor Petições (R$)",
+    "Saldo Créditos IA",
+    "Gerações IA",
+    "Custo IA (US$)",
+    "Total Pago (R$)",
+)
 
-    revenue_by_plan = (
-        revenue_plan_query.group_by(BillingPlan.id, BillingPlan.name)
-        .order_by(func.coalesce(func.sum(Payment.amount), 0).desc())
-        .all()
-    )
 
-    # Churn rate
-    churn_data = []
-    for months_back in range(months_range - 1, -1, -1):
-        start_date = now - timedelta(days=30 * months_back)
-        end_date = start_date + timedelta(days=30)
+def _iter_users_with_metrics(batch_size=500):
+    """Usuários (exceto master) com métricas calculadas em lote"""
+    query = User.query.filter(User.user_type != "master").order_by(User.id)
+    for users in export_engine.batched(export_engine.iter_query(query), batch_size):
+        yield from _get_bulk_user_metrics(users)
 
-        churn_query = UserPlan.query.filter(
-            UserPlan.canceled_at >= start_date,
-            UserPlan.canceled_at < end_date,
-            UserPlan.status == "canceled",
-        )
 
-        if plan_filter != "all":
-            churn_query = churn_query.join(BillingPlan).filter(
-                BillingPlan.name == plan_filter
-            )
+def _count_export_users(params):
+    return User.query.filter(User.user_type != "master").count()
 
-        churned = churn_query.count()
 
-        active_query = UserPlan.query.filter(
-            UserPlan.created_at < start_date,
-            db.or_(UserPlan.canceled_at.is_(None), UserPlan.canceled_at >= start_date),
-            UserPlan.status.in_(["active", "canceled"]),
-        )
+@export_service.register(
+    "users", USER_EXPORT_HEADER, count=_count_export_users, sheet_title="Usuários"
+)
+def _user_export_rows(params):
+    for item in _iter_users_with_metrics():
+        user, metrics = item["user"], item["metrics"]
+        yield [
+            user.id,
+            user.username,
+            user.email,
+            user.full_name or "",
+            user.oab_number or "",
+            user.user_type,
+            "Sim" if user.is_active else "Não",
+            user.billing_status or "",
+            user.created_at.strftime("%Y-%m-%d %H:%M:%S") if user.created_at else "",
+            metrics["plan_name"],
+            metrics["days_on_platform"],
+            metrics["days_paying"],
+            metrics["total_clients"],
+            metrics["total_petitions"],
+            metrics["petitions_month"],
+            f"{metrics['petitions_value_total']:.2f}",
+            metrics["ai_credits_balance"],
+            metrics["ai_generations_total"],
+            f"{metrics['ai_cost_month']:.4f}",
+            f"{metrics['total_paid']:.2f}",
+        ]
 
-        if plan_filter != "all":
-            active_query = active_query.join(BillingPlan).filter(
-                BillingPlan.name == plan_filter
-            )
 
-        active_start = active_query.count()
+def _user_export_json(user, metrics):
+    """Formato histórico do export JSON (chaves de _get_user_metrics)"""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "full_name": user.full_name,
+        "oab_number": user.oab_number,
+        "user_type": user.user_type,
+        "is_active": user.is_active,
+        "billing_status": user.billing_status,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "metrics": {
+            "days_on_platform": metrics["days_on_platform"],
+            "days_paying": metrics["days_paying"],
+            "plan_name": metrics["plan_name"],
+            "clients_count": metrics["total_clients"],
+            "clients_month": metrics["clients_month"],
+            "petitions_total": metrics["total_petitions"],
+            "petitions_month": metrics["petitions_month"],
+            "petitions_value": metrics["petitions_value_total"],
+            "petitions_value_month": metrics["petitions_value_month"],
+            "ai_credits_balance": metrics["ai_credits_balance"],
+            "ai_credits_used": metrics["ai_credits_total_used"],
+            "ai_generations_total": metrics["ai_generations_total"],
+            "ai_generations_month": metrics["ai_generations_month"],
+            "ai_tokens_total": metrics["ai_tokens_month"],
+            "ai_cost_total": metrics["ai_cost_month"],
+            "total_paid": metrics["total_paid"],
+        },
+    }
 
-        churn_rate = (churned / active_start * 100) if active_start > 0 else 0
 
-        churn_data.append(
-            {
-                "month": start_date.strftime("%Y-%m"),
-                "churned": churned,
-                "active_start": active_start,
-                "churn_rate": round(churn_rate, 2),
-            }
-        )
+def _users_json_chunks():
+    yield "["
+    for index, item in enumerate(_iter_users_with_metrics()):
+        data = _user_export_json(item["user"], item["metrics"])
+        yield ("," if index else "") + json.dumps(data, default=str)
+    yield "]"
 
-    # Criar CSV com múltiplas abas (usando ZIP)
-    import zipfile
-    from io import BytesIO
 
-    zip_buffer = BytesIO()
+@bp.route("/api/users/export")
+@login_required
+def export_users():
+    """
+    Exporta lista de usuários com métricas.
 
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        # Receita mensal
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["Mês", "Receita (R$)"])
-        for item in monthly_revenue:
-            writer.writerow([item["month"], f"{item['revenue']:.2f}"])
-        zip_file.writestr("receita_mensal.csv", output.getvalue())
-
-        # Receita por plano
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["Plano", "Receita Total (R$)", "Assinaturas"])
-        for row in revenue_by_plan:
-            writer.writerow(
-                [row.name, f"{row.total_revenue:.2f}", row.subscription_count]
-            )
-        zip_file.writestr("receita_por_plano.csv", output.getvalue())
-
-        # Churn rate
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["Mês", "Cancelamentos", "Ativos Início", "Taxa Churn (%)"])
-        for item in churn_data:
-            writer.writerow(
-                [
-                    item["month"],
-                    item["churned"],
-                    item["active_start"],
-                    f"{item['churn_rate']:.2f}",
-                ]
-            )
-        zip_file.writestr("churn_rate.csv", output.getvalue())
+    ?format=json (padrão), csv ou xlsx; ?async=1 gera o arquivo em background.
+    """
+    _require_admin()
 
-    zip_buffer.seek(0)
-    return Response(
-        zip_buffer.getvalue(),
-        mimetype="application/zip",
-        headers={
-            "Content-Disposition": f"attachment; filename=dashboard_financeiro_{period}.zip"
-        },
+    fmt = request.args.get("format", "json", type=str).lower()
+    if fmt == "json":
+        return Response(
+            stream_with_context(_users_json_chunks()), mimetype="application/json"
+        )
+
+    try:
+        fmt = export_engine.parse_format(fmt)
+    except export_engine.ExportError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return export_service.respond(
+        "users",
+        fmt,
+        f"usuarios_{datetime.now(timezone.utc):%Y%m%d}",
+        current_user.id,
+        run_async=request.args.get("async", type=int) == 1,
     )
 
 
-@bp.route("/api/users/export")
+@bp.route("/exports/<job_id>")
 @login_required
-def export_users():
-    """Exporta lista de usuários em JSON"""
-    _require_admin()
+def export_job_status(job_id):
+    """Status de uma exportação em background"""
+    # Também atende as exportações da LGPD, liberadas a is_admin()
+    if not current_user.is_admin():
+        abort(403)
 
-    users = User.query.filter(User.user_type != "master").all()
+    job = export_service.get(job_id, current_user.id)
+    if not job:
+        return jsonify({"error": "Exportação não encontrada"}), 404
+    return jsonify(export_engine.public_job(job))
 
-    data = []
-    for user in users:
-        metrics = _get_user_metrics(user)
-        data.append(
-            {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "full_name": user.full_name,
-                "oab_number": user.oab_number,
-                "user_type": user.user_type,
-                "is_active": user.is_active,
-                "billing_status": user.billing_status,
-                "created_at": user.created_at.isoformat() if user.created_at else None,
-                "metrics": metrics,
-            }
-        )
 
-    return jsonify(data)
+@bp.route("/exports/<job_id>/download")
+@login_required
+def export_job_download(job_id):
+    """Baixa o arquivo de uma exportação concluída"""
+    if not current_user.is_admin():
+        abort(403)
+
+    job = export_service.get(job_id, current_user.id)
+    if not job:
+        return jsonify({"error": "Exportação não encontrada"}), 404
+    if job["status"] != "completed":
+        return jsonify({"error": "Exportação ainda não está pronta"}), 409
+
+    path = export_service.output_path(job)
+    if path is None:
+        return jsonify({"error": "Exportação expirada, gere novamente"}), 410
+
+    return send_file(
+        path,
+        mimetype=export_engine.MIMETYPES[job["format"]],
+        as_attachment=True,
+        download_name=job["filename"],
+    )
 
 
 def _get_bulk_user_metrics(users):
@@ -1845,6 +1579,16 @@ def _get_bulk_user_metrics(users):
         .all()
     )
 
+    clients_month = dict(
+        db.session.query(Client.lawyer_id, func.count(Client.id))
+        .filter(
+            Client.lawyer_id.in_(user_ids),
+            Client.created_at >= current_month_start,
+        )
+        .group_by(Client.lawyer_id)
+        .all()
+    )
+
     # 2. Petições totais e mensais
     petitions_total = dict(
         db.session.query(PetitionUsage.user_id, func.count(PetitionUsage.id))
@@ -1989,6 +1733,7 @@ def _get_bulk_user_metrics(users):
             "days_paying": first_payments.get(uid, 0),
             "plan_name": current_plans.get(uid, "Sem plano"),
             "total_clients": clients_count.get(uid, 0),
+            "clients_month": clients_month.get(uid, 0),
             "total_petitions": petitions_total.get(uid, 0),
             "petitions_month": petitions_month.get(uid, 0),
             "petitions_value_total": float(petitions_value.get(uid, Decimal("0.00"))),
@@ -2969,24 +2714,21 @@ def _calculate_trends():
     now = datetime.now(timezone.utc)
     trends = {}
 
-    # === Tendência de Receita ===
-    revenue_trend = []
+    # Janelas de 30 dias: as duas anteriores e a atual
+    windows = []
     for months_back in range(2, -1, -1):
         start_date = now - timedelta(days=30 * months_back)
-        end_date = start_date + timedelta(days=30)
-
-        revenue = (
-            db.session.query(func.coalesce(func.sum(Payment.amount), 0))
-            .filter(
-                Payment.paid_at >= start_date,
-                Payment.paid_at < end_date,
-                Payment.payment_status == "completed",
-            )
-            .scalar()
-            or 0
-        )
+        windows.append((start_date, start_date + timedelta(days=30)))
+    first_day = windows[0][0].date()
 
-        revenue_trend.append(float(revenue))
+    # === Tendência de Receita ===
+    revenue_by_day = admin_analytics.daily_series(
+        AnalyticsRevenueDaily.amount, fact=AnalyticsRevenueDaily, start=first_day
+    )
+    revenue_trend = [
+        float(admin_analytics.sum_window(revenue_by_day, start.date(), end.date()))
+        for start, end in windows
+    ]
 
     if len(revenue_trend) >= 2:
         revenue_change = (
@@ -3014,10 +2756,7 @@ def _calculate_trends():
 
     # === Tendência de Novos Usuários ===
     users_trend = []
-    for months_back in range(2, -1, -1):
-        start_date = now - timedelta(days=30 * months_back)
-        end_date = start_date + timedelta(days=30)
-
+    for start_date, end_date in windows:
         user_count = User.query.filter(
             User.created_at >= start_date,
             User.created_at < end_date,
@@ -3051,17 +2790,15 @@ def _calculate_trends():
         }
 
     # === Tendência de Petições ===
-    petitions_trend = []
-    for months_back in range(2, -1, -1):
-        start_date = now - timedelta(days=30 * months_back)
-        end_date = start_date + timedelta(days=30)
-
-        petition_count = PetitionUsage.query.filter(
-            PetitionUsage.generated_at >= start_date,
-            PetitionUsage.generated_at < end_date,
-        ).count()
-
-        petitions_trend.append(petition_count)
+    petitions_by_day = admin_analytics.daily_series(
+        AnalyticsPetitionDaily.petition_count,
+        fact=AnalyticsPetitionDaily,
+        start=first_day,
+    )
+    petitions_trend = [
+        int(admin_analytics.sum_window(petitions_by_day, start.date(), end.date()))
+        for start, end in windows
+    ]
 
     if len(petitions_trend) >= 2:
         petitions_change = (
@@ -3889,74 +3626,91 @@ def roadmap_feedback_toggle_featured(feedback_id):
     return redirect(url_for("admin.roadmap_feedback_detail", feedback_id=feedback_id))
 
 
-@bp.route("/roadmap/feedback/export")
-@login_required
-def roadmap_feedback_export():
-    """Exporta feedback para CSV"""
-    _require_admin()
+ROADMAP_FEEDBACK_EXPORT_HEADER = (
+    "ID",
+    "Data",
+    "Usuário",
+    "Item do Roadmap",
+    "Categoria",
+    "Avaliação",
+    "Título",
+    "Comentário",
+    "Pontos Positivos",
+    "Pontos de Melhoria",
+    "Sugestões",
+    "Frequência de Uso",
+    "Facilidade de Uso",
+    "Status",
+    "Resposta Admin",
+    "Anônimo",
+    "Destacado",
+)
 
-    # Query com joins para incluir informações relacionadas
-    feedback_query = (
-        RoadmapFeedback.query.join(RoadmapItem).join(RoadmapCategory).join(User).all()
+
+def _roadmap_feedback_export_query():
+    from sqlalchemy.orm import contains_eager
+
+    # Item, categoria e autor vêm no mesmo SELECT (sem lazy load por linha)
+    return (
+        RoadmapFeedback.query.join(RoadmapFeedback.roadmap_item)
+        .join(RoadmapItem.category)
+        .join(RoadmapFeedback.user)
+        .options(
+            contains_eager(RoadmapFeedback.roadmap_item).contains_eager(
+                RoadmapItem.category
+            ),
+            contains_eager(RoadmapFeedback.user),
+        )
+        .order_by(RoadmapFeedback.id)
     )
 
-    # Criar CSV
-    output = StringIO()
-    writer = csv.writer(output)
 
-    # Cabeçalhos
-    writer.writerow(
-        [
-            "ID",
-            "Data",
-            "Usuário",
-            "Item do Roadmap",
-            "Categoria",
-            "Avaliação",
-            "Título",
-            "Comentário",
-            "Pontos Positivos",
-            "Pontos de Melhoria",
-            "Sugestões",
-            "Frequência de Uso",
-            "Facilidade de Uso",
-            "Status",
-            "Resposta Admin",
-            "Anônimo",
-            "Destacado",
+@export_service.register(
+    "roadmap_feedback",
+    ROADMAP_FEEDBACK_EXPORT_HEADER,
+    count=lambda params: _roadmap_feedback_export_query().count(),
+    sheet_title="Feedback",
+)
+def _roadmap_feedback_export_rows(params):
+    for fb in export_engine.iter_query(_roadmap_feedback_export_query()):
+        yield [
+            fb.id,
+            fb.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            fb.user.full_name if not fb.is_anonymous and fb.user else "Anônimo",
+            fb.roadmap_item.title,
+            fb.roadmap_item.category.name,
+            fb.rating,
+            fb.title or "",
+            fb.comment or "",
+            fb.pros or "",
+            fb.cons or "",
+            fb.suggestions or "",
+            fb.get_usage_frequency_display(),
+            fb.get_ease_of_use_display(),
+            fb.get_status_display()[0],
+            fb.admin_response or "",
+            "Sim" if fb.is_anonymous else "Não",
+            "Sim" if fb.is_featured else "Não",
         ]
-    )
 
-    # Dados
-    for fb in feedback_query:
-        writer.writerow(
-            [
-                fb.id,
-                fb.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                fb.user.full_name if not fb.is_anonymous and fb.user else "Anônimo",
-                fb.roadmap_item.title,
-                fb.roadmap_item.category.name,
-                fb.rating,
-                fb.title or "",
-                fb.comment or "",
-                fb.pros or "",
-                fb.cons or "",
-                fb.suggestions or "",
-                fb.get_usage_frequency_display(),
-                fb.get_ease_of_use_display(),
-                fb.get_status_display()[0],
-                fb.admin_response or "",
-                "Sim" if fb.is_anonymous else "Não",
-                "Sim" if fb.is_featured else "Não",
-            ]
-        )
 
-    # Retornar arquivo CSV
-    output.seek(0)
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-Disposition": "attachment;filename=roadmap_feedback.csv"},
+@bp.route("/roadmap/feedback/export")
+@login_required
+def roadmap_feedback_export():
+    """Exporta feedback em CSV (ou XLSX com ?format=xlsx)"""
+    _require_admin()
+
+    try:
+        fmt = export_engine.parse_format(request.args.get("format"))
+    except export_engine.ExportError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return export_service.respond(
+        "roadmap_feedback",
+        fmt,
+        "roadmap_feedback",
+        current_user.id,
+        run_async=request.args.get("async", type=int) == 1,
     )
 
 
@@ -4174,6 +3928,7 @@ def petition_model_edit(model_id):
                 PetitionModelAdminRepository.add_sections(petition_model, section_ids)
 
             AdminSessionManager.commit()
+            petition_template_engine.invalidate("petition_model", model_id)
             current_app.logger.info(f"Commit successful for model {model_id}")
             flash("Modelo de petição atualizado com sucesso!", "success")
         except Exception as e:
@@ -4360,12 +4115,9 @@ def _check_and_use_ai_credits(amount):
 
     user_credits = UserCredits.get_or_create(current_user.id)
 
-    # Verificar se tem créditos suficientes
-    if not user_credits.has_credits(amount):
+    # Débito condicional: falha sem saldo, mesmo com requisições simultâneas
+    if not user_credits.use_credits(amount):
         return False, "Créditos insuficientes para gerar template com IA"
-
-    # Debitar créditos
-    user_credits.use_credits(amount)
     return True, None
 
 
@@ -4951,21 +4703,10 @@ def petition_model_validate_template_generic():
     if not template.strip():
         return jsonify({"valid": False, "errors": ["Template vazio"]})
 
-    try:
-        from jinja2 import Template, TemplateSyntaxError
-
-        Template(template)
-        return jsonify({"valid": True})
-
-    except TemplateSyntaxError as e:
-        return jsonify(
-            {
-                "valid": False,
-                "errors": [f"Erro de sintaxe na linha {e.lineno}: {e.message}"],
-            }
-        )
-    except Exception as e:
-        return jsonify({"valid": False, "errors": [f"Erro desconhecido: {str(e)}"]})
+    errors = validate_template(template)
+    if errors:
+        return jsonify({"valid": False, "errors": errors})
+    return jsonify({"valid": True})
 
 
 @bp.route("/petitions/models/preview_template_generic", methods=["POST"])
@@ -4981,8 +4722,6 @@ def petition_model_preview_template_generic():
         return jsonify({"success": False, "error": "Template vazio"})
 
     try:
-        from jinja2 import Template
-
         # Criar dados de exemplo genéricos para preview
         sample_data = {
             "vara": "1ª Vara Cível da Comarca de São Paulo",
@@ -5001,8 +4740,7 @@ def petition_model_preview_template_generic():
             "valor_causa": "10.000,00",
         }
 
-        template = Template(template_content)
-        rendered = template.render(**sample_data)
+        rendered = petition_template_engine.render_string(template_content, sample_data)
 
         return jsonify({"success": True, "preview": rendered})
 
@@ -5025,22 +4763,10 @@ def petition_model_validate_template(model_id):
     if not template.strip():
         return jsonify({"valid": False, "errors": ["Template vazio"]})
 
-    try:
-        # Tentar compilar o template Jinja2
-        from jinja2 import Template, TemplateSyntaxError
-
-        Template(template)
-        return jsonify({"valid": True})
-
-    except TemplateSyntaxError as e:
-        return jsonify(
-            {
-                "valid": False,
-                "errors": [f"Erro de sintaxe na linha {e.lineno}: {e.message}"],
-            }
-        )
-    except Exception as e:
-        return jsonify({"valid": False, "errors": [f"Erro desconhecido: {str(e)}"]})
+    errors = validate_template(template)
+    if errors:
+        return jsonify({"valid": False, "errors": errors})
+    return jsonify({"valid": True})
 
 
 @bp.route("/petitions/models/<int:model_id>/preview_template", methods=["POST"])
@@ -5058,8 +4784,6 @@ def petition_model_preview_template(model_id):
         return jsonify({"success": False, "error": "Template vazio"})
 
     try:
-        from jinja2 import Template
-
         # Criar dados de exemplo para preview
         sample_data = {
             "vara": "1ª Vara Cível da Comarca de São Paulo",
@@ -5083,8 +4807,7 @@ def petition_model_preview_template(model_id):
                 sample_data[section_name] = f"[CONTEÚDO DA SEÇÃO: {section.name}]"
 
         # Renderizar template
-        template = Template(template_content)
-        rendered = template.render(**sample_data)
+        rendered = petition_template_engine.render_string(template_content, sample_data)
 
         return jsonify({"success": True, "preview": rendered})
 
@@ -5370,6 +5093,9 @@ def audit_logs():
     date_to = request.args.get("date_to")
     per_page = 50
 
+    # Inclui os eventos ainda na fila de gravação deste processo
+    audit_writer.flush(timeout=2)
+
     # Construir query
     query = AuditLog.query
 
@@ -5481,6 +5207,22 @@ def audit_logs():
     )
 
 
+@bp.route("/audit-logs/writer-stats")
+@login_required
+def audit_writer_stats():
+    """Métricas da gravação em lote dos logs de auditoria (deste processo)"""
+    _require_admin()
+    return jsonify(audit_writer.stats())
+
+
+@bp.route("/office-converter/stats")
+@login_required
+def office_converter_stats():
+    """Fila, workers e latência da conversão Office -> PDF (deste processo)"""
+    _require_admin()
+    return jsonify(office_converter.stats())
+
+
 @bp.route("/audit-logs/<int:log_id>")
 @login_required
 def audit_log_detail(log_id):
@@ -5852,6 +5594,19 @@ def system_diagnostics():
     except ImportError:
         diagnostics["conversions"]["pdf_read"] = {"available": False}
 
+    # Fila de saída de emails
+    from app.services.outbound_email import outbound_email
+
+    try:
+        diagnostics["email_queue"] = outbound_email.stats()
+    except Exception as e:
+        diagnostics["email_queue"] = {"error": str(e)}
+
+    # Queries por endpoint/tenant e prováveis N+1 (deste worker)
+    from app.services.query_profiler import query_profiler
+
+    diagnostics["db_queries"] = query_profiler.stats()
+
     return jsonify(diagnostics)
 
 
@@ -6150,12 +5905,18 @@ def ai_config():
         for row in usage_by_type
     }
 
+    # Cache de completions
+    cached_generations = AIGeneration.query.filter_by(is_cached=True).count()
+
     return render_template(
         "admin/ai_config.html",
         configs=configs,
         total_generations=total_generations,
         total_credits_used=int(total_credits_used),
         usage_stats=usage_stats,
+        cached_generations=cached_generations,
+        cache_stats=completion_cache.stats(),
+        cache_info=completion_cache.backend.info(),
     )
 
 
@@ -6195,6 +5956,17 @@ def ai_config_update(config_id):
     if "description" in data:
         update_data["description"] = str(data["description"])[:500]
 
+    if "cache_enabled" in data:
+        update_data["cache_enabled"] = bool(data["cache_enabled"])
+
+    if "cache_ttl_seconds" in data:
+        cache_ttl = int(data["cache_ttl_seconds"])
+        if cache_ttl < 60 or cache_ttl > 30 * 86400:
+            return jsonify(
+                {"success": False, "message": "TTL deve ser entre 60s e 30 dias"}
+            ), 400
+        update_data["cache_ttl_seconds"] = cache_ttl
+
     if update_data:
         AICreditConfigRepository.update(config, update_data)
 
@@ -6209,11 +5981,25 @@ def ai_config_update(config_id):
                 "credit_cost": config.credit_cost,
                 "is_premium": config.is_premium,
                 "is_active": config.is_active,
+                "cache_enabled": config.cache_enabled,
+                "cache_ttl_seconds": config.cache_ttl_seconds,
             },
         }
     )
 
 
+@bp.route("/ai-config/cache/clear", methods=["POST"])
+@login_required
+@master_required
+def ai_config_cache_clear():
+    """Limpa o cache de completions de IA e seus contadores"""
+    try:
+        completion_cache.reset()
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Erro: {str(e)}"}), 500
+    return jsonify({"success": True, "message": "Cache de IA limpo!"})
+
+
 @bp.route("/ai-config/reset", methods=["POST"])
 @login_required
 @master_required
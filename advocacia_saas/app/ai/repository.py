@@ -13,6 +13,7 @@ from app.models import (
     CreditTransaction,
     UserCredits,
 )
+from app.services.credit_ledger import credit_ledger
 
 
 class UserCreditsRepository:
@@ -24,19 +25,21 @@ class UserCreditsRepository:
 
     @staticmethod
     def has_credits(user_id: int, amount: int) -> bool:
-        user_credits = UserCreditsRepository.get_or_create(user_id)
-        return user_credits.has_credits(amount)
+        """Triagem pelo saldo em cache; o débito é condicional no banco"""
+        return credit_ledger.balance(user_id) >= amount
 
     @staticmethod
     def use_credits(user_id: int, amount: int) -> bool:
-        user_credits = UserCreditsRepository.get_or_create(user_id)
-        return user_credits.use_credits(amount)
+        """
+        Debita créditos com um UPDATE condicional (sem read-modify-write),
+        seguro para requisições concorrentes. Não faz commit.
+        """
+        return credit_ledger.adjust(user_id, -amount, "usage") is not None
 
     @staticmethod
     def add_credits(user_id: int, amount: int, source: str = "purchase") -> UserCredits:
-        user_credits = UserCreditsRepository.get_or_create(user_id)
-        user_credits.add_credits(amount, source)
-        return user_credits
+        credit_ledger.adjust(user_id, amount, source)
+        return UserCreditsRepository.get_or_create(user_id)
 
 
 class CreditPackageRepository:
@@ -97,8 +100,6 @@ class CreditTransactionRepository:
             description=data.get("description", ""),
             package_id=data.get("package_id"),
             generation_id=data.get("generation_id"),
-            payment_intent_id=data.get("payment_intent_id"),
-            metadata=json.dumps(data.get("metadata")) if data.get("metadata") else None,
         )
         db.session.add(transaction)
         return transaction
@@ -143,20 +144,20 @@ class AIGenerationRepository:
             model_used=data.get("model_used", "gpt-4o-mini"),
             tokens_input=data.get("tokens_input"),
             tokens_output=data.get("tokens_output"),
-            tokens_total=data.get("tokens_total"),
+            # "tokens_used", "prompt" e "result" são aceitos como aliases
+            tokens_total=data.get("tokens_total") or data.get("tokens_used"),
             response_time_ms=data.get("response_time_ms"),
+            prompt_summary=(data.get("prompt") or "")[:500] or None,
             input_data=json.dumps(data.get("input_data"))
             if data.get("input_data")
             else None,
-            output_content=data.get("output_content"),
+            output_content=data.get("output_content") or data.get("result"),
             status=data.get("status", "completed"),
+            is_cached=bool(data.get("is_cached")),
             error_message=data.get("error_message"),
             completed_at=datetime.now(timezone.utc)
             if data.get("status") == "completed"
             else None,
-            prompt=data.get("prompt"),
-            result=data.get("result"),
-            tokens_used=data.get("tokens_used"),
         )
         generation.calculate_cost()
         db.session.add(generation)
@@ -9,12 +9,13 @@ from datetime import datetime, timezone
 import mercadopago
 from flask import (
     Blueprint,
+    Response,
     current_app,
     jsonify,
     redirect,
     render_template,
     request,
-    session,
+    stream_with_context,
     url_for,
 )
 from flask_login import current_user, login_required
@@ -27,6 +28,7 @@ from app.ai.repository import (
     CreditTransactionRepository,
     UserCreditsRepository,
 )
+from app.ai.services import LastDocumentService
 from app.decorators import require_feature
 from app.models import (
     AIGeneration,
@@ -35,6 +37,8 @@ from app.models import (
     UserCredits,
 )
 from app.rate_limits import AUTH_API_LIMIT
+from app.services.ai_jobs import OPERATIONS as AI_JOB_OPERATIONS
+from app.services.ai_jobs import ai_job_manager
 from app.services.ai_service import (
     CREDIT_COSTS,
     PREMIUM_OPERATIONS,
@@ -43,10 +47,13 @@ from app.services.ai_service import (
     is_premium_operation,
 )
 from app.services.document_service import (
-    extract_document_text,
     get_supported_formats,
     validate_document_file,
 )
+from app.services.document_text import document_text_service
+from app.services.credit_ledger import credit_ledger
+from app.services.job_store import FINAL_STATUSES
+from app.services.realtime import realtime
 
 ai_bp = Blueprint("ai", __name__, url_prefix="/ai")
 
@@ -67,11 +74,14 @@ def get_user_credits():
 
 
 def has_sufficient_credits(amount):
-    """Verifica se o usuário tem créditos suficientes (master sempre tem)"""
+    """
+    Verifica se o usuário tem créditos suficientes (master sempre tem).
+
+    Só uma triagem pelo saldo em cache: o débito em si é condicional no banco.
+    """
     if is_master_user():
         return True
-    user_credits = get_user_credits()
-    return user_credits.has_credits(amount)
+    return credit_ledger.balance(current_user.id) >= amount
 
 
 def use_credits_if_needed(amount):
@@ -126,6 +136,7 @@ def record_ai_generation(
             "section_name": section_name,
             "credits_used": credits_used,
             "model_used": metadata.get("model", "gpt-4o-mini"),
+            "is_cached": bool(metadata.get("cached")),
             "tokens_input": metadata.get("tokens_input"),
             "tokens_output": metadata.get("tokens_output"),
             "tokens_total": metadata.get("tokens_total"),
@@ -805,6 +816,214 @@ def api_credit_costs():
     return jsonify({"success": True, "costs": CREDIT_COSTS})
 
 
+# =============================================================================
+# JOBS ASSÍNCRONOS DE IA (submissão + streaming)
+# =============================================================================
+
+
+@ai_bp.route("/api/jobs", methods=["POST"])
+@login_required
+@require_feature("ai_petitions")
+@limiter.limit(AUTH_API_LIMIT)
+def api_submit_job():
+    """
+    Enfileira uma geração com IA e retorna imediatamente o id do job.
+
+    Body JSON:
+        operation: section | full_petition | improve | fundamentos
+        params: mesmos campos aceitos pelas rotas síncronas equivalentes
+
+    Créditos são debitados somente quando o job termina com sucesso.
+    """
+    if not ai_service.is_configured():
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": "Serviço de IA não configurado. Entre em contato com o suporte.",
+                }
+            ),
+            503,
+        )
+
+    data = request.get_json() or {}
+    operation = data.get("operation", "")
+    params = data.get("params") or {}
+
+    if operation not in AI_JOB_OPERATIONS:
+        return jsonify({"success": False, "error": "Operação inválida"}), 400
+
+    if operation == "fundamentos":
+        # Mesmo comportamento de /api/generate-fundamentos: usa o último
+        # documento analisado quando o texto não vem no request
+        if "document_text" not in params or "document_analysis" not in params:
+            last_text, last_analysis = LastDocumentService.recall()
+            params.setdefault("document_text", last_text)
+            params.setdefault("document_analysis", last_analysis)
+        if not params.get("document_text") and not params.get("document_analysis"):
+            return jsonify(
+                {
+                    "success": False,
+                    "error": "Nenhum documento carregado. Faça upload e análise primeiro.",
+                }
+            ), 400
+
+    generation_type = ai_job_manager.generation_type_for(operation, params)
+    credit_cost = ai_service.get_credit_cost(generation_type)
+
+    if not has_sufficient_credits(credit_cost):
+        user_credits = get_user_credits()
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": "Créditos insuficientes",
+                    "credits_required": credit_cost,
+                    "credits_available": user_credits.balance,
+                }
+            ),
+            402,
+        )
+
+    job = ai_job_manager.submit(
+        current_app._get_current_object(),
+        current_user,
+        operation,
+        params,
+        credit_cost,
+    )
+    if job is None:
+        # Outro job gastou o saldo entre a verificação e a reserva
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": "Créditos insuficientes",
+                    "credits_required": credit_cost,
+                    "credits_available": credit_ledger.balance(current_user.id),
+                }
+            ),
+            402,
+        )
+
+    return (
+        jsonify(
+            {
+                "success": True,
+                "job_id": job["id"],
+                "status": job["status"],
+                "status_url": url_for("ai.api_job_status", job_id=job["id"]),
+                "stream_url": url_for("ai.api_job_stream", job_id=job["id"]),
+            }
+        ),
+        202,
+    )
+
+
+@ai_bp.route("/api/jobs/<job_id>")
+@login_required
+def api_job_status(job_id):
+    """
+    Estado de um job. Com `offset`, retorna também os trechos gerados a
+    partir dessa posição (polling incremental). Com `wait` (segundos, máx 25),
+    aguarda novos trechos antes de responder (long-polling).
+    """
+    job = ai_job_manager.get(job_id, current_user.id)
+    if not job:
+        return jsonify({"success": False, "error": "Job não encontrado"}), 404
+
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    wait = min(max(request.args.get("wait", 0, type=float), 0), 25)
+    if wait and job["status"] not in FINAL_STATUSES:
+        ai_job_manager.store.wait(job_id, offset, wait)
+        job = ai_job_manager.get(job_id, current_user.id)
+
+    chunks = ai_job_manager.store.read_chunks(job_id, offset)
+
+    return jsonify(
+        {
+            "success": True,
+            "job": _public_job(job),
+            "chunks": chunks,
+            "next_offset": offset + len(chunks),
+        }
+    )
+
+
+@ai_bp.route("/api/jobs/<job_id>/stream")
+@login_required
+def api_job_stream(job_id):
+    """
+    Stream SSE dos tokens de um job.
+
+    Eventos:
+        token: {"delta": "..."} a cada trecho gerado
+        done: job final (content, credits_used, generation_id...)
+        error: {"error": "..."}
+    """
+    job = ai_job_manager.get(job_id, current_user.id)
+    if not job:
+        return jsonify({"success": False, "error": "Job não encontrado"}), 404
+
+    # Permite retomar após reconexão do EventSource
+    offset = request.headers.get("Last-Event-ID", 0, type=int) or 0
+    store = ai_job_manager.store
+    user_id = current_user.id
+
+    def generate():
+        nonlocal offset
+        while True:
+            store.wait(job_id, offset, timeout=15)
+            chunks = store.read_chunks(job_id, offset)
+            for chunk in chunks:
+                offset += 1
+                yield (
+                    f"id: {offset}\nevent: token\n"
+                    f"data: {json.dumps({'delta': chunk}, ensure_ascii=False)}\n\n"
+                )
+
+            current = ai_job_manager.get(job_id, user_id)
+            if not current:
+                yield f"event: error\ndata: {json.dumps({'error': 'Job expirado'})}\n\n"
+                return
+            if current["status"] == "completed" and not store.read_chunks(
+                job_id, offset
+            ):
+                payload = json.dumps(_public_job(current), ensure_ascii=False)
+                yield f"event: done\ndata: {payload}\n\n"
+                return
+            if current["status"] == "failed":
+                payload = json.dumps(
+                    {"error": current.get("error")}, ensure_ascii=False
+                )
+                yield f"event: error\ndata: {payload}\n\n"
+                return
+            if not chunks:
+                yield ": keep-alive\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _public_job(job):
+    """Campos do job expostos ao navegador"""
+    return {
+        "id": job["id"],
+        "operation": job["operation"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "content": job.get("content"),
+        "error": job.get("error"),
+        "generation_id": job.get("generation_id"),
+        "credits_used": job.get("credits_used"),
+        "credits_remaining": job.get("credits_remaining"),
+        "metadata": job.get("metadata") or {},
+    }
+
+
 # =============================================================================
 # FEEDBACK
 # =============================================================================
@@ -878,7 +1097,7 @@ def api_analyze_document():
 
     try:
         # Extrair texto do documento
-        document_text, doc_metadata = extract_document_text(file)
+        document_text, doc_metadata = document_text_service.extract(file)
 
         if not document_text or len(document_text.strip()) < 50:
             return jsonify(
@@ -897,10 +1116,8 @@ def api_analyze_document():
         if not is_master_user():
             use_credits_if_needed(credit_cost)
 
-        # Salvar na sessão para uso posterior
-        session["last_document_text"] = document_text[:20000]
-        session["last_document_analysis"] = analysis
-        session["last_document_name"] = file.filename
+        # Guardar para uso posterior (fundamentação)
+        LastDocumentService.remember(document_text, analysis, file.filename)
 
         # Registrar geração via repository
         AIGenerationRepository.create(
@@ -911,6 +1128,7 @@ def api_analyze_document():
                 "result": analysis[:5000],
                 "tokens_used": ai_metadata.get("tokens_total", 0),
                 "model_used": ai_metadata.get("model", "gpt-4o"),
+                "is_cached": bool(ai_metadata.get("cached")),
                 "credits_used": credit_cost,
             }
         )
@@ -958,11 +1176,13 @@ def api_generate_fundamentos():
 
     data = request.get_json() or {}
 
-    # Pegar documento da sessão ou do request
-    document_text = data.get("document_text") or session.get("last_document_text")
-    document_analysis = data.get("document_analysis") or session.get(
-        "last_document_analysis"
-    )
+    # Pegar documento do request ou o último analisado
+    document_text = data.get("document_text")
+    document_analysis = data.get("document_analysis")
+    if not document_text or not document_analysis:
+        last_text, last_analysis = LastDocumentService.recall()
+        document_text = document_text or last_text
+        document_analysis = document_analysis or last_analysis
     petition_type = data.get("petition_type")
     additional_context = data.get("additional_context")
 
@@ -996,6 +1216,7 @@ def api_generate_fundamentos():
                 "result": fundamentos[:5000],
                 "tokens_used": ai_metadata.get("tokens_total", 0),
                 "model_used": ai_metadata.get("model", "gpt-4o"),
+                "is_cached": bool(ai_metadata.get("cached")),
                 "credits_used": credit_cost,
             }
         )
@@ -1504,6 +1725,11 @@ def mercadopago_webhook_credits():
                         current_app.logger.info(
                             f"✅ Webhook: Créditos processados payment_id={payment_id}"
                         )
+                    realtime.publish(
+                        user_id,
+                        "payment_status",
+                        {"payment_id": str(payment_id), "status": "approved"},
+                    )
 
         except Exception as e:
             current_app.logger.error(f"Erro no webhook MP créditos: {str(e)}")
@@ -18,7 +18,9 @@ from app.ai.repository import (
     UserCreditsRepository,
 )
 from app.services.ai_service import CREDIT_COSTS, ai_service
-from app.services.document_service import extract_document_text, validate_document_file
+from app.services.document_service import validate_document_file
+from app.services.document_text import document_text_service
+from app.services.session_store import session_store
 
 
 class CreditsService:
@@ -205,6 +207,7 @@ class AIGenerationService:
                     "generation_type": generation_type,
                     "credits_used": actual_cost,
                     "model_used": metadata.get("model", "gpt-4o-mini"),
+                    "is_cached": bool(metadata.get("cached")),
                     "tokens_input": metadata.get("tokens_input"),
                     "tokens_output": metadata.get("tokens_output"),
                     "tokens_total": metadata.get("tokens_total"),
@@ -300,6 +303,7 @@ class AIGenerationService:
                     "generation_type": "full_petition",
                     "credits_used": actual_cost,
                     "model_used": metadata.get("model", "gpt-4o"),
+                    "is_cached": bool(metadata.get("cached")),
                     "tokens_input": metadata.get("tokens_input"),
                     "tokens_output": metadata.get("tokens_output"),
                     "tokens_total": metadata.get("tokens_total"),
@@ -393,6 +397,7 @@ class AIGenerationService:
                     "generation_type": "improve",
                     "credits_used": actual_cost,
                     "model_used": metadata.get("model", "gpt-4o-mini"),
+                    "is_cached": bool(metadata.get("cached")),
                     "tokens_input": metadata.get("tokens_input"),
                     "tokens_output": metadata.get("tokens_output"),
                     "tokens_total": metadata.get("tokens_total"),
@@ -444,6 +449,32 @@ class AIGenerationService:
         return {"success": True}, 200
 
 
+class LastDocumentService:
+    """Último documento analisado: texto e análise no cache de blobs, chave na sessão"""
+
+    SESSION_KEY = "last_document"
+    MAX_TEXT_CHARS = 20000
+
+    @staticmethod
+    def remember(document_text: str, analysis: str, filename: str) -> None:
+        previous = session.get(LastDocumentService.SESSION_KEY) or {}
+        session_store.delete_blob(previous.get("blob"))
+        blob = session_store.put_blob(
+            {
+                "text": document_text[: LastDocumentService.MAX_TEXT_CHARS],
+                "analysis": analysis,
+            }
+        )
+        session[LastDocumentService.SESSION_KEY] = {"blob": blob, "name": filename}
+
+    @staticmethod
+    def recall() -> tuple[str | None, str | None]:
+        """(texto, análise) do último documento, ou (None, None) se expirou"""
+        reference = session.get(LastDocumentService.SESSION_KEY) or {}
+        data = session_store.get_blob(reference.get("blob")) or {}
+        return data.get("text"), data.get("analysis")
+
+
 class DocumentAnalysisService:
     """Serviço para análise de documentos com IA"""
 
@@ -464,7 +495,7 @@ class DocumentAnalysisService:
             return {"success": False, "error": error_msg}, 400
 
         try:
-            document_text, doc_metadata = extract_document_text(file)
+            document_text, doc_metadata = document_text_service.extract(file)
 
             if not document_text or len(document_text.strip()) < 50:
                 return {
@@ -479,10 +510,8 @@ class DocumentAnalysisService:
             if not CreditsService.is_master_user(user):
                 CreditsService.use_credits_if_needed(user, credit_cost)
 
-            # Salvar na sessão para uso posterior
-            session["last_document_text"] = document_text[:20000]
-            session["last_document_analysis"] = analysis
-            session["last_document_name"] = file.filename
+            # Guardar para uso posterior (fundamentação)
+            LastDocumentService.remember(document_text, analysis, file.filename)
 
             AIGenerationRepository.create(
                 {
@@ -492,6 +521,7 @@ class DocumentAnalysisService:
                     "result": analysis[:5000],
                     "tokens_used": ai_metadata.get("tokens_total", 0),
                     "model_used": ai_metadata.get("model", "gpt-4o"),
+                    "is_cached": bool(ai_metadata.get("cached")),
                     "credits_used": credit_cost,
                     "status": "completed",
                 }
@@ -528,10 +558,12 @@ class DocumentAnalysisService:
                 "credits_required": credit_cost,
             }, 402
 
-        document_text = data.get("document_text") or session.get("last_document_text")
-        document_analysis = data.get("document_analysis") or session.get(
-            "last_document_analysis"
-        )
+        document_text = data.get("document_text")
+        document_analysis = data.get("document_analysis")
+        if not document_text or not document_analysis:
+            last_text, last_analysis = LastDocumentService.recall()
+            document_text = document_text or last_text
+            document_analysis = document_analysis or last_analysis
 
         if not document_text and not document_analysis:
             return {
@@ -558,6 +590,7 @@ class DocumentAnalysisService:
                     "result": fundamentos[:5000],
                     "tokens_used": ai_metadata.get("tokens_total", 0),
                     "model_used": ai_metadata.get("model", "gpt-4o"),
+                    "is_cached": bool(ai_metadata.get("cached")),
                     "credits_used": credit_cost,
                     "status": "completed",
                 }
@@ -657,6 +690,7 @@ class RiskAnalysisService:
                     "input_data": {"petition_type": petition_type},
                     "output_content": str(analysis)[:5000],
                     "model_used": ai_metadata.get("model", "gpt-4o"),
+                    "is_cached": bool(ai_metadata.get("cached")),
                     "status": "completed",
                 }
             )
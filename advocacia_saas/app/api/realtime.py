@@ -0,0 +1,37 @@
+"""
+Long-poll dos eventos em tempo real (fallback quando o websocket não conecta)
+"""
+
+from flask import Blueprint, jsonify, request
+from flask_login import current_user, login_required
+
+from app import db, limiter
+from app.rate_limits import AUTH_API_LIMIT
+from app.services.realtime import realtime
+
+realtime_api_bp = Blueprint("realtime_api", __name__, url_prefix="/api/realtime")
+
+
+@realtime_api_bp.route("/poll", methods=["GET"])
+@login_required
+@limiter.limit(AUTH_API_LIMIT)
+def poll():
+    """
+    Espera eventos do usuário depois de `cursor`.
+
+    Sem cursor retorna na hora o cursor atual; com cursor segura a requisição
+    até chegar um evento ou passar `timeout` segundos (máx.
+    REALTIME_POLL_TIMEOUT).
+    """
+    cursor = request.args.get("cursor") or None
+    timeout = request.args.get("timeout", type=float)
+    user_id = current_user.id
+    # Devolve a conexão ao pool antes de esperar
+    db.session.close()
+    try:
+        cursor, events = realtime.poll(user_id, cursor, timeout)
+    except Exception:
+        # Cursor inválido ou caixa indisponível: o cliente recomeça do zero
+        return jsonify({"success": True, "cursor": None, "events": []})
+
+    return jsonify({"success": True, "cursor": cursor, "events": events})
@@ -398,11 +398,12 @@ def setup_2fa():
             current_user.email_2fa_code_expires = datetime.now(
                 timezone.utc
             ) + timedelta(minutes=10)
+            sent = EmailService.send_2fa_code_email(
+                current_user.email, code, method="email"
+            )
             db.session.commit()
 
-            if EmailService.send_2fa_code_email(
-                current_user.email, code, method="email"
-            ):
+            if sent:
                 flash(
                     f"Código enviado para {current_user.email}. Verifique seu email.",
                     "info",
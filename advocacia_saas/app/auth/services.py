@@ -640,6 +640,7 @@ class TwoFactorService:
         EmailService.send_2fa_enabled_notification(
             user.email, user.full_name or user.username, method
         )
+        db.session.commit()
 
         return backup_codes
 
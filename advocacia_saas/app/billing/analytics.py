@@ -1,44 +1,35 @@
 """
 Funções para análise e previsão de uso de petições
+
+Leem os totais pré-agregados por ciclo (app/billing/usage_rollup.py) em vez
+de contar petition_usage a cada chamada.
 """
 
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
-from sqlalchemy import extract, func
-
-from app.models import PetitionUsage
+from app.billing import usage_rollup
 
 
 def get_monthly_usage_history(user, months=6):
     """Retorna histórico de uso de petições nos últimos N meses."""
-    history = []
     current_date = datetime.now(timezone.utc)
+    month_dates = [current_date - timedelta(days=30 * i) for i in range(months)]
+    cycles = [month_date.strftime("%Y-%m") for month_date in month_dates]
 
-    for i in range(months):
-        month_date = current_date - timedelta(days=30 * i)
-        cycle = month_date.strftime("%Y-%m")
-
-        # Contar apenas billable
-        billable_count = PetitionUsage.query.filter_by(
-            user_id=user.id,
-            billing_cycle=cycle,
-            billable=True,
-        ).count()
-
-        # Total incluindo gratuitas
-        total_count = PetitionUsage.query.filter_by(
-            user_id=user.id,
-            billing_cycle=cycle,
-        ).count()
+    # Uma leitura dos totais pré-agregados para todos os ciclos
+    totals = usage_rollup.get_cycle_totals(user.id, cycles)
 
+    history = []
+    for month_date, cycle in zip(month_dates, cycles):
+        cycle_totals = totals[cycle]
         history.append(
             {
                 "cycle": cycle,
                 "month_name": month_date.strftime("%b/%Y"),
-                "billable": billable_count,
-                "free": total_count - billable_count,
-                "total": total_count,
+                "billable": cycle_totals.billable,
+                "free": cycle_totals.free,
+                "total": cycle_totals.total,
             }
         )
 
@@ -52,16 +43,10 @@ def predict_limit_date(user):
     if not plan or plan.plan.monthly_petition_limit is None:
         return None  # Ilimitado ou sem plano
 
-    # Pegar uso dos últimos 7 dias
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
+    # Pegar uso dos últimos 7 dias (hoje e os 6 anteriores, por dia)
     current_cycle = datetime.utcnow().strftime("%Y-%m")
-
-    recent_usage = PetitionUsage.query.filter(
-        PetitionUsage.user_id == user.id,
-        PetitionUsage.billing_cycle == current_cycle,
-        PetitionUsage.billable.is_(True),
-        PetitionUsage.generated_at >= seven_days_ago,
-    ).count()
+    totals = usage_rollup.get_totals(user.id, current_cycle)
+    recent_usage = totals.billable_since((datetime.utcnow() - timedelta(days=6)).date())
 
     if recent_usage == 0:
         return None  # Sem uso recente
@@ -70,11 +55,7 @@ def predict_limit_date(user):
     daily_average = recent_usage / 7.0
 
     # Uso atual no mês
-    current_usage = PetitionUsage.query.filter_by(
-        user_id=user.id,
-        billing_cycle=current_cycle,
-        billable=True,
-    ).count()
+    current_usage = totals.billable
 
     remaining = plan.plan.monthly_petition_limit - current_usage
 
@@ -105,19 +86,13 @@ def get_usage_insights(user):
     current_cycle = datetime.now(timezone.utc).strftime("%Y-%m")
     last_cycle = (datetime.now(timezone.utc) - timedelta(days=30)).strftime("%Y-%m")
 
+    totals = usage_rollup.get_cycle_totals(user.id, [current_cycle, last_cycle])
+
     # Uso atual
-    current_billable = PetitionUsage.query.filter_by(
-        user_id=user.id,
-        billing_cycle=current_cycle,
-        billable=True,
-    ).count()
+    current_billable = totals[current_cycle].billable
 
     # Uso mês passado
-    last_billable = PetitionUsage.query.filter_by(
-        user_id=user.id,
-        billing_cycle=last_cycle,
-        billable=True,
-    ).count()
+    last_billable = totals[last_cycle].billable
 
     # Calcular tendência
     if last_billable > 0:
@@ -126,24 +101,13 @@ def get_usage_insights(user):
         growth_rate = 100 if current_billable > 0 else 0
 
     # Dia do mês com mais uso
-    peak_day = (
-        PetitionUsage.query.filter_by(
-            user_id=user.id, billing_cycle=current_cycle, billable=True
-        )
-        .with_entities(
-            func.date(PetitionUsage.generated_at).label("day"),
-            func.count(PetitionUsage.id).label("count"),
-        )
-        .group_by(func.date(PetitionUsage.generated_at))
-        .order_by(func.count(PetitionUsage.id).desc())
-        .first()
-    )
+    peak_day = totals[current_cycle].peak_day()
 
     return {
         "current_month": current_billable,
         "last_month": last_billable,
         "growth_rate": round(growth_rate, 1),
         "trend": "up" if growth_rate > 0 else "down" if growth_rate < 0 else "stable",
-        "peak_day": peak_day.day.strftime("%d/%m/%Y") if peak_day else None,
-        "peak_count": peak_day.count if peak_day else 0,
+        "peak_day": peak_day[0].strftime("%d/%m/%Y") if peak_day else None,
+        "peak_count": peak_day[1] if peak_day else 0,
     }
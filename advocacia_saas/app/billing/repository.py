@@ -20,6 +20,7 @@ from app.models import (
 from app.models import (
     plan_features as pf_table,
 )
+from app.services.entitlements import entitlement_resolver
 
 
 class BillingPlanRepository:
@@ -239,3 +240,5 @@ class FeatureRepository:
             )
 
         db.session.commit()
+        # Escrita direta em plan_features não dispara os eventos do ORM
+        entitlement_resolver.invalidate_all()
@@ -0,0 +1,399 @@
+"""
+Totais de uso de petições por usuário e ciclo de cobrança.
+
+O dashboard do advogado (uso do ciclo, histórico de 6 meses, previsão do
+limite e insights) contava linhas de petition_usage a cada acesso - mais de
+uma dúzia de COUNTs por página. A tabela petition_usage_rollups guarda, por
+(usuário, ciclo), o total de petições, as billable, o valor cobrado e as
+billable por dia, de modo que a página lê poucas linhas pequenas.
+
+Manutenção:
+- record_petition_usage trava a linha do ciclo (SELECT ... FOR UPDATE),
+  confere o limite do plano nela e a incrementa na mesma transação do uso;
+- ciclos ainda sem linha são montados a partir de petition_usage na primeira
+  leitura ou gravação, então a tabela nunca fica "vazia" para o usuário;
+- `flask usage-rollup-check --fix` (rodar diariamente) compara os totais com
+  petition_usage e corrige divergências; `flask usage-rollup-backfill`
+  reconstrói tudo depois da migração.
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from flask import g, has_app_context
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import PetitionUsage, PetitionUsageRollup
+
+logger = logging.getLogger(__name__)
+
+_MEMO_KEY = "_usage_rollups"
+
+
+@dataclass(frozen=True)
+class UsageTotals:
+    """Totais de um usuário em um ciclo (YYYY-MM)"""
+
+    billing_cycle: str
+    total: int = 0
+    billable: int = 0
+    billable_amount: Decimal = Decimal("0.00")
+    # "YYYY-MM-DD" -> petições billable no dia
+    daily_billable: Mapping[str, int] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+
+    @property
+    def free(self) -> int:
+        return self.total - self.billable
+
+    def billable_since(self, day: date) -> int:
+        """Petições billable do ciclo a partir de `day` (inclusive)"""
+        start = day.isoformat()
+        return sum(n for d, n in self.daily_billable.items() if d >= start)
+
+    def peak_day(self):
+        """(dia, quantidade) com mais petições billable, ou None"""
+        if not self.daily_billable:
+            return None
+        day, count = max(self.daily_billable.items(), key=lambda item: item[1])
+        return date.fromisoformat(day), count
+
+    @classmethod
+    def from_rollup(cls, rollup: PetitionUsageRollup) -> "UsageTotals":
+        return cls(
+            billing_cycle=rollup.billing_cycle,
+            total=rollup.total_count or 0,
+            billable=rollup.billable_count or 0,
+            billable_amount=Decimal(str(rollup.billable_amount or 0)),
+            daily_billable=MappingProxyType(dict(rollup.daily_billable or {})),
+        )
+
+
+@dataclass(frozen=True)
+class RollupDrift:
+    """Divergência entre a tabela de totais e petition_usage"""
+
+    user_id: int
+    billing_cycle: str
+    expected: UsageTotals  # calculado de petition_usage
+    actual: Optional[UsageTotals]  # None = linha inexistente
+
+    def describe(self) -> str:
+        if self.actual is None:
+            return "sem linha de totais"
+        parts = []
+        for name in ("total", "billable", "billable_amount"):
+            got, want = getattr(self.actual, name), getattr(self.expected, name)
+            if got != want:
+                parts.append(f"{name} {got} != {want}")
+        if dict(self.actual.daily_billable) != dict(self.expected.daily_billable):
+            parts.append("billable por dia divergente")
+        return ", ".join(parts)
+
+
+def _day_key(value) -> str:
+    if isinstance(value, str):
+        return value[:10]
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.isoformat()
+
+
+def _same(actual: UsageTotals, expected: UsageTotals) -> bool:
+    return (
+        actual.total == expected.total
+        and actual.billable == expected.billable
+        and actual.billable_amount == expected.billable_amount
+        and dict(actual.daily_billable) == dict(expected.daily_billable)
+    )
+
+
+# -----------------------------------------------------------------------------
+# Agregação a partir de petition_usage
+# -----------------------------------------------------------------------------
+
+
+def aggregate_usage(*filters) -> Dict[tuple, UsageTotals]:
+    """
+    Calcula os totais direto de petition_usage, em uma única query agrupada.
+
+    Retorna {(user_id, billing_cycle): UsageTotals} para as linhas que
+    satisfazem `filters`.
+    """
+    day = func.date(PetitionUsage.generated_at)
+    rows = (
+        db.session.query(
+            PetitionUsage.user_id,
+            PetitionUsage.billing_cycle,
+            PetitionUsage.billable,
+            day,
+            func.count(PetitionUsage.id),
+            func.coalesce(func.sum(PetitionUsage.amount), 0),
+        )
+        .filter(PetitionUsage.billing_cycle.isnot(None), *filters)
+        .group_by(
+            PetitionUsage.user_id,
+            PetitionUsage.billing_cycle,
+            PetitionUsage.billable,
+            day,
+        )
+        .all()
+    )
+
+    acc = defaultdict(
+        lambda: {"total": 0, "billable": 0, "amount": Decimal("0"), "daily": {}}
+    )
+    for user_id, cycle, billable, usage_day, count, amount in rows:
+        entry = acc[(user_id, cycle)]
+        entry["total"] += count
+        if billable:
+            entry["billable"] += count
+            entry["amount"] += Decimal(str(amount))
+            if usage_day is not None:
+                key = _day_key(usage_day)
+                entry["daily"][key] = entry["daily"].get(key, 0) + count
+
+    return {
+        key: UsageTotals(
+            billing_cycle=key[1],
+            total=entry["total"],
+            billable=entry["billable"],
+            billable_amount=entry["amount"].quantize(Decimal("0.01")),
+            daily_billable=MappingProxyType(entry["daily"]),
+        )
+        for key, entry in acc.items()
+    }
+
+
+def _write_totals(rollup: PetitionUsageRollup, totals: UsageTotals):
+    rollup.total_count = totals.total
+    rollup.billable_count = totals.billable
+    rollup.billable_amount = totals.billable_amount
+    rollup.daily_billable = dict(totals.daily_billable)
+
+
+# -----------------------------------------------------------------------------
+# Leitura
+# -----------------------------------------------------------------------------
+
+
+def _materialize(user_id: int, cycles: Iterable[str], lock: bool = False):
+    """
+    Carrega as linhas de totais dos ciclos, criando as que faltam a partir de
+    petition_usage. Retorna ({ciclo: PetitionUsageRollup}, criou_alguma).
+    """
+    cycles = list(dict.fromkeys(cycles))
+    query = PetitionUsageRollup.query.filter(
+        PetitionUsageRollup.user_id == user_id,
+        PetitionUsageRollup.billing_cycle.in_(cycles),
+    )
+    if lock:
+        query = query.with_for_update()
+    rollups = {r.billing_cycle: r for r in query.all()}
+
+    missing = [c for c in cycles if c not in rollups]
+    if not missing:
+        return rollups, False
+
+    computed = aggregate_usage(
+        PetitionUsage.user_id == user_id,
+        PetitionUsage.billing_cycle.in_(missing),
+    )
+    for cycle in missing:
+        totals = computed.get((user_id, cycle)) or UsageTotals(billing_cycle=cycle)
+        rollup = PetitionUsageRollup(user_id=user_id, billing_cycle=cycle)
+        _write_totals(rollup, totals)
+        try:
+            with db.session.begin_nested():
+                db.session.add(rollup)
+        except IntegrityError:
+            # Outra requisição criou a linha ao mesmo tempo
+            query = PetitionUsageRollup.query.filter_by(
+                user_id=user_id, billing_cycle=cycle
+            )
+            if lock:
+                query = query.with_for_update()
+            rollup = query.one()
+        rollups[cycle] = rollup
+
+    return rollups, True
+
+
+def get_cycle_totals(user_id: int, cycles: Iterable[str]) -> Dict[str, UsageTotals]:
+    """
+    Totais do usuário nos ciclos pedidos ({ciclo: UsageTotals}).
+
+    Memoizado por requisição: as várias funções do dashboard leem os mesmos
+    ciclos e só os que ainda não foram carregados vão ao banco.
+    """
+    cycles = list(dict.fromkeys(cycles))
+    memo = g.setdefault(_MEMO_KEY, {}) if has_app_context() else {}
+
+    pending = [c for c in cycles if (user_id, c) not in memo]
+    if pending:
+        rollups, created = _materialize(user_id, pending)
+        # Antes do commit: depois dele os atributos expiram e cada ciclo
+        # voltaria ao banco (N+1)
+        for cycle, rollup in rollups.items():
+            memo[(user_id, cycle)] = UsageTotals.from_rollup(rollup)
+        if created:
+            db.session.commit()
+
+    return {c: memo[(user_id, c)] for c in cycles}
+
+
+def get_totals(user_id: int, cycle: str) -> UsageTotals:
+    """Totais do usuário em um único ciclo"""
+    return get_cycle_totals(user_id, [cycle])[cycle]
+
+
+def _forget(user_id: int, cycle: str):
+    if has_app_context():
+        memo = g.get(_MEMO_KEY)
+        if memo:
+            memo.pop((user_id, cycle), None)
+
+
+# -----------------------------------------------------------------------------
+# Gravação
+# -----------------------------------------------------------------------------
+
+
+def lock_cycle(user_id: int, cycle: str) -> PetitionUsageRollup:
+    """
+    Trava (SELECT ... FOR UPDATE) e devolve a linha de totais do ciclo.
+
+    Chamado por record_petition_usage antes de conferir o limite do plano,
+    o que também serializa gerações simultâneas do mesmo usuário. A trava é
+    liberada no commit/rollback da transação.
+    """
+    rollups, _ = _materialize(user_id, [cycle], lock=True)
+    return rollups[cycle]
+
+
+def apply_usage(rollup: PetitionUsageRollup, usage: PetitionUsage):
+    """Soma um novo PetitionUsage à linha de totais (já travada)"""
+    rollup.total_count = (rollup.total_count or 0) + 1
+    if usage.billable:
+        rollup.billable_count = (rollup.billable_count or 0) + 1
+        rollup.billable_amount = Decimal(str(rollup.billable_amount or 0)) + Decimal(
+            str(usage.amount or 0)
+        )
+        key = _day_key(usage.generated_at or datetime.now(timezone.utc))
+        daily = dict(rollup.daily_billable or {})
+        daily[key] = daily.get(key, 0) + 1
+        rollup.daily_billable = daily  # reatribui para o SQLAlchemy detectar
+    _forget(rollup.user_id, rollup.billing_cycle)
+
+
+# -----------------------------------------------------------------------------
+# Conferência e backfill
+# -----------------------------------------------------------------------------
+
+
+def find_drift(
+    cycles: Optional[List[str]] = None, user_ids: Optional[List[int]] = None
+) -> List[RollupDrift]:
+    """
+    Compara petition_usage_rollups com os totais recalculados de
+    petition_usage (filtrando por ciclos e/ou usuários).
+
+    Linhas de totais zeradas sem uso correspondente não contam como
+    divergência - são criadas pelo dashboard para ciclos sem petições.
+    """
+    usage_filters = []
+    rollup_query = PetitionUsageRollup.query
+    if cycles:
+        usage_filters.append(PetitionUsage.billing_cycle.in_(cycles))
+        rollup_query = rollup_query.filter(PetitionUsageRollup.billing_cycle.in_(cycles))
+    if user_ids:
+        usage_filters.append(PetitionUsage.user_id.in_(user_ids))
+        rollup_query = rollup_query.filter(PetitionUsageRollup.user_id.in_(user_ids))
+
+    expected = aggregate_usage(*usage_filters)
+    actual = {
+        (r.user_id, r.billing_cycle): UsageTotals.from_rollup(r)
+        for r in rollup_query.all()
+    }
+
+    drifts = []
+    for key in sorted(expected.keys() | actual.keys()):
+        want = expected.get(key) or UsageTotals(billing_cycle=key[1])
+        got = actual.get(key)
+        if got is None or not _same(got, want):
+            drifts.append(
+                RollupDrift(
+                    user_id=key[0], billing_cycle=key[1], expected=want, actual=got
+                )
+            )
+    return drifts
+
+
+def fix_drift(drifts: List[RollupDrift]) -> int:
+    """
+    Regrava as linhas divergentes com os totais de petition_usage.
+
+    Cada linha é recalculada sob trava, para não sobrescrever um incremento
+    feito entre a conferência e a correção.
+    """
+    fixed = 0
+    for drift in drifts:
+        rollup = lock_cycle(drift.user_id, drift.billing_cycle)
+        current = aggregate_usage(
+            PetitionUsage.user_id == drift.user_id,
+            PetitionUsage.billing_cycle == drift.billing_cycle,
+        ).get((drift.user_id, drift.billing_cycle))
+        _write_totals(rollup, current or UsageTotals(billing_cycle=drift.billing_cycle))
+        db.session.commit()
+        logger.info(
+            f"Totais de uso corrigidos: user={drift.user_id} "
+            f"ciclo={drift.billing_cycle} ({drift.describe()})"
+        )
+        fixed += 1
+    return fixed
+
+
+def backfill(user_id: Optional[int] = None, batch_size: int = 500) -> dict:
+    """
+    Reconstrói os totais de todos os ciclos a partir de petition_usage,
+    em lotes de `batch_size` usuários (um commit por lote).
+
+    Não trava as linhas: um uso gravado durante o backfill pode ser
+    sobrescrito, o que a conferência diária (find_drift/fix_drift) corrige.
+    """
+    query = db.session.query(PetitionUsage.user_id).distinct()
+    if user_id is not None:
+        query = query.filter(PetitionUsage.user_id == user_id)
+    users = sorted(uid for (uid,) in query.all())
+
+    result = {"users": len(users), "rows": 0, "fixed": 0}
+    for start in range(0, len(users), batch_size):
+        batch = users[start : start + batch_size]
+        expected = aggregate_usage(PetitionUsage.user_id.in_(batch))
+        existing = {
+            (r.user_id, r.billing_cycle): r
+            for r in PetitionUsageRollup.query.filter(
+                PetitionUsageRollup.user_id.in_(batch)
+            ).all()
+        }
+        for key, totals in expected.items():
+            rollup = existing.get(key)
+            if rollup is None:
+                rollup = PetitionUsageRollup(user_id=key[0], billing_cycle=key[1])
+                db.session.add(rollup)
+            elif _same(UsageTotals.from_rollup(rollup), totals):
+                continue
+            _write_totals(rollup, totals)
+            result["fixed"] += 1
+        result["rows"] += len(expected)
+        db.session.commit()
+
+    return result
@@ -5,6 +5,7 @@ from decimal import Decimal
 from flask import current_app
 
 from app import db
+from app.billing import usage_rollup
 from app.models import (
     BillingPlan,
     Notification,
@@ -204,12 +205,9 @@ def check_petition_balance(user, petition_type: PetitionType) -> dict:
         and plan.plan.plan_type == "monthly"
         and plan.plan.monthly_petition_limit is not None
     ):
-        current_cycle = current_billing_cycle()
-        used_this_month = PetitionUsage.query.filter_by(
-            user_id=user.id,
-            billing_cycle=current_cycle,
-            billable=True,
-        ).count()
+        used_this_month = usage_rollup.get_totals(
+            user.id, current_billing_cycle()
+        ).billable
 
         if used_this_month >= plan.plan.monthly_petition_limit:
             return {
@@ -283,18 +281,18 @@ def record_petition_usage(
         )
         db.session.add(transaction)
 
+    # Travar os totais do ciclo: o limite é conferido e incrementado na mesma
+    # transação, sem contar petition_usage
+    current_cycle = current_billing_cycle()
+    rollup = usage_rollup.lock_cycle(user.id, current_cycle)
+
     # Verificar limites para planos mensais
     if (
         petition_type.is_billable
         and plan.plan.plan_type == "monthly"
         and plan.plan.monthly_petition_limit is not None
     ):
-        current_cycle = current_billing_cycle()
-        used_this_month = PetitionUsage.query.filter_by(
-            user_id=user.id,
-            billing_cycle=current_cycle,
-            billable=True,
-        ).count()
+        used_this_month = rollup.billable_count
 
         if used_this_month >= plan.plan.monthly_petition_limit:
             raise BillingAccessError(
@@ -311,11 +309,13 @@ def record_petition_usage(
         user_id=user.id,
         petition_type_id=petition_type.id,
         plan_id=plan.plan_id,
-        billing_cycle=current_billing_cycle(),
+        billing_cycle=current_cycle,
+        generated_at=datetime.now(timezone.utc),
         billable=will_be_billable,
         amount=amount,
     )
     db.session.add(usage)
+    usage_rollup.apply_usage(rollup, usage)
     db.session.commit()
     return usage
 
@@ -382,20 +382,12 @@ def get_user_petition_usage(user) -> dict:
             "is_unlimited": True,
         }
 
-    current_cycle = current_billing_cycle()
+    totals = usage_rollup.get_totals(user.id, current_billing_cycle())
 
-    # Contar APENAS petições billable (as que têm valor)
-    billable_used = PetitionUsage.query.filter_by(
-        user_id=user.id,
-        billing_cycle=current_cycle,
-        billable=True,
-    ).count()
-
-    # Contar total (incluindo gratuitas) para informação
-    total_used = PetitionUsage.query.filter_by(
-        user_id=user.id,
-        billing_cycle=current_cycle,
-    ).count()
+    # APENAS petições billable (as que têm valor) contam para o limite;
+    # o total inclui as gratuitas, para informação
+    billable_used = totals.billable
+    total_used = totals.total
 
     limit = plan.plan.monthly_petition_limit
     is_unlimited = limit is None
@@ -527,6 +519,14 @@ def create_notification(user, notification_type, title, message, link=None):
     return notification
 
 
+CREDIT_LOW_TITLE = "⚠️ Créditos IA Baixos"
+
+
+def credit_low_message(current_balance):
+    """Texto do aviso de créditos IA baixos."""
+    return f"Você tem apenas {current_balance} créditos IA restantes. Recarregue seus créditos para continuar usando a geração de petições com IA."
+
+
 def create_credit_low_notification(user, current_balance, threshold=10):
     """Cria notificação quando créditos IA estão baixos."""
     # Verificar se já existe notificação similar recente (últimas 24h)
@@ -544,8 +544,8 @@ def create_credit_low_notification(user, current_balance, threshold=10):
     return create_notification(
         user=user,
         notification_type="credit_low",
-        title="⚠️ Créditos IA Baixos",
-        message=f"Você tem apenas {current_balance} créditos IA restantes. Recarregue seus créditos para continuar usando a geração de petições com IA.",
+        title=CREDIT_LOW_TITLE,
+        message=credit_low_message(current_balance),
         link="/ai/credits",
     )
 
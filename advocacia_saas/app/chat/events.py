@@ -6,7 +6,9 @@ from flask_login import current_user
 from flask_socketio import emit, join_room, leave_room
 
 from app import db, socketio
+from app.chat.services import MessageService
 from app.models import ChatRoom, Message
+from app.services.realtime import user_room
 
 
 @socketio.on("connect")
@@ -14,6 +16,8 @@ def handle_connect():
     """Cliente conectou ao WebSocket"""
     if current_user.is_authenticated:
         print(f"Cliente conectado: {current_user.full_name} (ID: {current_user.id})")
+        # Sala do usuário: notificações, chat e pagamentos (app/services/realtime.py)
+        join_room(user_room(current_user.id))
         emit("connected", {"message": "Conectado ao chat"})
     else:
         return False  # Rejeitar conexão não autenticada
@@ -100,11 +104,7 @@ def handle_send_message(data):
     emit("new_message", {"message": message.to_dict(), "room_id": room_id}, room=room)
 
     # Notificar destinatário se estiver online mas não na sala
-    emit(
-        "notification",
-        {"type": "new_message", "message": message.to_dict(), "room_id": room_id},
-        room=f"user_{recipient_id}",
-    )
+    MessageService.publish_new_message(message, room_id)
 
 
 @socketio.on("typing")
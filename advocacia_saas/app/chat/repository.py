@@ -4,10 +4,12 @@ Chat Repository - Camada de Acesso a Dados.
 Operações de banco de dados para o sistema de chat.
 """
 
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
 
 from app import db
 from app.models import ChatRoom, Client, Message
+from app.utils.pagination import keyset_page
 
 
 class ChatRoomRepository:
@@ -61,11 +63,9 @@ class MessageRepository:
         return Message.query.get(message_id)
 
     @staticmethod
-    def get_messages_between_users(
-        user1_id: int, user2_id: int, order_asc: bool = True
-    ) -> List[Message]:
-        """Busca mensagens entre dois usuários."""
-        query = Message.query.filter(
+    def _conversation_query(user1_id: int, user2_id: int):
+        """Mensagens trocadas entre dois usuários, nos dois sentidos."""
+        return Message.query.filter(
             db.or_(
                 db.and_(
                     Message.sender_id == user1_id,
@@ -77,12 +77,41 @@ class MessageRepository:
                 ),
             )
         )
+
+    @staticmethod
+    def get_messages_between_users(
+        user1_id: int, user2_id: int, order_asc: bool = True
+    ) -> List[Message]:
+        """Busca mensagens entre dois usuários."""
+        query = MessageRepository._conversation_query(user1_id, user2_id)
         if order_asc:
             query = query.order_by(Message.created_at.asc())
         else:
             query = query.order_by(Message.created_at.desc())
         return query.all()
 
+    @staticmethod
+    def get_messages_page(
+        user1_id: int,
+        user2_id: int,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Message], bool]:
+        """
+        Página de mensagens entre dois usuários (cursor por id).
+
+        Returns:
+            Tupla (mensagens em ordem cronológica, has_more)
+        """
+        return keyset_page(
+            MessageRepository._conversation_query(user1_id, user2_id),
+            Message,
+            before_id=before_id,
+            after_id=after_id,
+            limit=limit,
+        )
+
     @staticmethod
     def create(
         sender_id: int,
@@ -116,6 +145,18 @@ class MessageRepository:
         """Conta mensagens não lidas de um usuário."""
         return Message.query.filter_by(recipient_id=user_id, is_read=False).count()
 
+    @staticmethod
+    def mark_conversation_as_read(recipient_id: int, sender_id: int) -> int:
+        """Marca como lidas, num UPDATE, as mensagens recebidas de um usuário."""
+        updated = Message.query.filter_by(
+            recipient_id=recipient_id, sender_id=sender_id, is_read=False
+        ).update(
+            {"is_read": True, "read_at": datetime.now(timezone.utc)},
+            synchronize_session=False,
+        )
+        db.session.commit()
+        return updated
+
     @staticmethod
     def mark_as_read(message: Message):
         """Marca mensagem como lida."""
@@ -40,14 +40,13 @@ def room(room_id):
         abort(403)
 
     # Marcar mensagens como lidas
-    ChatService.mark_room_as_read(
-        room_info.room, current_user.id, room_info.messages
-    )
+    ChatService.mark_room_as_read(room_info.room, current_user.id)
 
     return render_template(
         "chat/room.html",
         chat_room=room_info.room,
         messages=room_info.messages,
+        has_more=room_info.has_more,
         client=room_info.client,
     )
 
@@ -85,13 +84,24 @@ def send_message():
 @bp.route("/api/messages/<int:room_id>")
 @login_required
 def get_messages(room_id):
-    """API para buscar mensagens de uma sala."""
-    messages, error = MessageService.get_room_messages(room_id, current_user.id)
+    """
+    API para buscar mensagens de uma sala.
+
+    Query params: before_id (histórico anterior), after_id (novas desde a
+    última recebida) e limit.
+    """
+    page, error = MessageService.get_room_messages(
+        room_id,
+        current_user.id,
+        before_id=request.args.get("before_id", type=int),
+        after_id=request.args.get("after_id", type=int),
+        limit=request.args.get("limit", type=int),
+    )
 
     if error:
         return jsonify({"error": error}), 403
 
-    return jsonify({"messages": [msg.to_dict() for msg in messages]})
+    return jsonify(page.to_dict())
 
 
 @bp.route("/api/mark-read/<int:message_id>", methods=["POST"])
@@ -18,6 +18,8 @@ from app.chat.repository import (
     MessageRepository,
 )
 from app.models import ChatRoom, Client, Message
+from app.services.realtime import realtime
+from app.utils.pagination import PaginationHelper
 
 
 @dataclass
@@ -27,6 +29,27 @@ class ChatRoomInfo:
     room: ChatRoom
     messages: List[Message]
     client: Client
+    has_more: bool = False
+
+
+@dataclass
+class MessagePage:
+    """Página de mensagens de uma conversa (cursor por id)."""
+
+    messages: List[Message]
+    has_more: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "messages": [msg.to_dict() for msg in self.messages],
+            "has_more": self.has_more,
+        }
+
+
+def chat_page_size(limit: Optional[int] = None) -> int:
+    """Tamanho da página do histórico (CHAT_PAGE_SIZE, máx. 100)."""
+    default = current_app.config.get("CHAT_PAGE_SIZE", 50)
+    return max(1, min(limit or default, PaginationHelper.MAX_PER_PAGE))
 
 
 class ChatService:
@@ -66,19 +89,19 @@ class ChatService:
         if user_id != chat_room.lawyer_id:
             return None, "Sem permissão"
 
-        # Buscar mensagens
+        # Só a página mais recente; o histórico vem por /api/messages
         client_user_id = chat_room.client.user_id if chat_room.client else None
+        messages, has_more = [], False
         if client_user_id:
-            messages = MessageRepository.get_messages_between_users(
-                user_id, client_user_id
+            messages, has_more = MessageRepository.get_messages_page(
+                user_id, client_user_id, limit=chat_page_size()
             )
-        else:
-            messages = []
 
         return ChatRoomInfo(
             room=chat_room,
             messages=messages,
             client=chat_room.client,
+            has_more=has_more,
         ), None
 
     @classmethod
@@ -119,14 +142,12 @@ class ChatService:
         return chat_room, True
 
     @classmethod
-    def mark_room_as_read(
-        cls, chat_room: ChatRoom, user_id: int, messages: List[Message]
-    ):
-        """Marca sala e mensagens como lidas."""
+    def mark_room_as_read(cls, chat_room: ChatRoom, user_id: int):
+        """Marca sala e mensagens recebidas como lidas."""
         chat_room.mark_as_read_by(user_id)
-        for msg in messages:
-            if msg.recipient_id == user_id and not msg.is_read:
-                msg.mark_as_read()
+        client_user_id = chat_room.client.user_id if chat_room.client else None
+        if client_user_id:
+            MessageRepository.mark_conversation_as_read(user_id, client_user_id)
 
 
 class MessageService:
@@ -158,6 +179,7 @@ class MessageService:
         )
 
         # Atualizar chat room
+        chat_room = None
         if client_id:
             chat_room = ChatRoomRepository.find_by_lawyer_and_client(
                 sender_id, client_id
@@ -165,17 +187,39 @@ class MessageService:
             if chat_room:
                 ChatRoomRepository.update_last_message(chat_room, message)
 
+        cls.publish_new_message(message, chat_room.id if chat_room else None)
         return message, None
 
+    @classmethod
+    def publish_new_message(cls, message: Message, room_id: Optional[int] = None):
+        """Empurra a mensagem e o novo total de não lidas ao destinatário."""
+        realtime.publish(
+            message.recipient_id,
+            "chat_message",
+            {
+                "room_id": room_id,
+                "message": message.to_dict(),
+                "unread": cls.get_unread_count(message.recipient_id),
+            },
+        )
+
     @classmethod
     def get_room_messages(
-        cls, room_id: int, user_id: int
-    ) -> Tuple[Optional[List[Message]], Optional[str]]:
+        cls,
+        room_id: int,
+        user_id: int,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[Optional[MessagePage], Optional[str]]:
         """
-        Busca mensagens de uma sala.
+        Busca uma página de mensagens de uma sala.
+
+        Sem cursor traz as mais recentes; `before_id` carrega o histórico
+        anterior e `after_id` só o que chegou depois (sincronização).
 
         Returns:
-            Tupla (messages, error_message)
+            Tupla (MessagePage, error_message)
         """
         chat_room = ChatRoomRepository.find_by_id(room_id)
         if not chat_room:
@@ -185,14 +229,17 @@ class MessageService:
             return None, "Sem permissão"
 
         client_user_id = chat_room.client.user_id if chat_room.client else None
-        if client_user_id:
-            messages = MessageRepository.get_messages_between_users(
-                user_id, client_user_id
-            )
-        else:
-            messages = []
-
-        return messages, None
+        if not client_user_id:
+            return MessagePage(messages=[]), None
+
+        messages, has_more = MessageRepository.get_messages_page(
+            user_id,
+            client_user_id,
+            before_id=before_id,
+            after_id=after_id,
+            limit=chat_page_size(limit),
+        )
+        return MessagePage(messages=messages, has_more=has_more), None
 
     @classmethod
     def mark_message_read(
@@ -272,6 +319,7 @@ class FileUploadService:
         )
 
         # Atualizar chat room
+        chat_room = None
         if client_id:
             chat_room = ChatRoomRepository.find_by_lawyer_and_client(
                 sender_id, client_id
@@ -279,8 +327,22 @@ class FileUploadService:
             if chat_room:
                 ChatRoomRepository.update_last_message(chat_room, message)
 
+        cls.publish_new_message(message, chat_room.id if chat_room else None)
         return message, None
 
+    @classmethod
+    def publish_new_message(cls, message: Message, room_id: Optional[int] = None):
+        """Empurra a mensagem e o novo total de não lidas ao destinatário."""
+        realtime.publish(
+            message.recipient_id,
+            "chat_message",
+            {
+                "room_id": room_id,
+                "message": message.to_dict(),
+                "unread": cls.get_unread_count(message.recipient_id),
+            },
+        )
+
     @classmethod
     def get_file_path(
         cls, message_id: int, user_id: int
@@ -14,6 +14,18 @@ def init_app(app):
     app.cli.add_command(init_features_cmd)
     app.cli.add_command(init_office_plans_cmd)
     app.cli.add_command(reorder_sections_cmd)
+    app.cli.add_command(search_reindex_cmd)
+    app.cli.add_command(check_petition_templates_cmd)
+    app.cli.add_command(datajud_refresh_cmd)
+    app.cli.add_command(bcb_sync_cmd)
+    app.cli.add_command(usage_rollup_backfill_cmd)
+    app.cli.add_command(usage_rollup_check_cmd)
+    app.cli.add_command(analytics_refresh_cmd)
+    app.cli.add_command(holidays_import_cmd)
+    app.cli.add_command(holidays_list_cmd)
+    app.cli.add_command(email_worker_cmd)
+    app.cli.add_command(digests_send_cmd)
+    app.cli.add_command(credits_release_expired_cmd)
 
 
 @click.command("renew-credits")
@@ -739,3 +751,424 @@ def reorder_sections_cmd(dry_run):
 
     if dry_run:
         click.echo("\n💡 Execute sem --dry-run para aplicar as alterações")
+
+
+@click.command("search-reindex")
+@click.option("--batch-size", default=1000, help="Linhas inseridas por lote")
+@with_appcontext
+def search_reindex_cmd(batch_size):
+    """
+    Reconstrói o índice da busca global (clientes, processos, petições e documentos).
+    Necessário após a migração inicial ou cargas feitas fora do ORM.
+
+    Uso:
+        flask search-reindex
+        flask search-reindex --batch-size 5000
+    """
+    from app.services.search_index import SearchIndexService
+
+    click.echo("🔎 Reconstruindo índice de busca...")
+
+    totals = SearchIndexService.rebuild(batch_size=batch_size)
+
+    for entity_type, count in totals.items():
+        click.echo(f"   ✅ {entity_type}: {count} registros")
+    click.echo(f"\n📊 Total indexado: {sum(totals.values())}")
+
+
+@click.command("check-petition-templates")
+@with_appcontext
+def check_petition_templates_cmd():
+    """
+    Valida e pré-compila os templates Jinja2 de todos os modelos de petição.
+    Aponta templates salvos antes da validação que não compilam mais e aquece
+    o cache de bytecode.
+
+    Uso:
+        flask check-petition-templates
+    """
+    from app.models import PetitionModel
+    from app.services.petition_templates import (
+        petition_template_engine,
+        validate_template,
+    )
+
+    click.echo("🧩 Verificando templates dos modelos de petição...")
+
+    invalid = 0
+    models = PetitionModel.query.filter(PetitionModel.template_content.isnot(None))
+    for petition_model in models:
+        errors = validate_template(petition_model.template_content)
+        if errors:
+            invalid += 1
+            click.echo(f"   ❌ {petition_model.name} (ID {petition_model.id})")
+            for error in errors:
+                click.echo(f"      - {error}")
+            continue
+        petition_template_engine.get_template(
+            petition_model.template_content,
+            origin="petition_model",
+            object_id=petition_model.id,
+        )
+
+    click.echo(f"\n📊 Templates com erro: {invalid}")
+
+
+@click.command("datajud-refresh")
+@click.option("--user-id", type=int, default=None, help="Atualiza apenas os processos deste usuário")
+@click.option("--batch-size", default=200, help="Processos consultados por lote")
+@with_appcontext
+def datajud_refresh_cmd(user_id, batch_size):
+    """
+    Atualiza em lote os processos ativos com os andamentos do DataJud.
+    Pensado para o job noturno; as consultas rodam em paralelo e reaproveitam
+    o pool de conexões.
+
+    Uso:
+        flask datajud-refresh
+        flask datajud-refresh --user-id 42
+    """
+    from app.models import Process
+    from app.services.datajud_service import DataJudService
+
+    click.echo("⚖️  Atualizando processos a partir do DataJud...")
+
+    query = Process.query.filter(
+        Process.process_number.isnot(None),
+        Process.status.notin_(["archived", "finished"]),
+    )
+    if user_id:
+        query = query.filter(Process.user_id == user_id)
+
+    totals = {"checked": 0, "found": 0, "errors": 0, "movements": 0}
+    last_id = 0
+    while True:
+        batch = (
+            query.filter(Process.id > last_id)
+            .order_by(Process.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for key, value in DataJudService.refresh_processes(batch).items():
+            totals[key] += value
+
+    click.echo(f"   🔎 Consultados: {totals['checked']}")
+    click.echo(f"   ✅ Encontrados: {totals['found']}")
+    click.echo(f"   ❌ Erros: {totals['errors']}")
+    click.echo(f"\n📊 Novos andamentos: {totals['movements']}")
+
+
+@click.command("bcb-sync")
+@click.option("--indice", "-i", multiple=True, help="Índice a sincronizar (padrão: todos)")
+@click.option("--timeout", default=60, help="Timeout de cada consulta à API do BCB")
+@with_appcontext
+def bcb_sync_cmd(indice, timeout):
+    """
+    Atualiza a cópia local das séries do BCB usadas pela calculadora.
+    Busca apenas os meses posteriores ao último armazenado; a primeira
+    execução carrega o histórico desde BCB_SERIES_START.
+
+    Uso:
+        flask bcb-sync
+        flask bcb-sync -i IPCA -i SELIC
+    """
+    from app.services.bcb_api import SERIES_BCB
+    from app.services.bcb_series import bcb_series_store
+
+    indices = [i.upper() for i in indice]
+    invalidos = [i for i in indices if i not in SERIES_BCB]
+    if invalidos:
+        raise click.BadParameter(
+            f"Índices desconhecidos: {', '.join(invalidos)}", param_hint="--indice"
+        )
+
+    click.echo("📈 Sincronizando séries do BCB...")
+
+    resultado = bcb_series_store.sync(indices or None, timeout=timeout)
+
+    falhas = 0
+    for nome, novos in resultado.items():
+        if novos is None:
+            falhas += 1
+            click.echo(f"   ❌ {nome}: API do BCB não respondeu")
+        else:
+            ultimo = bcb_series_store.ultimo(nome)
+            ate = ultimo[0].strftime("%m/%Y") if ultimo else "-"
+            click.echo(f"   ✅ {nome}: {novos} novos meses (até {ate})")
+
+    if falhas:
+        raise SystemExit(1)
+
+
+@click.command("usage-rollup-backfill")
+@click.option("--user-id", type=int, default=None, help="Reconstrói apenas este usuário")
+@click.option("--batch-size", default=500, help="Usuários processados por lote")
+@with_appcontext
+def usage_rollup_backfill_cmd(user_id, batch_size):
+    """
+    Reconstrói os totais de uso de petições (petition_usage_rollups) de todos
+    os ciclos a partir de petition_usage. Necessário após a migração inicial.
+
+    Uso:
+        flask usage-rollup-backfill
+        flask usage-rollup-backfill --user-id 42
+    """
+    from app.billing import usage_rollup
+
+    click.echo("📊 Reconstruindo totais de uso de petições...")
+
+    result = usage_rollup.backfill(user_id=user_id, batch_size=batch_size)
+
+    click.echo(f"   👥 Usuários: {result['users']}")
+    click.echo(f"   📅 Ciclos: {result['rows']}")
+    click.echo(f"   ✏️  Linhas gravadas: {result['fixed']}")
+
+
+@click.command("usage-rollup-check")
+@click.option("--cycle", "-c", multiple=True, help="Ciclo YYYY-MM (padrão: atual e anterior)")
+@click.option("--all-cycles", is_flag=True, help="Confere todos os ciclos")
+@click.option("--user-id", type=int, default=None, help="Confere apenas este usuário")
+@click.option("--fix", is_flag=True, help="Corrige as divergências encontradas")
+@with_appcontext
+def usage_rollup_check_cmd(cycle, all_cycles, user_id, fix):
+    """
+    Confere os totais de uso de petições com a tabela petition_usage.
+    Sai com código 1 se houver divergência não corrigida. Rodar diariamente
+    com --fix.
+
+    Uso:
+        flask usage-rollup-check
+        flask usage-rollup-check --fix
+        flask usage-rollup-check -c 2026-09 --user-id 42
+    """
+    from datetime import datetime, timedelta, timezone
+
+    from app.billing import usage_rollup
+
+    if all_cycles:
+        cycles = None
+    elif cycle:
+        cycles = list(cycle)
+    else:
+        now = datetime.now(timezone.utc)
+        previous = now.replace(day=1) - timedelta(days=1)
+        cycles = [now.strftime("%Y-%m"), previous.strftime("%Y-%m")]
+
+    click.echo(
+        f"🔍 Conferindo totais de uso ({'todos os ciclos' if cycles is None else ', '.join(cycles)})..."
+    )
+
+    drifts = usage_rollup.find_drift(
+        cycles=cycles, user_ids=[user_id] if user_id is not None else None
+    )
+
+    for drift in drifts:
+        click.echo(
+            f"   ⚠️  user={drift.user_id} ciclo={drift.billing_cycle}: {drift.describe()}"
+        )
+
+    if not drifts:
+        click.echo("   ✅ Nenhuma divergência")
+        return
+
+    if fix:
+        fixed = usage_rollup.fix_drift(drifts)
+        click.echo(f"\n🔧 Corrigidas: {fixed}")
+    else:
+        click.echo(f"\n❌ Divergências: {len(drifts)} (use --fix para corrigir)")
+        raise SystemExit(1)
+
+
+@click.command("analytics-refresh")
+@click.option("--since", default=None, help="Reconstrói a partir desta data (AAAA-MM-DD)")
+@click.option("--full", is_flag=True, help="Reconstrói todo o histórico")
+@with_appcontext
+def analytics_refresh_cmd(since, full):
+    """
+    Atualiza os fatos diários dos dashboards administrativos (receita,
+    petições e IA). Sem opções, reconstrói apenas os dias desde a última
+    execução (menos ANALYTICS_REFRESH_LOOKBACK_DAYS). Rodar a cada poucos
+    minutos; a primeira execução processa todo o histórico.
+
+    Uso:
+        flask analytics-refresh
+        flask analytics-refresh --since 2026-01-01
+        flask analytics-refresh --full
+    """
+    from datetime import date
+
+    from flask import current_app
+
+    from app.services import admin_analytics
+
+    try:
+        since_day = date.fromisoformat(since) if since else None
+    except ValueError:
+        raise click.BadParameter("Use o formato AAAA-MM-DD", param_hint="--since")
+
+    click.echo("📊 Atualizando fatos de analytics...")
+
+    result = admin_analytics.refresh(
+        since=since_day,
+        full=full,
+        lookback_days=current_app.config.get(
+            "ANALYTICS_REFRESH_LOOKBACK_DAYS", admin_analytics.DEFAULT_LOOKBACK_DAYS
+        ),
+    )
+
+    click.echo(f"   📅 Dias: {result['since']:%d/%m/%Y} a {result['until']:%d/%m/%Y}")
+    for table, count in result["rows"].items():
+        click.echo(f"   ✅ {table}: {count} linhas")
+
+
+@click.command("holidays-import")
+@click.argument("csv_file", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "--replace-year", type=int, default=None, help="Apaga os feriados do ano antes"
+)
+@with_appcontext
+def holidays_import_cmd(csv_file, replace_year):
+    """
+    Importa feriados estaduais, municipais, de tribunal e suspensões de
+    expediente para o calendário forense. CSV com cabeçalho
+    data,nome,uf,tribunal (uf e tribunal vazios = todos). Linhas já
+    cadastradas (mesma data, UF e tribunal) são atualizadas.
+
+    Uso:
+        flask holidays-import feriados_2027.csv
+        flask holidays-import feriados_2027.csv --replace-year 2027
+    """
+    import csv
+    from datetime import date
+
+    from app import db
+    from app.models import JudicialHoliday
+    from app.services.business_calendar import business_calendar, normalize_key
+
+    if replace_year:
+        removed = JudicialHoliday.query.filter(
+            JudicialHoliday.day.between(
+                date(replace_year, 1, 1), date(replace_year, 12, 31)
+            )
+        ).delete(synchronize_session=False)
+        click.echo(f"🗑️  Removidos {removed} feriados de {replace_year}")
+
+    existing = {(h.day, h.uf, h.court): h for h in JudicialHoliday.query.all()}
+    created = updated = 0
+    for line, row in enumerate(csv.DictReader(csv_file), start=2):
+        try:
+            day = date.fromisoformat(row["data"].strip())
+        except (KeyError, ValueError):
+            raise click.BadParameter(f"Linha {line}: data inválida (use AAAA-MM-DD)")
+        uf, court = normalize_key(row.get("uf"), row.get("tribunal"))
+        name = (row.get("nome") or "").strip() or "Feriado"
+
+        holiday = existing.get((day, uf, court))
+        if holiday:
+            holiday.name = name
+            updated += 1
+        else:
+            holiday = JudicialHoliday(day=day, name=name, uf=uf, court=court)
+            db.session.add(holiday)
+            existing[(day, uf, court)] = holiday
+            created += 1
+
+    db.session.commit()
+    business_calendar.invalidate()
+    click.echo(f"✅ Feriados: {created} novos, {updated} atualizados")
+
+
+@click.command("holidays-list")
+@click.option("--year", type=int, default=None, help="Ano (padrão: atual)")
+@click.option("--uf", default=None, help="UF do calendário")
+@click.option("--court", default=None, help="Tribunal (valor de Process.court)")
+@with_appcontext
+def holidays_list_cmd(year, uf, court):
+    """
+    Lista os dias sem expediente forense (exceto fins de semana) do
+    calendário de uma UF/tribunal.
+
+    Uso:
+        flask holidays-list
+        flask holidays-list --year 2027 --uf SP --court "Justiça Federal"
+    """
+    from datetime import date
+
+    from app.services.business_calendar import business_calendar
+
+    year = year or date.today().year
+    closed = business_calendar.closed_days(
+        date(year, 1, 1), date(year, 12, 31), uf=uf, court=court
+    )
+    for day, name in closed:
+        click.echo(f"   {day.strftime('%d/%m/%Y')} ({day.strftime('%a')}) {name}")
+    click.echo(f"\n📅 {len(closed)} dias sem expediente em {year}")
+
+
+@click.command("email-worker")
+@click.option("--once", is_flag=True, help="Esvazia a fila e sai")
+@with_appcontext
+def email_worker_cmd(once):
+    """
+    Worker da fila de saída de emails (email_outbox), para rodar fora do
+    processo web (com OUTBOUND_EMAIL_WORKERS=0 no web).
+
+    Uso:
+        flask email-worker
+        flask email-worker --once
+    """
+    from app.services.outbound_email import outbound_email
+
+    if not outbound_email.available:
+        click.echo("❌ Nenhum transporte de email configurado (RESEND_API_KEY ou MAIL_SERVER)")
+        raise SystemExit(1)
+
+    click.echo(f"📬 Transporte: {outbound_email.transport.name}")
+    if once:
+        sent = outbound_email.dispatch()
+        click.echo(f"✅ {sent} emails processados")
+        return
+
+    click.echo("🔄 Aguardando emails (Ctrl+C para sair)...")
+    try:
+        outbound_email.run_forever()
+    except KeyboardInterrupt:
+        click.echo("\n👋 Worker encerrado")
+
+
+@click.command("digests-send")
+@with_appcontext
+def digests_send_cmd():
+    """
+    Envia os digests de notificação de quem está no horário configurado
+    (no próprio fuso). Agendar a cada hora.
+
+    Uso:
+        flask digests-send
+    """
+    from app.services.digest_builder import build_digests
+
+    run = build_digests()
+    click.echo(
+        f"📬 {run.emails} digests enfileirados "
+        f"({run.items} notificações, {run.users} usuários na hora)"
+    )
+
+
+@click.command("credits-release-expired")
+@with_appcontext
+def credits_release_expired_cmd():
+    """
+    Devolve ao saldo os créditos de reservas vencidas (jobs de IA que não
+    terminaram, ex: worker reiniciado). Agendar a cada 15 minutos.
+
+    Uso:
+        flask credits-release-expired
+    """
+    from app.services.credit_ledger import credit_ledger
+
+    released = credit_ledger.release_expired()
+    click.echo(f"💳 {released} reservas de créditos liberadas")
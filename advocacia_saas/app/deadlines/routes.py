@@ -13,6 +13,7 @@ from app.deadlines.repository import (
     ClientForDeadlineRepository,
     DeadlineRepository,
 )
+from app.services.business_calendar import business_calendar
 from app.utils.pagination import PaginationHelper
 
 
@@ -191,73 +192,102 @@ def api_upcoming():
     return jsonify({"deadlines": [d.to_dict() for d in deadlines]})
 
 
-@bp.route("/api/send-alerts", methods=["POST"])
-def api_send_alerts():
-    """API: Enviar alertas de prazos próximos (cron job)
+@bp.route("/api/due-date")
+@login_required
+def api_due_date():
+    """API: Vencimento de um prazo pelo calendário forense
 
-    Requer header: X-API-Key com valor de CRON_API_KEY
+    Parâmetros: start (AAAA-MM-DD), days, business (1 = dias úteis, padrão)
+    e court (valor de Process.court, opcional)
     """
-    import os
-
-    from flask import current_app
+    try:
+        start = datetime.strptime(request.args.get("start", "")[:10], "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"error": "Data inicial inválida"}), 400
+    days = request.args.get("days", type=int)
+    if days is None or not 0 <= days <= 3650:
+        return jsonify({"error": "Quantidade de dias inválida"}), 400
+
+    business = request.args.get("business", 1, type=int) == 1
+    court = request.args.get("court")
+    due = business_calendar.due_date(
+        start.date(), days, business_days=business, uf=current_user.uf, court=court
+    )
+    return jsonify(
+        {
+            "due_date": due.isoformat(),
+            "business_days": business,
+            "days_until": business_calendar.business_days_between(
+                datetime.now().date(), due, uf=current_user.uf, court=court
+            ),
+        }
+    )
 
-    from app import db
-    from app.models import Notification
-    from app.utils.email import send_email
 
-    # Autenticação por API key
-    api_key = request.headers.get("X-API-Key")
-    expected_key = os.environ.get("CRON_API_KEY")
+@bp.route("/api/holidays")
+@login_required
+def api_holidays():
+    """API: Feriados e recesso forense como eventos de fundo do calendário"""
+    start_str = request.args.get("start")
+    end_str = request.args.get("end")
 
-    if not expected_key:
-        current_app.logger.warning(
-            "CRON_API_KEY não configurada - endpoint desabilitado"
+    try:
+        start_date = (
+            datetime.strptime(start_str[:10], "%Y-%m-%d").date()
+            if start_str
+            else datetime.utcnow().date()
         )
-        return jsonify({"error": "Endpoint não configurado"}), 503
+        end_date = (
+            datetime.strptime(end_str[:10], "%Y-%m-%d").date()
+            if end_str
+            else (datetime.utcnow() + timedelta(days=90)).date()
+        )
+    except ValueError:
+        start_date = datetime.utcnow().date()
+        end_date = (datetime.utcnow() + timedelta(days=90)).date()
 
-    if not api_key or api_key != expected_key:
-        current_app.logger.warning(
-            f"Tentativa de acesso não autorizado ao cron de alertas"
+    closed = business_calendar.closed_days(
+        start_date, end_date, uf=current_user.uf, court=request.args.get("court")
+    )
+
+    # Dias consecutivos com o mesmo motivo (ex.: recesso) viram um só evento
+    events = []
+    for day, name in closed:
+        last = events[-1] if events else None
+        if last and last["title"] == name and last["end"] == day.isoformat():
+            last["end"] = (day + timedelta(days=1)).isoformat()
+            continue
+        events.append(
+            {
+                "title": name,
+                "start": day.isoformat(),
+                "end": (day + timedelta(days=1)).isoformat(),
+                "allDay": True,
+                "display": "background",
+                "backgroundColor": "#f8d7da",
+                "extendedProps": {"type": "holiday"},
+            }
         )
-        return jsonify({"error": "API key inválida"}), 401
-
-    # Buscar prazos que precisam de alerta
-    deadlines = DeadlineRepository.get_pending_alerts()
-
-    alerts_sent = 0
-
-    for deadline in deadlines:
-        days_until = deadline.days_until()
-
-        # Enviar alerta se estiver dentro do prazo configurado
-        if 0 <= days_until <= deadline.alert_days_before:
-            try:
-                # Enviar email
-                send_email(
-                    to=deadline.user.email,
-                    subject=f"⚠️ Prazo próximo: {deadline.title}",
-                    template="emails/deadline_alert.html",
-                    deadline=deadline,
-                    days_until=days_until,
-                )
 
-                # Criar notificação
-                Notification.create_notification(
-                    user_id=deadline.user_id,
-                    notification_type="deadline",
-                    title="Prazo próximo",
-                    message=f"{deadline.title} vence em {days_until} dias",
-                    link=url_for("deadlines.view", deadline_id=deadline.id),
-                )
+    return jsonify(events)
+
 
-                # Marcar como enviado
-                DeadlineRepository.mark_alert_sent(deadline)
-                alerts_sent += 1
+@bp.route("/api/send-alerts", methods=["POST"])
+def api_send_alerts():
+    """API: Enviar alertas de prazos próximos (cron job)
 
-            except Exception as e:
-                current_app.logger.error(f"Erro ao enviar alerta: {str(e)}")
+    Requer header: X-API-Key com valor de CRON_API_KEY
+    """
+    from app.deadlines.services import DeadlineAlertService
+
+    valid, error = DeadlineAlertService.validate_api_key(
+        request.headers.get("X-API-Key")
+    )
+    if not valid:
+        status = 503 if error == "Endpoint não configurado" else 401
+        return jsonify({"error": error}), status
 
-    db.session.commit()
+    alerts_sent = DeadlineAlertService.send_pending_alerts()
 
     return jsonify({"success": True, "alerts_sent": alerts_sent})
 
@@ -7,7 +7,7 @@ import os
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
-from flask import current_app, url_for
+from flask import current_app
 
 from app import db
 from app.deadlines.repository import (
@@ -15,9 +15,7 @@ from app.deadlines.repository import (
     ClientForDeadlineRepository,
     DeadlineRepository,
 )
-from app.models import Notification
-from app.processes.automation import run_process_automations
-from app.utils.email import send_email
+from app.services.deadline_scanner import scan_deadline_alerts
 from app.utils.pagination import PaginationHelper
 
 
@@ -196,53 +194,8 @@ class DeadlineAlertService:
 
     @staticmethod
     def send_pending_alerts() -> int:
-        """Envia alertas para prazos pendentes"""
-        deadlines = DeadlineRepository.get_pending_alerts()
-        alerts_sent = 0
-
-        for deadline in deadlines:
-            days_until = deadline.days_until()
-
-            if 0 <= days_until <= deadline.alert_days_before:
-                try:
-                    run_process_automations(
-                        user_id=deadline.user_id,
-                        event_data={
-                            "trigger_type": "deadline",
-                            "process_id": deadline.process_id,
-                            "process_title": deadline.process.title
-                            if deadline.process
-                            else None,
-                            "days_before": int(days_until),
-                            "deadline_id": deadline.id,
-                            "deadline_title": deadline.title,
-                        },
-                    )
-
-                    send_email(
-                        to=deadline.user.email,
-                        subject=f"⚠️ Prazo próximo: {deadline.title}",
-                        template="emails/deadline_alert.html",
-                        deadline=deadline,
-                        days_until=days_until,
-                    )
-
-                    Notification.create_notification(
-                        user_id=deadline.user_id,
-                        notification_type="deadline",
-                        title="Prazo próximo",
-                        message=f"{deadline.title} vence em {days_until} dias",
-                        link=url_for("deadlines.view", deadline_id=deadline.id),
-                    )
-
-                    DeadlineRepository.mark_alert_sent(deadline)
-                    alerts_sent += 1
-
-                except Exception as e:
-                    current_app.logger.error(f"Erro ao enviar alerta: {str(e)}")
-
-        db.session.commit()
-        return alerts_sent
+        """Envia alertas para prazos pendentes (varredura em lote)"""
+        return scan_deadline_alerts().notifications
 
 
 class AgendaBlockService:
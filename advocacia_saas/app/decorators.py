@@ -189,8 +189,8 @@ def require_feature(feature_slug, redirect_to=None, message=None):
             if not current_user.is_authenticated:
                 return redirect(url_for("auth.login"))
 
-            # Verificar acesso à feature
-            if not current_user.has_feature(feature_slug):
+            # Verificar acesso à feature (snapshot do plano, cache por requisição)
+            if not current_user.entitlements.has_feature(feature_slug):
                 # Mensagem padrão ou customizada
                 default_message = f"Seu plano atual não inclui este recurso. Faça upgrade para acessar."
                 flash_message = message or default_message
@@ -246,12 +246,14 @@ def check_feature_limit(feature_slug, current_count=None):
             if not current_user.is_authenticated:
                 return redirect(url_for("auth.login"))
 
+            entitlements = current_user.entitlements
+
             # Master não tem limites
-            if current_user.is_master:
+            if entitlements.is_master:
                 return f(*args, **kwargs)
 
             # Obter limite da feature
-            limit = current_user.get_feature_limit(feature_slug)
+            limit = entitlements.feature_limit(feature_slug)
 
             # Se não tem limite (None ou -1), permitir
             if limit is None or limit == -1:
@@ -51,6 +51,7 @@ def upload():
             tags=request.form.get("tags"),
             is_visible_to_client=request.form.get("is_visible_to_client") == "on",
             is_confidential=request.form.get("is_confidential") == "on",
+            convert_to_pdf=request.form.get("convert_to_pdf") == "on",
         )
 
         if not result.success:
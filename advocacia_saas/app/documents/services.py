@@ -14,6 +14,7 @@ from werkzeug.utils import secure_filename
 
 from app.documents.repository import ClientRepository, DocumentRepository
 from app.models import Client, Document
+from app.services import pdf_converter
 from app.utils.pagination import PaginationHelper
 
 ALLOWED_EXTENSIONS = {
@@ -99,10 +100,14 @@ class DocumentService:
         tags: Optional[str] = None,
         is_visible_to_client: bool = False,
         is_confidential: bool = False,
+        convert_to_pdf: bool = False,
     ) -> UploadResult:
         """
         Faz upload de documento.
 
+        Com convert_to_pdf, imagens, TXT e documentos Office são gravados já
+        convertidos em PDF (o original é mantido se a conversão falhar).
+
         Returns:
             UploadResult com sucesso ou erro.
         """
@@ -122,8 +127,17 @@ class DocumentService:
                 success=False, error_message="Cliente e título são obrigatórios"
             )
 
-        # Salvar arquivo
         filename = secure_filename(file.filename)
+        content_type = file.content_type
+        converted_data = None
+        if convert_to_pdf and filename.rsplit(".", 1)[1].lower() != "pdf":
+            pdf_data, pdf_filename = pdf_converter.convert_to_pdf(file.read(), filename)
+            file.stream.seek(0)
+            if pdf_filename.endswith(".pdf"):
+                converted_data, filename = pdf_data, pdf_filename
+                content_type = "application/pdf"
+
+        # Salvar arquivo
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         unique_filename = f"{timestamp}_{filename}"
 
@@ -133,7 +147,11 @@ class DocumentService:
         os.makedirs(upload_folder, exist_ok=True)
 
         filepath = os.path.join(upload_folder, unique_filename)
-        file.save(filepath)
+        if converted_data is not None:
+            with open(filepath, "wb") as f:
+                f.write(converted_data)
+        else:
+            file.save(filepath)
 
         file_size = os.path.getsize(filepath)
         file_extension = "." + filename.rsplit(".", 1)[1].lower()
@@ -149,7 +167,7 @@ class DocumentService:
             filename=filename,
             file_path=f"uploads/documents/{unique_filename}",
             file_size=file_size,
-            file_type=file.content_type,
+            file_type=content_type,
             file_extension=file_extension,
             tags=tags,
             is_visible_to_client=is_visible_to_client,
@@ -7,6 +7,7 @@ from datetime import datetime, timezone
 from typing import Any
 
 from flask import request
+from sqlalchemy.orm import contains_eager
 
 from app import db
 from app.models import (
@@ -33,6 +34,15 @@ class ConsentRepository:
     def get_all() -> list[DataConsent]:
         return DataConsent.query.all()
 
+    @staticmethod
+    def export_query():
+        """Consentimentos com o e-mail do titular, para exportação em lotes"""
+        return (
+            DataConsent.query.outerjoin(DataConsent.user)
+            .options(contains_eager(DataConsent.user))
+            .order_by(DataConsent.id)
+        )
+
     @staticmethod
     def create(data: dict[str, Any]) -> DataConsent:
         consent = DataConsent(
@@ -293,6 +303,20 @@ class ProcessingLogRepository:
 
         return query.order_by(DataProcessingLog.processed_at.desc()).limit(limit).all()
 
+    @staticmethod
+    def export_query(date_filter: datetime | None = None):
+        """Log completo (sem limite) com o e-mail do titular, para exportação"""
+        query = DataProcessingLog.query.outerjoin(DataProcessingLog.user).options(
+            contains_eager(DataProcessingLog.user)
+        )
+
+        if date_filter:
+            query = query.filter(
+                db.func.date(DataProcessingLog.processed_at) == date_filter.date()
+            )
+
+        return query.order_by(DataProcessingLog.id)
+
     @staticmethod
     def create(data: dict[str, Any]) -> DataProcessingLog:
         log_entry = DataProcessingLog(
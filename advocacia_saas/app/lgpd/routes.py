@@ -18,6 +18,8 @@ from app.models import (
     DataProcessingLog,
     DeletionRequest,
 )
+from app.services import export_engine
+from app.services.export_engine import export_service
 
 # =============================================================================
 # PÁGINAS WEB
@@ -421,6 +423,141 @@ def get_audit_log():
     return jsonify(result)
 
 
+def _export_date(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else ""
+
+
+@export_service.register(
+    "lgpd_consents",
+    (
+        "ID",
+        "Usuário",
+        "Email",
+        "Tipo",
+        "Propósito",
+        "Consentido",
+        "Versão",
+        "Consentido em",
+        "Retirado em",
+        "Expira em",
+        "Método",
+        "IP",
+    ),
+    count=lambda params: ConsentRepository.export_query().count(),
+    sheet_title="Consentimentos",
+)
+def _consent_export_rows(params):
+    for consent in export_engine.iter_query(ConsentRepository.export_query()):
+        yield [
+            consent.id,
+            consent.user_id,
+            consent.user.email if consent.user else "",
+            consent.consent_type,
+            consent.consent_purpose,
+            "Sim" if consent.consented else "Não",
+            consent.consent_version or "",
+            _export_date(consent.consented_at),
+            _export_date(consent.withdrawn_at),
+            _export_date(consent.expires_at),
+            consent.consent_method or "",
+            consent.ip_address or "",
+        ]
+
+
+def _audit_log_export_query(params):
+    date_filter = params.get("date")
+    return ProcessingLogRepository.export_query(
+        datetime.fromisoformat(date_filter) if date_filter else None
+    )
+
+
+@export_service.register(
+    "lgpd_audit_log",
+    (
+        "ID",
+        "Usuário",
+        "Email",
+        "Ação",
+        "Categoria",
+        "Campos",
+        "Finalidade",
+        "Base Legal",
+        "Consentimento",
+        "Endpoint",
+        "IP",
+        "Processado em",
+    ),
+    count=lambda params: _audit_log_export_query(params).count(),
+    sheet_title="Log de Processamento",
+)
+def _audit_log_export_rows(params):
+    for log in export_engine.iter_query(_audit_log_export_query(params)):
+        yield [
+            log.id,
+            log.user_id,
+            log.user.email if log.user else "",
+            log.action,
+            log.data_category,
+            log.data_fields or "",
+            log.purpose,
+            log.legal_basis or "",
+            log.consent_id or "",
+            log.endpoint or "",
+            log.ip_address or "",
+            _export_date(log.processed_at),
+        ]
+
+
+@lgpd_bp.route("/admin/consents/export", methods=["GET"])
+@login_required
+def export_consents():
+    """Exporta todos os consentimentos em CSV/XLSX (apenas admin)"""
+    if not current_user.is_admin():
+        return jsonify({"error": "Acesso negado"}), 403
+
+    try:
+        fmt = export_engine.parse_format(request.args.get("format"))
+    except export_engine.ExportError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return export_service.respond(
+        "lgpd_consents",
+        fmt,
+        "lgpd_consentimentos",
+        current_user.id,
+        run_async=request.args.get("async", type=int) == 1,
+    )
+
+
+@lgpd_bp.route("/admin/audit-log/export", methods=["GET"])
+@login_required
+def export_audit_log():
+    """Exporta o log de processamento completo em CSV/XLSX (apenas admin)"""
+    if not current_user.is_admin():
+        return jsonify({"error": "Acesso negado"}), 403
+
+    try:
+        fmt = export_engine.parse_format(request.args.get("format"))
+    except export_engine.ExportError as e:
+        return jsonify({"error": str(e)}), 400
+
+    date_filter = request.args.get("date")
+    if date_filter:
+        try:
+            datetime.fromisoformat(date_filter)
+        except ValueError:
+            return jsonify({"error": "Formato de data inválido"}), 400
+
+    return export_service.respond(
+        "lgpd_audit_log",
+        fmt,
+        f"lgpd_log_processamento_{date_filter or 'completo'}",
+        current_user.id,
+        params={"date": date_filter},
+        run_async=request.args.get("async", type=int) == 1,
+    )
+
+
 @lgpd_bp.route("/admin/anonymization-request/<int:request_id>", methods=["GET"])
 @login_required
 def get_anonymization_request_details(request_id):
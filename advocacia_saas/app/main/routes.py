@@ -57,6 +57,13 @@ from app.schemas import (
     TestimonialSchema,
     UserPreferencesSchema,
 )
+from app.services.page_cache import (
+    TAG_PETITION_TYPES,
+    TAG_PLANS,
+    TAG_ROADMAP,
+    TAG_TESTIMONIALS,
+    page_cache,
+)
 from app.utils.error_messages import format_error_for_user
 
 # Ícones para categorias de petições
@@ -92,9 +99,16 @@ def favicon():
 
 
 @bp.route("/")
+@page_cache.cached_page(
+    tags=(TAG_PLANS, TAG_PETITION_TYPES, TAG_TESTIMONIALS, TAG_ROADMAP)
+)
 def index():
     plans = _get_public_plans()
-    petition_types = _get_implemented_petition_types()
+    petition_types = page_cache.fragment(
+        "implemented_petition_types",
+        (TAG_PETITION_TYPES,),
+        _get_implemented_petition_types,
+    )
 
     # Busca depoimentos aprovados (prioriza destacados)
     testimonials = (
@@ -104,25 +118,10 @@ def index():
         .all()
     )
 
-    # Busca dados do roadmap (apenas itens visíveis aos usuários)
-    public_roadmap_items = RoadmapItem.query.filter_by(visible_to_users=True).all()
-
-    roadmap_stats = {
-        "total": len(public_roadmap_items),
-        "completed": len([i for i in public_roadmap_items if i.status == "completed"]),
-        "in_progress": len(
-            [i for i in public_roadmap_items if i.status == "in_progress"]
-        ),
-        "planned": len([i for i in public_roadmap_items if i.status == "planned"]),
-    }
-
-    # Calcular progresso
-    if roadmap_stats["total"] > 0:
-        roadmap_stats["progress"] = round(
-            (roadmap_stats["completed"] / roadmap_stats["total"]) * 100, 1
-        )
-    else:
-        roadmap_stats["progress"] = 0
+    # Estatísticas do roadmap (apenas itens visíveis aos usuários)
+    roadmap_stats = page_cache.fragment(
+        "public_roadmap_stats", (TAG_ROADMAP,), _get_public_roadmap_stats
+    )
 
     # Buscar itens em destaque para mostrar na home
     featured_roadmap = []
@@ -495,6 +494,29 @@ def _current_cycle_label(cycle=None):
     return f"{month_label}/{year}"
 
 
+def _get_public_roadmap_stats():
+    """Contagem por status dos itens públicos do roadmap e progresso geral"""
+    counts = dict(
+        RoadmapItem.query.with_entities(RoadmapItem.status, func.count(RoadmapItem.id))
+        .filter_by(visible_to_users=True)
+        .group_by(RoadmapItem.status)
+        .all()
+    )
+    stats = {
+        "total": sum(counts.values()),
+        "completed": counts.get("completed", 0),
+        "in_progress": counts.get("in_progress", 0),
+        "planned": counts.get("planned", 0),
+    }
+
+    # Calcular progresso
+    if stats["total"] > 0:
+        stats["progress"] = round((stats["completed"] / stats["total"]) * 100, 1)
+    else:
+        stats["progress"] = 0
+    return stats
+
+
 def _get_implemented_petition_types():
     """Retorna os tipos de petição implementados para exibição pública."""
     types = (
@@ -834,6 +856,7 @@ def notification_settings():
 
 
 @bp.route("/sitemap.xml")
+@page_cache.cached_page(tags=(TAG_PLANS, TAG_PETITION_TYPES))
 def sitemap():
     """Sitemap XML dinâmico para SEO"""
     from datetime import datetime, timedelta
@@ -941,6 +964,7 @@ Sitemap: {url_for("main.sitemap", _external=True)}
 
 
 @bp.route("/roadmap")
+@page_cache.cached_page(tags=(TAG_ROADMAP,))
 def roadmap():
     """Página pública do roadmap de desenvolvimento"""
 
@@ -1007,6 +1031,7 @@ def roadmap():
 
 
 @bp.route("/roadmap/<slug>")
+@page_cache.cached_page(tags=(TAG_ROADMAP,))
 def roadmap_item(slug):
     """Página detalhada de um item do roadmap"""
 
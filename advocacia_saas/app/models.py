@@ -3,6 +3,7 @@ from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 from flask_login import UserMixin
+from sqlalchemy import DDL, event
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from app import db, login_manager
@@ -565,12 +566,20 @@ class User(UserMixin, db.Model):
     # FEATURE ACCESS METHODS (Sistema Modular)
     # =============================================================================
 
+    @property
+    def entitlements(self):
+        """Snapshot imutável de features/limites do plano (cache por requisição)"""
+        from app.services.entitlements import entitlement_resolver
+
+        return entitlement_resolver.for_user(self)
+
     def get_current_plan(self):
         """Retorna o plano atual do usuário"""
-        user_plan = self.plans.filter_by(is_current=True, status="active").first()
-        if user_plan:
-            return user_plan.plan
-        return None
+        if self.is_master:
+            user_plan = self.plans.filter_by(is_current=True, status="active").first()
+            return user_plan.plan if user_plan else None
+        plan_id = self.entitlements.plan_id
+        return db.session.get(BillingPlan, plan_id) if plan_id else None
 
     def has_feature(self, feature_slug):
         """
@@ -585,16 +594,7 @@ class User(UserMixin, db.Model):
         Returns:
             bool: True se tem acesso à feature
         """
-        # Master sempre tem acesso total
-        if self.is_master:
-            return True
-
-        # Buscar plano atual
-        plan = self.get_current_plan()
-        if not plan:
-            return False
-
-        return plan.has_feature(feature_slug)
+        return self.entitlements.has_feature(feature_slug)
 
     def get_feature_limit(self, feature_slug):
         """
@@ -606,15 +606,7 @@ class User(UserMixin, db.Model):
         Returns:
             int ou None: Limite da feature (None = ilimitado ou não aplicável)
         """
-        # Master não tem limites
-        if self.is_master:
-            return None  # Ilimitado
-
-        plan = self.get_current_plan()
-        if not plan:
-            return 0
-
-        return plan.get_feature_limit(feature_slug)
+        return self.entitlements.feature_limit(feature_slug)
 
     def get_monthly_credits(self, feature_slug):
         """
@@ -627,14 +619,7 @@ class User(UserMixin, db.Model):
         Returns:
             int: Quantidade de créditos mensais (0 se não tem a feature)
         """
-        if self.is_master:
-            return -1  # Ilimitado (representado por -1)
-
-        plan = self.get_current_plan()
-        if not plan or not plan.has_feature(feature_slug):
-            return 0
-
-        return plan.get_feature_limit(feature_slug) or 0
+        return self.entitlements.monthly_credits(feature_slug)
 
     def get_all_features(self):
         """
@@ -825,10 +810,11 @@ class User(UserMixin, db.Model):
         # Definir expiração em 10 minutos
         self.email_2fa_code = code
         self.email_2fa_code_expires = datetime.now(timezone.utc) + timedelta(minutes=10)
-        db.session.commit()
 
-        # Enviar por email
-        return EmailService.send_2fa_code_email(self.email, code, method="email")
+        # Enviar por email (o email entra na fila no mesmo commit do código)
+        sent = EmailService.send_2fa_code_email(self.email, code, method="email")
+        db.session.commit()
+        return sent
 
     def is_2fa_locked(self) -> bool:
         """Verifica se usuário está bloqueado por múltiplas tentativas de 2FA"""
@@ -1741,70 +1727,36 @@ class BillingPlan(db.Model):
     def includes_petition(self, petition_type):
         return petition_type in self.petition_types
 
+    @property
+    def entitlements(self):
+        """Snapshot imutável das features/limites do plano (ver EntitlementResolver)"""
+        from app.services.entitlements import entitlement_resolver
+
+        return entitlement_resolver.for_plan(self)
+
     def has_feature(self, feature_slug):
         """Verifica se o plano tem uma feature específica"""
-        for feature in self.features:
-            if feature.slug == feature_slug:
-                return True
-        return False
+        return self.entitlements.has_feature(feature_slug)
 
     def get_feature_limit(self, feature_slug):
-        """Obtém o limite de uma feature para este plano"""
-        from sqlalchemy import select
-
-        # Buscar na tabela de associação
-        stmt = select(plan_features.c.limit_value).where(
-            plan_features.c.plan_id == self.id,
-            plan_features.c.feature_id == Feature.id,
-            Feature.slug == feature_slug,
-        )
-        result = db.session.execute(stmt).first()
-
-        if result and result[0] is not None:
-            return result[0]
-
-        # Se não tem limite específico, retorna o default da feature
-        feature = Feature.get_by_slug(feature_slug)
-        return feature.default_limit if feature else None
+        """Obtém o limite de uma feature para este plano (ou o default da feature)"""
+        return self.entitlements.feature_limit(feature_slug)
 
     def get_feature_config(self, feature_slug):
         """Obtém configuração extra de uma feature para este plano"""
-        from sqlalchemy import select
-
-        stmt = select(plan_features.c.config_json).where(
-            plan_features.c.plan_id == self.id,
-            plan_features.c.feature_id == Feature.id,
-            Feature.slug == feature_slug,
-        )
-        result = db.session.execute(stmt).first()
-
-        if result and result[0]:
-            return json.loads(result[0])
-        return {}
+        return self.entitlements.feature_config(feature_slug)
 
     def get_all_features_with_limits(self):
         """Retorna todas as features do plano com seus limites"""
-        from sqlalchemy import select
-
-        features_data = []
-        for feature in self.features:
-            stmt = select(
-                plan_features.c.limit_value, plan_features.c.config_json
-            ).where(
-                plan_features.c.plan_id == self.id,
-                plan_features.c.feature_id == feature.id,
-            )
-            result = db.session.execute(stmt).first()
-
-            features_data.append(
-                {
-                    "feature": feature,
-                    "limit": result[0] if result else feature.default_limit,
-                    "config": json.loads(result[1]) if result and result[1] else {},
-                }
-            )
-
-        return features_data
+        entitlements = self.entitlements
+        return [
+            {
+                "feature": feature,
+                "limit": entitlements.limits.get(feature.slug),
+                "config": entitlements.feature_config(feature.slug),
+            }
+            for feature in self.features
+        ]
 
     def get_price_for_period(self, period=None):
         """Calcula o preço para o período do plano com desconto"""
@@ -1908,6 +1860,44 @@ class PetitionUsage(db.Model):
         return f"<PetitionUsage user={self.user_id} petition={self.petition_type_id}>"
 
 
+class PetitionUsageRollup(db.Model):
+    """
+    Totais de PetitionUsage por usuário e ciclo de cobrança.
+
+    Incrementado por record_petition_usage e conferido com a tabela bruta por
+    `flask usage-rollup-check` (ver app/billing/usage_rollup.py). O dashboard
+    lê estas linhas em vez de contar petition_usage a cada acesso.
+    """
+
+    __tablename__ = "petition_usage_rollups"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "user_id", "billing_cycle", name="uq_petition_usage_rollup_cycle"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    billing_cycle = db.Column(db.String(7), nullable=False)  # YYYY-MM
+    total_count = db.Column(db.Integer, nullable=False, default=0)
+    billable_count = db.Column(db.Integer, nullable=False, default=0)
+    billable_amount = db.Column(
+        db.Numeric(10, 2), nullable=False, default=Decimal("0.00")
+    )
+    daily_billable = db.Column(db.JSON)  # {"YYYY-MM-DD": quantidade}
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    def __repr__(self):
+        return (
+            f"<PetitionUsageRollup user={self.user_id} cycle={self.billing_cycle} "
+            f"billable={self.billable_count}/{self.total_count}>"
+        )
+
+
 class Invoice(db.Model):
     """Faturas/Cobranças para clientes"""
 
@@ -2606,36 +2596,24 @@ class UserCredits(db.Model):
     )
 
     def add_credits(self, amount, source="purchase"):
-        """Adiciona créditos ao saldo"""
-        self.balance += amount
-        if source == "purchase":
-            self.total_purchased += amount
-        elif source == "bonus":
-            self.total_bonus += amount
-        self.updated_at = datetime.now(timezone.utc)
-        return self.balance
+        """
+        Adiciona créditos ao saldo (UPDATE atômico; o lançamento no diário
+        fica com o chamador, ver app.services.credit_ledger)
+        """
+        from app.services.credit_ledger import credit_ledger
 
-    def use_credits(self, amount):
-        """Usa créditos (retorna True se teve saldo suficiente)"""
-        if self.balance >= amount:
-            self.balance -= amount
-            self.total_used += amount
-            self.updated_at = datetime.now(timezone.utc)
+        return credit_ledger.adjust(self.user_id, amount, source)
 
-            # Criar notificação se créditos ficarem baixos (≤ 10)
-            if self.balance <= 10 and self.balance > 0:
-                from app.billing.utils import create_credit_low_notification
+    def use_credits(self, amount):
+        """
+        Usa créditos (retorna True se teve saldo suficiente).
 
-                try:
-                    create_credit_low_notification(
-                        self.user, self.balance, threshold=10
-                    )
-                except Exception as e:
-                    # Não falhar a operação se notificação falhar
-                    print(f"Erro ao criar notificação de créditos baixos: {e}")
+        Débito condicional no banco: requisições concorrentes nunca deixam o
+        saldo negativo. O aviso de saldo baixo sai depois do commit.
+        """
+        from app.services.credit_ledger import credit_ledger
 
-            return True
-        return False
+        return credit_ledger.adjust(self.user_id, -amount, "usage") is not None
 
     def has_credits(self, amount=1):
         """Verifica se tem créditos suficientes"""
@@ -2691,6 +2669,38 @@ class CreditTransaction(db.Model):
         return f"<CreditTransaction {self.transaction_type}: {self.amount}>"
 
 
+class CreditReservation(db.Model):
+    """
+    Créditos retidos por um job de IA em andamento.
+
+    O valor sai do saldo ao reservar e só entra no diário (CreditTransaction)
+    ao efetivar, com o custo real; reservas liberadas ou vencidas voltam ao
+    saldo sem lançamento.
+    """
+
+    __tablename__ = "credit_reservations"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    amount = db.Column(db.Integer, nullable=False)
+    status = db.Column(
+        db.String(20), nullable=False, default="held"
+    )  # 'held', 'committed', 'released'
+    description = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    expires_at = db.Column(db.DateTime, nullable=False)
+    settled_at = db.Column(db.DateTime)
+
+    # Reservas vencidas (release_expired) e abertas por usuário
+    __table_args__ = (
+        db.Index("ix_credit_reservations_status_expires", "status", "expires_at"),
+        db.Index("ix_credit_reservations_user_status", "user_id", "status"),
+    )
+
+    def __repr__(self):
+        return f"<CreditReservation {self.id} user={self.user_id} {self.status}>"
+
+
 class AIGeneration(db.Model):
     """Registro de cada geração de conteúdo por IA"""
 
@@ -2726,6 +2736,9 @@ class AIGeneration(db.Model):
         db.String(20), default="completed"
     )  # 'completed', 'failed', 'cancelled'
     error_message = db.Column(db.Text)
+    is_cached = db.Column(
+        db.Boolean, default=False
+    )  # Resposta servida pelo cache de completions (sem custo na OpenAI)
 
     # Feedback
     user_rating = db.Column(db.Integer)  # 1-5 estrelas
@@ -2744,6 +2757,10 @@ class AIGeneration(db.Model):
 
     def calculate_cost(self):
         """Calcula o custo estimado em USD baseado nos tokens"""
+        if self.is_cached:
+            self.cost_usd = 0
+            return 0
+
         if not self.tokens_input or not self.tokens_output:
             return 0
 
@@ -3032,6 +3049,11 @@ class NotificationQueue(db.Model):
     scheduled_for = db.Column(db.DateTime)  # Para envio agendado
     sent_at = db.Column(db.DateTime)
 
+    # Itens de digest por usuário (digest_builder)
+    __table_args__ = (
+        db.Index("ix_notification_queue_user_status", "user_id", "status"),
+    )
+
     # Relacionamento
     user = db.relationship(
         "User", backref=db.backref("notification_queue", lazy="dynamic")
@@ -3076,6 +3098,56 @@ class NotificationQueue(db.Model):
         return f"<NotificationQueue {self.notification_type} - {self.status}>"
 
 
+class EmailOutbox(db.Model):
+    """
+    Fila persistente de emails de saída (app/services/outbound_email.py).
+
+    O corpo vai pronto em `html` ou é renderizado pelo worker a partir de
+    `template` + `context` (valores JSON simples).
+    """
+
+    __tablename__ = "email_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Mesma chave = mesmo email: enfileirar de novo não duplica o envio
+    idempotency_key = db.Column(db.String(200), unique=True)
+    recipients = db.Column(db.JSON, nullable=False)
+    sender = db.Column(db.String(200))
+    subject = db.Column(db.String(500), nullable=False)
+    html = db.Column(db.Text)
+    text_body = db.Column(db.Text)
+    template = db.Column(db.String(200))
+    context = db.Column(db.JSON)
+    category = db.Column(db.String(50), default="transactional")
+    priority = db.Column(db.Integer, default=5)  # 0 = 2FA/segurança, 9 = lote
+
+    # Entrega
+    status = db.Column(
+        db.String(20), default="queued"
+    )  # 'queued', 'sending', 'sent', 'failed'
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(
+        db.DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    provider = db.Column(db.String(20))
+    provider_message_id = db.Column(db.String(200))
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index(
+            "ix_email_outbox_dispatch", "status", "priority", "next_attempt_at"
+        ),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox {self.id} {self.status} - {self.subject}>"
+
+
 # =============================================================================
 # PAYMENT MODELS - Sistema de Pagamentos
 # =============================================================================
@@ -3298,30 +3370,42 @@ class Deadline(db.Model):
         "Process", backref=db.backref("deadlines", lazy="dynamic")
     )
 
+    # Candidatos da varredura de alertas (pendentes sem alerta, por vencimento)
+    __table_args__ = (
+        db.Index("ix_deadlines_alert_scan", "status", "alert_sent", "deadline_date"),
+    )
+
     def __repr__(self):
         return f"<Deadline {self.id} - {self.title} - {self.deadline_date}>"
 
+    def calendar_key(self):
+        """(UF, tribunal) do calendário forense usado na contagem"""
+        uf = self.user.uf if self.user else None
+        court = self.process.court if self.process_id and self.process else None
+        return uf, court
+
     def days_until(self, use_business_days=None):
-        """Calcula dias até o prazo"""
+        """
+        Calcula dias até o prazo (dias úteis pelo calendário forense da UF do
+        advogado e do tribunal do processo, ou dias corridos)
+        """
         if use_business_days is None:
             use_business_days = self.count_business_days
 
         if self.status != "pending":
             return 0
 
-        today = datetime.now(timezone.utc)
-        if self.deadline_date <= today:
+        today = datetime.now(timezone.utc).date()
+        due = self.deadline_date.date()
+        if due <= today:
             return 0
 
         if use_business_days:
-            # Calcular dias úteis (aproximação simples)
-            days = (self.deadline_date - today).days
-            # Remove aproximadamente 2 dias de fim de semana por semana
-            weeks = days // 7
-            business_days = days - (weeks * 2)
-            return max(0, business_days)
-        else:
-            return (self.deadline_date - today).days
+            from app.services.business_calendar import business_calendar
+
+            uf, court = self.calendar_key()
+            return business_calendar.business_days_between(today, due, uf, court)
+        return (due - today).days
 
     def is_urgent(self, days_threshold=3):
         """Verifica se o prazo é urgente"""
@@ -3354,11 +3438,46 @@ class Deadline(db.Model):
         }
 
 
+class JudicialHoliday(db.Model):
+    """
+    Feriado ou suspensão de expediente forense fora do calendário nacional.
+
+    uf vazio vale para todas as UFs e court vazio para todos os tribunais.
+    Feriados nacionais e o recesso de 20/12 a 20/01 são calculados em
+    app/services/business_calendar.py e não precisam estar aqui.
+    """
+
+    __tablename__ = "judicial_holidays"
+    __table_args__ = (
+        db.UniqueConstraint("day", "uf", "court", name="uq_judicial_holiday"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    name = db.Column(db.String(150), nullable=False)
+    uf = db.Column(db.String(2), nullable=False, default="")
+    court = db.Column(db.String(100), nullable=False, default="")  # Process.court
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<JudicialHoliday {self.day} {self.uf or 'BR'} {self.court} - {self.name}>"
+
+
 class Message(db.Model):
     """Mensagens do chat entre advogado e cliente"""
 
     __tablename__ = "messages"
 
+    # Histórico paginado por cursor de uma conversa (sender -> recipient)
+    __table_args__ = (
+        db.Index(
+            "ix_messages_sender_recipient_created",
+            "sender_id",
+            "recipient_id",
+            "created_at",
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     recipient_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
@@ -3420,9 +3539,9 @@ class Message(db.Model):
         return {
             "id": self.id,
             "sender_id": self.sender_id,
-            "sender_name": self.sender.name if self.sender else None,
+            "sender_name": self.sender.full_name if self.sender else None,
             "recipient_id": self.recipient_id,
-            "recipient_name": self.recipient.name if self.recipient else None,
+            "recipient_name": self.recipient.full_name if self.recipient else None,
             "client_id": self.client_id,
             "content": self.content,
             "message_type": self.message_type,
@@ -4569,34 +4688,6 @@ class Process(db.Model):
         }
         return status_map.get(self.status, ("Desconhecido", "secondary"))
 
-
-class FeeContractTemplate(db.Model):
-    """Modelos editáveis para contrato de honorários."""
-
-    __tablename__ = "fee_contract_templates"
-
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-
-    name = db.Column(db.String(200), nullable=False)
-    content = db.Column(db.Text, nullable=False)
-    is_default = db.Column(db.Boolean, default=False)
-
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = db.Column(
-        db.DateTime,
-        default=lambda: datetime.now(timezone.utc),
-        onupdate=lambda: datetime.now(timezone.utc),
-    )
-
-    user = db.relationship(
-        "User",
-        backref=db.backref("fee_contract_templates", lazy="dynamic"),
-    )
-
-    def __repr__(self):
-        return f"<FeeContractTemplate {self.id} - {self.name}>"
-
     def get_status_color(self):
         """Retorna apenas a cor do status."""
         return self.get_status_display()[1]
@@ -4624,17 +4715,52 @@ class FeeContractTemplate(db.Model):
         return False
 
     def days_until_deadline(self):
-        """Retorna dias até o próximo prazo."""
+        """Retorna dias úteis até o próximo prazo (negativo se vencido)."""
         if self.next_deadline:
             from datetime import date
 
-            return (self.next_deadline - date.today()).days
+            from app.services.business_calendar import business_calendar
+
+            return business_calendar.business_days_between(
+                date.today(),
+                self.next_deadline,
+                uf=self.user.uf if self.user else None,
+                court=self.court,
+            )
         return None
 
     def __repr__(self):
         return f"<Process {self.process_number or 'Sem número'} - {self.title}>"
 
 
+class FeeContractTemplate(db.Model):
+    """Modelos editáveis para contrato de honorários."""
+
+    __tablename__ = "fee_contract_templates"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+
+    name = db.Column(db.String(200), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    is_default = db.Column(db.Boolean, default=False)
+
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    user = db.relationship(
+        "User",
+        backref=db.backref("fee_contract_templates", lazy="dynamic"),
+    )
+
+    def __repr__(self):
+        return f"<FeeContractTemplate {self.id} - {self.name}>"
+
+
 # Modelo para notificações de processos
 class ProcessNotification(db.Model):
     """
@@ -4675,6 +4801,16 @@ class ProcessNotification(db.Model):
         "Process", backref=db.backref("notifications", lazy="dynamic")
     )
 
+    # Duplicidade diária dos avisos de prazo (NOT EXISTS da varredura)
+    __table_args__ = (
+        db.Index(
+            "ix_process_notifications_process_type_created",
+            "process_id",
+            "notification_type",
+            "created_at",
+        ),
+    )
+
     def mark_as_read(self):
         """Marca a notificação como lida."""
         self.read = True
@@ -6759,6 +6895,9 @@ class AICreditConfig(db.Model):
     is_premium = db.Column(db.Boolean, default=False)  # Se usa modelo premium (GPT-4o)
     is_active = db.Column(db.Boolean, default=True)  # Se a operação está disponível
     sort_order = db.Column(db.Integer, default=0)
+    # Cache de completions (opt-in por operação)
+    cache_enabled = db.Column(db.Boolean, default=False)
+    cache_ttl_seconds = db.Column(db.Integer, default=86400)  # 24h
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(
         db.DateTime,
@@ -6876,6 +7015,16 @@ class AICreditConfig(db.Model):
             return config.is_active
         return True  # Default: ativo
 
+    @classmethod
+    def get_cache_ttl(cls, operation_key: str) -> int | None:
+        """Retorna o TTL do cache da operação ou None se o cache estiver desligado"""
+        config = cls.query.filter_by(
+            operation_key=operation_key, is_active=True
+        ).first()
+        if config and config.cache_enabled:
+            return config.cache_ttl_seconds or 86400
+        return None
+
     @classmethod
     def get_all_configs(cls) -> dict:
         """Retorna todas as configurações como dicionário"""
@@ -6911,3 +7060,235 @@ class AICreditConfig(db.Model):
 
     def __repr__(self):
         return f"<AICreditConfig {self.operation_key}: {self.credit_cost} créditos>"
+
+
+# =============================================================================
+# ÍNDICE DE BUSCA GLOBAL
+# =============================================================================
+
+
+class SearchIndexEntry(db.Model):
+    """
+    Índice desnormalizado usado pela busca global (/api/search/global).
+
+    Cada linha representa um cliente, processo, petição salva ou documento.
+    `search_text` guarda o texto já normalizado (minúsculo e sem acentos) e é
+    indexado por tsvector + trigram no PostgreSQL e por FTS5 no SQLite.
+    As linhas são mantidas por eventos do SQLAlchemy (ver
+    app/services/search_index.py) e podem ser reconstruídas com
+    `flask search-reindex`.
+    """
+
+    __tablename__ = "search_index"
+    __table_args__ = (
+        db.UniqueConstraint("entity_type", "entity_id", name="uq_search_index_entity"),
+        db.Index("ix_search_index_user_type", "user_id", "entity_type"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(
+        db.String(20), nullable=False
+    )  # client, process, petition, document
+    entity_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+
+    # Dados exibidos no resultado (evita carregar a entidade original)
+    title = db.Column(db.String(300), nullable=False)
+    subtitle = db.Column(db.String(300))
+    url = db.Column(db.String(300), nullable=False)
+
+    # Título normalizado para o bônus de correspondência exata/prefixo
+    title_key = db.Column(db.String(300), nullable=False, default="")
+    # Texto normalizado de todos os campos pesquisáveis
+    search_text = db.Column(db.Text, nullable=False, default="")
+
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    def __repr__(self):
+        return f"<SearchIndexEntry {self.entity_type}:{self.entity_id}>"
+
+
+# Estruturas específicas de cada banco, criadas junto com a tabela.
+# PostgreSQL: tsvector (stemming português) + trigram para tolerância a erros.
+# O texto já chega sem acentos, então a coluna gerada não depende de unaccent().
+SEARCH_INDEX_PG_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE search_index ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('portuguese', search_text)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_search_index_vector "
+    "ON search_index USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_search_index_trgm "
+    "ON search_index USING GIN (search_text gin_trgm_ops)",
+]
+
+# SQLite (dev/testes): tabela FTS5 de conteúdo externo sincronizada por triggers
+SEARCH_INDEX_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index_fts USING fts5("
+    "search_text, content='search_index', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS search_index_ai AFTER INSERT ON search_index BEGIN "
+    "INSERT INTO search_index_fts(rowid, search_text) VALUES (new.id, new.search_text); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS search_index_ad AFTER DELETE ON search_index BEGIN "
+    "INSERT INTO search_index_fts(search_index_fts, rowid, search_text) "
+    "VALUES ('delete', old.id, old.search_text); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS search_index_au AFTER UPDATE ON search_index BEGIN "
+    "INSERT INTO search_index_fts(search_index_fts, rowid, search_text) "
+    "VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO search_index_fts(rowid, search_text) VALUES (new.id, new.search_text); "
+    "END",
+]
+
+for _statement in SEARCH_INDEX_PG_DDL:
+    event.listen(
+        SearchIndexEntry.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql"),
+    )
+for _statement in SEARCH_INDEX_SQLITE_DDL:
+    event.listen(
+        SearchIndexEntry.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    SearchIndexEntry.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS search_index_fts").execute_if(dialect="sqlite"),
+)
+
+
+# =============================================================================
+# SÉRIES DE ÍNDICES ECONÔMICOS (BCB)
+# =============================================================================
+
+
+class EconomicIndexValue(db.Model):
+    """
+    Valor mensal de um índice de correção (IPCA, INPC, IGPM, TR, SELIC).
+
+    Cópia local das séries SGS do Banco Central, usada pela calculadora
+    jurídica sem depender da API. Atualizada de forma incremental por
+    `flask bcb-sync` (ver app/services/bcb_series.py).
+    """
+
+    __tablename__ = "economic_index_values"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "indice", "reference_month", name="uq_economic_index_month"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    indice = db.Column(db.String(10), nullable=False)  # chave de SERIES_BCB
+    reference_month = db.Column(db.Date, nullable=False)  # 1º dia do mês
+    value = db.Column(db.Numeric(12, 6), nullable=False)  # variação % no mês
+    fetched_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return (
+            f"<EconomicIndexValue {self.indice} {self.reference_month}: {self.value}>"
+        )
+
+
+# =============================================================================
+# ANALYTICS (fatos diários dos dashboards administrativos)
+# =============================================================================
+#
+# Tabelas derivadas, reconstruídas por dia por `flask analytics-refresh` (ver
+# app/services/admin_analytics.py). Cada uma vem de uma única tabela de
+# origem, agrupada por dia e usuário, então somas e contagens não se
+# multiplicam por joins. plan_id = 0 indica "sem plano"; uf = "" indica UF
+# não informada.
+
+
+class AnalyticsRevenueDaily(db.Model):
+    """Pagamentos concluídos por dia e usuário (origem: payments)"""
+
+    __tablename__ = "analytics_revenue_daily"
+    __table_args__ = (
+        db.UniqueConstraint("day", "user_id", name="uq_analytics_revenue_day_user"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    plan_id = db.Column(db.Integer, nullable=False, default=0)  # plano do usuário
+    uf = db.Column(db.String(2), nullable=False, default="")
+    payment_count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Numeric(12, 2), nullable=False, default=Decimal("0.00"))
+
+
+class AnalyticsPetitionDaily(db.Model):
+    """Petições geradas por dia, usuário, tipo e plano (origem: petition_usage)"""
+
+    __tablename__ = "analytics_petition_daily"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "day",
+            "user_id",
+            "petition_type_id",
+            "plan_id",
+            name="uq_analytics_petition_day_user_type_plan",
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    petition_type_id = db.Column(db.Integer, nullable=False)
+    plan_id = db.Column(db.Integer, nullable=False, default=0)  # plano no uso
+    uf = db.Column(db.String(2), nullable=False, default="")
+    petition_count = db.Column(db.Integer, nullable=False, default=0)
+    billable_count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Numeric(12, 2), nullable=False, default=Decimal("0.00"))
+    last_generated_at = db.Column(db.DateTime)
+
+
+class AnalyticsPetitionHourly(db.Model):
+    """Petições geradas por dia e hora (origem: petition_usage)"""
+
+    __tablename__ = "analytics_petition_hourly"
+    __table_args__ = (
+        db.UniqueConstraint("day", "hour", name="uq_analytics_petition_day_hour"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    hour = db.Column(db.Integer, nullable=False)  # 0-23 (UTC)
+    petition_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class AnalyticsAIDaily(db.Model):
+    """
+    Uso de IA e créditos comprados por dia e usuário (origens: ai_generations
+    e credit_transactions, agregadas separadamente)
+    """
+
+    __tablename__ = "analytics_ai_daily"
+    __table_args__ = (
+        db.UniqueConstraint("day", "user_id", name="uq_analytics_ai_day_user"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    generation_count = db.Column(db.Integer, nullable=False, default=0)
+    tokens_total = db.Column(db.BigInteger, nullable=False, default=0)
+    cost_usd = db.Column(db.Numeric(14, 6), nullable=False, default=Decimal("0"))
+    credits_purchased = db.Column(db.Integer, nullable=False, default=0)
+
+
+class AnalyticsRefreshState(db.Model):
+    """Até que dia os fatos de analytics foram reconstruídos"""
+
+    __tablename__ = "analytics_refresh_state"
+
+    name = db.Column(db.String(50), primary_key=True)
+    refreshed_through = db.Column(db.Date, nullable=False)
+    refreshed_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
@@ -21,6 +21,7 @@ from app.payments.repository import (
     SubscriptionRepository,
     UserPaymentRepository,
 )
+from app.services.realtime import realtime
 from app.utils.audit import AuditManager
 
 # Configurar Mercado Pago SDK
@@ -346,6 +347,11 @@ class WebhookProcessorService:
                 )
 
                 AuditManager.log_payment_completed(payment)
+                realtime.publish(
+                    payment.user_id,
+                    "payment_status",
+                    {"payment_id": payment.id, "status": "paid"},
+                )
                 current_app.logger.info(f"✅ Pagamento aprovado: {payment_id}")
 
         elif payment_data["status"] in ["rejected", "cancelled"]:
@@ -358,6 +364,11 @@ class WebhookProcessorService:
                 AuditManager.log_payment_failed(
                     payment, f"Status: {payment_data['status']}"
                 )
+                realtime.publish(
+                    payment.user_id,
+                    "payment_status",
+                    {"payment_id": payment.id, "status": "failed"},
+                )
 
     @staticmethod
     def process_preapproval_webhook(preapproval_id: str) -> None:
@@ -15,7 +15,6 @@ from flask import (
     jsonify,
     redirect,
     render_template,
-    render_template_string,
     request,
     send_file,
     url_for,
@@ -23,12 +22,12 @@ from flask import (
 from flask_login import current_user, login_required
 from sqlalchemy import or_
 from werkzeug.utils import secure_filename
-from xhtml2pdf import pisa
 
-from app import limiter
+from app import db, limiter
 from app.billing.decorators import subscription_required
 from app.billing.utils import (
     BillingAccessError,
+    check_petition_balance,
     ensure_petition_type,
     record_petition_usage,
     slugify,
@@ -41,6 +40,7 @@ from app.models import (
     PetitionSection,
     PetitionType,
     SavedPetition,
+    User,
 )
 from app.petitions import bp
 from app.petitions.forms import (
@@ -63,7 +63,13 @@ from app.schemas import (
     GenerateModelSchema,
     PetitionSaveSchema,
 )
-from app.services.pdf_converter import CONVERTIBLE_EXTENSIONS, convert_to_pdf
+from app.services.pdf_converter import CONVERTIBLE_EXTENSIONS, convert_many_to_pdf
+from app.services.pdf_renderer import (
+    PDFRenderError,
+    PDFRenderTimeout,
+    pdf_render_service,
+)
+from app.services.petition_templates import petition_template_engine
 from app.utils.error_messages import format_error_for_user
 
 # Extensões permitidas - agora incluindo mais formatos que podem ser convertidos
@@ -461,46 +467,97 @@ def _render_pdf(text: str, title: str) -> BytesIO:
     </html>
     """
 
-    # Gera o PDF
-    buffer = BytesIO()
-    pisa_status = pisa.CreatePDF(src=html_template, dest=buffer, encoding="UTF-8")
+    # Gera o PDF no pool de renderização (com cache de saída)
+    return pdf_render_service.render_to_buffer(html_template, title)
 
-    if pisa_status.err:
-        # Fallback para texto simples se houver erro
-        buffer = BytesIO()
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib.units import cm
-        from reportlab.pdfgen import canvas as reportlab_canvas
 
-        pdf = reportlab_canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-        x_margin = 2 * cm
-        y = height - 2 * cm
+def _send_rendered_pdf(
+    html_content, title, filename, petition_type=None, background=False
+):
+    """
+    Devolve o PDF renderizado no pool (ou vindo do cache) e registra o uso.
 
-        pdf.setTitle(title)
-        pdf.setFont("Helvetica", 11)
+    O uso só é cobrado depois que o PDF existe: renderização que falha ou
+    estoura o tempo não é cobrada. HTML que o xhtml2pdf não renderiza
+    responde 500 (sem o PDF de texto simples do reportlab).
 
-        # Remove tags HTML para texto simples
-        plain_text = re.sub("<[^<]+?>", "", text)
+    Com background=True não espera a renderização: responde 202 com o id do
+    job, acompanhado em /petitions/api/pdf-jobs/<id>. O saldo/limite é
+    conferido antes e a cobrança acontece quando o job conclui. Sem estado
+    de jobs compartilhado entre os workers (REDIS_URL), a consulta poderia
+    cair em outro processo, então a resposta continua síncrona.
+    """
+    if background and pdf_render_service.shared_jobs:
+        on_complete = None
+        if petition_type:
+            balance = check_petition_balance(current_user, petition_type)
+            if not balance["can_generate"]:
+                return jsonify({"error": balance["error"]}), 403
+            on_complete = _usage_recorder(current_user.id, petition_type.id)
+
+        job = pdf_render_service.submit(
+            current_user.id,
+            html_content,
+            title,
+            filename,
+            on_complete=on_complete,
+            fallback=False,
+        )
+        return jsonify(_public_pdf_job(job)), 202
 
-        for raw_line in plain_text.splitlines():
-            line = raw_line.rstrip()
-            if not line:
-                y -= 12
-            else:
-                pdf.drawString(x_margin, y, line)
-                y -= 14
+    try:
+        pdf_buffer = pdf_render_service.render_to_buffer(
+            html_content, title, fallback=False
+        )
+    except PDFRenderTimeout as e:
+        return jsonify({"error": f"{e}. Tente novamente em instantes."}), 504
+    except PDFRenderError:
+        return jsonify({"error": "Erro ao gerar PDF"}), 500
+
+    try:
+        if petition_type:
+            record_petition_usage(current_user, petition_type)
+    except BillingAccessError as e:
+        return jsonify({"error": str(e)}), 403
+
+    return send_file(
+        pdf_buffer,
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=filename,
+    )
 
-            if y <= 2 * cm:
-                pdf.showPage()
-                pdf.setFont("Helvetica", 11)
-                y = height - 2 * cm
 
-        pdf.showPage()
-        pdf.save()
+def _usage_recorder(user_id, petition_type_id):
+    """Cobrança de um job de PDF, executada quando a renderização conclui"""
 
-    buffer.seek(0)
-    return buffer
+    def record():
+        user = db.session.get(User, user_id)
+        petition_type = db.session.get(PetitionType, petition_type_id)
+        try:
+            record_petition_usage(user, petition_type)
+        except Exception:
+            db.session.rollback()
+            raise
+
+    return record
+
+
+def _public_pdf_job(job):
+    """Campos de um job de PDF expostos ao cliente"""
+    data = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "filename": job["filename"],
+        "cached": job.get("cached", False),
+        "error": job.get("error"),
+        "created_at": job.get("created_at"),
+        "completed_at": job.get("completed_at"),
+        "status_url": url_for("petitions.pdf_job_status", job_id=job["id"]),
+    }
+    if job["status"] == "completed":
+        data["download_url"] = url_for("petitions.pdf_job_download", job_id=job["id"])
+    return data
 
 
 def _extract_attachments(files, convert_to_pdf_enabled=True):
@@ -543,28 +600,38 @@ def _extract_attachments(files, convert_to_pdf_enabled=True):
         if total_size + size > MAX_TOTAL_SIZE_PER_PETITION:
             raise ValueError(f"Total de arquivos excede o limite de 50 MB por petição.")
 
-        # Ler dados do arquivo
-        file_data = file_storage.read()
+        attachments.append({"filename": filename, "data": file_storage.read()})
+        total_size += size
 
-        # Converter para PDF se habilitado e não for PDF
-        if convert_to_pdf_enabled and ext != "pdf":
-            try:
-                converted_data, new_filename = convert_to_pdf(file_data, filename)
-                # Verificar se conversão foi bem sucedida (arquivo mudou para .pdf)
-                if new_filename.endswith(".pdf"):
-                    current_app.logger.info(
-                        f"Arquivo {filename} convertido para {new_filename}"
-                    )
-                    file_data = converted_data
-                    filename = new_filename
-            except Exception as e:
-                current_app.logger.warning(
-                    f"Falha ao converter {filename} para PDF: {e}"
+    # Converter para PDF em lote: documentos Office vão juntos para o pool
+    # do LibreOffice em vez de um processo por arquivo
+    to_convert = [
+        index
+        for index, attachment in enumerate(attachments)
+        if convert_to_pdf_enabled
+        and attachment["filename"].rsplit(".", 1)[-1].lower() != "pdf"
+    ]
+    if to_convert:
+        try:
+            converted = convert_many_to_pdf(
+                [
+                    (attachments[index]["data"], attachments[index]["filename"])
+                    for index in to_convert
+                ]
+            )
+        except Exception as e:
+            current_app.logger.warning(f"Falha ao converter anexos para PDF: {e}")
+            converted = []
+            # Mantém arquivos originais se conversão falhar
+
+        for index, (converted_data, new_filename) in zip(to_convert, converted):
+            # Verificar se conversão foi bem sucedida (arquivo mudou para .pdf)
+            if new_filename.endswith(".pdf"):
+                current_app.logger.info(
+                    f"Arquivo {attachments[index]['filename']} convertido para "
+                    f"{new_filename}"
                 )
-                # Mantém arquivo original se conversão falhar
-
-        attachments.append({"filename": filename, "data": file_data})
-        total_size += len(file_data)
+                attachments[index] = {"filename": new_filename, "data": converted_data}
 
     return attachments
 
@@ -721,6 +788,7 @@ def dynamic_form(slug):
         edit_petition=edit_petition,
         edit_petition_json=edit_petition_json,
         locked_fields=locked_fields,
+        pdf_background_jobs=pdf_render_service.shared_jobs,
     )
 
 
@@ -746,13 +814,11 @@ def generate_dynamic():
         if petition_model.template_content and petition_model.template_content.strip():
             # Usar template Jinja2
             try:
-                from jinja2 import Template
-
-                template = Template(petition_model.template_content)
-                rendered_content = template.render(**form_data)
+                rendered_content = petition_template_engine.render_petition_model(
+                    petition_model, form_data
+                )
 
                 # Gerar PDF com o conteúdo renderizado
-                pdf_buffer = BytesIO()
                 html_content = f"""
             <!DOCTYPE html>
             <html>
@@ -775,26 +841,14 @@ def generate_dynamic():
             </html>
             """
 
-                pisa_status = pisa.CreatePDF(html_content, dest=pdf_buffer)
-
-                if pisa_status.err:
-                    return jsonify({"error": "Erro ao gerar PDF"}), 500
-
-                pdf_buffer.seek(0)
-
-                # Registrar uso
-                try:
-                    record_petition_usage(current_user, petition_type)
-                except BillingAccessError as e:
-                    return jsonify({"error": str(e)}), 403
-
                 filename = f"{petition_type.slug}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
 
-                return send_file(
-                    pdf_buffer,
-                    mimetype="application/pdf",
-                    as_attachment=True,
-                    download_name=filename,
+                return _send_rendered_pdf(
+                    html_content,
+                    petition_type.name,
+                    filename,
+                    petition_type,
+                    background=data.get("background", False),
                 )
 
             except Exception as e:
@@ -803,19 +857,29 @@ def generate_dynamic():
                 )
                 # Fallback para geração dinâmica
                 return _generate_dynamic_fallback(
-                    petition_model, petition_type, form_data
+                    petition_model,
+                    petition_type,
+                    form_data,
+                    background=data.get("background", False),
                 )
 
         else:
             # Usar geração dinâmica tradicional
-            return _generate_dynamic_fallback(petition_model, petition_type, form_data)
+            return _generate_dynamic_fallback(
+                petition_model,
+                petition_type,
+                form_data,
+                background=data.get("background", False),
+            )
 
     except Exception as e:
         error_msg = format_error_for_user(e, "Erro ao gerar petição dinâmica")
         return jsonify({"error": error_msg}), 400
 
 
-def _generate_dynamic_fallback(petition_model, petition_type, form_data):
+def _generate_dynamic_fallback(
+    petition_model, petition_type, form_data, background=False
+):
     """Fallback para geração dinâmica tradicional quando não há template Jinja2"""
 
     # Buscar seções configuradas para o modelo
@@ -875,7 +939,6 @@ def _generate_dynamic_fallback(petition_model, petition_type, form_data):
 
     # Gerar PDF
     try:
-        pdf_buffer = BytesIO()
         html_content = f"""
         <!DOCTYPE html>
         <html>
@@ -898,28 +961,16 @@ def _generate_dynamic_fallback(petition_model, petition_type, form_data):
         </html>
         """
 
-        pisa_status = pisa.CreatePDF(html_content, dest=pdf_buffer)
-
-        if pisa_status.err:
-            return jsonify({"error": "Erro ao gerar PDF"}), 500
-
-        pdf_buffer.seek(0)
-
-        # Registrar uso
-        try:
-            record_petition_usage(current_user, petition_type)
-        except BillingAccessError as e:
-            return jsonify({"error": str(e)}), 403
-
         filename = (
             f"{petition_type.slug}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         )
 
-        return send_file(
-            pdf_buffer,
-            mimetype="application/pdf",
-            as_attachment=True,
-            download_name=filename,
+        return _send_rendered_pdf(
+            html_content,
+            petition_type.name,
+            filename,
+            petition_type,
+            background=background,
         )
 
     except Exception as e:
@@ -999,6 +1050,7 @@ def model_form(slug):
         sections_json=sections_json,
         edit_petition=edit_petition,
         edit_petition_json=edit_petition_json,
+        pdf_background_jobs=pdf_render_service.shared_jobs,
     )
 
 
@@ -1024,8 +1076,8 @@ def generate_model():
 
         # Renderizar template do modelo
         try:
-            template_content = render_template_string(
-                petition_model.template_content, **form_data
+            template_content = petition_template_engine.render_petition_model(
+                petition_model, form_data
             )
         except Exception as e:
             return jsonify(
@@ -1034,7 +1086,6 @@ def generate_model():
 
         # Gerar PDF
         try:
-            pdf_buffer = BytesIO()
             html_content = f"""
         <!DOCTYPE html>
         <html>
@@ -1057,29 +1108,17 @@ def generate_model():
         </html>
         """
 
-            pisa_status = pisa.CreatePDF(html_content, dest=pdf_buffer)
-
-            if pisa_status.err:
-                return jsonify({"error": "Erro ao gerar PDF"}), 500
-
-            pdf_buffer.seek(0)
-
-            # Registrar uso (usando o petition_type associado ao modelo)
-            try:
-                if petition_model.petition_type:
-                    record_petition_usage(current_user, petition_model.petition_type)
-            except BillingAccessError as e:
-                return jsonify({"error": str(e)}), 403
-
             filename = (
                 f"{petition_model.slug}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
             )
 
-            return send_file(
-                pdf_buffer,
-                mimetype="application/pdf",
-                as_attachment=True,
-                download_name=filename,
+            # Registrar uso (usando o petition_type associado ao modelo)
+            return _send_rendered_pdf(
+                html_content,
+                petition_model.name,
+                filename,
+                petition_model.petition_type,
+                background=data.get("background", False),
             )
 
         except Exception as e:
@@ -1090,6 +1129,39 @@ def generate_model():
         return jsonify({"error": error_msg}), 400
 
 
+@bp.route("/api/pdf-jobs/<job_id>")
+@login_required
+@limiter.limit("120 per minute")
+def pdf_job_status(job_id):
+    """Status de uma renderização de PDF em background"""
+    job = pdf_render_service.get(job_id, current_user.id)
+    if not job:
+        return jsonify({"error": "Job não encontrado"}), 404
+    return jsonify(_public_pdf_job(job))
+
+
+@bp.route("/api/pdf-jobs/<job_id>/download")
+@login_required
+def pdf_job_download(job_id):
+    """Baixa o PDF de uma renderização concluída"""
+    job = pdf_render_service.get(job_id, current_user.id)
+    if not job:
+        return jsonify({"error": "Job não encontrado"}), 404
+    if job["status"] != "completed":
+        return jsonify({"error": "PDF ainda não está pronto"}), 409
+
+    data = pdf_render_service.read_output(job)
+    if data is None:
+        return jsonify({"error": "PDF expirado, gere novamente"}), 410
+
+    return send_file(
+        BytesIO(data),
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=job["filename"],
+    )
+
+
 # ============================================================================
 # ROTAS PARA PETIÇÕES SALVAS (CRUD)
 # ============================================================================
@@ -4,7 +4,6 @@ Petitions Services - Camada de lógica de negócios
 
 import json
 import os
-import re
 import uuid
 from datetime import datetime, timezone
 from io import BytesIO
@@ -14,7 +13,6 @@ import bleach
 from flask import current_app
 from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
-from xhtml2pdf import pisa
 
 from app import db
 from app.models import PetitionModel, PetitionType, SavedPetition
@@ -25,6 +23,8 @@ from app.petitions.repository import (
     PetitionTypeRepository,
     SavedPetitionRepository,
 )
+from app.services.pdf_renderer import pdf_render_service
+from app.services.petition_templates import petition_template_engine
 from app.utils.pagination import PaginationHelper
 
 # Constantes
@@ -223,44 +223,8 @@ class PDFGenerationService:
 
     @staticmethod
     def render_pdf_from_html(html_content: str, title: str) -> BytesIO:
-        """Renderiza conteúdo HTML para PDF"""
-        buffer = BytesIO()
-        pisa_status = pisa.CreatePDF(src=html_content, dest=buffer, encoding="UTF-8")
-
-        if pisa_status.err:
-            # Fallback para texto simples
-            buffer = BytesIO()
-            from reportlab.lib.pagesizes import A4
-            from reportlab.lib.units import cm
-            from reportlab.pdfgen import canvas as reportlab_canvas
-
-            pdf = reportlab_canvas.Canvas(buffer, pagesize=A4)
-            width, height = A4
-            x_margin = 2 * cm
-            y = height - 2 * cm
-
-            pdf.setTitle(title)
-            pdf.setFont("Helvetica", 11)
-
-            plain_text = re.sub("<[^<]+?>", "", html_content)
-            for raw_line in plain_text.splitlines():
-                line = raw_line.rstrip()
-                if not line:
-                    y -= 12
-                else:
-                    pdf.drawString(x_margin, y, line)
-                    y -= 14
-
-                if y <= 2 * cm:
-                    pdf.showPage()
-                    pdf.setFont("Helvetica", 11)
-                    y = height - 2 * cm
-
-            pdf.showPage()
-            pdf.save()
-
-        buffer.seek(0)
-        return buffer
+        """Renderiza conteúdo HTML para PDF (pool de renderização + cache)"""
+        return pdf_render_service.render_to_buffer(html_content, title)
 
     @staticmethod
     def sanitize_html(text: str) -> str:
@@ -285,10 +249,9 @@ class PDFGenerationService:
             return None, "Template não configurado"
 
         try:
-            from jinja2 import Template
-
-            template = Template(petition_model.template_content)
-            rendered_content = template.render(**form_data)
+            rendered_content = petition_template_engine.render_petition_model(
+                petition_model, form_data
+            )
 
             html_content = f"""
             <!DOCTYPE html>
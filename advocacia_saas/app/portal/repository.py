@@ -22,6 +22,7 @@ from app.models import (
     ProcessMovement,
     User,
 )
+from app.utils.pagination import keyset_page
 
 
 class PortalRepository:
@@ -134,32 +135,60 @@ class PortalRepository:
         """Conta mensagens não lidas"""
         return Message.query.filter_by(recipient_id=user_id, is_read=False).count()
 
+    @staticmethod
+    def _chat_query(user_id: int, lawyer_id: int, client_id: int):
+        """Mensagens do chat entre cliente e advogado (inclui as do bot)"""
+        return Message.query.filter(
+            or_(
+                and_(
+                    Message.sender_id == user_id,
+                    Message.recipient_id == lawyer_id,
+                ),
+                and_(
+                    Message.sender_id == lawyer_id,
+                    Message.recipient_id == user_id,
+                ),
+                and_(
+                    Message.client_id == client_id,
+                    Message.message_type == "bot",
+                ),
+            )
+        )
+
     @staticmethod
     def get_chat_messages(
         user_id: int, lawyer_id: int, client_id: int
     ) -> list[Message]:
         """Busca mensagens do chat entre cliente e advogado"""
         return (
-            Message.query.filter(
-                or_(
-                    and_(
-                        Message.sender_id == user_id,
-                        Message.recipient_id == lawyer_id,
-                    ),
-                    and_(
-                        Message.sender_id == lawyer_id,
-                        Message.recipient_id == user_id,
-                    ),
-                    and_(
-                        Message.client_id == client_id,
-                        Message.message_type == "bot",
-                    ),
-                )
-            )
+            PortalRepository._chat_query(user_id, lawyer_id, client_id)
             .order_by(Message.created_at.asc())
             .all()
         )
 
+    @staticmethod
+    def get_chat_messages_page(
+        user_id: int,
+        lawyer_id: int,
+        client_id: int,
+        before_id: int | None = None,
+        after_id: int | None = None,
+        limit: int = 50,
+    ) -> tuple[list[Message], bool]:
+        """
+        Página do chat entre cliente e advogado (cursor por id)
+
+        Returns:
+            tuple: (mensagens em ordem cronológica, has_more)
+        """
+        return keyset_page(
+            PortalRepository._chat_query(user_id, lawyer_id, client_id),
+            Message,
+            before_id=before_id,
+            after_id=after_id,
+            limit=limit,
+        )
+
     @staticmethod
     def create_message(
         sender_id: int,
@@ -293,11 +293,14 @@ def chat():
     try:
         portal_logger.info(f"Usuário {current_user.email} acessando chat")
 
-        client, messages, chat_room = PortalChatService.get_chat_data(current_user.id)
+        client, messages, chat_room, has_more = PortalChatService.get_chat_data(
+            current_user.id
+        )
 
         return render_template(
             "portal/chat.html",
             messages=messages,
+            has_more=has_more,
             client=client,
             chat_room=chat_room,
         )
@@ -311,8 +314,18 @@ def chat():
 @bp.route("/api/chat/messages")
 @client_required
 def get_chat_messages():
-    """API para buscar mensagens do chat"""
-    messages_data = PortalChatService.get_messages_as_dict(current_user.id)
+    """
+    API para buscar mensagens do chat
+
+    Query params: before_id (histórico anterior), after_id (novas desde a
+    última recebida) e limit.
+    """
+    messages_data = PortalChatService.get_messages_as_dict(
+        current_user.id,
+        before_id=request.args.get("before_id", type=int),
+        after_id=request.args.get("after_id", type=int),
+        limit=request.args.get("limit", type=int),
+    )
     return jsonify(messages_data)
 
 
@@ -15,6 +15,7 @@ from werkzeug.security import check_password_hash
 from werkzeug.utils import secure_filename
 
 from app import db
+from app.chat.services import chat_page_size
 from app.portal.repository import PortalRepository
 
 # Logger específico para o portal
@@ -209,56 +210,81 @@ class PortalChatService:
     """Serviço de chat do portal"""
 
     @staticmethod
-    def get_chat_data(user_id: int) -> tuple[Any, list, bool]:
+    def get_chat_data(user_id: int) -> tuple[Any, list, bool, bool]:
         """
-        Obtém dados do chat
+        Obtém dados do chat (só a página mais recente de mensagens)
 
         Returns:
-            tuple: (client, messages, has_chat_room)
+            tuple: (client, messages, has_chat_room, has_more)
         """
         client = PortalRepository.get_client_by_user_id_or_404(user_id)
         has_chat_room = client.lawyer_id is not None
-        messages = []
+        messages, has_more = [], False
 
         if has_chat_room:
-            messages = PortalRepository.get_chat_messages(
-                user_id, client.lawyer_id, client.id
+            messages, has_more = PortalRepository.get_chat_messages_page(
+                user_id, client.lawyer_id, client.id, limit=chat_page_size()
             )
 
         portal_logger.debug(
-            f"{len(messages)} mensagens encontradas para cliente {client.id}"
+            f"{len(messages)} mensagens carregadas para cliente {client.id}"
         )
-        return client, messages, has_chat_room
+        return client, messages, has_chat_room, has_more
 
     @staticmethod
-    def get_messages_as_dict(user_id: int) -> list[dict]:
-        """Lista mensagens formatadas como dicionário"""
-        client = PortalRepository.get_client_by_user_id_or_404(user_id)
-        messages = PortalRepository.get_chat_messages(
-            user_id, client.lawyer_id, client.id
-        )
+    def message_to_dict(message, user_id: int) -> dict:
+        """Formata uma mensagem do chat para o cliente"""
+        if message.sender_id == user_id:
+            sender_type = "client"
+        elif message.message_type == "bot":
+            sender_type = "bot"
+        else:
+            sender_type = "lawyer"
+
+        return {
+            "id": message.id,
+            "content": message.content,
+            "created_at": message.created_at.isoformat(),
+            "is_read": message.is_read,
+            "sender_type": sender_type,
+            "message_type": message.message_type,
+        }
 
-        messages_data = []
-        for message in messages:
-            if message.sender_id == user_id:
-                sender_type = "client"
-            elif message.message_type == "bot":
-                sender_type = "bot"
-            else:
-                sender_type = "lawyer"
+    @staticmethod
+    def get_messages_as_dict(
+        user_id: int,
+        before_id: int | None = None,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ) -> dict:
+        """
+        Página de mensagens formatadas como dicionário
 
-            messages_data.append(
-                {
-                    "id": message.id,
-                    "content": message.content,
-                    "created_at": message.created_at.isoformat(),
-                    "is_read": message.is_read,
-                    "sender_type": sender_type,
-                    "message_type": message.message_type,
-                }
-            )
+        Sem cursor traz as mais recentes; `before_id` carrega o histórico
+        anterior e `after_id` só as novas desde a última recebida.
 
-        return messages_data
+        Returns:
+            dict: {"messages": [...], "has_more": bool}
+        """
+        client = PortalRepository.get_client_by_user_id_or_404(user_id)
+        if client.lawyer_id is None:
+            return {"messages": [], "has_more": False}
+
+        messages, has_more = PortalRepository.get_chat_messages_page(
+            user_id,
+            client.lawyer_id,
+            client.id,
+            before_id=before_id,
+            after_id=after_id,
+            limit=chat_page_size(limit),
+        )
+        return {
+            "messages": [
+                PortalChatService.message_to_dict(message, user_id)
+                for message in messages
+            ],
+            "has_more": has_more,
+        }
 
     @staticmethod
     def send_message(
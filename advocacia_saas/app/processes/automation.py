@@ -2,24 +2,59 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Optional
 
 from app.models import ProcessAutomation
 
+IN_CHUNK = 1000
 
-def run_process_automations(user_id: int, event_data: Dict[str, Any]) -> int:
+
+def load_automations_by_user(
+    user_ids: Iterable[int], trigger_type: Optional[str] = None
+) -> Dict[int, List[ProcessAutomation]]:
+    """Carrega as automações ativas de vários usuários de uma vez.
+
+    Args:
+        user_ids: IDs dos usuários.
+        trigger_type: Restringe a um tipo de gatilho (ex.: "deadline").
+
+    Returns:
+        Automações agrupadas por user_id (usuários sem automação ficam de fora).
+    """
+    user_ids = sorted(set(user_ids))
+    by_user: Dict[int, List[ProcessAutomation]] = {}
+    for start in range(0, len(user_ids), IN_CHUNK):
+        query = ProcessAutomation.query.filter(
+            ProcessAutomation.user_id.in_(user_ids[start : start + IN_CHUNK]),
+            ProcessAutomation.is_active.is_(True),
+        )
+        if trigger_type:
+            query = query.filter(ProcessAutomation.trigger_type == trigger_type)
+        for automation in query.order_by(ProcessAutomation.id):
+            by_user.setdefault(automation.user_id, []).append(automation)
+    return by_user
+
+
+def run_process_automations(
+    user_id: int,
+    event_data: Dict[str, Any],
+    automations: Optional[List[ProcessAutomation]] = None,
+) -> int:
     """Executa automações ativas para o usuário com base no evento.
 
     Args:
         user_id: ID do usuário dono das automações.
         event_data: Dados do evento (trigger_type, process_id, etc.).
+        automations: Automações já carregadas (ver load_automations_by_user);
+            se omitido, são consultadas no banco.
 
     Returns:
         Quantidade de automações executadas com sucesso.
     """
-    automations = ProcessAutomation.query.filter_by(
-        user_id=user_id, is_active=True
-    ).all()
+    if automations is None:
+        automations = ProcessAutomation.query.filter_by(
+            user_id=user_id, is_active=True
+        ).all()
 
     executed = 0
     for automation in automations:
@@ -6,10 +6,11 @@ import os
 from datetime import datetime, timedelta
 
 from flask import render_template
-from flask_mail import Mail, Message
+from flask_mail import Mail
 
 from app import db
 from app.models import Process, ProcessNotification, User
+from app.services.outbound_email import outbound_email
 
 mail = Mail()
 
@@ -21,17 +22,17 @@ def init_mail(app):
 
 
 def send_email_notification(user, subject, html_content, text_content=None):
-    """Envia notificação por email"""
+    """Enfileira notificação por email (entregue pelos workers da fila)"""
     try:
-        msg = Message(subject=subject, recipients=[user.email], html=html_content)
-
-        if text_content:
-            msg.body = text_content
-
-        mail.send(msg)
-        return True
+        return outbound_email.enqueue(
+            user.email,
+            subject,
+            html=html_content,
+            text=text_content,
+            category="notification",
+        )
     except Exception as e:
-        print(f"Erro ao enviar email: {e}")
+        print(f"Erro ao enfileirar email: {e}")
         return False
 
 
@@ -21,6 +21,7 @@ from app import db
 from app.models import Process, ProcessAttachment, ProcessCost, ProcessMovement
 from app.processes import bp  # Usar o mesmo blueprint de processes
 from app.processes.automation import run_process_automations
+from app.services.pdf_converter import convert_to_pdf
 
 # Configurações para upload
 UPLOAD_FOLDER = os.path.join(
@@ -253,10 +254,27 @@ def upload_attachment(process_id):
 
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
+            content_type = file.content_type
+            converted_data = None
+            # Conversão opcional para PDF (pool LibreOffice para DOC/DOCX)
+            if (
+                "convert_to_pdf" in request.form
+                and filename.rsplit(".", 1)[1].lower() != "pdf"
+            ):
+                pdf_data, pdf_filename = convert_to_pdf(file.read(), filename)
+                file.stream.seek(0)
+                if pdf_filename.endswith(".pdf"):
+                    converted_data, filename = pdf_data, pdf_filename
+                    content_type = "application/pdf"
+
             file_path = os.path.join(
                 UPLOAD_FOLDER, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
             )
-            file.save(file_path)
+            if converted_data is not None:
+                with open(file_path, "wb") as f:
+                    f.write(converted_data)
+            else:
+                file.save(file_path)
 
             attachment = ProcessAttachment(
                 process_id=process_id,
@@ -264,7 +282,7 @@ def upload_attachment(process_id):
                 filename=filename,
                 file_path=file_path,
                 file_size=os.path.getsize(file_path),
-                file_type=file.content_type,
+                file_type=content_type,
                 file_extension=filename.rsplit(".", 1)[1].lower(),
                 title=request.form["title"],
                 description=request.form.get("description"),
@@ -4,6 +4,7 @@ from flask import current_app
 
 from app import db
 from app.models import Process, ProcessNotification, SavedPetition
+from app.services.deadline_scanner import scan_process_deadlines
 
 
 def create_process_notification(
@@ -27,86 +28,9 @@ def create_process_notification(
 
 
 def check_deadline_notifications():
-    """Verifica prazos próximos e cria notificações."""
+    """Verifica prazos próximos e cria notificações (varredura em lote)."""
 
-    # Prazos vencendo hoje
-    today = datetime.now(timezone.utc).date()
-    tomorrow = today + timedelta(days=1)
-    week_from_now = today + timedelta(days=7)
-
-    # Buscar processos com prazos próximos
-    urgent_processes = Process.query.filter(
-        Process.next_deadline.isnot(None), Process.next_deadline <= week_from_now
-    ).all()
-
-    notifications_created = 0
-
-    for process in urgent_processes:
-        days_until = process.days_until_deadline()
-
-        # Determinar tipo de notificação baseado no prazo
-        if days_until < 0:
-            # Prazo vencido
-            if not _notification_exists(process.id, "deadline_overdue", today):
-                create_process_notification(
-                    user_id=process.user_id,
-                    process_id=process.id,
-                    notification_type="deadline_overdue",
-                    title=f"Prazo vencido: {process.title}",
-                    message=f"O prazo processual venceu em {abs(days_until)} dia(s). Processo: {process.process_number or 'Sem número'}",
-                    metadata={
-                        "days_overdue": abs(days_until),
-                        "deadline_date": process.next_deadline.isoformat(),
-                    },
-                )
-                notifications_created += 1
-
-        elif days_until == 0:
-            # Vence hoje
-            if not _notification_exists(process.id, "deadline_today", today):
-                create_process_notification(
-                    user_id=process.user_id,
-                    process_id=process.id,
-                    notification_type="deadline_today",
-                    title=f"Prazo vence hoje: {process.title}",
-                    message=f"O prazo processual vence hoje. Processo: {process.process_number or 'Sem número'}",
-                    metadata={"deadline_date": process.next_deadline.isoformat()},
-                )
-                notifications_created += 1
-
-        elif days_until <= 3:
-            # Vence em até 3 dias
-            if not _notification_exists(process.id, "deadline_urgent", today):
-                create_process_notification(
-                    user_id=process.user_id,
-                    process_id=process.id,
-                    notification_type="deadline_urgent",
-                    title=f"Prazo urgente: {process.title}",
-                    message=f"O prazo processual vence em {days_until} dia(s). Processo: {process.process_number or 'Sem número'}",
-                    metadata={
-                        "days_until": days_until,
-                        "deadline_date": process.next_deadline.isoformat(),
-                    },
-                )
-                notifications_created += 1
-
-        elif days_until <= 7:
-            # Vence em até 7 dias
-            if not _notification_exists(process.id, "deadline_warning", today):
-                create_process_notification(
-                    user_id=process.user_id,
-                    process_id=process.id,
-                    notification_type="deadline_warning",
-                    title=f"Prazo próximo: {process.title}",
-                    message=f"O prazo processual vence em {days_until} dia(s). Processo: {process.process_number or 'Sem número'}",
-                    metadata={
-                        "days_until": days_until,
-                        "deadline_date": process.next_deadline.isoformat(),
-                    },
-                )
-                notifications_created += 1
-
-    return notifications_created
+    return scan_process_deadlines().notifications
 
 
 def check_petitions_without_number():
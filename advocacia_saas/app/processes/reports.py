@@ -4,7 +4,8 @@ from flask import jsonify
 from sqlalchemy import and_, extract, func
 
 from app import db
-from app.models import Process, SavedPetition, process_petitions
+from app.models import Process, SavedPetition, User, process_petitions
+from app.services.business_calendar import business_calendar
 
 
 def get_process_reports(user_id, report_type, start_date=None, end_date=None):
@@ -146,8 +147,14 @@ def get_deadline_analysis_report(user_id, start_date, end_date):
         "upcoming": [],  # Próximos
     }
 
-    for process in processes_with_deadlines:
-        days_until = process.days_until_deadline()
+    # Dias úteis até cada prazo, calculados em lote pelo calendário forense
+    uf = db.session.query(User.uf).filter(User.id == user_id).scalar()
+    days_until_list = business_calendar.business_days_until_many(
+        [(p.next_deadline, uf, p.court) for p in processes_with_deadlines],
+        today=today,
+    )
+
+    for process, days_until in zip(processes_with_deadlines, days_until_list):
 
         if days_until < 0:
             analysis["overdue"].append(
@@ -9,7 +9,6 @@ from datetime import datetime, timezone
 
 from flask import flash, redirect, render_template, request, send_file, url_for
 from flask_login import current_user, login_required
-from jinja2 import Template
 from sqlalchemy import or_
 
 from app import db
@@ -20,6 +19,7 @@ from app.processes import bp
 from app.processes.forms import ProcessForm
 from app.processes.services import ProcessService
 from app.services.ai_service import get_credit_cost
+from app.services.petition_templates import petition_template_engine
 
 
 def _sanitize_text(text: str, max_length: int = 255) -> str:
@@ -510,7 +510,9 @@ def fee_contract_generate():
         }
 
         try:
-            rendered = Template(template.content).render(**context)
+            rendered = petition_template_engine.get_template(
+                template.content, origin="fee_contract", object_id=template.id
+            ).render(**context)
             html_content = f"""
             <!DOCTYPE html>
             <html lang="pt-BR">
@@ -188,6 +188,15 @@ class PetitionTypeSchema(Schema):
         return data
 
 
+def _validate_jinja_template(value):
+    """Recusa templates que não compilam ou violam o sandbox"""
+    from app.services.petition_templates import validate_template
+
+    errors = validate_template(value)
+    if errors:
+        raise ValidationError(errors)
+
+
 class PetitionModelSchema(Schema):
     """Validação de modelos de petição"""
 
@@ -208,6 +217,7 @@ class PetitionModelSchema(Schema):
         required=False,  # Não obrigatório - pode ser gerado depois
         allow_none=True,
         load_default="",
+        validate=_validate_jinja_template,
     )
     is_active = fields.Bool(load_default=False)
     use_dynamic_form = fields.Bool(load_default=False)
@@ -561,11 +571,13 @@ class PetitionSaveSchema(Schema):
 class GenerateDynamicSchema(Schema):
     """Validação para gerar petição dinâmica"""
 
-    petition_type_id = fields.Int(
-        required=True, error_messages={"required": "Tipo de petição é obrigatório"}
+    petition_model_id = fields.Int(
+        required=True, error_messages={"required": "Modelo é obrigatório"}
     )
+    petition_type_id = fields.Int()  # Enviado pelo formulário; o tipo vem do modelo
     form_data = fields.Dict(required=True)
     with_ai = fields.Bool(dump_default=False)
+    background = fields.Bool(load_default=False)
 
 
 class GenerateModelSchema(Schema):
@@ -575,6 +587,7 @@ class GenerateModelSchema(Schema):
         required=True, error_messages={"required": "Modelo é obrigatório"}
     )
     form_data = fields.Dict(required=True)
+    background = fields.Bool(load_default=False)
 
 
 class AttachmentUploadSchema(Schema):
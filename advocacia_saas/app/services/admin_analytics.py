@@ -0,0 +1,665 @@
+"""
+Camada de analytics dos dashboards administrativos (master).
+
+Os dashboards geral, regional, de petições e financeiro agregavam payments,
+ai_generations, credit_transactions e petition_usage a cada acesso, e a
+exportação regional juntava clientes, petições e pagamentos no mesmo JOIN com
+user - cada linha de um lado se repetia para cada linha do outro, inflando
+contagens e somas.
+
+Aqui esses eventos viram fatos diários (ver models: AnalyticsRevenueDaily,
+AnalyticsPetitionDaily, AnalyticsPetitionHourly, AnalyticsAIDaily):
+- cada tabela vem de uma única origem, agrupada por dia e usuário, então um
+  total nunca é multiplicado por outro relacionamento;
+- o grão por usuário mantém exatos os "usuários únicos" e os rankings, e
+  permite filtrar pelo status atual do usuário com um JOIN por chave primária;
+- as leituras agrupam por dia (no máximo algumas centenas de linhas) e
+  distribuem em meses/janelas em Python, igual em SQLite e PostgreSQL.
+
+`flask analytics-refresh` reconstrói os dias a partir do último já
+processado, menos ANALYTICS_REFRESH_LOOKBACK_DAYS (pagamentos confirmados ou
+estornados depois). Rodar a cada poucos minutos; a primeira execução processa
+todo o histórico. Os dias são UTC.
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case, func
+
+from app import db
+from app.models import (
+    AIGeneration,
+    AnalyticsAIDaily,
+    AnalyticsPetitionDaily,
+    AnalyticsPetitionHourly,
+    AnalyticsRefreshState,
+    AnalyticsRevenueDaily,
+    BillingPlan,
+    CreditTransaction,
+    Payment,
+    PetitionType,
+    PetitionUsage,
+    User,
+    UserPlan,
+)
+
+logger = logging.getLogger(__name__)
+
+STATE_NAME = "admin_dashboards"
+NO_PLAN = 0
+DEFAULT_LOOKBACK_DAYS = 3
+# Dias reconstruídos por transação
+REFRESH_CHUNK_DAYS = 31
+# Tamanho máximo das listas IN ao buscar UF/plano dos usuários
+_IN_BATCH = 1000
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _day_start(day: date) -> datetime:
+    """Início do dia em UTC, sem tzinfo (como as colunas são gravadas)"""
+    return datetime.combine(day, time.min)
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def month_key(day: date) -> date:
+    return day.replace(day=1)
+
+
+@dataclass(frozen=True)
+class AnalyticsFilters:
+    """Filtros de plano ("all", "free" ou nome do plano) e status do usuário"""
+
+    plan: str = "all"
+    status: str = "all"
+
+    def apply(self, query, fact):
+        if self.plan == "free":
+            query = query.filter(fact.plan_id == NO_PLAN)
+        elif self.plan != "all":
+            plan_ids = [
+                plan_id
+                for (plan_id,) in db.session.query(BillingPlan.id).filter(
+                    BillingPlan.name == self.plan
+                )
+            ]
+            query = query.filter(fact.plan_id.in_(plan_ids or [-1]))
+
+        if self.status in ("active", "inactive") and hasattr(fact, "user_id"):
+            query = query.join(User, User.id == fact.user_id).filter(
+                User.is_active.is_(self.status == "active")
+            )
+        return query
+
+
+NO_FILTERS = AnalyticsFilters()
+
+
+# =============================================================================
+# Atualização dos fatos
+# =============================================================================
+
+
+def _user_dims(user_ids: Iterable[int]) -> Dict[int, tuple]:
+    """{user_id: (uf, plano atual)} para os usuários informados"""
+    user_ids = list(set(user_ids))
+    dims = {}
+    for start in range(0, len(user_ids), _IN_BATCH):
+        batch = user_ids[start : start + _IN_BATCH]
+        rows = (
+            db.session.query(User.id, User.uf, UserPlan.plan_id)
+            .outerjoin(
+                UserPlan,
+                (UserPlan.user_id == User.id) & UserPlan.is_current.is_(True),
+            )
+            .filter(User.id.in_(batch))
+            .all()
+        )
+        for user_id, uf, plan_id in rows:
+            dims[user_id] = ((uf or "").strip().upper()[:2], plan_id or NO_PLAN)
+    return dims
+
+
+def _revenue_rows(start: datetime, end: datetime) -> List[dict]:
+    day = func.date(Payment.paid_at)
+    grouped = (
+        db.session.query(
+            day,
+            Payment.user_id,
+            func.count(Payment.id),
+            func.coalesce(func.sum(Payment.amount), 0),
+        )
+        .filter(
+            Payment.payment_status == "completed",
+            Payment.paid_at >= start,
+            Payment.paid_at < end,
+        )
+        .group_by(day, Payment.user_id)
+        .all()
+    )
+    dims = _user_dims(row[1] for row in grouped)
+    return [
+        {
+            "day": _as_date(row_day),
+            "user_id": user_id,
+            "plan_id": dims.get(user_id, ("", NO_PLAN))[1],
+            "uf": dims.get(user_id, ("", NO_PLAN))[0],
+            "payment_count": count,
+            "amount": Decimal(str(amount)),
+        }
+        for row_day, user_id, count, amount in grouped
+    ]
+
+
+def _petition_rows(start: datetime, end: datetime) -> List[dict]:
+    day = func.date(PetitionUsage.generated_at)
+    plan_id = func.coalesce(PetitionUsage.plan_id, NO_PLAN)
+    grouped = (
+        db.session.query(
+            day,
+            PetitionUsage.user_id,
+            PetitionUsage.petition_type_id,
+            plan_id,
+            func.count(PetitionUsage.id),
+            func.coalesce(
+                func.sum(case((PetitionUsage.billable.is_(True), 1), else_=0)), 0
+            ),
+            func.coalesce(func.sum(PetitionUsage.amount), 0),
+            func.max(PetitionUsage.generated_at),
+        )
+        .filter(
+            PetitionUsage.generated_at >= start,
+            PetitionUsage.generated_at < end,
+        )
+        .group_by(day, PetitionUsage.user_id, PetitionUsage.petition_type_id, plan_id)
+        .all()
+    )
+    dims = _user_dims(row[1] for row in grouped)
+    rows = []
+    for row_day, user_id, type_id, row_plan, count, billable, amount, last in grouped:
+        if isinstance(last, str):
+            last = datetime.fromisoformat(last)
+        rows.append(
+            {
+                "day": _as_date(row_day),
+                "user_id": user_id,
+                "petition_type_id": type_id,
+                "plan_id": row_plan,
+                "uf": dims.get(user_id, ("", NO_PLAN))[0],
+                "petition_count": count,
+                "billable_count": int(billable),
+                "amount": Decimal(str(amount)),
+                "last_generated_at": last,
+            }
+        )
+    return rows
+
+
+def _hourly_rows(start: datetime, end: datetime) -> List[dict]:
+    day = func.date(PetitionUsage.generated_at)
+    hour = func.extract("hour", PetitionUsage.generated_at)
+    grouped = (
+        db.session.query(day, hour, func.count(PetitionUsage.id))
+        .filter(
+            PetitionUsage.generated_at >= start,
+            PetitionUsage.generated_at < end,
+        )
+        .group_by(day, hour)
+        .all()
+    )
+    return [
+        {"day": _as_date(row_day), "hour": int(row_hour), "petition_count": count}
+        for row_day, row_hour, count in grouped
+    ]
+
+
+def _ai_rows(start: datetime, end: datetime) -> List[dict]:
+    merged = defaultdict(
+        lambda: {
+            "generation_count": 0,
+            "tokens_total": 0,
+            "cost_usd": Decimal("0"),
+            "credits_purchased": 0,
+        }
+    )
+
+    day = func.date(AIGeneration.created_at)
+    for row_day, user_id, count, tokens, cost in (
+        db.session.query(
+            day,
+            AIGeneration.user_id,
+            func.count(AIGeneration.id),
+            func.coalesce(func.sum(AIGeneration.tokens_total), 0),
+            func.coalesce(func.sum(AIGeneration.cost_usd), 0),
+        )
+        .filter(AIGeneration.created_at >= start, AIGeneration.created_at < end)
+        .group_by(day, AIGeneration.user_id)
+    ):
+        entry = merged[(_as_date(row_day), user_id)]
+        entry["generation_count"] = count
+        entry["tokens_total"] = int(tokens)
+        entry["cost_usd"] = Decimal(str(cost))
+
+    day = func.date(CreditTransaction.created_at)
+    for row_day, user_id, credits in (
+        db.session.query(
+            day,
+            CreditTransaction.user_id,
+            func.coalesce(func.sum(CreditTransaction.amount), 0),
+        )
+        .filter(
+            CreditTransaction.transaction_type == "purchase",
+            CreditTransaction.created_at >= start,
+            CreditTransaction.created_at < end,
+        )
+        .group_by(day, CreditTransaction.user_id)
+    ):
+        merged[(_as_date(row_day), user_id)]["credits_purchased"] = int(credits)
+
+    return [
+        {"day": row_day, "user_id": user_id, **values}
+        for (row_day, user_id), values in merged.items()
+    ]
+
+
+_FACTS = (
+    (AnalyticsRevenueDaily, _revenue_rows),
+    (AnalyticsPetitionDaily, _petition_rows),
+    (AnalyticsPetitionHourly, _hourly_rows),
+    (AnalyticsAIDaily, _ai_rows),
+)
+
+
+def _first_event_day() -> Optional[date]:
+    candidates = [
+        db.session.query(func.min(Payment.paid_at)).scalar(),
+        db.session.query(func.min(PetitionUsage.generated_at)).scalar(),
+        db.session.query(func.min(AIGeneration.created_at)).scalar(),
+        db.session.query(func.min(CreditTransaction.created_at)).scalar(),
+    ]
+    days = [_as_date(value) for value in candidates if value is not None]
+    return min(days) if days else None
+
+
+def refresh_range(first_day: date, last_day: date) -> Dict[str, int]:
+    """
+    Reconstrói os fatos dos dias [first_day, last_day]: apaga e regrava cada
+    bloco de REFRESH_CHUNK_DAYS dias em uma transação.
+    """
+    written = {model.__tablename__: 0 for model, _ in _FACTS}
+    chunk_start = first_day
+    while chunk_start <= last_day:
+        chunk_end = min(chunk_start + timedelta(days=REFRESH_CHUNK_DAYS - 1), last_day)
+        start, end = _day_start(chunk_start), _day_start(chunk_end + timedelta(days=1))
+
+        for model, build_rows in _FACTS:
+            rows = build_rows(start, end)
+            table = model.__table__
+            db.session.execute(
+                table.delete().where(
+                    table.c.day >= chunk_start, table.c.day <= chunk_end
+                )
+            )
+            if rows:
+                db.session.execute(table.insert(), rows)
+            written[model.__tablename__] += len(rows)
+
+        db.session.commit()
+        chunk_start = chunk_end + timedelta(days=1)
+    return written
+
+
+def refresh(
+    since: Optional[date] = None,
+    full: bool = False,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+) -> dict:
+    """
+    Atualização incremental: reconstrói do último dia processado (menos
+    `lookback_days`) até hoje. `since` força o início; `full` refaz tudo.
+    """
+    today = _utc_today()
+    state = db.session.get(AnalyticsRefreshState, STATE_NAME)
+
+    if since is None and not full and state is not None:
+        since = state.refreshed_through - timedelta(days=lookback_days)
+    if since is None:
+        since = _first_event_day() or today
+        if full:
+            for model, _ in _FACTS:
+                db.session.execute(model.__table__.delete())
+
+    since = min(since, today)
+    written = refresh_range(since, today)
+
+    state = db.session.get(AnalyticsRefreshState, STATE_NAME)
+    if state is None:
+        state = AnalyticsRefreshState(name=STATE_NAME, refreshed_through=today)
+        db.session.add(state)
+    state.refreshed_through = today
+    state.refreshed_at = datetime.now(timezone.utc)
+    db.session.commit()
+
+    logger.info(f"Analytics atualizado de {since} a {today}: {written}")
+    return {"since": since, "until": today, "rows": written}
+
+
+def refreshed_at() -> Optional[datetime]:
+    """Momento da última atualização dos fatos (None = nunca)"""
+    state = db.session.get(AnalyticsRefreshState, STATE_NAME)
+    return state.refreshed_at if state else None
+
+
+# =============================================================================
+# Leituras
+# =============================================================================
+
+
+def _between(query, fact, start: Optional[date], end: Optional[date] = None):
+    if start is not None:
+        query = query.filter(fact.day >= start)
+    if end is not None:
+        query = query.filter(fact.day < end)
+    return query
+
+
+def daily_series(
+    *columns,
+    fact,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    filters: AnalyticsFilters = NO_FILTERS,
+) -> Dict[date, tuple]:
+    """
+    Soma as colunas do fato por dia: {dia: (soma1, soma2, ...)}.
+
+    Dias sem movimento não aparecem; use sum_window para totalizar janelas.
+    """
+    query = db.session.query(
+        fact.day, *[func.coalesce(func.sum(column), 0) for column in columns]
+    )
+    query = filters.apply(_between(query, fact, start, end), fact)
+    return {
+        _as_date(row[0]): tuple(row[1:]) for row in query.group_by(fact.day).all()
+    }
+
+
+def sum_window(series: Dict[date, tuple], start: date, end: date, index: int = 0):
+    """Soma a posição `index` da série nos dias [start, end)"""
+    return sum(
+        (values[index] for day, values in series.items() if start <= day < end), 0
+    )
+
+
+def window_totals(
+    *columns,
+    fact,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    filters: AnalyticsFilters = NO_FILTERS,
+) -> tuple:
+    """Soma das colunas do fato no período"""
+    query = db.session.query(
+        *[func.coalesce(func.sum(column), 0) for column in columns]
+    )
+    return tuple(filters.apply(_between(query, fact, start, end), fact).one())
+
+
+def revenue_by_plan_and_month(start: date) -> Dict[tuple, Decimal]:
+    """{(plan_id, 1º dia do mês): receita} desde `start`"""
+    rows = _between(
+        db.session.query(
+            AnalyticsRevenueDaily.plan_id,
+            AnalyticsRevenueDaily.day,
+            func.sum(AnalyticsRevenueDaily.amount),
+        ),
+        AnalyticsRevenueDaily,
+        start,
+    ).group_by(AnalyticsRevenueDaily.plan_id, AnalyticsRevenueDaily.day)
+
+    totals = defaultdict(Decimal)
+    for plan_id, day, amount in rows:
+        totals[(plan_id, month_key(_as_date(day)))] += Decimal(str(amount or 0))
+    return totals
+
+
+def top_users_by_petitions(
+    start: date, filters: AnalyticsFilters = NO_FILTERS, limit: int = 10
+):
+    """Usuários com mais petições no período"""
+    fact = AnalyticsPetitionDaily
+    petition_count = func.sum(fact.petition_count)
+    query = db.session.query(
+        User.id,
+        User.username,
+        User.full_name,
+        User.email,
+        User.uf,
+        petition_count.label("petition_count"),
+        func.coalesce(func.sum(fact.amount), 0).label("total_value"),
+        func.max(fact.last_generated_at).label("last_petition"),
+    ).join(fact, fact.user_id == User.id)
+    query = _between(query, fact, start)
+    query = _filter_plan_and_status(query, fact, filters)
+    return (
+        query.group_by(User.id, User.username, User.full_name, User.email, User.uf)
+        .order_by(petition_count.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def top_users_by_ai(start: date, limit: int = 10):
+    """Usuários com mais tokens de IA no período"""
+    fact = AnalyticsAIDaily
+    return (
+        _between(
+            db.session.query(
+                User.id,
+                User.username,
+                User.full_name,
+                func.sum(fact.generation_count).label("generation_count"),
+                func.coalesce(func.sum(fact.tokens_total), 0).label("total_tokens"),
+                func.coalesce(func.sum(fact.cost_usd), 0).label("total_cost"),
+            ).join(fact, fact.user_id == User.id),
+            fact,
+            start,
+        )
+        .filter(fact.generation_count > 0)
+        .group_by(User.id, User.username, User.full_name)
+        .order_by(func.sum(fact.tokens_total).desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _filter_plan_and_status(query, fact, filters: AnalyticsFilters):
+    """Como AnalyticsFilters.apply, para consultas que já fazem JOIN com User"""
+    query = AnalyticsFilters(plan=filters.plan).apply(query, fact)
+    if filters.status in ("active", "inactive"):
+        query = query.filter(User.is_active.is_(filters.status == "active"))
+    return query
+
+
+def petitions_by_uf(start: Optional[date], filters: AnalyticsFilters = NO_FILTERS):
+    fact = AnalyticsPetitionDaily
+    count = func.sum(fact.petition_count)
+    total = func.coalesce(func.sum(fact.amount), 0)
+    query = db.session.query(
+        fact.uf.label("uf"),
+        count.label("petition_count"),
+        total.label("total_value"),
+        (total / count).label("avg_value"),
+    ).filter(fact.uf != "")
+    query = filters.apply(_between(query, fact, start), fact)
+    return query.group_by(fact.uf).order_by(count.desc()).all()
+
+
+def revenue_by_uf(start: Optional[date], filters: AnalyticsFilters = NO_FILTERS):
+    fact = AnalyticsRevenueDaily
+    total = func.coalesce(func.sum(fact.amount), 0)
+    query = db.session.query(
+        fact.uf.label("uf"),
+        total.label("total_revenue"),
+        func.sum(fact.payment_count).label("payment_count"),
+    ).filter(fact.uf != "")
+    query = filters.apply(_between(query, fact, start), fact)
+    return query.group_by(fact.uf).order_by(total.desc()).all()
+
+
+def petitions_by_type(start: Optional[date], filters: AnalyticsFilters = NO_FILTERS):
+    """Petições por tipo: nome, quantidade, valor, valor médio e usuários únicos"""
+    fact = AnalyticsPetitionDaily
+    count = func.sum(fact.petition_count)
+    total = func.coalesce(func.sum(fact.amount), 0)
+    query = db.session.query(
+        PetitionType.name.label("petition_type"),
+        count.label("count"),
+        total.label("total_value"),
+        (total / count).label("avg_value"),
+        func.count(fact.user_id.distinct()).label("unique_users"),
+    ).outerjoin(PetitionType, PetitionType.id == fact.petition_type_id)
+    query = filters.apply(_between(query, fact, start), fact)
+    return (
+        query.group_by(fact.petition_type_id, PetitionType.name)
+        .order_by(count.desc())
+        .all()
+    )
+
+
+def petitions_by_hour(start: Optional[date]) -> List[dict]:
+    fact = AnalyticsPetitionHourly
+    counts = dict(
+        _between(
+            db.session.query(fact.hour, func.sum(fact.petition_count)), fact, start
+        )
+        .group_by(fact.hour)
+        .all()
+    )
+    return [{"hour": hour, "count": int(counts.get(hour, 0))} for hour in range(24)]
+
+
+def petition_revenue_by_plan(
+    start: Optional[date], filters: AnalyticsFilters = NO_FILTERS
+):
+    """Valor das petições billable por plano (nome, receita, quantidade)"""
+    fact = AnalyticsPetitionDaily
+    total = func.coalesce(func.sum(fact.amount), 0)
+    query = (
+        db.session.query(
+            BillingPlan.name,
+            total.label("total_revenue"),
+            func.sum(fact.billable_count).label("subscription_count"),
+        )
+        .join(BillingPlan, BillingPlan.id == fact.plan_id)
+        .filter(fact.billable_count > 0)
+    )
+    query = filters.apply(_between(query, fact, start), fact)
+    return query.group_by(BillingPlan.id, BillingPlan.name).order_by(total.desc()).all()
+
+
+@dataclass(frozen=True)
+class LifetimeValue:
+    avg_payment: float
+    total_payments: int
+    unique_users: int
+
+
+def lifetime_value(
+    start: Optional[date], filters: AnalyticsFilters = NO_FILTERS
+) -> LifetimeValue:
+    fact = AnalyticsRevenueDaily
+    query = db.session.query(
+        func.coalesce(func.sum(fact.amount), 0),
+        func.coalesce(func.sum(fact.payment_count), 0),
+        func.count(fact.user_id.distinct()),
+    )
+    amount, payments, users = filters.apply(_between(query, fact, start), fact).one()
+    return LifetimeValue(
+        avg_payment=float(amount) / payments if payments else 0.0,
+        total_payments=int(payments),
+        unique_users=int(users),
+    )
+
+
+# =============================================================================
+# Métricas de assinaturas (direto de user_plans, que é pequena)
+# =============================================================================
+
+
+def churn_series(
+    now: datetime, months_range: int, filters: AnalyticsFilters = NO_FILTERS
+) -> List[dict]:
+    """Cancelamentos e ativos no início de cada janela de 30 dias"""
+    plan_ids = None
+    if filters.plan not in ("all", "free"):
+        plan_ids = [
+            plan_id
+            for (plan_id,) in db.session.query(BillingPlan.id).filter(
+                BillingPlan.name == filters.plan
+            )
+        ]
+
+    first_start = now - timedelta(days=30 * (months_range - 1))
+    query = db.session.query(
+        UserPlan.started_at, UserPlan.renewal_date, UserPlan.status
+    ).filter(
+        UserPlan.status.in_(["active", "canceled"]),
+        db.or_(
+            UserPlan.renewal_date.is_(None),
+            UserPlan.renewal_date >= first_start.replace(tzinfo=None),
+        ),
+    )
+    if plan_ids is not None:
+        query = query.filter(UserPlan.plan_id.in_(plan_ids or [-1]))
+    plans = query.all()
+
+    def naive(value):
+        return value.replace(tzinfo=None) if value and value.tzinfo else value
+
+    plans = [(naive(s), naive(r), status) for s, r, status in plans]
+
+    series = []
+    for months_back in range(months_range - 1, -1, -1):
+        start_date = (now - timedelta(days=30 * months_back)).replace(tzinfo=None)
+        end_date = start_date + timedelta(days=30)
+
+        churned = sum(
+            1
+            for _, renewal, status in plans
+            if status == "canceled" and renewal and start_date <= renewal < end_date
+        )
+        active_start = sum(
+            1
+            for started, renewal, _ in plans
+            if started
+            and started < start_date
+            and (renewal is None or renewal >= start_date)
+        )
+        churn_rate = (churned / active_start * 100) if active_start > 0 else 0
+
+        series.append(
+            {
+                "month": start_date.strftime("%Y-%m"),
+                "churned": churned,
+                "active_start": active_start,
+                "churn_rate": round(churn_rate, 2),
+            }
+        )
+    return series
@@ -0,0 +1,209 @@
+"""
+Cache de completions da OpenAI endereçado por conteúdo.
+
+A chave é o SHA-256 de (modelo, mensagens normalizadas, temperatura,
+max_tokens), então a mesma requisição feita por usuários diferentes ou em
+retentativas reaproveita a resposta. O cache é opt-in por operação via
+AICreditConfig.cache_enabled / cache_ttl_seconds.
+
+Backends:
+- RedisCompletionCache: compartilhado entre workers (quando REDIS_URL existe).
+  A remoção por tamanho fica a cargo da política maxmemory do Redis
+  (recomendado: allkeys-lru).
+- LRUCompletionCache: em memória, com TTL e limite de entradas/bytes.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "petitio:ai_cache:stats"
+
+
+def make_cache_key(model, messages, temperature, max_tokens):
+    """Hash estável da requisição (espaços em branco normalizados)"""
+    normalized = [
+        {
+            "role": message.get("role"),
+            "content": re.sub(r"\s+", " ", str(message.get("content") or "")).strip(),
+        }
+        for message in messages
+    ]
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": normalized,
+            "temperature": round(float(temperature), 3),
+            "max_tokens": int(max_tokens),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCompletionCache:
+    """Cache em memória com TTL e remoção LRU por quantidade e tamanho"""
+
+    def __init__(self, max_entries=1000, max_bytes=50 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if not item:
+                return None
+            expires_at, value, size = item
+            if expires_at < time.time():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        size = len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.time() + ttl, value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def info(self):
+        return {"backend": "memory", "entries": len(self._data), "bytes": self._bytes}
+
+    def _remove(self, key):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+
+class RedisCompletionCache:
+    """Cache no Redis (compartilhado entre processos)"""
+
+    def __init__(self, client, prefix="petitio:ai_cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key, value, ttl):
+        self.client.set(
+            self.prefix + key, json.dumps(value, ensure_ascii=False), ex=int(ttl)
+        )
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+    def info(self):
+        return {"backend": "redis", "entries": None, "bytes": None}
+
+
+class CompletionCache:
+    """Fachada do cache com contadores de hit/miss por operação"""
+
+    def __init__(self):
+        self._backend = None
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = self._create_backend()
+        return self._backend
+
+    def _create_backend(self):
+        try:
+            from flask import current_app
+
+            from app.utils.redis_client import get_redis
+
+            client = get_redis("REDIS_CACHE_DB")
+            if client:
+                return RedisCompletionCache(client)
+            return LRUCompletionCache(
+                max_entries=current_app.config.get("AI_CACHE_MAX_ENTRIES", 1000),
+                max_bytes=current_app.config.get(
+                    "AI_CACHE_MAX_BYTES", 50 * 1024 * 1024
+                ),
+            )
+        except RuntimeError:
+            # Fora de app context (scripts): cache local
+            return LRUCompletionCache()
+
+    def get(self, operation, key):
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Falha ao ler cache de IA: {e}")
+            value = None
+        self._count(operation, "hits" if value else "misses")
+        return value
+
+    def set(self, key, value, ttl):
+        try:
+            self.backend.set(key, value, ttl)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar cache de IA: {e}")
+
+    def _count(self, operation, field):
+        with self._stats_lock:
+            op_stats = self._stats.setdefault(operation, {"hits": 0, "misses": 0})
+            op_stats[field] += 1
+        if isinstance(self._backend, RedisCompletionCache):
+            try:
+                self._backend.client.hincrby(STATS_KEY, f"{operation}:{field}", 1)
+            except Exception:
+                pass
+
+    def stats(self):
+        """
+        Contadores de hit/miss por operação. Com Redis, soma todos os
+        workers; em memória, reflete apenas o processo atual.
+        """
+        if isinstance(self.backend, RedisCompletionCache):
+            try:
+                stats = {}
+                for field, value in self.backend.client.hgetall(STATS_KEY).items():
+                    field = field.decode() if isinstance(field, bytes) else field
+                    operation, kind = field.rsplit(":", 1)
+                    stats.setdefault(operation, {"hits": 0, "misses": 0})[kind] = int(
+                        value
+                    )
+                return stats
+            except Exception as e:
+                logger.warning(f"Falha ao ler estatísticas do cache de IA: {e}")
+        with self._stats_lock:
+            return {op: dict(values) for op, values in self._stats.items()}
+
+    def reset(self):
+        """Limpa entradas e contadores"""
+        self.backend.clear()
+        with self._stats_lock:
+            self._stats.clear()
+        if isinstance(self._backend, RedisCompletionCache):
+            self._backend.client.delete(STATS_KEY)
+
+
+completion_cache = CompletionCache()
@@ -0,0 +1,334 @@
+"""
+Fila de jobs assíncronos para geração com IA.
+
+A requisição HTTP apenas registra o job e devolve um id; a chamada à OpenAI
+roda em um pool de threads separado e os tokens são publicados à medida que
+chegam. O navegador acompanha via SSE (/ai/api/jobs/<id>/stream) ou polling
+(/ai/api/jobs/<id>?offset=N).
+
+Os créditos ficam reservados ao enfileirar (app.services.credit_ledger) e
+são efetivados, junto com o registro AIGeneration, quando o job termina; se
+ele falha, a reserva volta ao saldo.
+
+O estado dos jobs fica no Redis quando REDIS_URL está configurado (necessário
+com vários workers do gunicorn) ou em memória no processo.
+
+Para testes de carga offline, aponte OPENAI_BASE_URL para
+scripts/fake_openai_server.py.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from app import db
+from app.services.ai_service import ai_service
+from app.services.job_store import MemoryJobStore, RedisJobStore
+
+logger = logging.getLogger(__name__)
+
+# Seções que contam como fundamentação (mesma regra de AIGenerationService)
+FUNDAMENTOS_SECTIONS = {
+    "direito",
+    "fundamentos",
+    "fundamentacao",
+    "fundamentacao-juridica",
+    "fundamentos-juridicos",
+    "do-direito",
+    "dos-fundamentos",
+}
+
+
+# =============================================================================
+# OPERAÇÕES SUPORTADAS
+# =============================================================================
+
+
+def _section_operation(params):
+    section_type = params.get("section_type", "")
+    is_fundamentos = section_type.lower().replace("_", "-") in FUNDAMENTOS_SECTIONS
+    context = dict(params.get("context") or {})
+    context["petition_type"] = params.get("petition_type", "")
+    return {
+        "generation_type": "fundamentos" if is_fundamentos else "section",
+        "petition_type_slug": params.get("petition_type", ""),
+        "section_name": section_type,
+        "input_data": context,
+        "description": f"Geração de seção: {section_type}",
+        "call": lambda: ai_service.generate_section(
+            section_type=section_type,
+            context=context,
+            existing_content=params.get("existing_content", ""),
+            premium=True if is_fundamentos else bool(params.get("premium", False)),
+        ),
+    }
+
+
+def _full_petition_operation(params):
+    petition_type = params.get("petition_type", "")
+    context = params.get("context") or {}
+    return {
+        "generation_type": "full_petition",
+        "petition_type_slug": petition_type,
+        "input_data": context,
+        "description": f"Geração de petição completa: {petition_type}",
+        "call": lambda: ai_service.generate_full_petition(
+            petition_type=petition_type,
+            context=context,
+            premium=bool(params.get("premium", True)),
+        ),
+    }
+
+
+def _improve_operation(params):
+    text = params.get("text", "")
+    return {
+        "generation_type": "improve",
+        "input_data": {"text": text[:500], "context": params.get("context", "")},
+        "description": "Melhoria de texto",
+        "call": lambda: ai_service.improve_text(
+            text=text,
+            context=params.get("context", ""),
+            premium=bool(params.get("premium", False)),
+        ),
+    }
+
+
+def _fundamentos_operation(params):
+    document_text = params.get("document_text", "")
+    return {
+        "generation_type": "fundamentos",
+        "petition_type_slug": params.get("petition_type", ""),
+        "input_data": {"petition_type": params.get("petition_type", "")},
+        "description": "Fundamentação jurídica baseada em documento",
+        "call": lambda: ai_service.generate_fundamentos_from_document(
+            document_text=document_text,
+            petition_type=params.get("petition_type", ""),
+            additional_context=params.get("additional_context", ""),
+            document_analysis=params.get("document_analysis"),
+        ),
+    }
+
+
+OPERATIONS = {
+    "section": _section_operation,
+    "full_petition": _full_petition_operation,
+    "improve": _improve_operation,
+    "fundamentos": _fundamentos_operation,
+}
+
+
+# =============================================================================
+# GERENCIADOR
+# =============================================================================
+
+
+class AIJobManager:
+    """Recebe jobs de geração e os executa em um pool de threads"""
+
+    def __init__(self):
+        self._executor = None
+        self._store = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configura pool e armazenamento a partir da configuração do app"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=app.config.get("AI_JOB_WORKERS", 4),
+                    thread_name_prefix="ai-job",
+                )
+        with app.app_context():
+            from app.utils.redis_client import get_redis
+
+            client = get_redis("REDIS_CACHE_DB")
+            self._store = (
+                RedisJobStore(client, prefix="petitio:ai_job")
+                if client
+                else MemoryJobStore()
+            )
+        app.extensions["ai_jobs"] = self
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = MemoryJobStore()
+        return self._store
+
+    def submit(self, app, user, operation, params, credit_cost):
+        """
+        Registra e enfileira um job, reservando os créditos.
+
+        Returns:
+            dict | None: job registrado (id, status, ...), ou None se faltou
+            saldo para a reserva
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Operação de IA desconhecida: {operation}")
+
+        # O custo fica retido até o job terminar: dois jobs simultâneos não
+        # gastam o mesmo saldo
+        is_master = user.user_type == "master"
+        reservation_id = None
+        if credit_cost and not is_master:
+            from app.services.credit_ledger import credit_ledger
+
+            reservation = credit_ledger.reserve(
+                user.id,
+                credit_cost,
+                description=OPERATIONS[operation](params)["description"],
+            )
+            if reservation is None:
+                db.session.rollback()
+                return None
+            reservation_id = reservation.id
+            db.session.commit()
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "user_id": user.id,
+            "is_master": is_master,
+            "operation": operation,
+            "status": "queued",
+            "credit_cost": credit_cost,
+            "reservation_id": reservation_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_ts": time.time(),
+            "generation_id": None,
+            "content": None,
+            "error": None,
+            "metadata": {},
+        }
+        self.store.create(job)
+        self._executor.submit(self._run, app, job, params)
+        return job
+
+    @staticmethod
+    def generation_type_for(operation, params):
+        """Tipo de geração (chave de custo em AICreditConfig) de uma operação"""
+        return OPERATIONS[operation](params)["generation_type"]
+
+    def get(self, job_id, user_id):
+        """Retorna o job se pertencer ao usuário"""
+        job = self.store.get(job_id)
+        if not job or job["user_id"] != user_id:
+            return None
+        return job
+
+    def _run(self, app, job, params):
+        job_id = job["id"]
+        self.store.update(job_id, status="running")
+        spec = OPERATIONS[job["operation"]](params)
+
+        # A chamada também precisa de app context: custos e cache da operação
+        # vêm de AICreditConfig
+        with app.app_context():
+            try:
+                with ai_service.streaming(
+                    lambda token: self.store.append_chunk(job_id, token)
+                ):
+                    content, metadata = spec["call"]()
+            except Exception as e:
+                logger.error(f"Job de IA {job_id} falhou: {e}")
+                self._record_failure(job, spec, str(e))
+                self.store.update(job_id, status="failed", error=str(e))
+                return
+
+            try:
+                result = self._finalize(job, spec, content, metadata)
+            except Exception as e:
+                logger.error(f"Erro ao finalizar job de IA {job_id}: {e}")
+                self._record_failure(job, spec, str(e))
+                result = {"status": "failed", "error": str(e)}
+            finally:
+                db.session.remove()
+        self.store.update(job_id, **result)
+
+    def _finalize(self, job, spec, content, metadata):
+        """Efetiva a reserva de créditos e registra AIGeneration"""
+        from app.ai.repository import AIGenerationRepository
+        from app.services.credit_ledger import credit_ledger
+
+        actual_cost = 0 if job["is_master"] else job["credit_cost"]
+        generation = AIGenerationRepository.create(
+            {
+                "user_id": job["user_id"],
+                "generation_type": spec["generation_type"],
+                "petition_type_slug": spec.get("petition_type_slug"),
+                "section_name": spec.get("section_name"),
+                "credits_used": actual_cost,
+                "model_used": metadata.get("model", "gpt-4o-mini"),
+                "is_cached": bool(metadata.get("cached")),
+                "tokens_input": metadata.get("tokens_input"),
+                "tokens_output": metadata.get("tokens_output"),
+                "tokens_total": metadata.get("tokens_total"),
+                "response_time_ms": metadata.get("response_time_ms"),
+                "input_data": spec.get("input_data"),
+                "output_content": content,
+                "status": "completed",
+            }
+        )
+        db.session.flush()
+
+        # Lança o uso no diário (CreditTransaction) com a geração vinculada
+        if job.get("reservation_id"):
+            credit_ledger.commit(
+                job["reservation_id"], actual_cost, generation_id=generation.id
+            )
+
+        db.session.commit()
+        balance = credit_ledger.balance(job["user_id"])
+
+        return {
+            "status": "completed",
+            "content": content,
+            "generation_id": generation.id,
+            "credits_used": actual_cost,
+            "credits_remaining": "∞" if job["is_master"] else balance,
+            "metadata": {
+                "model": metadata.get("model"),
+                "tokens_used": metadata.get("tokens_total"),
+                "response_time_ms": metadata.get("response_time_ms"),
+            },
+        }
+
+    @staticmethod
+    def _record_failure(job, spec, error_message):
+        from app.ai.repository import AIGenerationRepository
+
+        try:
+            db.session.rollback()
+            if job.get("reservation_id"):
+                from app.services.credit_ledger import credit_ledger
+
+                credit_ledger.release(job["reservation_id"])
+            AIGenerationRepository.create(
+                {
+                    "user_id": job["user_id"],
+                    "generation_type": spec["generation_type"],
+                    "petition_type_slug": spec.get("petition_type_slug"),
+                    "section_name": spec.get("section_name"),
+                    "credits_used": 0,
+                    "status": "failed",
+                    "error_message": error_message,
+                }
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Erro ao registrar falha do job {job['id']}: {e}")
+        finally:
+            db.session.remove()
+
+    def shutdown(self, wait=True):
+        """Encerra o pool (usado em testes e no desligamento do processo)"""
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+ai_job_manager = AIJobManager()
@@ -3,11 +3,19 @@ Serviço de Integração com OpenAI para geração de petições jurídicas.
 Suporta modelos híbridos: GPT-4o-mini (rápido/barato) e GPT-4o (premium).
 """
 
+import logging
 import os
+import threading
 import time
-from typing import Any, Dict, Tuple
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Tuple
 
 from openai import OpenAI
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.services.ai_cache import completion_cache, make_cache_key
+
+logger = logging.getLogger(__name__)
 
 # Configuração de custos LEGADO (usado como fallback)
 # Os valores reais são lidos do banco via AICreditConfig
@@ -54,6 +62,22 @@ def is_premium_operation(operation_key: str) -> bool:
         return operation_key in PREMIUM_OPERATIONS
 
 
+def get_cache_ttl(operation_key: str):
+    """
+    TTL do cache de completions da operação (None = cache desligado).
+
+    Precisa de app context (jobs assíncronos rodam dentro de um). Só falha
+    do banco desliga o cache, e fica no log.
+    """
+    from app.models import AICreditConfig
+
+    try:
+        return AICreditConfig.get_cache_ttl(operation_key)
+    except SQLAlchemyError as e:
+        logger.warning(f"Cache de IA desligado para {operation_key}: {e}")
+        return None
+
+
 # Modelos disponíveis
 MODELS = {
     "fast": "gpt-4o-mini",  # Rápido e barato - tarefas simples
@@ -226,6 +250,10 @@ INSTRUÇÕES:
 }
 
 
+# Callback de streaming ativo na thread atual (ver AIService.streaming)
+_stream_context = threading.local()
+
+
 class AIService:
     """Serviço para geração de conteúdo jurídico com IA"""
 
@@ -244,16 +272,33 @@ class AIService:
         """Retorna o custo em créditos para um tipo de geração (do banco)"""
         return get_credit_cost(generation_type)
 
+    @contextmanager
+    def streaming(self, on_token: Callable[[str], None]):
+        """
+        Faz as chamadas desta thread usarem streaming, entregando cada
+        trecho gerado a `on_token`. Usado pelos jobs assíncronos de IA.
+        """
+        _stream_context.on_token = on_token
+        try:
+            yield
+        finally:
+            _stream_context.on_token = None
+
     def _call_openai(
         self,
         messages: list,
         model: str = "gpt-4o-mini",
         temperature: float = 0.7,
         max_tokens: int = 2000,
+        operation: str = None,
     ) -> Tuple[str, Dict[str, Any]]:
         """
         Faz a chamada à API da OpenAI.
 
+        Se `operation` tiver cache habilitado em AICreditConfig, a resposta é
+        buscada/gravada no cache de completions; hits retornam
+        `metadata["cached"] = True`.
+
         Returns:
             Tuple[str, Dict]: (conteúdo gerado, metadados com tokens e tempo)
         """
@@ -262,6 +307,45 @@ class AIService:
                 "API OpenAI não configurada. Configure OPENAI_API_KEY no .env"
             )
 
+        on_token = getattr(_stream_context, "on_token", None)
+        cache_ttl = get_cache_ttl(operation) if operation else None
+
+        if cache_ttl:
+            start_time = time.time()
+            cache_key = make_cache_key(model, messages, temperature, max_tokens)
+            cached = completion_cache.get(operation, cache_key)
+            if cached:
+                if on_token:
+                    on_token(cached["content"])
+                metadata = dict(cached["metadata"])
+                metadata["cached"] = True
+                metadata["response_time_ms"] = int((time.time() - start_time) * 1000)
+                return cached["content"], metadata
+
+        if on_token:
+            content, metadata = self._stream_openai(
+                messages, model, temperature, max_tokens, on_token
+            )
+        else:
+            content, metadata = self._complete_openai(
+                messages, model, temperature, max_tokens
+            )
+
+        if cache_ttl and content:
+            completion_cache.set(
+                cache_key, {"content": content, "metadata": metadata}, cache_ttl
+            )
+
+        return content, metadata
+
+    def _complete_openai(
+        self,
+        messages: list,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Chamada síncrona (sem streaming) à API da OpenAI"""
         start_time = time.time()
 
         response = self.client.chat.completions.create(
@@ -286,6 +370,59 @@ class AIService:
 
         return content, metadata
 
+    def _stream_openai(
+        self,
+        messages: list,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        on_token: Callable[[str], None],
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Versão em streaming de `_call_openai`.
+
+        Returns:
+            Tuple[str, Dict]: (conteúdo completo, metadados com tokens e tempo)
+        """
+        start_time = time.time()
+
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        parts = []
+        usage = None
+        finish_reason = None
+        for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta and choice.delta.content:
+                parts.append(choice.delta.content)
+                on_token(choice.delta.content)
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+
+        elapsed_ms = int((time.time() - start_time) * 1000)
+
+        metadata = {
+            "model": model,
+            "tokens_input": usage.prompt_tokens if usage else None,
+            "tokens_output": usage.completion_tokens if usage else None,
+            "tokens_total": usage.total_tokens if usage else None,
+            "response_time_ms": elapsed_ms,
+            "finish_reason": finish_reason,
+        }
+
+        return "".join(parts), metadata
+
     def generate_section(
         self,
         section_type: str,
@@ -321,7 +458,7 @@ class AIService:
 
         model = MODELS["premium"] if premium else MODELS["fast"]
 
-        return self._call_openai(messages, model=model)
+        return self._call_openai(messages, model=model, operation="section")
 
     def _build_section_prompt(
         self, section_type: str, context: Dict[str, Any], existing_content: str = None
@@ -407,7 +544,9 @@ class AIService:
 
         model = MODELS["premium"] if premium else MODELS["fast"]
 
-        return self._call_openai(messages, model=model, max_tokens=4000)
+        return self._call_openai(
+            messages, model=model, max_tokens=4000, operation="full_petition"
+        )
 
     def _build_full_petition_prompt(
         self, petition_type: str, context: Dict[str, Any]
@@ -496,7 +635,7 @@ DADOS DO RÉU:
 
         model = MODELS["premium"] if premium else MODELS["fast"]
 
-        return self._call_openai(messages, model=model)
+        return self._call_openai(messages, model=model, operation="improve")
 
     def generate_fee_contract_template(
         self, instructions: str = "", premium: bool = False
@@ -539,7 +678,9 @@ DADOS DO RÉU:
 
         model = MODELS["premium"] if premium else MODELS["fast"]
 
-        return self._call_openai(messages, model=model, max_tokens=2500)
+        return self._call_openai(
+            messages, model=model, max_tokens=2500, operation="fee_contract_create"
+        )
 
     def analyze_case(
         self, facts: str, question: str = None, premium: bool = True
@@ -576,7 +717,9 @@ Seja objetivo e fundamentado."""
 
         model = MODELS["premium"] if premium else MODELS["fast"]
 
-        return self._call_openai(messages, model=model, max_tokens=2500)
+        return self._call_openai(
+            messages, model=model, max_tokens=2500, operation="analyze"
+        )
 
     def generate_petition_content(
         self,
@@ -648,7 +791,12 @@ INSTRUÇÕES IMPORTANTES:
         ]
 
         # Sempre usa modelo premium para análise de documentos
-        return self._call_openai(messages, model=MODELS["premium"], max_tokens=3000)
+        return self._call_openai(
+            messages,
+            model=MODELS["premium"],
+            max_tokens=3000,
+            operation="analyze_document",
+        )
 
     def generate_fundamentos_from_document(
         self,
@@ -696,7 +844,9 @@ INSTRUÇÕES IMPORTANTES:
         ]
 
         # Sempre usa modelo premium para fundamentação
-        return self._call_openai(messages, model=MODELS["premium"], max_tokens=4000)
+        return self._call_openai(
+            messages, model=MODELS["premium"], max_tokens=4000, operation="fundamentos"
+        )
 
     def should_use_premium(self, generation_type: str) -> bool:
         """
@@ -764,7 +914,9 @@ INSTRUÇÕES IMPORTANTES:
         ]
 
         # Sempre usa modelo premium para análise de riscos
-        return self._call_openai(messages, model=MODELS["premium"], max_tokens=3000)
+        return self._call_openai(
+            messages, model=MODELS["premium"], max_tokens=3000, operation="analyze_risk"
+        )
 
 
 # Instância global do serviço
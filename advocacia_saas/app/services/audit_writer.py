@@ -0,0 +1,394 @@
+"""
+Gravação em lote dos logs de auditoria (AuditLog).
+
+AuditManager.log_change apenas monta o registro e o entrega a este writer;
+a requisição não espera o banco e a sessão do chamador não é tocada (antes
+cada evento fazia db.session.commit(), efetivando junto o que o chamador
+tivesse pendente).
+
+Uma thread em background agrupa os registros e faz um INSERT em lote, em uma
+conexão própria, quando o lote atinge AUDIT_BATCH_SIZE ou a cada
+AUDIT_FLUSH_INTERVAL segundos.
+
+Nenhum evento é descartado:
+- fila cheia (AUDIT_QUEUE_MAX): o registro vai para o spool em disco
+  (AUDIT_SPOOL_DIR, arquivos JSONL) em vez de bloquear a requisição;
+- falha no banco: o lote inteiro vai para o spool;
+- o spool é reprocessado pela thread assim que o banco volta a responder;
+- no desligamento (atexit / shutdown()) a fila é esvaziada antes de sair.
+
+stats() expõe os contadores de backpressure (profundidade da fila, registros
+em spool, lotes com falha...), visíveis em /admin/audit-logs/writer-stats.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def build_audit_row(**fields):
+    """
+    Monta a linha de audit_log com a mesma serialização de AuditLog.__init__.
+
+    O timestamp é o do evento, não o da gravação.
+    """
+    from app.models import AuditLog
+
+    log = AuditLog(**fields)
+    row = {
+        column.name: getattr(log, column.name)
+        for column in AuditLog.__table__.columns
+        if column.name != "id"
+    }
+    row["timestamp"] = datetime.now(timezone.utc)
+    return row
+
+
+class AuditLogWriter:
+    """Fila de registros de auditoria gravados em lote por uma thread"""
+
+    def __init__(self):
+        self._app = None
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._flush_requests = queue.Queue()
+        self._stopped = False
+        self.enabled = False
+        self.batch_size = 100
+        self.flush_interval = 2.0
+        self.max_queue = 10000
+        self.spool_dir = os.path.join(tempfile.gettempdir(), "petitio_audit_spool")
+        self._stats = self._empty_stats()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    @staticmethod
+    def _empty_stats():
+        return {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "max_queue_depth": 0,
+            "last_batch_size": 0,
+            "last_flush_ms": None,
+        }
+
+    def init_app(self, app):
+        """Configura limites; a thread sobe no primeiro evento (se AUDIT_ASYNC)"""
+        self.shutdown()
+        self._app = app
+        self.enabled = app.config.get("AUDIT_ASYNC", True)
+        self.batch_size = app.config.get("AUDIT_BATCH_SIZE", self.batch_size)
+        self.flush_interval = app.config.get(
+            "AUDIT_FLUSH_INTERVAL", self.flush_interval
+        )
+        self.max_queue = app.config.get("AUDIT_QUEUE_MAX", self.max_queue)
+        self.spool_dir = app.config.get("AUDIT_SPOOL_DIR") or os.path.join(
+            app.instance_path, "audit_spool"
+        )
+        self._stats = self._empty_stats()
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._stopped = False
+        app.extensions["audit_writer"] = self
+
+    def _after_fork(self):
+        # Threads não sobrevivem ao fork (gunicorn --preload): cada worker
+        # cria fila e thread próprias no primeiro evento
+        self._lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._flush_requests = queue.Queue()
+        self._thread = None
+        if self._queue is not None:
+            self._queue = queue.Queue(maxsize=self.max_queue)
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="audit-writer", daemon=True
+                )
+                self._thread.start()
+
+    # -------------------------------------------------------------------------
+    # API usada pelo AuditManager
+    # -------------------------------------------------------------------------
+
+    def write(self, row):
+        """Enfileira um registro (ou grava na hora se o modo assíncrono está off)"""
+        self._count("enqueued")
+        if not self.enabled or self._queue is None or self._stopped:
+            self._write_rows([row])
+            return
+
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Backpressure: não segura a requisição; o spool é reprocessado
+            # pela thread quando a fila esvaziar
+            self._spool([row])
+            return
+
+        depth = self._queue.qsize()
+        with self._lock:
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+
+    def flush(self, timeout=10):
+        """
+        Grava imediatamente o que estiver na fila.
+
+        Returns:
+            bool: True se a thread confirmou a gravação dentro do timeout
+        """
+        if not self.enabled or self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._flush_requests.put(done)
+        self._queue.put(None)  # acorda a thread
+        return done.wait(timeout)
+
+    def stats(self):
+        """Contadores de gravação e backpressure deste processo"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize() if self._queue else 0
+        stats["queue_max"] = self.max_queue
+        stats["spool_files"] = len(self._spool_files())
+        stats["async"] = self.enabled
+        return stats
+
+    def shutdown(self, timeout=30):
+        """
+        Esvazia a fila, grava os lotes pendentes e encerra a thread.
+
+        Eventos registrados depois disso são gravados de forma síncrona.
+        """
+        with self._lock:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.error("Auditoria: thread de gravação não terminou a tempo")
+                return
+        # Eventos enfileirados enquanto a thread encerrava e sobras do spool
+        if self._queue is not None:
+            self._write_remaining()
+        if self._app is not None:
+            self._replay_spool()
+
+    # -------------------------------------------------------------------------
+    # Thread de gravação
+    # -------------------------------------------------------------------------
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+        self._replay_spool()
+
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                batch.append(item)
+
+            # Drena o que já está na fila sem esperar
+            while len(batch) < self.batch_size and not stopping:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                elif item is not None:
+                    batch.append(item)
+
+            flush_waiters = []
+            while True:
+                try:
+                    flush_waiters.append(self._flush_requests.get_nowait())
+                except queue.Empty:
+                    break
+
+            if (
+                len(batch) >= self.batch_size
+                or time.monotonic() >= deadline
+                or flush_waiters
+                or stopping
+            ):
+                if batch and self._write_rows(batch):
+                    self._replay_spool()
+                batch = []
+                # flush() garante tudo o que foi enfileirado antes dele
+                if flush_waiters and self._write_remaining():
+                    stopping = True
+                deadline = time.monotonic() + self.flush_interval
+                for done in flush_waiters:
+                    done.set()
+
+        # Desligamento: o que chegou depois do sinal também é gravado
+        self._write_remaining()
+
+    def _write_remaining(self):
+        """
+        Grava em lotes tudo o que estiver na fila agora.
+
+        Returns:
+            bool: True se o sinal de parada estava na fila
+        """
+        remaining = []
+        stop_seen = False
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop_seen = True
+            elif item is not None:
+                remaining.append(item)
+        for start in range(0, len(remaining), self.batch_size):
+            self._write_rows(remaining[start : start + self.batch_size])
+        return stop_seen
+
+    def _write_rows(self, rows):
+        """INSERT em lote numa conexão própria; em caso de falha, vai para o spool"""
+        from app import db
+        from app.models import AuditLog
+
+        started = time.perf_counter()
+        try:
+            with self._app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(AuditLog.__table__.insert(), rows)
+        except Exception as e:
+            logger.error(f"Auditoria: falha ao gravar lote de {len(rows)} ({e})")
+            self._count("failed_batches")
+            self._spool(rows)
+            return False
+
+        with self._lock:
+            self._stats["written"] += len(rows)
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(rows)
+            self._stats["last_flush_ms"] = round(
+                (time.perf_counter() - started) * 1000, 2
+            )
+        return True
+
+    # -------------------------------------------------------------------------
+    # Spool em disco
+    # -------------------------------------------------------------------------
+
+    def _spool_files(self):
+        if not self.spool_dir or not os.path.isdir(self.spool_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.spool_dir) if name.endswith(".jsonl")
+        )
+
+    def _spool(self, rows):
+        path = os.path.join(
+            self.spool_dir, f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.jsonl"
+        )
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            with self._spool_lock, open(path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, default=_json_default) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            # Último recurso: o registro fica ao menos no log da aplicação
+            logger.critical(f"Auditoria: spool indisponível ({e}); registros: {rows}")
+            return
+        self._count("spooled", len(rows))
+
+    def _replay_spool(self):
+        """Regrava no banco os arquivos do spool (mais antigos primeiro)"""
+        from app import db
+        from app.models import AuditLog
+
+        for name in self._spool_files():
+            path = os.path.join(self.spool_dir, name)
+            # Rename atômico: com vários workers, só um reprocessa cada arquivo
+            claimed = f"{path}.{os.getpid()}.claim"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            try:
+                with open(claimed, encoding="utf-8") as f:
+                    rows = [_load_row(line) for line in f if line.strip()]
+            except (OSError, ValueError) as e:
+                logger.error(f"Auditoria: spool ilegível {name} ({e})")
+                os.rename(claimed, f"{path}.bad")
+                continue
+
+            # Grava direto (sem _write_rows) para não duplicar o arquivo em
+            # caso de nova falha
+            try:
+                with self._app_context():
+                    with db.engine.begin() as connection:
+                        if rows:
+                            connection.execute(AuditLog.__table__.insert(), rows)
+            except Exception as e:
+                logger.warning(f"Auditoria: spool mantido para nova tentativa ({e})")
+                os.rename(claimed, path)
+                return
+            os.remove(claimed)
+            self._count("replayed", len(rows))
+            self._count("written", len(rows))
+
+    def _app_context(self):
+        if self._app is not None:
+            return self._app.app_context()
+        from flask import current_app
+
+        return current_app._get_current_object().app_context()
+
+    def _count(self, field, amount=1):
+        with self._lock:
+            self._stats[field] += amount
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Tipo não serializável: {type(value)}")
+
+
+def _load_row(line):
+    row = json.loads(line)
+    for key, value in row.items():
+        if isinstance(value, dict) and "__datetime__" in value:
+            row[key] = datetime.fromisoformat(value["__datetime__"])
+    return row
+
+
+audit_writer = AuditLogWriter()
+atexit.register(audit_writer.shutdown)
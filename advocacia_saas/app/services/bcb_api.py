@@ -10,6 +10,10 @@ Códigos das Séries SGS:
 - 226: TR (mensal)
 - 11: SELIC (diária)
 - 4390: CDI (diária)
+
+Os cálculos usam primeiro a cópia local das séries (app/services/bcb_series.py,
+atualizada por `flask bcb-sync`); a API só é consultada quando o período não
+está coberto localmente.
 """
 
 import logging
@@ -65,7 +69,9 @@ SERIES_BCB = {
 BCB_API_URL = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.{codigo}/dados"
 
 
-def buscar_serie_bcb(codigo: int, data_inicio: str, data_fim: str) -> Optional[list]:
+def buscar_serie_bcb(
+    codigo: int, data_inicio: str, data_fim: str, timeout: int = 5
+) -> Optional[list]:
     """
     Busca série temporal da API do BCB.
 
@@ -73,6 +79,7 @@ def buscar_serie_bcb(codigo: int, data_inicio: str, data_fim: str) -> Optional[l
         codigo: Código da série SGS
         data_inicio: Data inicial (formato DD/MM/YYYY)
         data_fim: Data final (formato DD/MM/YYYY)
+        timeout: Segundos até desistir (curto nas requisições da interface)
 
     Returns:
         Lista de dicts com data e valor, ou None em caso de erro
@@ -81,8 +88,7 @@ def buscar_serie_bcb(codigo: int, data_inicio: str, data_fim: str) -> Optional[l
         url = BCB_API_URL.format(codigo=codigo)
         params = {"formato": "json", "dataInicial": data_inicio, "dataFinal": data_fim}
 
-        # Timeout curto para não travar a interface
-        response = requests.get(url, params=params, timeout=5)
+        response = requests.get(url, params=params, timeout=timeout)
         response.raise_for_status()
 
         dados = response.json()
@@ -115,7 +121,9 @@ def calcular_fator_correcao(
 ) -> Dict[str, Any]:
     """
     Calcula o fator de correção monetária para um período usando dados reais do BCB.
-    Se a API não responder, usa valores aproximados como fallback.
+
+    Usa a série armazenada localmente quando ela cobre o período; senão
+    consulta a API e, se ela não responder, usa valores aproximados.
 
     Args:
         indice: Nome do índice (IPCA, INPC, IGPM, TR, SELIC)
@@ -135,6 +143,22 @@ def calcular_fator_correcao(
     serie_info = SERIES_BCB[indice]
     codigo = serie_info["codigo"]
 
+    from app.services.bcb_series import bcb_series_store
+
+    local = bcb_series_store.fator(indice, data_inicial, data_final)
+    if local is not None:
+        return _montar_resultado(
+            indice,
+            serie_info,
+            data_inicial,
+            data_final,
+            local.fator,
+            local.meses,
+            local.valores_mensais,
+            f"Dados oficiais do {serie_info['fonte']} (série do Banco Central, "
+            f"atualizada até {local.atualizado_ate.strftime('%m/%Y')})",
+        )
+
     # Calcular meses entre as datas (para fallback)
     dias = (data_final - data_inicial).days
     meses = max(1, dias / 30)
@@ -176,6 +200,29 @@ def calcular_fator_correcao(
             logger.warning(f"Valor inválido ignorado: {item}")
             continue
 
+    return _montar_resultado(
+        indice,
+        serie_info,
+        data_inicial,
+        data_final,
+        fator_acumulado,
+        len(valores_usados),
+        valores_usados[-12:],  # Últimos 12 meses
+        f"Dados oficiais do {serie_info['fonte']} via API do Banco Central do Brasil",
+    )
+
+
+def _montar_resultado(
+    indice: str,
+    serie_info: dict,
+    data_inicial: datetime,
+    data_final: datetime,
+    fator_acumulado: Decimal,
+    meses: int,
+    valores_mensais: list,
+    observacao: str,
+) -> Dict[str, Any]:
+    """Formata o resultado de calcular_fator_correcao"""
     # Calcular percentual de correção
     percentual_correcao = (fator_acumulado - 1) * 100
 
@@ -193,12 +240,10 @@ def calcular_fator_correcao(
         "periodo": {
             "inicio": data_inicial.strftime("%d/%m/%Y"),
             "fim": data_final.strftime("%d/%m/%Y"),
-            "meses": len(valores_usados),
+            "meses": meses,
         },
-        "valores_mensais": valores_usados[-12:]
-        if len(valores_usados) > 12
-        else valores_usados,  # Últimos 12 meses
-        "observacao": f"Dados oficiais do {serie_info['fonte']} via API do Banco Central do Brasil",
+        "valores_mensais": valores_mensais,
+        "observacao": observacao,
     }
 
 
@@ -225,10 +270,9 @@ def _calcular_fallback(indice: str, serie_info: dict, meses: float) -> Dict[str,
     }
 
 
-@lru_cache(maxsize=100)
 def obter_ultimo_indice(indice: str) -> Optional[Dict[str, Any]]:
     """
-    Obtém o valor mais recente de um índice (com cache).
+    Obtém o valor mais recente de um índice (série local ou API com cache).
 
     Args:
         indice: Nome do índice
@@ -239,6 +283,23 @@ def obter_ultimo_indice(indice: str) -> Optional[Dict[str, Any]]:
     if indice not in SERIES_BCB:
         return None
 
+    from app.services.bcb_series import bcb_series_store
+
+    ultimo = bcb_series_store.ultimo(indice)
+    if ultimo:
+        mes, valor = ultimo
+        return {
+            "indice": indice,
+            "data": mes.strftime("%d/%m/%Y"),
+            "valor": float(valor),
+            "fonte": SERIES_BCB[indice]["fonte"],
+        }
+    return _obter_ultimo_indice_api(indice)
+
+
+@lru_cache(maxsize=100)
+def _obter_ultimo_indice_api(indice: str) -> Optional[Dict[str, Any]]:
+    """Consulta o último valor na API do BCB (cacheado por processo)"""
     codigo = SERIES_BCB[indice]["codigo"]
 
     # Buscar últimos 3 meses para garantir que pegamos o mais recente
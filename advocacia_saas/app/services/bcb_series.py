@@ -0,0 +1,255 @@
+"""
+Cópia local das séries mensais de índices do BCB (IPCA, INPC, IGPM, TR, SELIC).
+
+Os valores ficam na tabela economic_index_values e são carregados em memória
+por processo. Para cada índice guardamos o produto acumulado dos fatores
+mensais (1 + v/100), de modo que o fator de correção de qualquer período é
+apenas acumulado[fim] / acumulado[inicio] - duas buscas binárias e uma
+divisão, sem chamar a API.
+
+A sincronização é incremental: `flask bcb-sync` busca no SGS apenas os meses
+posteriores ao último já armazenado (rodar diariamente; o IBGE/FGV publicam
+uma vez por mês).
+"""
+
+import logging
+import operator
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import accumulate
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.services.bcb_api import SERIES_BCB, buscar_serie_bcb
+
+logger = logging.getLogger(__name__)
+
+# Início da série armazenada (pós Plano Real)
+DEFAULT_START = date(1995, 1, 1)
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _next_month(month: date) -> date:
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+@dataclass(frozen=True)
+class SeriesSnapshot:
+    """Série de um índice em memória (meses ordenados)"""
+
+    months: List[date]
+    values: List[Decimal]
+    # acumulado[k] = produto dos fatores dos meses [0, k); acumulado[0] = 1
+    accumulated: List[Decimal]
+
+    @classmethod
+    def build(cls, months, values):
+        factors = [1 + value / 100 for value in values]
+        accumulated = list(accumulate(factors, operator.mul, initial=Decimal("1")))
+        return cls(months=months, values=values, accumulated=accumulated)
+
+
+@dataclass(frozen=True)
+class CorrectionWindow:
+    """Resultado de BCBSeriesStore.fator para um período"""
+
+    fator: Decimal
+    meses: int
+    valores_mensais: List[dict]  # últimos 12 meses do período
+    atualizado_ate: date
+
+
+class BCBSeriesStore:
+    """Séries do BCB em memória, recarregadas periodicamente do banco"""
+
+    def __init__(self):
+        self._series: Dict[str, SeriesSnapshot] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.reload_interval = 900
+        self.start_date = DEFAULT_START
+
+    def init_app(self, app):
+        """Lê a configuração do app"""
+        self.reload_interval = app.config.get(
+            "BCB_SERIES_RELOAD_SECONDS", self.reload_interval
+        )
+        start = app.config.get("BCB_SERIES_START")
+        if start:
+            self.start_date = date.fromisoformat(start)
+        self._series = {}
+        self._loaded_at = 0.0
+        app.extensions["bcb_series"] = self
+
+    # -------------------------------------------------------------------------
+    # Leitura
+    # -------------------------------------------------------------------------
+
+    def load(self):
+        """Carrega todas as séries do banco (substitui o snapshot atual)"""
+        from app.models import EconomicIndexValue
+
+        rows = (
+            EconomicIndexValue.query.with_entities(
+                EconomicIndexValue.indice,
+                EconomicIndexValue.reference_month,
+                EconomicIndexValue.value,
+            )
+            .order_by(EconomicIndexValue.indice, EconomicIndexValue.reference_month)
+            .all()
+        )
+
+        grouped = {}
+        for indice, month, value in rows:
+            months, values = grouped.setdefault(indice, ([], []))
+            months.append(month)
+            values.append(Decimal(value))
+
+        self._series = {
+            indice: SeriesSnapshot.build(months, values)
+            for indice, (months, values) in grouped.items()
+        }
+        self._loaded_at = time.monotonic()
+
+    def _snapshot(self, indice) -> Optional[SeriesSnapshot]:
+        if time.monotonic() - self._loaded_at > self.reload_interval:
+            with self._lock:
+                if time.monotonic() - self._loaded_at > self.reload_interval:
+                    try:
+                        self.load()
+                    except (RuntimeError, SQLAlchemyError) as e:
+                        # Sem app context ou tabela ainda não migrada
+                        logger.warning(f"Séries BCB locais indisponíveis: {e}")
+                        self._loaded_at = time.monotonic()
+        return self._series.get(indice)
+
+    def fator(self, indice, data_inicial, data_final) -> Optional[CorrectionWindow]:
+        """
+        Fator acumulado dos meses com referência em [data_inicial, data_final]
+        (mesma regra de datas da API do SGS).
+
+        Returns:
+            CorrectionWindow ou None se a série local não cobre o início do
+            período (o chamador deve recorrer à API).
+        """
+        series = self._snapshot(indice)
+        inicio, fim = _as_date(data_inicial), _as_date(data_final)
+        if not series or not series.months or inicio < series.months[0]:
+            return None
+
+        i = bisect_left(series.months, inicio)
+        j = bisect_right(series.months, fim)
+        j = max(i, j)
+
+        valores_mensais = []
+        for k in range(max(i, j - 12), j):
+            valor = series.values[k]
+            valores_mensais.append(
+                {
+                    "data": series.months[k].strftime("%d/%m/%Y"),
+                    "valor": float(valor),
+                    "fator": float(1 + valor / 100),
+                }
+            )
+
+        return CorrectionWindow(
+            fator=series.accumulated[j] / series.accumulated[i],
+            meses=j - i,
+            valores_mensais=valores_mensais,
+            atualizado_ate=series.months[-1],
+        )
+
+    def ultimo(self, indice) -> Optional[tuple]:
+        """(mês, valor) mais recente armazenado para o índice"""
+        series = self._snapshot(indice)
+        if not series or not series.months:
+            return None
+        return series.months[-1], series.values[-1]
+
+    # -------------------------------------------------------------------------
+    # Sincronização
+    # -------------------------------------------------------------------------
+
+    def sync(self, indices=None, timeout=30) -> Dict[str, Optional[int]]:
+        """
+        Busca no SGS os meses posteriores ao último armazenado de cada índice.
+
+        Returns:
+            Dict {índice: meses inseridos} (None quando a API falhou)
+        """
+        from sqlalchemy import func
+
+        from app import db
+        from app.models import EconomicIndexValue
+
+        hoje = date.today()
+        resultado = {}
+
+        for indice in indices or SERIES_BCB.keys():
+            ultimo = (
+                db.session.query(func.max(EconomicIndexValue.reference_month))
+                .filter(EconomicIndexValue.indice == indice)
+                .scalar()
+            )
+            inicio = _next_month(ultimo) if ultimo else self.start_date
+            if inicio > hoje:
+                resultado[indice] = 0
+                continue
+
+            dados = buscar_serie_bcb(
+                SERIES_BCB[indice]["codigo"],
+                inicio.strftime("%d/%m/%Y"),
+                hoje.strftime("%d/%m/%Y"),
+                timeout=timeout,
+            )
+            if dados is None:
+                resultado[indice] = None
+                continue
+
+            novos = 0
+            for item in dados:
+                try:
+                    month = (
+                        datetime.strptime(item["data"], "%d/%m/%Y")
+                        .date()
+                        .replace(day=1)
+                    )
+                    value = Decimal(str(item["valor"]).replace(",", "."))
+                except (KeyError, ValueError, InvalidOperation):
+                    logger.warning(f"BCB {indice}: valor inválido ignorado: {item}")
+                    continue
+                if month < inicio:
+                    continue
+                db.session.add(
+                    EconomicIndexValue(
+                        indice=indice, reference_month=month, value=value
+                    )
+                )
+                inicio = _next_month(month)
+                novos += 1
+
+            try:
+                db.session.commit()
+            except SQLAlchemyError as e:
+                # Outro processo sincronizou ao mesmo tempo
+                db.session.rollback()
+                logger.warning(f"BCB {indice}: sincronização descartada ({e})")
+                novos = 0
+            resultado[indice] = novos
+
+        with self._lock:
+            self.load()
+        return resultado
+
+
+bcb_series_store = BCBSeriesStore()
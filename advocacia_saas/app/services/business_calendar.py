@@ -0,0 +1,371 @@
+"""
+Calendário forense: dias úteis para contagem de prazos processuais.
+
+Regras do CPC:
+- art. 219: prazos em dias contam apenas dias úteis;
+- art. 220: prazos ficam suspensos de 20 de dezembro a 20 de janeiro;
+- art. 224: exclui-se o dia do começo e inclui-se o do vencimento; o prazo
+  que terminaria em dia sem expediente é prorrogado para o dia útil seguinte.
+
+Feriados nacionais (fixos e móveis, a partir da Páscoa) e o recesso são
+calculados aqui. Feriados estaduais, municipais, de tribunal e suspensões de
+expediente ficam na tabela judicial_holidays (`flask holidays-import`).
+
+Cada calendário (nacional + UF + tribunal) é montado uma vez por processo
+numa janela de anos, com um vetor de somas prefixadas de dias úteis e a lista
+ordenada dos dias úteis. Assim "dias úteis entre duas datas" e "somar N dias
+úteis" são acessos a listas (O(1)), e as APIs em lote (`*_many`) atendem
+milhares de prazos sem consultas por linha. A tabela é relida a cada
+BUSINESS_CALENDAR_RELOAD_SECONDS (ou na hora com `invalidate()`).
+"""
+
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+# Lei 662/1949, Lei 6.802/1980 e Lei 14.759/2023 (Consciência Negra, desde 2024)
+NATIONAL_FIXED = {
+    (1, 1): "Confraternização Universal",
+    (4, 21): "Tiradentes",
+    (5, 1): "Dia do Trabalho",
+    (9, 7): "Independência do Brasil",
+    (10, 12): "Nossa Senhora Aparecida",
+    (11, 2): "Finados",
+    (11, 15): "Proclamação da República",
+    (12, 25): "Natal",
+}
+# Deslocamento em relação ao domingo de Páscoa
+NATIONAL_MOVABLE = {
+    -48: "Carnaval",
+    -47: "Carnaval",
+    -2: "Sexta-feira Santa",
+    60: "Corpus Christi",
+}
+RECESS_NAME = "Recesso forense (CPC, art. 220)"
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def easter(year: int) -> date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def national_holidays(year: int) -> Dict[date, str]:
+    """Feriados nacionais do ano (fixos e móveis)"""
+    holidays = {
+        date(year, month, day): name for (month, day), name in NATIONAL_FIXED.items()
+    }
+    if year >= 2024:
+        holidays[date(year, 11, 20)] = "Dia Nacional de Zumbi e da Consciência Negra"
+    sunday = easter(year)
+    for offset, name in NATIONAL_MOVABLE.items():
+        holidays[sunday + timedelta(days=offset)] = name
+    return holidays
+
+
+def _reach(days) -> timedelta:
+    # Dias corridos que certamente contêm `days` dias úteis (fins de semana,
+    # feriados e o recesso de 32 dias)
+    return timedelta(days=2 * abs(days) + 45)
+
+
+def normalize_key(uf=None, court=None) -> Tuple[str, str]:
+    """Chave de calendário: (UF em maiúsculas, tribunal)"""
+    return ((uf or "").strip().upper()[:2], (court or "").strip())
+
+
+class BusinessCalendar:
+    """
+    Dias úteis de um calendário numa janela [start, end].
+
+    prefix[i] = dias úteis em [start, start + i); business[k] = deslocamento
+    (a partir de start) do k-ésimo dia útil da janela.
+    """
+
+    def __init__(self, start: date, end: date, closed: Mapping[date, str]):
+        self.start = start
+        self.end = end
+        # Dias sem expediente que não são fim de semana, com o motivo
+        self.closed = dict(closed)
+        size = (end - start).days + 1
+        prefix = [0] * (size + 1)
+        business = []
+        for offset in range(size):
+            day = start + timedelta(days=offset)
+            is_business = day.weekday() < 5 and day not in self.closed
+            prefix[offset + 1] = prefix[offset] + is_business
+            if is_business:
+                business.append(offset)
+        self._prefix = prefix
+        self._business = business
+
+    def covers(self, first: date, last: date) -> bool:
+        return self.start <= first and last <= self.end
+
+    def _offset(self, day) -> int:
+        offset = (_as_date(day) - self.start).days
+        if offset < 0 or offset >= len(self._prefix) - 1:
+            raise ValueError(f"{day} fora da janela do calendário")
+        return offset
+
+    def _day(self, index: int) -> date:
+        if index < 0 or index >= len(self._business):
+            raise ValueError("Resultado fora da janela do calendário")
+        return self.start + timedelta(days=self._business[index])
+
+    def is_business_day(self, day) -> bool:
+        offset = self._offset(day)
+        return self._prefix[offset + 1] > self._prefix[offset]
+
+    def business_days_between(self, start, end) -> int:
+        """
+        Dias úteis em (start, end] - exclui o dia do começo e inclui o do
+        vencimento. Negativo quando end < start (prazo vencido).
+        """
+        a, b = self._offset(start), self._offset(end)
+        if b >= a:
+            return self._prefix[b + 1] - self._prefix[a + 1]
+        return -(self._prefix[a + 1] - self._prefix[b + 1])
+
+    def add_business_days(self, day, days: int) -> date:
+        """
+        N-ésimo dia útil depois de `day` (antes, se N < 0). Com N = 0
+        devolve o próprio dia ou, se não for útil, o próximo dia útil.
+        """
+        offset = self._offset(day)
+        if days > 0:
+            return self._day(self._prefix[offset + 1] + days - 1)
+        if days < 0:
+            return self._day(self._prefix[offset] + days)
+        return self._day(self._prefix[offset])
+
+    def next_business_day(self, day) -> date:
+        """O próprio dia, se útil, ou o próximo dia útil"""
+        return self.add_business_days(day, 0)
+
+    def due_date(self, start, days: int, business_days: bool = True) -> date:
+        """Vencimento de um prazo de `days` dias contado a partir de `start`"""
+        if business_days:
+            return self.add_business_days(start, days)
+        return self.next_business_day(_as_date(start) + timedelta(days=days))
+
+    def closed_days(self, start, end) -> List[Tuple[date, str]]:
+        """Feriados e suspensões (sem fins de semana) em [start, end]"""
+        first, last = _as_date(start), _as_date(end)
+        return sorted(
+            (day, name) for day, name in self.closed.items() if first <= day <= last
+        )
+
+
+class BusinessCalendarStore:
+    """Calendários por (UF, tribunal) em memória, a partir de judicial_holidays"""
+
+    def __init__(self):
+        self._holidays: List[Tuple[date, str, str, str]] = []
+        self._calendars: Dict[Tuple[str, str], BusinessCalendar] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.reload_interval = 900
+        self.years_back = 2
+        self.years_ahead = 3
+        self.recess = True
+
+    def init_app(self, app):
+        """Lê a configuração do app"""
+        self.reload_interval = app.config.get(
+            "BUSINESS_CALENDAR_RELOAD_SECONDS", self.reload_interval
+        )
+        self.recess = app.config.get("BUSINESS_CALENDAR_RECESS", self.recess)
+        self.invalidate()
+        app.extensions["business_calendar"] = self
+
+    def invalidate(self):
+        """Descarta os calendários montados (após importar feriados)"""
+        with self._lock:
+            self._holidays = []
+            self._calendars = {}
+            self._loaded_at = 0.0
+
+    def load(self):
+        """Carrega feriados e suspensões da tabela judicial_holidays"""
+        from app.models import JudicialHoliday
+
+        rows = JudicialHoliday.query.with_entities(
+            JudicialHoliday.day,
+            JudicialHoliday.uf,
+            JudicialHoliday.court,
+            JudicialHoliday.name,
+        ).all()
+        self._holidays = [
+            (day, (uf or "").upper(), court or "", name) for day, uf, court, name in rows
+        ]
+        self._calendars = {}
+        self._loaded_at = time.monotonic()
+
+    def _refresh(self):
+        if time.monotonic() - self._loaded_at > self.reload_interval:
+            with self._lock:
+                if time.monotonic() - self._loaded_at > self.reload_interval:
+                    try:
+                        self.load()
+                    except (RuntimeError, SQLAlchemyError) as e:
+                        # Sem app context ou tabela ainda não migrada: só o
+                        # calendário nacional
+                        logger.warning(f"Feriados forenses indisponíveis: {e}")
+                        self._holidays = []
+                        self._calendars = {}
+                        self._loaded_at = time.monotonic()
+
+    def _closed_days(self, key, first_year, last_year) -> Dict[date, str]:
+        uf, court = key
+        closed = {}
+        for year in range(first_year, last_year + 1):
+            closed.update(national_holidays(year))
+        if self.recess:
+            for year in range(first_year, last_year + 2):
+                day = date(year - 1, 12, 20)
+                while day <= date(year, 1, 20):
+                    closed.setdefault(day, RECESS_NAME)
+                    day += timedelta(days=1)
+        for day, row_uf, row_court, name in self._holidays:
+            if first_year <= day.year <= last_year:
+                if row_uf in ("", uf) and row_court in ("", court):
+                    closed.setdefault(day, name)
+        return closed
+
+    def calendar(self, uf=None, court=None, first=None, last=None) -> BusinessCalendar:
+        """
+        Calendário da UF/tribunal cobrindo [first, last] (padrão: hoje), com
+        folga para somar prazos a partir das pontas.
+        """
+        self._refresh()
+        key = normalize_key(uf, court)
+        today = date.today()
+        first = _as_date(first) if first else today
+        last = _as_date(last) if last else first
+        calendar = self._calendars.get(key)
+        if calendar is not None and calendar.covers(first, last):
+            return calendar
+
+        first_year = min(first.year, today.year) - self.years_back
+        last_year = max(last.year, today.year) + self.years_ahead
+        if calendar is not None:
+            first_year = min(first_year, calendar.start.year)
+            last_year = max(last_year, calendar.end.year)
+        calendar = BusinessCalendar(
+            date(first_year, 1, 1),
+            date(last_year, 12, 31),
+            self._closed_days(key, first_year, last_year),
+        )
+        self._calendars[key] = calendar
+        return calendar
+
+    # -------------------------------------------------------------------------
+    # Consultas pontuais
+    # -------------------------------------------------------------------------
+
+    def is_business_day(self, day, uf=None, court=None) -> bool:
+        return self.calendar(uf, court, day).is_business_day(day)
+
+    def business_days_between(self, start, end, uf=None, court=None) -> int:
+        first, last = sorted((_as_date(start), _as_date(end)))
+        return self.calendar(uf, court, first, last).business_days_between(start, end)
+
+    def add_business_days(self, day, days, uf=None, court=None) -> date:
+        day = _as_date(day)
+        margin = _reach(days)
+        calendar = self.calendar(uf, court, day - margin, day + margin)
+        return calendar.add_business_days(day, days)
+
+    def due_date(self, start, days, business_days=True, uf=None, court=None) -> date:
+        if business_days:
+            return self.add_business_days(start, days, uf, court)
+        end = _as_date(start) + timedelta(days=days)
+        calendar = self.calendar(uf, court, end, end + _reach(0))
+        return calendar.next_business_day(end)
+
+    # -------------------------------------------------------------------------
+    # Consultas em lote
+    # -------------------------------------------------------------------------
+
+    def _by_key(self, items, dates_of):
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        bounds: Dict[Tuple[str, str], Tuple[date, date]] = {}
+        for index, item in enumerate(items):
+            key = normalize_key(item[-2], item[-1])
+            groups.setdefault(key, []).append(index)
+            for day in dates_of(item):
+                low, high = bounds.get(key, (day, day))
+                bounds[key] = (min(low, day), max(high, day))
+        return groups, bounds
+
+    def business_days_until_many(
+        self, items: Iterable[Tuple[object, Optional[str], Optional[str]]], today=None
+    ) -> List[int]:
+        """
+        Dias úteis de `today` até cada vencimento (negativo se vencido).
+
+        Args:
+            items: (vencimento, uf, tribunal) por prazo
+
+        Returns:
+            list[int]: na mesma ordem de `items`
+        """
+        items = [(_as_date(due), uf, court) for due, uf, court in items]
+        today = _as_date(today) if today else date.today()
+        groups, bounds = self._by_key(items, lambda item: (item[0], today))
+        result = [0] * len(items)
+        for key, indexes in groups.items():
+            calendar = self.calendar(key[0], key[1], *bounds[key])
+            for index in indexes:
+                result[index] = calendar.business_days_between(today, items[index][0])
+        return result
+
+    def add_business_days_many(
+        self, items: Iterable[Tuple[object, int, Optional[str], Optional[str]]]
+    ) -> List[date]:
+        """
+        Vencimento de cada prazo somando dias úteis.
+
+        Args:
+            items: (data inicial, dias úteis, uf, tribunal) por prazo
+        """
+        items = [(_as_date(day), days, uf, court) for day, days, uf, court in items]
+
+        groups, bounds = self._by_key(
+            items,
+            lambda item: (item[0] - _reach(item[1]), item[0] + _reach(item[1])),
+        )
+        result = [None] * len(items)
+        for key, indexes in groups.items():
+            calendar = self.calendar(key[0], key[1], *bounds[key])
+            for index in indexes:
+                day, days = items[index][0], items[index][1]
+                result[index] = calendar.add_business_days(day, days)
+        return result
+
+    def closed_days(self, start, end, uf=None, court=None) -> List[Tuple[date, str]]:
+        """Feriados e suspensões (para o FullCalendar)"""
+        return self.calendar(uf, court, start, end).closed_days(start, end)
+
+
+business_calendar = BusinessCalendarStore()
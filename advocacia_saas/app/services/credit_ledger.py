@@ -0,0 +1,541 @@
+"""
+Razão (ledger) de créditos de IA.
+
+`credit_transactions` é o diário, só com inserções: toda entrada e saída de
+créditos vira uma linha com o saldo resultante. `user_credits.balance` é a
+projeção desse diário, mantida na mesma transação do lançamento.
+
+Nenhuma operação lê o saldo em Python para depois gravá-lo: o débito é um
+único UPDATE condicional
+
+    UPDATE user_credits SET balance = balance - n
+     WHERE user_id = :id AND balance >= n
+    RETURNING balance
+
+e quem perde a corrida recebe zero linhas, nunca um saldo negativo (no
+Postgres o WHERE é reavaliado sobre a versão já confirmada da linha).
+
+- debit / credit: movimentam o saldo e lançam no diário;
+- adjust: só o UPDATE atômico, para os fluxos que lançam no diário por conta
+  própria (UserCredits.add_credits / use_credits);
+- reserve / commit / release: jobs longos de IA retêm o custo ao entrar na
+  fila (CreditReservation), lançam o custo real ao terminar e devolvem o
+  restante; reservas esquecidas por um worker morto voltam ao saldo em
+  release_expired() (comando `flask credits-release-expired`);
+- balance: leitura da projeção com cache curto (Redis ou memória),
+  descartado no commit de qualquer movimentação do usuário.
+
+O aviso de saldo baixo não roda mais dentro do débito: é gravado depois do
+commit, numa conexão própria, e só quando o saldo cruza
+CREDIT_LOW_THRESHOLD.
+
+Invariante (verify): saldo == soma do diário - reservas em aberto, para
+contas criadas já com o ledger.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import has_app_context
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOW_THRESHOLD = 10
+DEFAULT_RESERVATION_TTL = 3600
+DEFAULT_BALANCE_CACHE_TTL = 30
+
+# Contador de UserCredits movido por cada tipo de lançamento
+_TOTALS = {
+    "purchase": "total_purchased",
+    "bonus": "total_bonus",
+    "usage": "total_used",
+}
+
+_SESSION_USERS = "credit_ledger_users"
+_SESSION_LOW = "credit_ledger_low_balance"
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+class CreditLedger:
+    """Movimentação atômica de créditos, reservas e projeção do saldo"""
+
+    PREFIX = "petitio:credits:balance:"
+
+    def __init__(self):
+        self.low_threshold = DEFAULT_LOW_THRESHOLD
+        self.reservation_ttl = DEFAULT_RESERVATION_TTL
+        self.cache_ttl = DEFAULT_BALANCE_CACHE_TTL
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Lê a configuração e registra os eventos de commit/rollback"""
+        self.low_threshold = app.config.get(
+            "CREDIT_LOW_THRESHOLD", DEFAULT_LOW_THRESHOLD
+        )
+        self.reservation_ttl = app.config.get(
+            "CREDIT_RESERVATION_TTL", DEFAULT_RESERVATION_TTL
+        )
+        self.cache_ttl = app.config.get(
+            "CREDIT_BALANCE_CACHE_TTL", DEFAULT_BALANCE_CACHE_TTL
+        )
+        with self._lock:
+            self._cache.clear()
+        _register_listeners()
+        app.extensions["credit_ledger"] = self
+
+    # -------------------------------------------------------------------------
+    # Saldo
+    # -------------------------------------------------------------------------
+
+    def adjust(self, user_id, delta, source="usage"):
+        """
+        Soma `delta` ao saldo com um UPDATE atômico. Não faz commit nem lança
+        no diário.
+
+        Débitos (delta < 0) só passam se houver saldo; créditos criam a conta
+        se ela ainda não existir.
+
+        Returns:
+            int | None: saldo resultante, ou None se faltou saldo
+        """
+        from app import db
+        from app.models import UserCredits
+
+        delta = int(delta)
+        values = {
+            "balance": UserCredits.balance + delta,
+            "updated_at": _utcnow(),
+        }
+        counter = _TOTALS.get(source)
+        if counter and delta:
+            column = getattr(UserCredits, counter)
+            values[counter] = func.coalesce(column, 0) + abs(delta)
+
+        stmt = (
+            update(UserCredits)
+            .where(UserCredits.user_id == user_id)
+            .values(**values)
+            .returning(UserCredits.balance)
+            .execution_options(synchronize_session="fetch")
+        )
+        if delta < 0:
+            stmt = stmt.where(UserCredits.balance >= -delta)
+
+        balance = db.session.execute(stmt).scalar()
+        if balance is None:
+            if delta < 0:
+                return None
+            # Primeira movimentação do usuário
+            account = UserCredits(user_id=user_id, balance=delta)
+            if counter and delta:
+                setattr(account, counter, delta)
+            db.session.add(account)
+            db.session.flush()
+            balance = delta
+
+        self._touched(user_id, delta, balance)
+        return balance
+
+    def balance(self, user_id):
+        """Saldo atual (projeção em cache por CREDIT_BALANCE_CACHE_TTL)"""
+        cached = self._cache_get(user_id)
+        if cached is not None:
+            return cached
+
+        from app import db
+        from app.models import UserCredits
+
+        balance = db.session.execute(
+            select(UserCredits.balance).where(UserCredits.user_id == user_id)
+        ).scalar()
+        balance = int(balance or 0)
+        self._cache_set(user_id, balance)
+        return balance
+
+    # -------------------------------------------------------------------------
+    # Lançamentos
+    # -------------------------------------------------------------------------
+
+    def debit(
+        self,
+        user_id,
+        amount,
+        description="",
+        transaction_type="usage",
+        generation_id=None,
+    ):
+        """
+        Debita `amount` e lança no diário. Não faz commit.
+
+        Returns:
+            CreditTransaction | None: lançamento, ou None sem saldo suficiente
+        """
+        balance = self.adjust(user_id, -amount, transaction_type)
+        if balance is None:
+            return None
+        return self._journal(
+            user_id,
+            transaction_type,
+            -amount,
+            balance,
+            description=description,
+            generation_id=generation_id,
+        )
+
+    def credit(
+        self,
+        user_id,
+        amount,
+        transaction_type="purchase",
+        description="",
+        package_id=None,
+    ):
+        """
+        Credita `amount` e lança no diário. Não faz commit.
+
+        Returns:
+            CreditTransaction: lançamento criado
+        """
+        balance = self.adjust(user_id, amount, transaction_type)
+        return self._journal(
+            user_id,
+            transaction_type,
+            amount,
+            balance,
+            description=description,
+            package_id=package_id,
+        )
+
+    @staticmethod
+    def _journal(user_id, transaction_type, amount, balance, **fields):
+        from app import db
+        from app.models import CreditTransaction
+
+        transaction = CreditTransaction(
+            user_id=user_id,
+            transaction_type=transaction_type,
+            amount=amount,
+            balance_after=balance,
+            **fields,
+        )
+        db.session.add(transaction)
+        return transaction
+
+    # -------------------------------------------------------------------------
+    # Reservas (jobs de IA)
+    # -------------------------------------------------------------------------
+
+    def reserve(self, user_id, amount, description="", ttl=None):
+        """
+        Retém `amount` do saldo até o job terminar. Não faz commit.
+
+        Returns:
+            CreditReservation | None: reserva, ou None sem saldo suficiente
+        """
+        from app import db
+        from app.models import CreditReservation
+
+        if self.adjust(user_id, -amount, source=None) is None:
+            return None
+        ttl = self.reservation_ttl if ttl is None else ttl
+        reservation = CreditReservation(
+            user_id=user_id,
+            amount=amount,
+            status="held",
+            description=description,
+            expires_at=_utcnow() + timedelta(seconds=ttl),
+        )
+        db.session.add(reservation)
+        db.session.flush()
+        return reservation
+
+    def commit(self, reservation_id, amount=None, generation_id=None):
+        """
+        Efetiva a reserva: lança `amount` (padrão: o valor reservado) como uso
+        e devolve a diferença ao saldo. Não faz commit.
+
+        Returns:
+            CreditTransaction | None: lançamento de uso; None se a reserva já
+            foi efetivada/liberada ou o custo real é zero
+        """
+        row = self._settle(reservation_id, "committed")
+        if row is None:
+            return None
+        user_id, reserved, description = row
+        used = reserved if amount is None else max(0, min(int(amount), reserved))
+
+        # Uma instrução: devolve a sobra e soma o uso em total_used
+        from app import db
+        from app.models import UserCredits
+
+        balance = db.session.execute(
+            update(UserCredits)
+            .where(UserCredits.user_id == user_id)
+            .values(
+                balance=UserCredits.balance + (reserved - used),
+                total_used=func.coalesce(UserCredits.total_used, 0) + used,
+                updated_at=_utcnow(),
+            )
+            .returning(UserCredits.balance)
+            .execution_options(synchronize_session="fetch")
+        ).scalar()
+        self._touched(user_id, reserved - used, balance)
+
+        if not used:
+            return None
+        return self._journal(
+            user_id,
+            "usage",
+            -used,
+            balance,
+            description=description,
+            generation_id=generation_id,
+        )
+
+    def release(self, reservation_id):
+        """
+        Devolve ao saldo uma reserva em aberto (job falhou). Não faz commit.
+
+        Returns:
+            bool: True se a reserva estava em aberto
+        """
+        row = self._settle(reservation_id, "released")
+        if row is None:
+            return False
+        user_id, reserved, _ = row
+        self.adjust(user_id, reserved, source=None)
+        return True
+
+    def release_expired(self, now=None, batch_size=500):
+        """
+        Libera reservas vencidas (worker que morreu no meio do job) e faz
+        commit a cada lote.
+
+        Returns:
+            int: quantidade de reservas liberadas
+        """
+        from app import db
+        from app.models import CreditReservation
+
+        now = now or _utcnow()
+        released = 0
+        while True:
+            ids = db.session.execute(
+                select(CreditReservation.id)
+                .where(
+                    CreditReservation.status == "held",
+                    CreditReservation.expires_at < now,
+                )
+                .order_by(CreditReservation.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return released
+            released += sum(1 for reservation_id in ids if self.release(reservation_id))
+            db.session.commit()
+
+    @staticmethod
+    def _settle(reservation_id, status):
+        """Fecha a reserva se ainda estiver em aberto (idempotente)"""
+        from app import db
+        from app.models import CreditReservation
+
+        return db.session.execute(
+            update(CreditReservation)
+            .where(
+                CreditReservation.id == reservation_id,
+                CreditReservation.status == "held",
+            )
+            .values(status=status, settled_at=_utcnow())
+            .returning(
+                CreditReservation.user_id,
+                CreditReservation.amount,
+                CreditReservation.description,
+            )
+            .execution_options(synchronize_session="fetch")
+        ).first()
+
+    # -------------------------------------------------------------------------
+    # Conferência
+    # -------------------------------------------------------------------------
+
+    def verify(self, user_id):
+        """
+        Confere a projeção contra o diário.
+
+        Returns:
+            tuple: (saldo gravado, soma do diário - reservas em aberto)
+        """
+        from app import db
+        from app.models import CreditReservation, CreditTransaction, UserCredits
+
+        balance = db.session.execute(
+            select(UserCredits.balance).where(UserCredits.user_id == user_id)
+        ).scalar()
+        journal = db.session.execute(
+            select(func.coalesce(func.sum(CreditTransaction.amount), 0)).where(
+                CreditTransaction.user_id == user_id
+            )
+        ).scalar()
+        held = db.session.execute(
+            select(func.coalesce(func.sum(CreditReservation.amount), 0)).where(
+                CreditReservation.user_id == user_id,
+                CreditReservation.status == "held",
+            )
+        ).scalar()
+        return int(balance or 0), int(journal) - int(held)
+
+    # -------------------------------------------------------------------------
+    # Efeitos depois do commit
+    # -------------------------------------------------------------------------
+
+    def _touched(self, user_id, delta, balance):
+        from app import db
+
+        info = db.session.info
+        info.setdefault(_SESSION_USERS, set()).add(user_id)
+        low = info.setdefault(_SESSION_LOW, {})
+        crossed = balance - delta > self.low_threshold >= balance > 0
+        if delta < 0 and crossed:
+            low[user_id] = balance
+        elif user_id in low and balance > self.low_threshold:
+            # Recarregou na mesma transação
+            del low[user_id]
+
+    def notify_low_balance(self, balances):
+        """
+        Grava o aviso "créditos baixos" (um por usuário a cada 24h) numa
+        conexão própria e publica a nova contagem de notificações.
+        """
+        from app import db
+        from app.billing.utils import CREDIT_LOW_TITLE, credit_low_message
+        from app.models import Notification
+        from app.services.realtime import realtime
+
+        since = _utcnow() - timedelta(hours=24)
+        notified = []
+        with db.engine.begin() as connection:
+            for user_id, balance in balances.items():
+                recent = connection.execute(
+                    select(Notification.id)
+                    .where(
+                        Notification.user_id == user_id,
+                        Notification.type == "credit_low",
+                        Notification.created_at >= since,
+                    )
+                    .limit(1)
+                ).first()
+                if recent:
+                    continue
+                connection.execute(
+                    insert(Notification).values(
+                        user_id=user_id,
+                        type="credit_low",
+                        title=CREDIT_LOW_TITLE,
+                        message=credit_low_message(balance),
+                        link="/ai/credits",
+                        read=False,
+                    )
+                )
+                notified.append(user_id)
+        realtime.notification_counts(notified)
+
+    # -------------------------------------------------------------------------
+    # Cache da projeção
+    # -------------------------------------------------------------------------
+
+    @property
+    def redis(self):
+        from app.utils.redis_client import get_redis
+
+        return get_redis("REDIS_CACHE_DB")
+
+    def _cache_get(self, user_id):
+        if not self.cache_ttl:
+            return None
+        client = self.redis
+        if client is not None:
+            try:
+                value = client.get(f"{self.PREFIX}{user_id}")
+            except Exception as e:
+                logger.warning(f"Créditos: falha ao ler cache ({e})")
+                return None
+            return int(value) if value is not None else None
+
+        with self._lock:
+            item = self._cache.get(user_id)
+            if item and item[0] >= time.monotonic():
+                return item[1]
+            return None
+
+    def _cache_set(self, user_id, balance):
+        if not self.cache_ttl:
+            return
+        client = self.redis
+        if client is not None:
+            try:
+                client.set(f"{self.PREFIX}{user_id}", balance, ex=int(self.cache_ttl))
+            except Exception as e:
+                logger.warning(f"Créditos: falha ao gravar cache ({e})")
+            return
+
+        with self._lock:
+            self._cache[user_id] = (time.monotonic() + self.cache_ttl, balance)
+
+    def invalidate(self, user_ids):
+        """Descarta o saldo em cache dos usuários"""
+        client = self.redis
+        if client is not None:
+            try:
+                client.delete(*[f"{self.PREFIX}{user_id}" for user_id in user_ids])
+            except Exception as e:
+                logger.warning(f"Créditos: falha ao invalidar cache ({e})")
+        with self._lock:
+            for user_id in user_ids:
+                self._cache.pop(user_id, None)
+
+
+credit_ledger = CreditLedger()
+
+
+# =============================================================================
+# Eventos do SQLAlchemy
+# =============================================================================
+
+_listeners_registered = False
+
+
+def _register_listeners():
+    global _listeners_registered
+    if _listeners_registered:
+        return
+
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _discard_pending)
+    _listeners_registered = True
+
+
+def _after_commit(session):
+    user_ids = session.info.pop(_SESSION_USERS, None)
+    low = session.info.pop(_SESSION_LOW, None)
+    if not user_ids or not has_app_context():
+        return
+    credit_ledger.invalidate(user_ids)
+    if low:
+        try:
+            credit_ledger.notify_low_balance(low)
+        except Exception as e:
+            logger.warning(f"Créditos: falha ao avisar saldo baixo ({e})")
+
+
+def _discard_pending(session):
+    session.info.pop(_SESSION_USERS, None)
+    session.info.pop(_SESSION_LOW, None)
@@ -8,7 +8,8 @@ from datetime import datetime, timedelta, timezone
 from sqlalchemy import text
 
 from app import db
-from app.models import CreditTransaction, Feature, User, UserCredits
+from app.models import CreditTransaction, Feature, User
+from app.services.credit_ledger import credit_ledger
 
 
 class CreditsService:
@@ -44,29 +45,18 @@ class CreditsService:
         monthly_credits = CreditsService.get_monthly_credits_for_plan(user)
 
         if monthly_credits <= 0:
-            current_balance = user.credits.balance if user.credits else 0
-            return (0, current_balance)
+            return (0, credit_ledger.balance(user.id))
 
-        # Garante que o usuário tem registro de créditos
-        if not user.credits:
-            user.credits = UserCredits(user_id=user.id, balance=0)
-            db.session.add(user.credits)
-
-        # Adiciona os créditos
-        user.credits.balance += monthly_credits
-
-        # Registra a transação
-        transaction = CreditTransaction(
-            user_id=user.id,
-            amount=monthly_credits,
+        # Crédito atômico + lançamento no diário (cria a conta se preciso)
+        transaction = credit_ledger.credit(
+            user.id,
+            monthly_credits,
             transaction_type="monthly_renewal",
             description=f"Renovação mensal de créditos - {user.billing_plan.name}",
-            balance_after=user.credits.balance,
         )
-        db.session.add(transaction)
         db.session.commit()
 
-        return (monthly_credits, user.credits.balance)
+        return (monthly_credits, transaction.balance_after)
 
     @staticmethod
     def process_monthly_renewals():
@@ -173,29 +163,17 @@ class CreditsService:
         Returns:
             tuple: (success, message, remaining_balance)
         """
-        if not user.credits:
-            return (False, "Usuário não possui créditos.", 0)
-
-        if user.credits.balance < amount:
-            return (
-                False,
-                f"Créditos insuficientes. Saldo: {user.credits.balance}",
-                user.credits.balance,
-            )
-
-        user.credits.balance -= amount
-
-        transaction = CreditTransaction(
-            user_id=user.id,
-            amount=-amount,
-            transaction_type="usage",
-            description="Uso de crédito IA",
-            balance_after=user.credits.balance,
+        transaction = credit_ledger.debit(
+            user.id, amount, description="Uso de crédito IA"
         )
-        db.session.add(transaction)
+        if transaction is None:
+            db.session.rollback()
+            balance = credit_ledger.balance(user.id)
+            return (False, f"Créditos insuficientes. Saldo: {balance}", balance)
+
         db.session.commit()
 
-        return (True, "Crédito deduzido com sucesso.", user.credits.balance)
+        return (True, "Crédito deduzido com sucesso.", transaction.balance_after)
 
 
 def run_monthly_credits_job():
@@ -3,15 +3,28 @@ Serviço de integração com a API DataJud do CNJ.
 
 Permite consultar informações públicas de processos judiciais.
 Documentação: https://datajud-wiki.cnj.jus.br/
+
+As chamadas passam por DataJudClient, que mantém uma requests.Session com
+pool de conexões, guarda respostas por (tribunal, número) com TTL - inclusive
+"não encontrado" (cache negativo, TTL menor) - e consulta vários tribunais em
+paralelo, devolvendo o primeiro que encontrar o processo.
+
+Para testes e desenvolvimento offline, aponte DATAJUD_BASE_URL para
+scripts/fake_datajud_server.py.
 """
 
+import json
 import logging
 import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from typing import Any, Dict, Optional
 
 import requests
 from flask import current_app
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
@@ -184,12 +197,255 @@ def detect_tribunal_from_number(numero: str) -> Optional[str]:
     return None
 
 
+class DataJudResponseCache:
+    """
+    Cache das respostas do DataJud por (tribunal, número).
+
+    Usa o Redis quando configurado (compartilhado entre workers) ou um dict
+    em memória. Um valor None representa "processo não encontrado".
+    """
+
+    PREFIX = "petitio:datajud:"
+
+    def __init__(self, client=None):
+        self.client = client
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, tribunal, numero):
+        """Retorna (encontrado_no_cache, processo_ou_None)"""
+        key = f"{self.PREFIX}{tribunal}:{numero}"
+        if self.client is not None:
+            try:
+                raw = self.client.get(key)
+            except Exception as e:
+                logger.warning(f"DataJud: falha ao ler cache ({e})")
+                return False, None
+            if raw is None:
+                return False, None
+            return True, json.loads(raw)
+
+        with self._lock:
+            item = self._data.get(key)
+            if not item:
+                return False, None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._data[key]
+                return False, None
+            return True, value
+
+    def set(self, tribunal, numero, processo, ttl):
+        key = f"{self.PREFIX}{tribunal}:{numero}"
+        if self.client is not None:
+            try:
+                self.client.set(key, json.dumps(processo), ex=int(ttl))
+            except Exception as e:
+                logger.warning(f"DataJud: falha ao gravar cache ({e})")
+            return
+
+        with self._lock:
+            self._data[key] = (time.time() + ttl, processo)
+
+    def clear(self):
+        if self.client is not None:
+            for key in self.client.scan_iter(f"{self.PREFIX}*"):
+                self.client.delete(key)
+        with self._lock:
+            self._data.clear()
+
+
+class DataJudClient:
+    """Cliente HTTP do DataJud com pool de conexões, cache e fan-out paralelo"""
+
+    def __init__(self):
+        self._session = None
+        self._executor = None
+        self._cache = None
+        self._lock = threading.Lock()
+        self.base_url = "https://api-publica.datajud.cnj.jus.br"
+        self.timeout = (5, 30)
+        self.cache_ttl = 6 * 3600
+        self.negative_cache_ttl = 3600
+        self.max_workers = 8
+
+    def init_app(self, app):
+        """Lê a configuração do app e prepara o cache"""
+        self.base_url = app.config.get("DATAJUD_BASE_URL", self.base_url).rstrip("/")
+        self.timeout = (
+            app.config.get("DATAJUD_CONNECT_TIMEOUT", 5),
+            app.config.get("DATAJUD_TIMEOUT", 30),
+        )
+        self.cache_ttl = app.config.get("DATAJUD_CACHE_TTL", self.cache_ttl)
+        self.negative_cache_ttl = app.config.get(
+            "DATAJUD_NEGATIVE_CACHE_TTL", self.negative_cache_ttl
+        )
+        self.max_workers = app.config.get("DATAJUD_MAX_WORKERS", self.max_workers)
+        with app.app_context():
+            from app.utils.redis_client import get_redis
+
+            self._cache = DataJudResponseCache(get_redis("REDIS_CACHE_DB"))
+        self.close()
+        app.extensions["datajud"] = self
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            self._cache = DataJudResponseCache()
+        return self._cache
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=len(TRIBUNAL_ENDPOINTS),
+                    pool_maxsize=self.max_workers,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="datajud"
+                )
+            return self._executor
+
+    def fetch(self, tribunal, numero, api_key, use_cache=True):
+        """
+        Consulta um processo em um tribunal.
+
+        Returns:
+            dict: {"status": "hit" | "miss" | "error", "processo", "message",
+                   "cached"}
+        """
+        if use_cache:
+            cached, processo = self.cache.get(tribunal, numero)
+            if cached:
+                return {
+                    "status": "hit" if processo else "miss",
+                    "processo": processo,
+                    "cached": True,
+                }
+
+        url = f"{self.base_url}/{TRIBUNAL_ENDPOINTS[tribunal]}/_search"
+        headers = {
+            "Authorization": f"ApiKey {api_key}",
+            "Content-Type": "application/json",
+        }
+        payload = {"query": {"match": {"numeroProcesso": numero}}}
+
+        try:
+            logger.info(f"Consultando DataJud: {tribunal} - {numero}")
+            response = self.session.post(
+                url, headers=headers, json=payload, timeout=self.timeout
+            )
+        except requests.Timeout:
+            logger.error(f"DataJud: Timeout na requisição ({tribunal})")
+            return {
+                "status": "error",
+                "message": "Tempo limite excedido. Tente novamente.",
+            }
+        except requests.RequestException as e:
+            logger.error(f"DataJud request error: {e}")
+            return {"status": "error", "message": "Erro de conexão com a API DataJud."}
+
+        if response.status_code == 401:
+            logger.error("DataJud: API Key inválida")
+            return {
+                "status": "error",
+                "message": "Falha na autenticação com a API DataJud.",
+            }
+
+        if response.status_code != 200:
+            logger.error(f"DataJud error: {response.status_code} - {response.text}")
+            return {
+                "status": "error",
+                "message": f"Erro na consulta ao DataJud (HTTP {response.status_code}).",
+            }
+
+        hits = response.json().get("hits", {}).get("hits", [])
+        processo = hits[0].get("_source", {}) if hits else None
+
+        # Erros não entram no cache; "não encontrado" entra com TTL menor
+        self.cache.set(
+            tribunal,
+            numero,
+            processo,
+            self.cache_ttl if processo else self.negative_cache_ttl,
+        )
+        return {
+            "status": "hit" if processo else "miss",
+            "processo": processo,
+            "cached": False,
+        }
+
+    def fetch_first(self, tribunais, numero, api_key):
+        """
+        Consulta os tribunais em paralelo e devolve o primeiro que encontrar.
+
+        As consultas que ainda não começaram são canceladas; as que já estão
+        em andamento terminam em background e alimentam o cache.
+
+        Returns:
+            tuple: (tribunal, resultado) ou (None, None) se nenhum encontrou
+        """
+        futures = {
+            self.executor.submit(self.fetch, tribunal, numero, api_key): tribunal
+            for tribunal in tribunais
+        }
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result["status"] == "hit":
+                        return futures[future], result
+        finally:
+            for future in pending:
+                future.cancel()
+        return None, None
+
+    def fetch_many(self, items, api_key, use_cache=False):
+        """
+        Consulta vários (tribunal, número) com concorrência limitada.
+
+        Returns:
+            dict: {(tribunal, número): resultado}
+        """
+        futures = {
+            self.executor.submit(self.fetch, tribunal, numero, api_key, use_cache): (
+                tribunal,
+                numero,
+            )
+            for tribunal, numero in items
+        }
+        return {key: future.result() for future, key in futures.items()}
+
+    def close(self):
+        """Fecha sessão e pool (recriados sob demanda)"""
+        with self._lock:
+            session, self._session = self._session, None
+            executor, self._executor = self._executor, None
+        if session:
+            session.close()
+        if executor:
+            executor.shutdown(wait=False)
+
+
+datajud_client = DataJudClient()
+
+
 class DataJudService:
     """Serviço para consultas à API pública do DataJud."""
 
-    BASE_URL = "https://api-publica.datajud.cnj.jus.br"
-    DEFAULT_TIMEOUT = 30
-
     @classmethod
     def get_api_key(cls) -> str:
         """Obtém a API Key configurada."""
@@ -238,65 +494,27 @@ class DataJudService:
                 "message": f"Tribunal '{tribunal}' não suportado pela API DataJud.",
             }
 
-        # Monta requisição
-        url = f"{cls.BASE_URL}/{endpoint}/_search"
-        headers = {
-            "Authorization": f"ApiKey {cls.get_api_key()}",
-            "Content-Type": "application/json",
-        }
-        payload = {"query": {"match": {"numeroProcesso": numero_limpo}}}
-
-        try:
-            logger.info(f"Consultando DataJud: {tribunal} - {numero_limpo}")
-
-            response = requests.post(
-                url, headers=headers, json=payload, timeout=cls.DEFAULT_TIMEOUT
-            )
-
-            if response.status_code == 401:
-                logger.error("DataJud: API Key inválida")
-                return {
-                    "success": False,
-                    "message": "Falha na autenticação com a API DataJud.",
-                }
-
-            if response.status_code != 200:
-                logger.error(f"DataJud error: {response.status_code} - {response.text}")
-                return {
-                    "success": False,
-                    "message": f"Erro na consulta ao DataJud (HTTP {response.status_code}).",
-                }
-
-            data = response.json()
-            hits = data.get("hits", {}).get("hits", [])
-
-            if not hits:
-                return {
-                    "success": False,
-                    "message": "Processo não encontrado no DataJud.",
-                }
-
-            # Extrai dados do primeiro resultado
-            processo = hits[0].get("_source", {})
-
-            return {
-                "success": True,
-                "data": cls._parse_process_data(processo),
-                "raw": processo,  # Dados brutos para debug
-            }
+        result = datajud_client.fetch(tribunal.upper(), numero_limpo, cls.get_api_key())
+        return cls._build_response(result)
 
-        except requests.Timeout:
-            logger.error("DataJud: Timeout na requisição")
+    @staticmethod
+    def _build_response(result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Converte o resultado do cliente no formato devolvido pela API"""
+        if not result or result["status"] == "miss":
             return {
                 "success": False,
-                "message": "Tempo limite excedido. Tente novamente.",
+                "message": "Processo não encontrado no DataJud.",
             }
-        except requests.RequestException as e:
-            logger.error(f"DataJud request error: {e}")
-            return {"success": False, "message": "Erro de conexão com a API DataJud."}
-        except Exception as e:
-            logger.exception(f"DataJud unexpected error: {e}")
-            return {"success": False, "message": "Erro inesperado na consulta."}
+        if result["status"] == "error":
+            return {"success": False, "message": result["message"]}
+
+        processo = result["processo"]
+        return {
+            "success": True,
+            "data": DataJudService._parse_process_data(processo),
+            "raw": processo,  # Dados brutos para debug
+            "cached": result.get("cached", False),
+        }
 
     @classmethod
     def _parse_process_data(cls, processo: Dict[str, Any]) -> Dict[str, Any]:
@@ -435,26 +653,99 @@ class DataJudService:
         if not numero_limpo:
             return {"success": False, "message": "Número do processo não informado."}
 
-        # Tenta detectar o tribunal primeiro
+        # Tribunal detectado primeiro, depois os mais comuns - todos em paralelo
         tribunal_detectado = detect_tribunal_from_number(numero_limpo)
-
-        if tribunal_detectado:
-            result = cls.search_process(numero_limpo, tribunal_detectado)
-            if result.get("success"):
-                return result
-
-        # Se não encontrou, tenta nos tribunais mais comuns
-        tribunais_tentativa = tribunais or ["TJSP", "TJRJ", "TJMG", "TRF1", "TRF3"]
-
-        for tribunal in tribunais_tentativa:
-            if tribunal == tribunal_detectado:
-                continue
-
-            result = cls.search_process(numero_limpo, tribunal)
-            if result.get("success"):
-                return result
+        tribunais_tentativa = [
+            t.upper()
+            for t in (tribunais or ["TJSP", "TJRJ", "TJMG", "TRF1", "TRF3"])
+            if t.upper() in TRIBUNAL_ENDPOINTS
+        ]
+        if tribunal_detectado in TRIBUNAL_ENDPOINTS:
+            tribunais_tentativa.insert(0, tribunal_detectado)
+        tribunais_tentativa = list(dict.fromkeys(tribunais_tentativa))
+
+        _, result = datajud_client.fetch_first(
+            tribunais_tentativa, numero_limpo, cls.get_api_key()
+        )
+        if result:
+            return cls._build_response(result)
 
         return {
             "success": False,
             "message": "Processo não encontrado nos tribunais consultados.",
         }
+
+    @classmethod
+    def refresh_processes(cls, processes) -> Dict[str, int]:
+        """
+        Atualiza em lote processos cadastrados a partir do DataJud.
+
+        Ignora o cache na consulta (mas o renova), preenche campos vazios do
+        processo e registra como ProcessMovement os andamentos ainda não
+        importados. Usado pelo job noturno (`flask datajud-refresh`).
+
+        Returns:
+            Dict com contadores: consultados, encontrados, erros e
+            novos andamentos.
+        """
+        from app import db
+        from app.models import ProcessMovement
+
+        targets = {}
+        for process in processes:
+            numero = sanitize_process_number(process.process_number)
+            tribunal = detect_tribunal_from_number(numero)
+            if tribunal in TRIBUNAL_ENDPOINTS:
+                targets.setdefault((tribunal, numero), []).append(process)
+
+        results = datajud_client.fetch_many(targets.keys(), cls.get_api_key())
+
+        stats = {"checked": len(targets), "found": 0, "errors": 0, "movements": 0}
+        for key, result in results.items():
+            if result["status"] == "error":
+                stats["errors"] += 1
+                continue
+            if result["status"] != "hit":
+                continue
+            stats["found"] += 1
+
+            data = cls._parse_process_data(result["processo"])
+            movimentos = result["processo"].get("movimentos", [])
+            for process in targets[key]:
+                for field in ("court_instance", "jurisdiction"):
+                    if not getattr(process, field) and data.get(field):
+                        setattr(process, field, data[field][:100])
+
+                existing = {(m.movement_date, m.description) for m in process.movements}
+                for mov in movimentos:
+                    movement_date = cls._parse_datetime(mov.get("dataHora"))
+                    description = mov.get("nome")
+                    if not movement_date or not description:
+                        continue
+                    if (movement_date, description) in existing:
+                        continue
+                    existing.add((movement_date, description))
+                    db.session.add(
+                        ProcessMovement(
+                            process_id=process.id,
+                            movement_date=movement_date,
+                            description=description,
+                            movement_type="datajud",
+                        )
+                    )
+                    stats["movements"] += 1
+
+        db.session.commit()
+        return stats
+
+    @staticmethod
+    def _parse_datetime(date_string: str) -> Optional[datetime]:
+        """Converte data/hora ISO do DataJud (sem fuso) para datetime."""
+        if not date_string:
+            return None
+        try:
+            return datetime.fromisoformat(date_string.replace("Z", "+00:00")).replace(
+                tzinfo=None, microsecond=0
+            )
+        except (ValueError, AttributeError):
+            return None
@@ -0,0 +1,369 @@
+"""
+Varredura em lote dos prazos (alertas de Deadline e avisos de processos).
+
+Substitui os loops linha a linha de DeadlineAlertService.send_pending_alerts e
+processes.notifications.check_deadline_notifications, que faziam para cada
+prazo: days_until(), uma consulta de duplicidade, uma consulta das automações
+do usuário, o envio síncrono do email e um commit.
+
+Aqui cada execução faz um número fixo de consultas por lote de CHUNK_SIZE:
+- o SQL já corta a janela de vencimento de cada faixa de `alert_days_before`
+  (e a duplicidade dos avisos de processo sai num único NOT EXISTS);
+- a contagem exata em dias úteis vem do calendário forense em memória
+  (business_days_until_many), agrupada por UF/tribunal;
+- o alerta é "reservado" com UPDATE ... WHERE alert_sent = false RETURNING,
+  então duas execuções simultâneas não duplicam avisos;
+- as notificações entram com INSERT em lote, as automações são carregadas uma
+  vez por usuário e os emails vão para a fila de saída (outbound_email).
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+
+from flask import url_for
+from sqlalchemy import and_, exists, insert, or_, select, update
+
+from app import db
+from app.models import (
+    Client,
+    Deadline,
+    Notification,
+    Process,
+    ProcessNotification,
+    User,
+)
+from app.services.business_calendar import business_calendar
+from app.services.outbound_email import PRIORITY_BULK, OutboundEmail, outbound_email
+from app.services.realtime import realtime
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+DEFAULT_ALERT_DAYS = 7
+# Folga em dias corridos sobre o calendário nacional (feriados locais)
+LOCAL_HOLIDAY_SLACK = timedelta(days=7)
+PROCESS_NOTIFICATION_TYPES = (
+    "deadline_overdue",
+    "deadline_today",
+    "deadline_urgent",
+    "deadline_warning",
+)
+
+
+@dataclass
+class ScanResult:
+    """Contadores de uma varredura"""
+
+    candidates: int = 0
+    notifications: int = 0
+    emails: int = 0
+    automations: int = 0
+
+
+def _today():
+    return datetime.now(timezone.utc).date()
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _window_end(today: date, business_days: int) -> datetime:
+    """Primeiro instante fora da janela de `business_days` dias úteis"""
+    last = business_calendar.add_business_days(today, business_days)
+    return datetime.combine(last + LOCAL_HOLIDAY_SLACK + timedelta(days=1), time.min)
+
+
+# =============================================================================
+# Alertas de Deadline
+# =============================================================================
+
+
+def _alert_window_filter(today):
+    """
+    Janela de vencimento por faixa de antecedência, em SQL.
+
+    Os valores distintos de alert_days_before são poucos (7, 15, 30...): uma
+    condição por faixa mantém o filtro portátil entre SQLite e PostgreSQL.
+    """
+    alert_days = db.func.coalesce(Deadline.alert_days_before, DEFAULT_ALERT_DAYS)
+    windows = [
+        value
+        for (value,) in db.session.execute(
+            select(alert_days)
+            .where(Deadline.status == "pending", Deadline.alert_sent.is_(False))
+            .distinct()
+        )
+        if value is not None and value >= 0
+    ]
+    if not windows:
+        return None
+    return or_(
+        *(
+            and_(
+                alert_days == value,
+                Deadline.deadline_date < _window_end(today, value),
+            )
+            for value in windows
+        )
+    )
+
+
+def _alert_candidates(today):
+    window = _alert_window_filter(today)
+    if window is None:
+        return []
+    query = (
+        select(
+            Deadline.id,
+            Deadline.user_id,
+            Deadline.process_id,
+            Deadline.title,
+            Deadline.description,
+            Deadline.deadline_date,
+            db.func.coalesce(
+                Deadline.alert_days_before, DEFAULT_ALERT_DAYS
+            ).label("alert_days"),
+            Deadline.count_business_days,
+            User.email,
+            db.func.coalesce(User.full_name, User.username).label("user_name"),
+            User.uf,
+            Process.court,
+            Process.title.label("process_title"),
+            Client.full_name.label("client_name"),
+        )
+        .join(User, User.id == Deadline.user_id)
+        .outerjoin(Process, Process.id == Deadline.process_id)
+        .outerjoin(Client, Client.id == Deadline.client_id)
+        .where(Deadline.status == "pending", Deadline.alert_sent.is_(False), window)
+        .order_by(Deadline.id)
+    )
+    return db.session.execute(query).all()
+
+
+def _alert_days(rows, today):
+    """Dias até cada vencimento, como Deadline.days_until (0 se já venceu)"""
+    business = [i for i, row in enumerate(rows) if row.count_business_days is not False]
+    counted = business_calendar.business_days_until_many(
+        [(rows[i].deadline_date, rows[i].uf, rows[i].court) for i in business],
+        today=today,
+    )
+    days = [max((row.deadline_date.date() - today).days, 0) for row in rows]
+    for index, value in zip(business, counted):
+        days[index] = max(value, 0)
+    return days
+
+
+def _claim_alerts(ids, now):
+    """Marca alert_sent; retorna os ids que esta execução efetivamente reservou"""
+    statement = (
+        update(Deadline)
+        .where(Deadline.id.in_(ids), Deadline.alert_sent.is_(False))
+        .values(alert_sent=True, alert_sent_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if not db.engine.dialect.update_returning:
+        db.session.execute(statement)
+        return set(ids)
+    return set(db.session.execute(statement.returning(Deadline.id)).scalars())
+
+
+def scan_deadline_alerts(today=None) -> ScanResult:
+    """
+    Cria os alertas dos prazos que entraram na janela de `alert_days_before`.
+
+    Returns:
+        ScanResult: candidatos lidos, notificações, emails e automações
+    """
+    today = today or _today()
+    result = ScanResult()
+    rows = _alert_candidates(today)
+    result.candidates = len(rows)
+
+    due = [
+        (row, days)
+        for row, days in zip(rows, _alert_days(rows, today))
+        if days <= row.alert_days
+    ]
+    if not due:
+        return result
+
+    # Import local: app.processes.notifications importa este módulo
+    from app.processes.automation import (
+        load_automations_by_user,
+        run_process_automations,
+    )
+
+    automations = load_automations_by_user({row.user_id for row, _ in due}, "deadline")
+
+    for chunk in _chunks(due):
+        now = datetime.now(timezone.utc)
+        claimed = _claim_alerts([row.id for row, _ in chunk], now)
+        chunk = [(row, days) for row, days in chunk if row.id in claimed]
+        if chunk:
+            db.session.execute(
+                insert(Notification),
+                [
+                    {
+                        "user_id": row.user_id,
+                        "type": "deadline",
+                        "title": "Prazo próximo",
+                        "message": f"{row.title} vence em {days} dias",
+                        "link": url_for("deadlines.view", deadline_id=row.id),
+                        "read": False,
+                        "created_at": now,
+                    }
+                    for row, days in chunk
+                ],
+            )
+            # Alertas e emails entram no mesmo commit do claim
+            result.emails += outbound_email.enqueue_many(
+                OutboundEmail(
+                    to=row.email,
+                    subject=f"⚠️ Prazo próximo: {row.title}",
+                    template="emails/deadline_alert.html",
+                    context={
+                        "deadline": {
+                            "title": row.title,
+                            "description": row.description,
+                            "due_date": row.deadline_date.strftime("%d/%m/%Y"),
+                            "client": (
+                                {"name": row.client_name} if row.client_name else None
+                            ),
+                            "user": {"name": row.user_name},
+                        },
+                        "days_until": days,
+                    },
+                    category="deadline_alert",
+                    priority=PRIORITY_BULK,
+                    idempotency_key=f"deadline_alert:{row.id}",
+                )
+                for row, days in chunk
+            )
+        db.session.commit()
+        result.notifications += len(chunk)
+        # INSERT em lote não passa pelos eventos do ORM
+        realtime.notification_counts({row.user_id for row, _ in chunk})
+
+        for row, days in chunk:
+            if row.user_id not in automations:
+                continue
+            result.automations += run_process_automations(
+                user_id=row.user_id,
+                event_data={
+                    "trigger_type": "deadline",
+                    "process_id": row.process_id,
+                    "process_title": row.process_title,
+                    "days_before": int(days),
+                    "deadline_id": row.id,
+                    "deadline_title": row.title,
+                },
+                automations=automations[row.user_id],
+            )
+
+    logger.info(
+        f"Alertas de prazo: {result.notifications} de {result.candidates} candidatos"
+    )
+    return result
+
+
+# =============================================================================
+# Avisos de prazo processual (Process.next_deadline)
+# =============================================================================
+
+
+def process_notification_type(days_until):
+    """Tipo de aviso pela distância ao prazo (None se ainda está longe)"""
+    if days_until < 0:
+        return "deadline_overdue"
+    if days_until == 0:
+        return "deadline_today"
+    if days_until <= 3:
+        return "deadline_urgent"
+    if days_until <= 7:
+        return "deadline_warning"
+    return None
+
+
+def _process_notification(process_id, user_id, title, number, deadline, days, now):
+    kind = process_notification_type(days)
+    if kind is None:
+        return None
+    number = number or "Sem número"
+    extra = {"deadline_date": deadline.isoformat()}
+    if kind == "deadline_overdue":
+        title = f"Prazo vencido: {title}"
+        message = (
+            f"O prazo processual venceu em {abs(days)} dia(s). Processo: {number}"
+        )
+        extra["days_overdue"] = abs(days)
+    elif kind == "deadline_today":
+        title = f"Prazo vence hoje: {title}"
+        message = f"O prazo processual vence hoje. Processo: {number}"
+    else:
+        label = "Prazo urgente" if kind == "deadline_urgent" else "Prazo próximo"
+        title = f"{label}: {title}"
+        message = f"O prazo processual vence em {days} dia(s). Processo: {number}"
+        extra["days_until"] = days
+    return {
+        "user_id": user_id,
+        "process_id": process_id,
+        "notification_type": kind,
+        "title": title,
+        "message": message,
+        "read": False,
+        "created_at": now,
+        "extra_data": extra,
+    }
+
+
+def scan_process_deadlines(today=None) -> ScanResult:
+    """
+    Avisos de prazo processual vencido, do dia, urgente (3) e próximo (7).
+
+    Cada processo recebe no máximo um aviso de prazo por dia: os que já têm
+    um saem da consulta por NOT EXISTS, sem consulta por processo.
+    """
+    today = today or _today()
+    result = ScanResult()
+    already_notified = exists().where(
+        ProcessNotification.process_id == Process.id,
+        ProcessNotification.notification_type.in_(PROCESS_NOTIFICATION_TYPES),
+        ProcessNotification.created_at >= datetime.combine(today, time.min),
+    )
+    rows = db.session.execute(
+        select(
+            Process.id,
+            Process.user_id,
+            Process.title,
+            Process.process_number,
+            Process.next_deadline,
+            User.uf,
+            Process.court,
+        )
+        .join(User, User.id == Process.user_id)
+        .where(
+            Process.next_deadline.isnot(None),
+            Process.next_deadline < _window_end(today, 7).date(),
+            ~already_notified,
+        )
+        .order_by(Process.id)
+    ).all()
+    result.candidates = len(rows)
+
+    days_until = business_calendar.business_days_until_many(
+        [(row.next_deadline, row.uf, row.court) for row in rows], today=today
+    )
+    now = datetime.now(timezone.utc)
+    notifications = [
+        notification
+        for row, days in zip(rows, days_until)
+        if (notification := _process_notification(*row[:5], days, now)) is not None
+    ]
+    for chunk in _chunks(notifications):
+        db.session.execute(insert(ProcessNotification), chunk)
+    db.session.commit()
+    result.notifications = len(notifications)
+    return result
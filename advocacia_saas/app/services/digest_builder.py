@@ -0,0 +1,340 @@
+"""
+Digest de notificações em lote.
+
+Substitui o loop de smart_notifications.process_pending_digests, que lia
+todas as NotificationPreferences com digest ativo, filtrava o horário em
+Python (no fuso do servidor) e chamava send_digest por usuário, com duas
+consultas, um email síncrono e um commit para cada um.
+
+Aqui cada execução horária faz um número fixo de consultas:
+- os fusos distintos dos usuários com digest saem de um SELECT DISTINCT; para
+  cada fuso o Python calcula a hora local, o início do dia local e se é
+  segunda-feira, e o SQL seleciona só quem está na hora (digest_time), ainda
+  não recebeu hoje e tem itens na fila;
+- os itens (NotificationQueue com status "digest") vêm numa consulta por lote
+  de DIGEST_CHUNK usuários, ordenada por usuário;
+- o HTML é montado num pool de threads (DIGEST_RENDER_WORKERS) a partir de
+  dicionários, fora da sessão do banco;
+- os emails vão para a fila de saída com chave `digest:<usuário>:<data local>`
+  e itens e preferências são atualizados com um UPDATE por lote.
+"""
+
+import logging
+import zoneinfo
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, time, timezone
+from itertools import groupby
+
+from flask import current_app
+from sqlalchemy import and_, exists, or_, select, update
+
+from app import db
+from app.models import NotificationPreferences, NotificationQueue, User
+from app.services.outbound_email import PRIORITY_BULK, OutboundEmail, outbound_email
+from app.services.smart_notifications import get_notification_category
+
+logger = logging.getLogger(__name__)
+
+DIGEST_CHUNK = 500
+DEFAULT_TIMEZONE = "America/Sao_Paulo"
+ITEMS_PER_CATEGORY = 5
+CATEGORY_NAMES = {
+    "deadline": "Prazos",
+    "movement": "Movimentações",
+    "payment": "Pagamentos",
+    "petition": "Petições/IA",
+    "system": "Sistema",
+}
+
+
+@dataclass
+class DigestRun:
+    """Contadores de uma execução"""
+
+    users: int = 0
+    emails: int = 0
+    items: int = 0
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+def _zone(name):
+    try:
+        return zoneinfo.ZoneInfo(name) if name else None
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def _default_zone():
+    zone = current_app.config.get("TIMEZONE")
+    return zone if isinstance(zone, zoneinfo.ZoneInfo) else _zone(DEFAULT_TIMEZONE)
+
+
+# =============================================================================
+# Renderização
+# =============================================================================
+
+
+def render_digest_html(user_name, items, day):
+    """
+    HTML do digest a partir de dicionários (title, message, notification_type).
+
+    Sem acesso ao banco nem ao contexto da aplicação: roda nas threads do pool.
+    """
+    grouped = {}
+    for item in items:
+        category = get_notification_category(item["notification_type"])
+        grouped.setdefault(category, []).append(item)
+
+    items_html = ""
+    for category, entries in grouped.items():
+        items_html += f"""
+            <div style="margin-bottom: 20px;">
+                <h3 style="color: #2563eb; border-bottom: 2px solid #2563eb; padding-bottom: 10px;">
+                    {CATEGORY_NAMES.get(category, category)} ({len(entries)})
+                </h3>
+                <ul style="list-style: none; padding: 0;">
+            """
+        for entry in entries[:ITEMS_PER_CATEGORY]:
+            message = entry["message"] or ""
+            items_html += f"""
+                <li style="padding: 10px; background: #fff; margin-bottom: 5px; border-radius: 4px;">
+                    <strong>{entry["title"]}</strong><br>
+                    <span style="color: #666; font-size: 14px;">{message[:100]}{"..." if len(message) > 100 else ""}</span>
+                </li>
+                """
+        if len(entries) > ITEMS_PER_CATEGORY:
+            extra = len(entries) - ITEMS_PER_CATEGORY
+            items_html += (
+                f'<li style="color: #999;">+ {extra} notificações adicionais</li>'
+            )
+        items_html += "</ul></div>"
+
+    return f"""
+        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            <div style="background: #2563eb; color: white; padding: 20px; text-align: center;">
+                <h1 style="margin: 0;">📬 Resumo de Notificações</h1>
+                <p style="margin: 5px 0 0 0; opacity: 0.9;">Petitio - {day.strftime("%d/%m/%Y")}</p>
+            </div>
+            <div style="padding: 30px; background: #f8f9fa;">
+                <p style="color: #666;">Olá {user_name},</p>
+                <p style="color: #666;">Aqui está o resumo das suas notificações:</p>
+                {items_html}
+                <div style="text-align: center; margin-top: 30px;">
+                    <a href="#" style="display: inline-block; background: #2563eb; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px;">
+                        Ver Todas as Notificações
+                    </a>
+                </div>
+            </div>
+            <div style="padding: 20px; text-align: center; color: #999; font-size: 12px;">
+                <p>Você recebeu este resumo porque ativou o digest no Petitio.</p>
+                <p><a href="#">Gerenciar preferências de notificação</a></p>
+            </div>
+        </div>
+        """
+
+
+def digest_subject(day):
+    return f"📬 Resumo de Notificações - {day.strftime('%d/%m/%Y')}"
+
+
+# =============================================================================
+# Seleção dos usuários na hora do digest
+# =============================================================================
+
+
+def _timezone_windows(now):
+    """
+    Uma condição SQL por fuso: hora local do digest, ainda não enviado no dia
+    local e, para os semanais, segunda-feira local.
+
+    Returns:
+        (condições, {fuso: data local})
+    """
+    names = db.session.execute(
+        select(User.timezone)
+        .join(NotificationPreferences, NotificationPreferences.user_id == User.id)
+        .where(NotificationPreferences.digest_enabled.is_(True))
+        .distinct()
+    ).scalars()
+
+    default = _default_zone()
+    conditions, local_dates = [], {}
+    for name in names:
+        local = now.astimezone(_zone(name) or default)
+        local_dates[name] = local.date()
+        digest_time = NotificationPreferences.digest_time
+        in_hour = digest_time >= time(local.hour)
+        if local.hour < 23:
+            in_hour = and_(in_hour, digest_time < time(local.hour + 1))
+        day_start = (
+            datetime.combine(local.date(), time.min, tzinfo=local.tzinfo)
+            .astimezone(timezone.utc)
+            .replace(tzinfo=None)
+        )
+        condition = and_(
+            User.timezone.is_(None) if name is None else User.timezone == name,
+            # Sem horário definido: primeira execução do dia
+            or_(NotificationPreferences.digest_time.is_(None), in_hour),
+            or_(
+                NotificationPreferences.last_digest_sent.is_(None),
+                NotificationPreferences.last_digest_sent < day_start,
+            ),
+        )
+        if local.weekday() != 0:
+            condition = and_(
+                condition,
+                or_(
+                    NotificationPreferences.digest_frequency.is_(None),
+                    NotificationPreferences.digest_frequency != "weekly",
+                ),
+            )
+        conditions.append(condition)
+    return conditions, local_dates
+
+
+def _due_users(now):
+    conditions, local_dates = _timezone_windows(now)
+    if not conditions:
+        return [], local_dates
+    has_items = exists().where(
+        NotificationQueue.user_id == User.id, NotificationQueue.status == "digest"
+    )
+    rows = db.session.execute(
+        select(
+            User.id,
+            User.email,
+            db.func.coalesce(User.full_name, User.username).label("name"),
+            User.timezone,
+        )
+        .join(NotificationPreferences, NotificationPreferences.user_id == User.id)
+        .where(
+            NotificationPreferences.digest_enabled.is_(True),
+            User.email.isnot(None),
+            or_(*conditions),
+            has_items,
+        )
+        .order_by(User.id)
+    ).all()
+    return rows, local_dates
+
+
+def _queued_items(user_ids):
+    """Itens de digest dos usuários, agrupados por usuário (mais novos antes)"""
+    rows = db.session.execute(
+        select(
+            NotificationQueue.id,
+            NotificationQueue.user_id,
+            NotificationQueue.notification_type,
+            NotificationQueue.title,
+            NotificationQueue.message,
+        )
+        .where(
+            NotificationQueue.user_id.in_(user_ids),
+            NotificationQueue.status == "digest",
+        )
+        .order_by(
+            NotificationQueue.user_id,
+            NotificationQueue.created_at.desc(),
+            NotificationQueue.id.desc(),
+        )
+    ).all()
+    return {
+        user_id: [row._asdict() for row in group]
+        for user_id, group in groupby(rows, key=lambda row: row.user_id)
+    }
+
+
+# =============================================================================
+# Execução
+# =============================================================================
+
+
+def _render_all(payloads, workers):
+    def render(payload):
+        return render_digest_html(payload["name"], payload["items"], payload["day"])
+
+    if workers <= 0 or len(payloads) < 2:
+        return [render(payload) for payload in payloads]
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="digest-render"
+    ) as executor:
+        return list(executor.map(render, payloads))
+
+
+def build_digests(now=None) -> DigestRun:
+    """
+    Envia os digests dos usuários cujo horário local é a hora atual.
+
+    Returns:
+        DigestRun: usuários na hora, emails enfileirados e itens marcados
+    """
+    now = now or _utcnow()
+    run = DigestRun()
+    users, local_dates = _due_users(now)
+    run.users = len(users)
+    workers = current_app.config.get("DIGEST_RENDER_WORKERS", 4)
+
+    for start in range(0, len(users), DIGEST_CHUNK):
+        chunk = users[start : start + DIGEST_CHUNK]
+        items = _queued_items([user.id for user in chunk])
+        payloads = [
+            {
+                "user_id": user.id,
+                "email": user.email,
+                "name": user.name,
+                "day": local_dates[user.timezone],
+                "items": items[user.id],
+            }
+            for user in chunk
+            if items.get(user.id)
+        ]
+        if not payloads:
+            continue
+
+        htmls = _render_all(payloads, workers)
+        run.emails += outbound_email.enqueue_many(
+            OutboundEmail(
+                to=payload["email"],
+                subject=digest_subject(payload["day"]),
+                html=html,
+                category="digest",
+                priority=PRIORITY_BULK,
+                idempotency_key=(
+                    f"digest:{payload['user_id']}:{payload['day'].isoformat()}"
+                ),
+            )
+            for payload, html in zip(payloads, htmls)
+        )
+
+        sent_at = now.astimezone(timezone.utc).replace(tzinfo=None)
+        item_ids = [item["id"] for payload in payloads for item in payload["items"]]
+        db.session.execute(
+            update(NotificationQueue)
+            .where(
+                NotificationQueue.id.in_(item_ids),
+                NotificationQueue.status == "digest",
+            )
+            .values(status="sent", sent_at=sent_at)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            update(NotificationPreferences)
+            .where(
+                NotificationPreferences.user_id.in_(
+                    [payload["user_id"] for payload in payloads]
+                )
+            )
+            .values(last_digest_sent=sent_at)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        run.items += len(item_ids)
+
+    logger.info(
+        f"Digests: {run.emails} emails, {run.items} itens, {run.users} usuários"
+    )
+    return run
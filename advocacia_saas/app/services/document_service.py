@@ -3,10 +3,60 @@ Serviço para extração de texto de documentos (PDF, DOCX).
 Usado para análise de documentos jurídicos com IA.
 """
 
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from werkzeug.datastructures import FileStorage
 
+# Páginas lidas por instância do PdfReader. Cada faixa reabre o arquivo, então
+# os objetos já resolvidos das páginas anteriores são liberados e um PDF de
+# centenas de páginas nunca fica inteiro na memória.
+PDF_PAGES_PER_READER = 25
+
+
+def count_pdf_pages(source) -> int:
+    """Número de páginas de um PDF (caminho ou stream)"""
+    from PyPDF2 import PdfReader  # type: ignore
+
+    return len(PdfReader(source).pages)
+
+
+def extract_pdf_page_range(source, start: int, stop: int) -> List[Tuple[int, str]]:
+    """
+    Extrai o texto das páginas [start, stop) de um PDF.
+
+    Roda também nos processos do pool de extração, por isso recebe o caminho
+    do arquivo e devolve só dados simples.
+
+    Returns:
+        List[Tuple[int, str]]: (número da página, texto), numeradas a partir de 1
+    """
+    from PyPDF2 import PdfReader  # type: ignore
+
+    reader = PdfReader(source)
+    return [
+        (index + 1, reader.pages[index].extract_text() or "")
+        for index in range(start, min(stop, len(reader.pages)))
+    ]
+
+
+def iter_pdf_pages(
+    source, chunk_pages: int = PDF_PAGES_PER_READER, total: Optional[int] = None
+) -> Iterator[Tuple[int, str]]:
+    """Gera (número, texto) página a página, com um PdfReader novo por faixa"""
+    if total is None:
+        total = count_pdf_pages(source)
+    for start in range(0, total, chunk_pages):
+        yield from extract_pdf_page_range(source, start, start + chunk_pages)
+
+
+def format_pdf_pages(pages: Iterable[Tuple[int, str]]) -> str:
+    """Junta as páginas com o cabeçalho "--- Página N ---" (pula as vazias)"""
+    return "\n\n".join(
+        f"--- Página {page_num} ---\n{page_text}"
+        for page_num, page_text in pages
+        if page_text
+    )
+
 
 def extract_text_from_pdf(file: FileStorage) -> Tuple[str, Dict]:
     """
@@ -19,21 +69,11 @@ def extract_text_from_pdf(file: FileStorage) -> Tuple[str, Dict]:
         Tuple[str, Dict]: (texto extraído, metadados)
     """
     try:
-        from PyPDF2 import PdfReader  # type: ignore
-
-        # Ler o PDF
-        pdf_reader = PdfReader(file)
-
-        text_parts = []
-        for page_num, page in enumerate(pdf_reader.pages, 1):
-            page_text = page.extract_text()
-            if page_text:
-                text_parts.append(f"--- Página {page_num} ---\n{page_text}")
-
-        full_text = "\n\n".join(text_parts)
+        total = count_pdf_pages(file)
+        full_text = format_pdf_pages(iter_pdf_pages(file, total=total))
 
         metadata = {
-            "pages": len(pdf_reader.pages),
+            "pages": total,
             "characters": len(full_text),
             "format": "pdf",
         }
@@ -0,0 +1,225 @@
+"""
+Extração de texto de documentos enviados, com cache e pool de processos.
+
+O mesmo arquivo costuma ser enviado mais de uma vez (nova análise, outra aba,
+retentativa depois de erro da IA), e o PyPDF2 gastava segundos por PDF
+grande na thread da requisição. Aqui:
+
+- o upload é identificado pelo SHA-256 do conteúdo; texto e metadados
+  extraídos ficam em cache por essa chave (Redis em REDIS_CACHE_DB ou disco
+  em DOCUMENT_TEXT_CACHE_DIR), por DOCUMENT_TEXT_CACHE_TTL segundos;
+- PDFs com DOCUMENT_EXTRACT_PARALLEL_PAGES páginas ou mais são divididos em
+  faixas de DOCUMENT_EXTRACT_CHUNK_PAGES páginas, extraídas em paralelo num
+  pool de processos (DOCUMENT_EXTRACT_WORKERS; 0 = sempre no processo);
+- cada faixa abre o PDF de novo (arquivo temporário), então nem o worker
+  HTTP nem os processos do pool seguram o documento inteiro parseado.
+
+O formato do texto é o mesmo de extract_text_from_pdf, com ou sem pool.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.services.document_service import (
+    PDF_PAGES_PER_READER,
+    count_pdf_pages,
+    extract_document_text,
+    extract_pdf_page_range,
+    format_pdf_pages,
+    get_supported_formats,
+    iter_pdf_pages,
+)
+from app.services.session_store import (
+    FilesystemKeyValueStore,
+    RedisKeyValueStore,
+    dumps,
+    loads,
+)
+
+logger = logging.getLogger(__name__)
+
+# Incrementar ao alterar a extração para invalidar os textos em cache
+EXTRACTOR_VERSION = "1"
+
+DEFAULT_CACHE_TTL = 7 * 24 * 3600
+DEFAULT_PARALLEL_PAGES = 60
+
+
+def hash_upload(file, chunk_size=1024 * 1024) -> str:
+    """SHA-256 do conteúdo do upload, lido em blocos; devolve o stream no início"""
+    stream = getattr(file, "stream", file)
+    stream.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+class DocumentTextService:
+    """Extrai texto de uploads com cache por hash e PDFs grandes em paralelo"""
+
+    def __init__(self):
+        self._executor = None
+        self._workers = 0
+        self._timeout = 120
+        self._parallel_pages = DEFAULT_PARALLEL_PAGES
+        self._chunk_pages = PDF_PAGES_PER_READER
+        self._cache_ttl = DEFAULT_CACHE_TTL
+        self._cache = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configura o pool de extração e o cache de textos"""
+        self._workers = app.config.get("DOCUMENT_EXTRACT_WORKERS", 2)
+        self._timeout = app.config.get("DOCUMENT_EXTRACT_TIMEOUT", 120)
+        self._parallel_pages = app.config.get(
+            "DOCUMENT_EXTRACT_PARALLEL_PAGES", DEFAULT_PARALLEL_PAGES
+        )
+        self._chunk_pages = app.config.get(
+            "DOCUMENT_EXTRACT_CHUNK_PAGES", PDF_PAGES_PER_READER
+        )
+        self._cache_ttl = app.config.get("DOCUMENT_TEXT_CACHE_TTL", DEFAULT_CACHE_TTL)
+        with app.app_context():
+            from app.utils.redis_client import get_redis
+
+            client = get_redis("REDIS_CACHE_DB")
+        self._cache = (
+            RedisKeyValueStore(client, "petitio:doc_text")
+            if client
+            else FilesystemKeyValueStore(
+                app.config.get("DOCUMENT_TEXT_CACHE_DIR")
+                or os.path.join(tempfile.gettempdir(), "petitio_doc_text")
+            )
+        )
+        app.extensions["document_text"] = self
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            self._cache = FilesystemKeyValueStore(
+                os.path.join(tempfile.gettempdir(), "petitio_doc_text")
+            )
+        return self._cache
+
+    @property
+    def executor(self):
+        # Criado sob demanda: comandos CLI e testes não sobem processos
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _cache_get(self, key):
+        try:
+            payload = self.cache.get(key)
+        except Exception as e:
+            logger.warning(f"Falha ao ler texto extraído do cache: {e}")
+            return None
+        return loads(payload) if payload else None
+
+    def _cache_set(self, key, text, metadata):
+        try:
+            self.cache.set(
+                key, dumps({"text": text, "metadata": metadata}), self._cache_ttl
+            )
+        except Exception as e:
+            logger.warning(f"Falha ao gravar texto extraído em cache: {e}")
+
+    def extract(self, file):
+        """
+        Extrai (ou reaproveita do cache) o texto de um upload.
+
+        Args:
+            file: Arquivo (FileStorage do Flask)
+
+        Returns:
+            Tuple[str, Dict]: (texto extraído, metadados). Os metadados trazem
+            também o sha256 do arquivo e se o texto veio do cache.
+
+        Raises:
+            ValueError: Se o formato não for suportado
+        """
+        extension = file.filename.lower().rsplit(".", 1)[-1]
+        if extension not in get_supported_formats():
+            return extract_document_text(file)  # levanta ValueError
+
+        digest = hash_upload(file)
+        key = f"{digest}_{extension}_v{EXTRACTOR_VERSION}"
+        cached = self._cache_get(key)
+        if cached:
+            return cached["text"], dict(cached["metadata"], cached=True)
+
+        if extension == "pdf":
+            text, metadata = self._extract_pdf(file)
+        else:
+            text, metadata = extract_document_text(file)
+        metadata["sha256"] = digest
+        self._cache_set(key, text, metadata)
+        return text, dict(metadata, cached=False)
+
+    def _extract_pdf(self, file):
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            file.stream.seek(0)
+            shutil.copyfileobj(file.stream, tmp)
+        file.stream.seek(0)
+        try:
+            total = count_pdf_pages(tmp.name)
+            if self._workers > 0 and total >= self._parallel_pages:
+                pages = self._extract_parallel(tmp.name, total)
+            else:
+                pages = iter_pdf_pages(tmp.name, self._chunk_pages, total)
+            text = format_pdf_pages(pages)
+        except Exception as e:
+            raise Exception(f"Erro ao extrair texto do PDF: {str(e)}")
+        finally:
+            os.remove(tmp.name)
+        return text, {"pages": total, "characters": len(text), "format": "pdf"}
+
+    def _extract_parallel(self, path, total):
+        """Faixas de páginas no pool, devolvidas na ordem do documento"""
+        futures = []
+        pages = []
+        try:
+            for start in range(0, total, self._chunk_pages):
+                futures.append(
+                    self.executor.submit(
+                        extract_pdf_page_range, path, start, start + self._chunk_pages
+                    )
+                )
+            for future in futures:
+                pages.extend(future.result(timeout=self._timeout))
+        except BrokenProcessPool:
+            logger.error("Pool de extração de texto caiu; extraindo no processo")
+            self._reset_executor()
+            return iter_pdf_pages(path, self._chunk_pages, total)
+        finally:
+            for future in futures:
+                future.cancel()
+        return pages
+
+    def shutdown(self, wait=True):
+        """Encerra o pool de processos (se foi criado)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+
+document_text_service = DocumentTextService()
@@ -0,0 +1,412 @@
+"""
+Direitos de acesso (features, limites e configurações) por plano e usuário.
+
+Antes, cada has_feature / get_feature_limit / get_monthly_credits chamado num
+template buscava de novo o plano atual do usuário e consultava plan_features,
+então uma única página disparava dezenas de queries idênticas.
+
+EntitlementResolver carrega tudo de uma vez (duas queries) num snapshot
+imutável:
+- memoizado por requisição em flask.g;
+- compartilhado entre requisições e workers no Redis (ou em um dict em
+  memória quando não há Redis), com TTL ENTITLEMENTS_CACHE_TTL.
+
+Invalidação:
+- mudanças em UserPlan (troca de plano, cancelamento...) descartam o snapshot
+  daquele usuário;
+- mudanças em BillingPlan, Feature ou plan_features (edições do admin)
+  incrementam uma versão global que invalida todos os snapshots.
+As duas são disparadas por eventos do SQLAlchemy ao gravar e de novo no
+commit/rollback, de modo que outros workers não fiquem com a versão antiga.
+Escritas diretas em plan_features (sem ORM) devem chamar invalidate_all().
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from flask import g, has_app_context
+from sqlalchemy import and_, event, select
+from sqlalchemy.orm import Session, object_session
+
+logger = logging.getLogger(__name__)
+
+_SESSION_USERS = "entitlements_users"
+_SESSION_ALL = "entitlements_all"
+
+
+@dataclass(frozen=True)
+class PlanEntitlements:
+    """Features, limites e configurações de um plano"""
+
+    plan_id: int
+    plan_slug: str
+    # features do plano -> limit_value de plan_features (None = usa o padrão)
+    limits: Mapping[str, Optional[int]]
+    configs: Mapping[str, Mapping]
+    # features ativas do catálogo -> default_limit
+    default_limits: Mapping[str, Optional[int]]
+
+    def has_feature(self, feature_slug):
+        return feature_slug in self.limits
+
+    def feature_limit(self, feature_slug):
+        """Limite do plano ou, sem limite específico, o padrão da feature"""
+        limit = self.limits.get(feature_slug)
+        if limit is not None:
+            return limit
+        return self.default_limits.get(feature_slug)
+
+    def feature_config(self, feature_slug):
+        return dict(self.configs.get(feature_slug, {}))
+
+    def to_dict(self):
+        return {
+            "plan_id": self.plan_id,
+            "plan_slug": self.plan_slug,
+            "limits": dict(self.limits),
+            "configs": {slug: dict(c) for slug, c in self.configs.items()},
+            "default_limits": dict(self.default_limits),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            plan_id=data["plan_id"],
+            plan_slug=data["plan_slug"],
+            limits=MappingProxyType(dict(data["limits"])),
+            configs=MappingProxyType(
+                {slug: MappingProxyType(c) for slug, c in data["configs"].items()}
+            ),
+            default_limits=MappingProxyType(dict(data["default_limits"])),
+        )
+
+
+@dataclass(frozen=True)
+class UserEntitlements:
+    """Direitos efetivos de um usuário (mesmas regras dos métodos de User)"""
+
+    user_id: int
+    is_master: bool
+    plan: Optional[PlanEntitlements]
+
+    @property
+    def plan_id(self):
+        return self.plan.plan_id if self.plan else None
+
+    def has_feature(self, feature_slug):
+        # Master sempre tem acesso total
+        if self.is_master:
+            return True
+        return bool(self.plan and self.plan.has_feature(feature_slug))
+
+    def feature_limit(self, feature_slug):
+        """None = ilimitado; 0 quando não há plano ativo"""
+        if self.is_master:
+            return None
+        if not self.plan:
+            return 0
+        return self.plan.feature_limit(feature_slug)
+
+    def monthly_credits(self, feature_slug):
+        """-1 = ilimitado (master); 0 quando o plano não tem a feature"""
+        if self.is_master:
+            return -1
+        if not self.has_feature(feature_slug):
+            return 0
+        return self.plan.feature_limit(feature_slug) or 0
+
+
+class EntitlementResolver:
+    """Carrega e guarda em cache os snapshots de direitos"""
+
+    PREFIX = "petitio:entitlements:"
+
+    def __init__(self):
+        self._app = None
+        self._data = {}
+        self._version = 0
+        self._lock = threading.Lock()
+        self.ttl = 300
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """Lê a configuração e registra os eventos de invalidação"""
+        self._app = app
+        self.ttl = app.config.get("ENTITLEMENTS_CACHE_TTL", self.ttl)
+        with self._lock:
+            self._data.clear()
+        _register_listeners()
+        app.extensions["entitlements"] = self
+
+    @property
+    def redis(self):
+        from app.utils.redis_client import get_redis
+
+        return get_redis("REDIS_CACHE_DB")
+
+    # -------------------------------------------------------------------------
+    # Leitura
+    # -------------------------------------------------------------------------
+
+    def for_user(self, user):
+        """Snapshot de direitos do usuário (master não consulta o banco)"""
+        if user.is_master:
+            return UserEntitlements(user_id=user.id, is_master=True, plan=None)
+
+        def load():
+            plan = self._load_user_plan(user.id)
+            return {"plan": plan.to_dict() if plan else None}
+
+        def build(data):
+            plan = PlanEntitlements.from_dict(data["plan"]) if data["plan"] else None
+            return UserEntitlements(user_id=user.id, is_master=False, plan=plan)
+
+        return self._cached(f"user:{user.id}", load, build)
+
+    def for_plan(self, plan):
+        """Snapshot de direitos de um BillingPlan"""
+        return self._cached(
+            f"plan:{plan.id}",
+            lambda: self._load_plan(plan.id, plan.slug).to_dict(),
+            PlanEntitlements.from_dict,
+        )
+
+    def _cached(self, key, loader, build):
+        memo = g.setdefault("_entitlements", {}) if has_app_context() else {}
+        if key in memo:
+            return memo[key]
+
+        # A versão é lida antes de carregar: uma invalidação concorrente faz
+        # o snapshot gravado já nascer vencido
+        data, version = self._cache_get(key)
+        if data is None:
+            self.misses += 1
+            data = loader()
+            self._cache_set(key, data, version)
+        else:
+            self.hits += 1
+        memo[key] = snapshot = build(data)
+        return snapshot
+
+    def _load_user_plan(self, user_id):
+        from app import db
+        from app.models import BillingPlan, UserPlan
+
+        row = db.session.execute(
+            select(BillingPlan.id, BillingPlan.slug)
+            .join(UserPlan, UserPlan.plan_id == BillingPlan.id)
+            .where(
+                UserPlan.user_id == user_id,
+                UserPlan.is_current.is_(True),
+                UserPlan.status == "active",
+            )
+            .limit(1)
+        ).first()
+        if row is None:
+            return None
+        return self._load_plan(row.id, row.slug)
+
+    def _load_plan(self, plan_id, plan_slug):
+        """Uma query: catálogo de features + linhas do plano em plan_features"""
+        from app import db
+        from app.models import Feature, plan_features
+
+        rows = db.session.execute(
+            select(
+                Feature.slug,
+                Feature.is_active,
+                Feature.default_limit,
+                plan_features.c.plan_id,
+                plan_features.c.limit_value,
+                plan_features.c.config_json,
+            ).outerjoin(
+                plan_features,
+                and_(
+                    plan_features.c.feature_id == Feature.id,
+                    plan_features.c.plan_id == plan_id,
+                ),
+            )
+        ).all()
+
+        limits, configs, default_limits = {}, {}, {}
+        for slug, is_active, default_limit, in_plan, limit_value, config_json in rows:
+            if is_active:
+                default_limits[slug] = default_limit
+            if in_plan is None:
+                continue
+            limits[slug] = limit_value
+            if config_json:
+                try:
+                    configs[slug] = json.loads(config_json)
+                except ValueError:
+                    logger.warning(f"Configuração inválida da feature {slug}")
+
+        return PlanEntitlements.from_dict(
+            {
+                "plan_id": plan_id,
+                "plan_slug": plan_slug,
+                "limits": limits,
+                "configs": configs,
+                "default_limits": default_limits,
+            }
+        )
+
+    # -------------------------------------------------------------------------
+    # Cache entre requisições
+    # -------------------------------------------------------------------------
+
+    def _cache_get(self, key):
+        """Retorna (dados ou None, versão atual do catálogo)"""
+        if not self.ttl:
+            return None, None
+        client = self.redis
+        if client is not None:
+            try:
+                version, raw = client.mget(
+                    f"{self.PREFIX}version", f"{self.PREFIX}{key}"
+                )
+            except Exception as e:
+                logger.warning(f"Entitlements: falha ao ler cache ({e})")
+                return None, None
+            version = int(version or 0)
+            if raw is None:
+                return None, version
+            entry = json.loads(raw)
+            if entry["version"] != version:
+                return None, version
+            return entry["data"], version
+
+        with self._lock:
+            item = self._data.get(key)
+            if item:
+                expires_at, version, data = item
+                if expires_at >= time.monotonic() and version == self._version:
+                    return data, version
+                del self._data[key]
+            return None, self._version
+
+    def _cache_set(self, key, data, version):
+        if not self.ttl or version is None:
+            return
+        client = self.redis
+        if client is not None:
+            try:
+                client.set(
+                    f"{self.PREFIX}{key}",
+                    json.dumps({"version": version, "data": data}),
+                    ex=int(self.ttl),
+                )
+            except Exception as e:
+                logger.warning(f"Entitlements: falha ao gravar cache ({e})")
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, version, data)
+
+    # -------------------------------------------------------------------------
+    # Invalidação
+    # -------------------------------------------------------------------------
+
+    def invalidate_user(self, *user_ids):
+        """Descarta os snapshots dos usuários (ex: troca de plano)"""
+        keys = [f"user:{user_id}" for user_id in user_ids]
+        self._forget_request_memo(keys)
+        client = self._redis_if_available()
+        if client is not None:
+            try:
+                client.delete(*[f"{self.PREFIX}{key}" for key in keys])
+            except Exception as e:
+                logger.warning(f"Entitlements: falha ao invalidar usuários ({e})")
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def invalidate_all(self):
+        """Invalida todos os snapshots (planos, features ou plan_features editados)"""
+        self._forget_request_memo(None)
+        client = self._redis_if_available()
+        if client is not None:
+            try:
+                client.incr(f"{self.PREFIX}version")
+            except Exception as e:
+                logger.warning(f"Entitlements: falha ao invalidar cache ({e})")
+        with self._lock:
+            self._version += 1
+            self._data.clear()
+
+    def _redis_if_available(self):
+        if has_app_context():
+            return self.redis
+        if self._app is not None:
+            with self._app.app_context():
+                return self.redis
+        return None
+
+    @staticmethod
+    def _forget_request_memo(keys):
+        if not has_app_context():
+            return
+        memo = g.get("_entitlements")
+        if not memo:
+            return
+        if keys is None:
+            memo.clear()
+            return
+        for key in keys:
+            memo.pop(key, None)
+
+
+entitlement_resolver = EntitlementResolver()
+
+
+# =============================================================================
+# Eventos do SQLAlchemy
+# =============================================================================
+
+_listeners_registered = False
+
+
+def _register_listeners():
+    global _listeners_registered
+    if _listeners_registered:
+        return
+
+    from app.models import BillingPlan, Feature, UserPlan
+
+    for name in ("after_insert", "after_update", "after_delete"):
+        event.listen(UserPlan, name, _user_plan_changed)
+        event.listen(BillingPlan, name, _catalog_changed)
+        event.listen(Feature, name, _catalog_changed)
+    event.listen(Session, "after_commit", _flush_pending)
+    event.listen(Session, "after_rollback", _flush_pending)
+    _listeners_registered = True
+
+
+def _user_plan_changed(mapper, connection, target):
+    # Invalida já (leituras na mesma transação) e de novo no commit/rollback,
+    # pois outro worker pode recarregar o estado antigo nesse intervalo
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_SESSION_USERS, set()).add(target.user_id)
+    entitlement_resolver.invalidate_user(target.user_id)
+
+
+def _catalog_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info[_SESSION_ALL] = True
+    entitlement_resolver.invalidate_all()
+
+
+def _flush_pending(session):
+    user_ids = session.info.pop(_SESSION_USERS, None)
+    if session.info.pop(_SESSION_ALL, False):
+        entitlement_resolver.invalidate_all()
+    elif user_ids:
+        entitlement_resolver.invalidate_user(*user_ids)
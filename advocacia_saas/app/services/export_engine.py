@@ -0,0 +1,424 @@
+"""
+Exportações CSV/XLSX em streaming (painel admin e LGPD).
+
+As linhas saem do banco em lotes (`Query.yield_per`, que no PostgreSQL usa
+cursor no servidor) e são escritas direto na resposta HTTP em pedaços, sem
+montar o arquivo inteiro em memória. O XLSX é gerado com o modo write-only do
+openpyxl num arquivo temporário, enviado em pedaços e apagado em seguida.
+
+Exportações registradas com `export_service.register` podem rodar como job em
+background quando passam de EXPORT_ASYNC_ROWS linhas (ou com `?async=1`): o
+arquivo fica em EXPORT_DIR por JOB_TTL_SECONDS e é baixado em
+/admin/exports/<job_id>/download (static/js/export_jobs.js acompanha o job e
+baixa o arquivo). Os jobs só são usados com o estado compartilhado entre
+workers (Redis); sem ele o status consultado em outro worker daria 404, então
+a exportação é enviada em streaming na própria requisição.
+"""
+
+import csv
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from io import StringIO
+from typing import Callable, Iterable, Optional
+
+from flask import (
+    Response,
+    current_app,
+    has_app_context,
+    jsonify,
+    stream_with_context,
+    url_for,
+)
+
+from app.services.job_store import JOB_TTL_SECONDS, MemoryJobStore, RedisJobStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_YIELD_PER = 1000
+CHUNK_SIZE = 64 * 1024
+MIMETYPES = {
+    # O Werkzeug acrescenta "; charset=utf-8" aos tipos text/*
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class ExportError(ValueError):
+    """Formato ou exportação desconhecidos"""
+
+
+def parse_format(value, default="csv"):
+    """Valida o formato pedido (?format=csv|xlsx)"""
+    fmt = (value or default).lower()
+    if fmt not in MIMETYPES:
+        raise ExportError(f"Formato de exportação inválido: {fmt}")
+    return fmt
+
+
+def iter_query(query, batch_size=None):
+    """Itera uma Query em lotes de `batch_size` linhas, sem carregar tudo"""
+    if batch_size is None:
+        batch_size = (
+            current_app.config.get("EXPORT_YIELD_PER", DEFAULT_YIELD_PER)
+            if has_app_context()
+            else DEFAULT_YIELD_PER
+        )
+    return query.yield_per(batch_size)
+
+
+def batched(iterable, size):
+    """Agrupa um iterável em listas de até `size` itens"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def csv_chunks(header, rows, chunk_size=CHUNK_SIZE):
+    """CSV em pedaços de ~`chunk_size` bytes (UTF-8)"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _xlsx_value(value):
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        # Excel não tem fuso horário: grava em UTC
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    return value
+
+
+def write_xlsx(path, sheets):
+    """
+    Grava um XLSX com openpyxl em modo write-only.
+
+    Args:
+        path: arquivo de destino
+        sheets: iterável de (título, cabeçalho, linhas)
+
+    Returns:
+        int: total de linhas gravadas (sem cabeçalhos)
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    written = 0
+    for title, header, rows in sheets:
+        sheet = workbook.create_sheet(title=title[:31])
+        sheet.append(list(header))
+        for row in rows:
+            sheet.append([_xlsx_value(value) for value in row])
+            written += 1
+    workbook.save(path)
+    return written
+
+
+def xlsx_chunks(sheets, chunk_size=CHUNK_SIZE):
+    """XLSX em pedaços: grava em arquivo temporário e lê de volta"""
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=".xlsx")
+    os.close(fd)
+    try:
+        write_xlsx(path, sheets)
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def export_chunks(fmt, header, rows, sheet_title="Exportação"):
+    """Pedaços do arquivo no formato pedido"""
+    if fmt == "xlsx":
+        return xlsx_chunks([(sheet_title, header, rows)])
+    return csv_chunks(header, rows)
+
+
+def write_export(path, fmt, header, rows, sheet_title="Exportação"):
+    """Grava a exportação em disco; retorna o total de linhas"""
+    counter = _Counter(rows)
+    if fmt == "xlsx":
+        write_xlsx(path, [(sheet_title, header, counter)])
+    else:
+        with open(path, "wb") as f:
+            for chunk in csv_chunks(header, counter):
+                f.write(chunk)
+    return counter.count
+
+
+class _Counter:
+    """Conta as linhas à medida que são consumidas"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self.count = 0
+
+    def __iter__(self):
+        for row in self._rows:
+            self.count += 1
+            yield row
+
+
+def stream_response(fmt, filename, header, rows, sheet_title="Exportação"):
+    """
+    Resposta HTTP com o arquivo em streaming.
+
+    `rows` deve ser preguiçoso (gerador): as consultas só rodam enquanto a
+    resposta é enviada, dentro do contexto da requisição.
+    """
+    return Response(
+        stream_with_context(export_chunks(fmt, header, rows, sheet_title)),
+        mimetype=MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}.{fmt}"},
+    )
+
+
+@dataclass(frozen=True)
+class ExportSource:
+    """Exportação registrada: cabeçalho, gerador de linhas e contagem"""
+
+    name: str
+    header: tuple
+    rows: Callable[[dict], Iterable]
+    count: Optional[Callable[[dict], int]] = None
+    sheet_title: str = "Exportação"
+
+
+class ExportService:
+    """Registro de exportações, streaming e jobs em background"""
+
+    def __init__(self):
+        self._sources = {}
+        self._app = None
+        self._executor = None
+        self._workers = 2
+        self.async_rows = 50000
+        self.export_dir = os.path.join(tempfile.gettempdir(), "petitio_exports")
+        self._store = None
+        # Jobs em background exigem estado compartilhado entre workers (Redis)
+        self.shared_jobs = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configura diretório de saída, pool e armazenamento de jobs"""
+        self._app = app
+        self._workers = app.config.get("EXPORT_WORKERS", 2)
+        self.async_rows = app.config.get("EXPORT_ASYNC_ROWS", 50000)
+        self.export_dir = app.config.get("EXPORT_DIR", self.export_dir)
+        with app.app_context():
+            from app.utils.redis_client import get_redis
+
+            client = get_redis("REDIS_CACHE_DB")
+            self._store = (
+                RedisJobStore(client, prefix="petitio:export_job")
+                if client
+                else MemoryJobStore()
+            )
+            self.shared_jobs = client is not None
+        app.extensions["export_service"] = self
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = MemoryJobStore()
+        return self._store
+
+    @property
+    def executor(self):
+        # Criado sob demanda: comandos CLI e testes não sobem threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(self._workers, 1), thread_name_prefix="export"
+                )
+            return self._executor
+
+    def register(self, name, header, count=None, sheet_title="Exportação"):
+        """Decorator que registra um gerador de linhas `rows(params)`"""
+
+        def decorator(func):
+            self._sources[name] = ExportSource(
+                name=name,
+                header=tuple(header),
+                rows=func,
+                count=count,
+                sheet_title=sheet_title,
+            )
+            return func
+
+        return decorator
+
+    def source(self, name):
+        try:
+            return self._sources[name]
+        except KeyError:
+            raise ExportError(f"Exportação desconhecida: {name}") from None
+
+    def should_run_async(self, source, params, requested=False):
+        """Job em background se pedido ou se a exportação for grande"""
+        if requested:
+            return True
+        if source.count is None or self.async_rows <= 0:
+            return False
+        return source.count(params) > self.async_rows
+
+    def respond(self, name, fmt, filename, user_id, params=None, run_async=False):
+        """
+        Responde uma exportação registrada.
+
+        Sem estado compartilhado entre workers a exportação é sempre enviada
+        em streaming, mesmo grande ou com `run_async`.
+
+        Returns:
+            Response: arquivo em streaming, ou 202 com o job em background
+        """
+        source = self.source(name)
+        params = params or {}
+        if self.should_run_async(source, params, run_async):
+            if self.shared_jobs:
+                job = self.submit(name, fmt, filename, user_id, params)
+                return jsonify(public_job(job)), 202
+            logger.info(f"Exportação {name} em streaming: jobs exigem Redis")
+        return stream_response(
+            fmt, filename, source.header, source.rows(params), source.sheet_title
+        )
+
+    def submit(self, name, fmt, filename, user_id, params=None):
+        """
+        Registra a exportação como job em background.
+
+        Com EXPORT_WORKERS = 0 o arquivo é gerado na própria thread.
+
+        Returns:
+            dict: job registrado (id, status, filename, ...)
+        """
+        source = self.source(name)
+        job = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "export": name,
+            "format": fmt,
+            "filename": f"{filename}.{fmt}",
+            "status": "queued",
+            "rows": 0,
+            "error": None,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_ts": time.time(),
+            "completed_at": None,
+        }
+        self._purge_files()
+        self.store.create(job)
+
+        app = self._app or current_app._get_current_object()
+        if self._workers > 0:
+            self.executor.submit(self._run, app, job["id"], source, fmt, params or {})
+        else:
+            self._run(app, job["id"], source, fmt, params or {})
+        return self.store.get(job["id"]) or job
+
+    def _run(self, app, job_id, source, fmt, params):
+        os.makedirs(self.export_dir, exist_ok=True)
+        path = self._path(job_id, fmt)
+        partial = f"{path}.part"
+        with app.app_context():
+            self.store.update(job_id, status="running")
+            try:
+                rows = write_export(
+                    partial, fmt, source.header, source.rows(params), source.sheet_title
+                )
+                os.replace(partial, path)
+            except Exception as e:
+                logger.error(f"Exportação {source.name} ({job_id}) falhou: {e}")
+                if os.path.exists(partial):
+                    os.remove(partial)
+                self.store.update(job_id, status="failed", error=str(e))
+                return
+            self.store.update(
+                job_id,
+                status="completed",
+                rows=rows,
+                completed_at=datetime.now(timezone.utc).isoformat(),
+            )
+
+    def _path(self, job_id, fmt):
+        return os.path.join(self.export_dir, f"{job_id}.{fmt}")
+
+    def _purge_files(self):
+        if not os.path.isdir(self.export_dir):
+            return
+        limit = time.time() - JOB_TTL_SECONDS
+        for name in os.listdir(self.export_dir):
+            path = os.path.join(self.export_dir, name)
+            try:
+                if os.path.getmtime(path) < limit:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def get(self, job_id, user_id):
+        """Retorna o job se pertencer ao usuário"""
+        job = self.store.get(job_id)
+        if not job or job["user_id"] != user_id:
+            return None
+        return job
+
+    def output_path(self, job):
+        """Arquivo de um job concluído (None se já expirou)"""
+        if job.get("status") != "completed":
+            return None
+        path = self._path(job["id"], job["format"])
+        return path if os.path.exists(path) else None
+
+    def shutdown(self, wait=True):
+        """Encerra o pool (usado em testes e no desligamento do processo)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+
+def public_job(job):
+    """Campos do job expostos na API, com os links de status e download"""
+    data = {
+        key: job.get(key)
+        for key in (
+            "id",
+            "status",
+            "export",
+            "format",
+            "filename",
+            "rows",
+            "error",
+            "created_at",
+            "completed_at",
+        )
+    }
+    data["status_url"] = url_for("admin.export_job_status", job_id=job["id"])
+    if job.get("status") == "completed":
+        data["download_url"] = url_for("admin.export_job_download", job_id=job["id"])
+    return data
+
+
+export_service = ExportService()
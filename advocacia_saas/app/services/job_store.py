@@ -0,0 +1,118 @@
+"""
+Armazenamento de estado de jobs em background (IA, PDF, ...).
+
+Cada job é um dict serializável em JSON com ao menos `id`, `status` e
+`created_ts`. Jobs que produzem saída incremental (tokens da IA) usam a
+lista de chunks; os demais podem ignorá-la.
+
+Use RedisJobStore quando REDIS_URL estiver configurado (necessário com vários
+workers do gunicorn) e MemoryJobStore no restante dos casos.
+"""
+
+import json
+import threading
+import time
+
+JOB_TTL_SECONDS = 3600
+FINAL_STATUSES = {"completed", "failed"}
+
+
+class MemoryJobStore:
+    """Estado dos jobs em memória (um único processo)"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._chunks = {}
+        self._condition = threading.Condition()
+
+    def create(self, job):
+        with self._condition:
+            self._purge_expired()
+            self._jobs[job["id"]] = dict(job)
+            self._chunks[job["id"]] = []
+
+    def update(self, job_id, **fields):
+        with self._condition:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+            self._condition.notify_all()
+
+    def append_chunk(self, job_id, chunk):
+        with self._condition:
+            self._chunks.setdefault(job_id, []).append(chunk)
+            self._condition.notify_all()
+
+    def get(self, job_id):
+        with self._condition:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def read_chunks(self, job_id, offset=0):
+        with self._condition:
+            return list(self._chunks.get(job_id, [])[offset:])
+
+    def wait(self, job_id, offset, timeout):
+        """Bloqueia até haver novos chunks, o job terminar ou o timeout"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: (
+                    len(self._chunks.get(job_id, [])) > offset
+                    or self._jobs.get(job_id, {}).get("status") in FINAL_STATUSES
+                ),
+                timeout=timeout,
+            )
+
+    def _purge_expired(self):
+        limit = time.time() - JOB_TTL_SECONDS
+        for job_id in [j for j, job in self._jobs.items() if job["created_ts"] < limit]:
+            self._jobs.pop(job_id, None)
+            self._chunks.pop(job_id, None)
+
+
+class RedisJobStore:
+    """Estado dos jobs no Redis (compartilhado entre workers)"""
+
+    def __init__(self, client, prefix):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, job_id, suffix=""):
+        return f"{self.prefix}:{job_id}{suffix}"
+
+    def create(self, job):
+        key = self._key(job["id"])
+        self.client.set(key, json.dumps(job), ex=JOB_TTL_SECONDS)
+
+    def update(self, job_id, **fields):
+        job = self.get(job_id)
+        if job:
+            job.update(fields)
+            self.client.set(self._key(job_id), json.dumps(job), ex=JOB_TTL_SECONDS)
+
+    def append_chunk(self, job_id, chunk):
+        key = self._key(job_id, ":chunks")
+        pipe = self.client.pipeline()
+        pipe.rpush(key, chunk)
+        pipe.expire(key, JOB_TTL_SECONDS)
+        pipe.execute()
+
+    def get(self, job_id):
+        raw = self.client.get(self._key(job_id))
+        return json.loads(raw) if raw else None
+
+    def read_chunks(self, job_id, offset=0):
+        return [
+            c.decode("utf-8") if isinstance(c, bytes) else c
+            for c in self.client.lrange(self._key(job_id, ":chunks"), offset, -1)
+        ]
+
+    def wait(self, job_id, offset, timeout):
+        deadline = time.time() + timeout
+        key = self._key(job_id, ":chunks")
+        while time.time() < deadline:
+            if self.client.llen(key) > offset:
+                return
+            job = self.get(job_id)
+            if not job or job.get("status") in FINAL_STATUSES:
+                return
+            time.sleep(0.1)
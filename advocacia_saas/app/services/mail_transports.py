@@ -0,0 +1,301 @@
+"""
+Transportes de email usados pelo worker da fila de saída.
+
+Cada transporte recebe um lote de mensagens já renderizadas e devolve um
+resultado por mensagem:
+- resend:  API em lote do Resend (até 100 mensagens por chamada);
+- smtp:    Flask-Mail com uma única conexão SMTP por lote;
+- maildir: grava cada mensagem num Maildir local (desenvolvimento e testes).
+
+MAIL_TRANSPORT = "auto" escolhe resend (RESEND_API_KEY), depois smtp
+(MAIL_SERVER). O maildir (MAIL_MAILDIR) só é usado se pedido explicitamente
+(MAIL_TRANSPORT = "maildir") ou, em debug/testes, como substituto de um
+provedor ausente; em produção, sem provedor, build_transport devolve None e
+a fila recusa os envios (os chamadores reportam a falha ao usuário).
+
+O limite de envio é por provedor (MAIL_RATE_LIMITS, requisições por segundo)
+e vale para o processo: cada worker respeita a sua cota.
+"""
+
+import logging
+import mailbox
+import os
+import smtplib
+import threading
+import time
+from dataclasses import dataclass
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SENDER = "noreply@petitio.onrender.com"
+DEFAULT_RATE_LIMITS = {"resend": 2.0, "smtp": 10.0, "maildir": 0}
+
+
+@dataclass
+class RenderedEmail:
+    """Mensagem pronta para o transporte"""
+
+    id: int
+    recipients: List[str]
+    subject: str
+    html: str
+    sender: str
+    text: Optional[str] = None
+    idempotency_key: Optional[str] = None
+
+
+@dataclass
+class SendResult:
+    """Resultado do envio de uma mensagem"""
+
+    ok: bool
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    # Erro que não melhora com nova tentativa (endereço inválido, 4xx...)
+    permanent: bool = False
+
+
+class RateLimiter:
+    """Token bucket: `rate` requisições por segundo, com rajada de `burst`"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Bloqueia até haver cota; retorna quanto tempo esperou"""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class MailTransport:
+    """Base dos transportes: `send_batch` devolve um SendResult por mensagem"""
+
+    def __init__(self, name, batch_size=50, limiter=None):
+        self.name = name
+        self.batch_size = batch_size
+        self.limiter = limiter or RateLimiter(0)
+
+    def send_batch(self, messages: List[RenderedEmail]) -> List[SendResult]:
+        raise NotImplementedError
+
+
+def _http_status(error) -> Optional[int]:
+    for attribute in ("code", "status_code", "status"):
+        value = getattr(error, attribute, None)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _is_permanent(error) -> bool:
+    status = _http_status(error)
+    return status is not None and 400 <= status < 500 and status != 429
+
+
+class ResendTransport(MailTransport):
+    """API do Resend; lotes via resend.Batch.send quando disponível"""
+
+    def __init__(self, api_key, rate=DEFAULT_RATE_LIMITS["resend"]):
+        import resend
+
+        resend.api_key = api_key
+        super().__init__("resend", batch_size=100, limiter=RateLimiter(rate))
+        self._client = resend
+
+    @staticmethod
+    def _params(message):
+        params = {
+            "from": message.sender,
+            "to": message.recipients,
+            "subject": message.subject,
+            "html": message.html,
+        }
+        if message.text:
+            params["text"] = message.text
+        return params
+
+    def _send_one(self, message):
+        self.limiter.acquire()
+        try:
+            response = self._client.Emails.send(self._params(message))
+        except Exception as e:
+            return SendResult(False, error=str(e), permanent=_is_permanent(e))
+        if not response.get("id"):
+            return SendResult(False, error=str(response))
+        return SendResult(True, message_id=response["id"])
+
+    def send_batch(self, messages):
+        batch_api = getattr(self._client, "Batch", None)
+        if batch_api is None or len(messages) == 1:
+            return [self._send_one(message) for message in messages]
+
+        self.limiter.acquire()
+        try:
+            response = batch_api.send([self._params(m) for m in messages])
+        except Exception as e:
+            # O lote inteiro é rejeitado se uma mensagem for inválida: envia
+            # uma a uma para isolar a que falhou
+            logger.warning(f"Resend: lote de {len(messages)} recusado ({e})")
+            return [self._send_one(message) for message in messages]
+
+        data = response.get("data") if isinstance(response, dict) else None
+        if not data or len(data) != len(messages):
+            return [SendResult(False, error=str(response)) for _ in messages]
+        return [SendResult(True, message_id=item.get("id")) for item in data]
+
+
+class SmtpTransport(MailTransport):
+    """Flask-Mail reaproveitando a conexão SMTP durante o lote"""
+
+    def __init__(self, mail, rate=DEFAULT_RATE_LIMITS["smtp"]):
+        super().__init__("smtp", batch_size=50, limiter=RateLimiter(rate))
+        self._mail = mail
+
+    def send_batch(self, messages):
+        from flask_mail import Message
+
+        results = []
+        try:
+            with self._mail.connect() as connection:
+                for message in messages:
+                    self.limiter.acquire()
+                    msg = Message(
+                        subject=message.subject,
+                        recipients=message.recipients,
+                        sender=message.sender,
+                        html=message.html,
+                        body=message.text,
+                    )
+                    try:
+                        connection.send(msg)
+                    except (
+                        smtplib.SMTPRecipientsRefused,
+                        smtplib.SMTPSenderRefused,
+                    ) as e:
+                        results.append(SendResult(False, error=str(e), permanent=True))
+                        continue
+                    results.append(SendResult(True, message_id=msg.msgId))
+        except (smtplib.SMTPException, OSError) as e:
+            # Conexão caiu: o que não foi enviado volta para a fila
+            error = f"SMTP: {e}"
+            results += [SendResult(False, error=error)] * (len(messages) - len(results))
+        return results
+
+
+class MaildirTransport(MailTransport):
+    """Grava as mensagens num Maildir (leia com `mutt -f` ou mailbox.Maildir)"""
+
+    def __init__(self, path):
+        super().__init__("maildir", batch_size=100)
+        self.path = path
+
+    @staticmethod
+    def build_message(message):
+        msg = EmailMessage()
+        msg["From"] = message.sender
+        msg["To"] = ", ".join(message.recipients)
+        msg["Subject"] = message.subject
+        msg["Date"] = formatdate(localtime=True)
+        msg["Message-ID"] = make_msgid()
+        if message.idempotency_key:
+            msg["X-Idempotency-Key"] = message.idempotency_key
+        msg.set_content(message.text or "Este email requer um cliente com HTML.")
+        msg.add_alternative(message.html or "", subtype="html")
+        return msg
+
+    def send_batch(self, messages):
+        os.makedirs(self.path, exist_ok=True)
+        box = mailbox.Maildir(self.path, create=True)
+        results = []
+        for message in messages:
+            msg = self.build_message(message)
+            try:
+                box.add(msg)
+            except OSError as e:
+                results.append(SendResult(False, error=str(e)))
+                continue
+            results.append(SendResult(True, message_id=msg["Message-ID"]))
+        return results
+
+
+def default_sender(app) -> str:
+    """Remetente padrão (domínio verificado no provedor)"""
+    return (
+        os.getenv("RESEND_SENDER")
+        or app.config.get("MAIL_DEFAULT_SENDER")
+        or DEFAULT_SENDER
+    )
+
+
+def build_transport(app) -> Optional[MailTransport]:
+    """
+    Transporte conforme MAIL_TRANSPORT (auto, resend, smtp ou maildir).
+
+    Returns:
+        MailTransport, ou None se nenhum provedor real estiver configurado
+        fora de debug/testes
+    """
+    choice = (app.config.get("MAIL_TRANSPORT") or "auto").lower()
+    rates = {**DEFAULT_RATE_LIMITS, **(app.config.get("MAIL_RATE_LIMITS") or {})}
+    api_key = os.getenv("RESEND_API_KEY")
+    local = app.debug or app.testing
+
+    if choice == "auto":
+        if api_key:
+            choice = "resend"
+        elif app.config.get("MAIL_SERVER"):
+            choice = "smtp"
+        elif local:
+            choice = "maildir"
+        else:
+            logger.error(
+                "Nenhum transporte de email configurado (RESEND_API_KEY ou "
+                "MAIL_SERVER); emails não serão enviados"
+            )
+            return None
+
+    if choice == "resend":
+        try:
+            if not api_key:
+                raise ValueError("RESEND_API_KEY não configurada")
+            return ResendTransport(api_key, rate=rates["resend"])
+        except (ImportError, ValueError) as e:
+            if not local:
+                logger.error(f"Resend indisponível ({e}); emails não serão enviados")
+                return None
+            logger.warning(f"Resend indisponível ({e}); usando maildir")
+    elif choice == "smtp":
+        from app import mail
+
+        return SmtpTransport(mail, rate=rates["smtp"])
+    elif choice != "maildir":
+        logger.error(f"MAIL_TRANSPORT desconhecido: {choice}")
+        return None
+
+    path = app.config.get("MAIL_MAILDIR") or os.path.join(
+        app.instance_path, "maildir"
+    )
+    return MaildirTransport(path)
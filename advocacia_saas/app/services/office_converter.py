@@ -0,0 +1,606 @@
+"""
+Conversão de documentos Office (DOC, XLS, PPT...) para PDF com LibreOffice.
+
+Antes, cada conversão testava até sete caminhos do binário com --version e
+subia um LibreOffice "frio" (criando o perfil do usuário do zero), o que
+custava alguns segundos e centenas de MB por documento.
+
+OfficeConversionPool:
+- descobre o binário uma vez por processo (SOFFICE_PATH ou caminhos padrão);
+- mantém OFFICE_CONVERTER_WORKERS workers atrás de uma fila. Cada worker tem
+  um perfil próprio do LibreOffice (instâncias não podem compartilhar
+  perfil) e:
+  * com o módulo `uno` disponível (python3-uno), mantém um soffice headless
+    em modo listener e converte via UNO, sem subir processo por documento;
+  * sem `uno`, roda `soffice --convert-to` reaproveitando o perfil já
+    inicializado (o custo maior do início a frio é criar o perfil);
+- aplica timeout por conversão (OFFICE_CONVERTER_TIMEOUT): o soffice travado
+  é morto e o worker reciclado, assim como após uma falha do processo ou a
+  cada OFFICE_CONVERTER_MAX_JOBS conversões (limita vazamentos de memória);
+- expõe profundidade da fila e latência das conversões em stats()
+  (/admin/office-converter/stats).
+
+Os workers sobem na primeira conversão; comandos CLI e testes que não
+convertem nada não iniciam o LibreOffice.
+"""
+
+import atexit
+import importlib.util
+import logging
+import os
+import queue
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SOFFICE_CANDIDATES = [
+    "libreoffice",  # Linux (PATH)
+    "soffice",  # Alternativo
+    "/usr/bin/libreoffice",
+    "/usr/bin/soffice",
+    "/usr/lib/libreoffice/program/soffice",
+    "/Applications/LibreOffice.app/Contents/MacOS/soffice",  # macOS
+    r"C:\Program Files\LibreOffice\program\soffice.exe",  # Windows
+    r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
+]
+
+# Filtro de exportação PDF por tipo de documento (modo UNO)
+PDF_EXPORT_FILTERS = {
+    "doc": "writer_pdf_Export",
+    "docx": "writer_pdf_Export",
+    "odt": "writer_pdf_Export",
+    "rtf": "writer_pdf_Export",
+    "txt": "writer_pdf_Export",
+    "xls": "calc_pdf_Export",
+    "xlsx": "calc_pdf_Export",
+    "ods": "calc_pdf_Export",
+    "ppt": "impress_pdf_Export",
+    "pptx": "impress_pdf_Export",
+    "odp": "impress_pdf_Export",
+}
+
+_STOP = object()
+
+
+class OfficeConversionError(Exception):
+    """Falha ao converter um documento com o LibreOffice"""
+
+
+class OfficeConversionTimeout(OfficeConversionError):
+    """A conversão excedeu OFFICE_CONVERTER_TIMEOUT"""
+
+
+@lru_cache(maxsize=None)
+def find_soffice(configured_path: Optional[str] = None) -> Optional[str]:
+    """
+    Localiza o binário do LibreOffice (resultado guardado por processo).
+
+    Returns:
+        Caminho absoluto do soffice ou None se não estiver instalado
+    """
+    candidates = [configured_path] if configured_path else SOFFICE_CANDIDATES
+    for candidate in candidates:
+        path = shutil.which(candidate) or (
+            candidate if os.path.isfile(candidate) else None
+        )
+        if not path:
+            continue
+        try:
+            result = subprocess.run(
+                [path, "--version"], capture_output=True, timeout=15
+            )
+        except (subprocess.SubprocessError, OSError):
+            continue
+        if result.returncode == 0:
+            return path
+    return None
+
+
+def _uno_available() -> bool:
+    return importlib.util.find_spec("uno") is not None
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _popen(args, **kwargs):
+    # Sessão própria: o soffice dispara o soffice.bin como filho, e o grupo
+    # inteiro precisa morrer junto para liberar o perfil
+    if os.name == "posix":
+        kwargs["start_new_session"] = True
+    return subprocess.Popen(args, **kwargs)
+
+
+def _kill(process):
+    if process is None or process.poll() is not None:
+        return
+    if os.name == "posix":
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            process.kill()
+    else:
+        process.kill()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        logger.error(f"soffice (pid {process.pid}) não terminou após kill")
+
+
+class _ConversionJob:
+    __slots__ = ("data", "ext", "future", "enqueued_at")
+
+    def __init__(self, data, ext):
+        self.data = data
+        self.ext = ext
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class OfficeWorker:
+    """Um slot de conversão: perfil próprio e, no modo UNO, um soffice vivo"""
+
+    def __init__(self, pool, index, profile_dir):
+        self.pool = pool
+        self.index = index
+        self.profile_dir = profile_dir
+        self.process = None
+        self.desktop = None
+        self.jobs_done = 0
+
+    @property
+    def profile_url(self):
+        return "file:///" + os.path.abspath(self.profile_dir).replace(
+            os.sep, "/"
+        ).lstrip("/")
+
+    # -------------------------------------------------------------------------
+    # Ciclo de vida
+    # -------------------------------------------------------------------------
+
+    def start(self):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        if self.pool.mode == "uno":
+            self._start_listener()
+
+    def _start_listener(self):
+        import uno  # type: ignore
+
+        port = _free_port()
+        self.process = _popen(
+            [
+                self.pool.soffice,
+                f"-env:UserInstallation={self.profile_url}",
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--nodefault",
+                "--norestore",
+                "--nolockcheck",
+                f"--accept=socket,host=127.0.0.1,port={port};urp;"
+                "StarOffice.ComponentContext",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local
+        )
+        deadline = time.monotonic() + self.pool.startup_timeout
+        while True:
+            try:
+                context = resolver.resolve(
+                    f"uno:socket,host=127.0.0.1,port={port};urp;"
+                    "StarOffice.ComponentContext"
+                )
+                break
+            except Exception:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    _kill(self.process)
+                    raise OfficeConversionError("soffice não iniciou o listener")
+                time.sleep(0.25)
+
+        self.desktop = context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", context
+        )
+
+    def stop(self):
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+            _kill(self.process)
+            self.process = None
+
+    def recycle(self, reset_profile=False):
+        """Reinicia o worker (após timeout, falha ou MAX_JOBS conversões)"""
+        self.stop()
+        if reset_profile:
+            # Perfil pode ter ficado travado (lock) ou corrompido
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+        self.jobs_done = 0
+        self.pool._count("restarts")
+        self.start()
+
+    # -------------------------------------------------------------------------
+    # Conversão
+    # -------------------------------------------------------------------------
+
+    def convert(self, data: bytes, ext: str) -> bytes:
+        work_dir = tempfile.mkdtemp(prefix="petitio_office_")
+        try:
+            input_path = os.path.join(work_dir, f"input.{ext}")
+            with open(input_path, "wb") as f:
+                f.write(data)
+            if self.pool.mode == "uno":
+                output_path = self._convert_uno(input_path, ext, work_dir)
+            else:
+                output_path = self._convert_cli(input_path, work_dir)
+            with open(output_path, "rb") as f:
+                return f.read()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            self.jobs_done += 1
+
+    def _convert_cli(self, input_path, work_dir):
+        out_dir = os.path.join(work_dir, "out")
+        process = _popen(
+            [
+                self.pool.soffice,
+                f"-env:UserInstallation={self.profile_url}",
+                "--headless",
+                "--norestore",
+                "--nolockcheck",
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                out_dir,
+                input_path,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            _, stderr = process.communicate(timeout=self.pool.timeout)
+        except subprocess.TimeoutExpired as e:
+            _kill(process)
+            raise OfficeConversionTimeout(
+                f"Conversão excedeu {self.pool.timeout}s"
+            ) from e
+
+        output_path = os.path.join(out_dir, "input.pdf")
+        if process.returncode != 0 or not os.path.exists(output_path):
+            raise OfficeConversionError(
+                f"soffice terminou com código {process.returncode}: "
+                f"{stderr.decode(errors='replace').strip()}"
+            )
+        return output_path
+
+    def _convert_uno(self, input_path, ext, work_dir):
+        import uno  # type: ignore
+        from com.sun.star.beans import PropertyValue  # type: ignore
+
+        def prop(name, value):
+            item = PropertyValue()
+            item.Name = name
+            item.Value = value
+            return item
+
+        output_path = os.path.join(work_dir, "output.pdf")
+        # Watchdog: matar o soffice destrava a chamada UNO em andamento
+        timed_out = threading.Event()
+
+        def on_timeout():
+            timed_out.set()
+            _kill(self.process)
+
+        watchdog = threading.Timer(self.pool.timeout, on_timeout)
+        watchdog.start()
+        try:
+            document = self.desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(input_path),
+                "_blank",
+                0,
+                (prop("Hidden", True), prop("ReadOnly", True)),
+            )
+            if document is None:
+                raise OfficeConversionError("LibreOffice não abriu o documento")
+            try:
+                document.storeToURL(
+                    uno.systemPathToFileUrl(output_path),
+                    (
+                        prop(
+                            "FilterName",
+                            PDF_EXPORT_FILTERS.get(ext, "writer_pdf_Export"),
+                        ),
+                    ),
+                )
+            finally:
+                document.close(True)
+        except OfficeConversionError:
+            raise
+        except Exception as e:
+            if timed_out.is_set():
+                raise OfficeConversionTimeout(
+                    f"Conversão excedeu {self.pool.timeout}s"
+                ) from e
+            raise OfficeConversionError(f"Falha UNO: {e}") from e
+        finally:
+            watchdog.cancel()
+        return output_path
+
+    @property
+    def healthy(self):
+        if self.pool.mode != "uno":
+            return True
+        return self.process is not None and self.process.poll() is None
+
+
+class OfficeConversionPool:
+    """Fila de conversões atendida por workers LibreOffice mantidos aquecidos"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._threads = []
+        self._workers = []
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=500)
+        self._queue_waits = deque(maxlen=500)
+        self._started = False
+        self.soffice = None
+        self.soffice_path = None
+        self.mode = None
+        self.size = 2
+        self.timeout = 60
+        self.startup_timeout = 30
+        self.max_jobs = 200
+        self.profile_dir = os.path.join(
+            tempfile.gettempdir(), "petitio_soffice_profiles"
+        )
+        self._stats = self._empty_stats()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    @staticmethod
+    def _empty_stats():
+        return {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "restarts": 0,
+            "in_flight": 0,
+        }
+
+    def init_app(self, app):
+        """Lê a configuração; workers sobem na primeira conversão"""
+        self.shutdown()
+        self.size = app.config.get("OFFICE_CONVERTER_WORKERS", self.size)
+        self.timeout = app.config.get("OFFICE_CONVERTER_TIMEOUT", self.timeout)
+        self.max_jobs = app.config.get("OFFICE_CONVERTER_MAX_JOBS", self.max_jobs)
+        self.soffice_path = app.config.get("SOFFICE_PATH") or None
+        self.profile_dir = app.config.get("OFFICE_CONVERTER_PROFILE_DIR") or (
+            os.path.join(app.instance_path, "soffice_profiles")
+        )
+        self._stats = self._empty_stats()
+        self._latencies.clear()
+        self._queue_waits.clear()
+        app.extensions["office_converter"] = self
+
+    def _after_fork(self):
+        # Threads e processos soffice do pai não servem ao worker filho
+        self._queue = queue.Queue()
+        self._threads = []
+        self._workers = []
+        self._lock = threading.Lock()
+        self._started = False
+
+    @property
+    def available(self):
+        return find_soffice(self.soffice_path) is not None
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self.soffice = find_soffice(self.soffice_path)
+            if self.soffice is None:
+                raise OfficeConversionError("LibreOffice não encontrado")
+            self.mode = "uno" if _uno_available() else "cli"
+            # Perfis por PID: workers do gunicorn não disputam o mesmo perfil
+            profiles = os.path.join(self.profile_dir, str(os.getpid()))
+            for index in range(max(1, self.size)):
+                worker = OfficeWorker(
+                    self, index, os.path.join(profiles, f"worker_{index}")
+                )
+                thread = threading.Thread(
+                    target=self._run,
+                    args=(worker,),
+                    name=f"office-converter-{index}",
+                    daemon=True,
+                )
+                self._workers.append(worker)
+                self._threads.append(thread)
+                thread.start()
+            self._started = True
+            logger.info(
+                f"LibreOffice: {len(self._workers)} workers ({self.mode}) "
+                f"usando {self.soffice}"
+            )
+
+    # -------------------------------------------------------------------------
+    # API
+    # -------------------------------------------------------------------------
+
+    def submit(self, data: bytes, ext: str) -> Future:
+        """Enfileira uma conversão; o Future resolve com os bytes do PDF"""
+        self._ensure_started()
+        job = _ConversionJob(data, ext.lower().lstrip("."))
+        self._count("submitted")
+        self._queue.put(job)
+        return job.future
+
+    def convert(self, data: bytes, ext: str, timeout: Optional[float] = None) -> bytes:
+        """
+        Converte um documento e devolve o PDF.
+
+        Raises:
+            OfficeConversionError: LibreOffice indisponível ou falha na conversão
+            OfficeConversionTimeout: conversão (incluindo espera na fila) excedeu
+                o timeout
+        """
+        future = self.submit(data, ext)
+        # A espera inclui a fila: com todos os workers ocupados o documento
+        # aguarda a vez antes de começar a contar o timeout do worker
+        wait = timeout if timeout is not None else self.timeout * 2
+        try:
+            return future.result(timeout=wait)
+        except FutureTimeoutError as e:
+            future.cancel()
+            raise OfficeConversionTimeout(
+                f"Conversão não concluída em {wait}s (fila: {self._queue.qsize()})"
+            ) from e
+
+    def stats(self):
+        """Profundidade da fila, contadores e latência das conversões"""
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+            queue_waits = sorted(self._queue_waits)
+        stats.update(
+            {
+                "available": self.available,
+                "mode": self.mode,
+                "binary": self.soffice,
+                "workers": len(self._workers),
+                "workers_alive": sum(1 for t in self._threads if t.is_alive()),
+                "queue_depth": self._queue.qsize(),
+                "latency_ms": _percentiles(latencies),
+                "queue_wait_ms": _percentiles(queue_waits),
+            }
+        )
+        return stats
+
+    def shutdown(self, timeout=15):
+        """Encerra os workers e os processos soffice"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            workers, self._workers = self._workers, []
+            self._started = False
+        for _ in threads:
+            self._queue.put(_STOP)
+        for thread in threads:
+            thread.join(timeout)
+        for worker in workers:
+            worker.stop()
+
+    # -------------------------------------------------------------------------
+    # Worker
+    # -------------------------------------------------------------------------
+
+    def _run(self, worker):
+        try:
+            worker.start()
+        except Exception as e:
+            logger.error(f"LibreOffice: worker {worker.index} não iniciou ({e})")
+
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                break
+            if not job.future.set_running_or_notify_cancel():
+                continue  # chamador desistiu enquanto aguardava na fila
+            with self._lock:
+                self._queue_waits.append((time.monotonic() - job.enqueued_at) * 1000)
+
+            if not worker.healthy:
+                try:
+                    worker.recycle()
+                except Exception as e:
+                    self._finish(job, error=OfficeConversionError(str(e)))
+                    continue
+
+            self._count("in_flight")
+            started = time.monotonic()
+            try:
+                pdf = worker.convert(job.data, job.ext)
+            except OfficeConversionTimeout as e:
+                self._count("timeouts")
+                self._finish(job, error=e, started=started)
+                self._safe_recycle(worker, reset_profile=True)
+            except Exception as e:
+                self._finish(job, error=e, started=started)
+                if not worker.healthy:
+                    self._safe_recycle(worker)
+            else:
+                self._finish(job, result=pdf, started=started)
+                if worker.jobs_done >= self.max_jobs:
+                    self._safe_recycle(worker)
+
+        worker.stop()
+
+    def _safe_recycle(self, worker, reset_profile=False):
+        try:
+            worker.recycle(reset_profile=reset_profile)
+        except Exception as e:
+            logger.error(f"LibreOffice: falha ao reciclar worker {worker.index} ({e})")
+
+    def _finish(self, job, result=None, error=None, started=None):
+        with self._lock:
+            if started is not None:
+                self._stats["in_flight"] -= 1
+                self._latencies.append((time.monotonic() - started) * 1000)
+            self._stats["failed" if error else "completed"] += 1
+        if error:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    def _count(self, field, amount=1):
+        with self._lock:
+            self._stats[field] += amount
+
+
+def _percentiles(values):
+    if not values:
+        return {"count": 0, "avg": None, "p50": None, "p95": None, "max": None}
+
+    def pick(fraction):
+        return round(values[min(len(values) - 1, int(len(values) * fraction))], 1)
+
+    return {
+        "count": len(values),
+        "avg": round(sum(values) / len(values), 1),
+        "p50": pick(0.5),
+        "p95": pick(0.95),
+        "max": round(values[-1], 1),
+    }
+
+
+office_converter = OfficeConversionPool()
+atexit.register(office_converter.shutdown)
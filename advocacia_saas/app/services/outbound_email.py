@@ -0,0 +1,660 @@
+"""
+Fila de saída de emails.
+
+Nenhum envio acontece dentro da requisição ou do job que gerou o email: o
+chamador grava a mensagem na tabela `email_outbox` (enqueue/enqueue_many) e
+segue. Workers retiram as mensagens em lote e entregam pelo transporte
+configurado (app/services/mail_transports.py: API em lote do Resend, SMTP com
+conexão reaproveitada ou Maildir local em desenvolvimento/testes).
+
+A gravação usa a sessão do chamador (db.session): a mensagem é efetivada no
+commit dele, junto com a mudança que a originou, e some num rollback. Os
+workers só são acordados depois do commit - quem enfileira precisa efetivar a
+sessão.
+
+- Idempotência: mensagens com a mesma `idempotency_key` são enfileiradas uma
+  única vez (índice único + ON CONFLICT DO NOTHING).
+- Prioridade: 2FA e avisos de segurança (PRIORITY_HIGH) passam na frente dos
+  envios em lote (alertas de prazo, digests).
+- Reserva: SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL) seguido de UPDATE
+  condicionado ao status, então vários workers/processos não enviam a mesma
+  mensagem. Reservas abandonadas (worker morto) voltam à fila após
+  STALE_LOCK.
+- Falhas temporárias voltam à fila com backoff exponencial
+  (OUTBOUND_EMAIL_RETRY_SECONDS * 2^(tentativa-1), com jitter) até
+  OUTBOUND_EMAIL_MAX_ATTEMPTS; erros permanentes (endereço recusado, 4xx do
+  provedor) falham na hora.
+- Limite de envio por provedor: MAIL_RATE_LIMITS (mail_transports.RateLimiter).
+
+Os workers são threads do próprio processo (OUTBOUND_EMAIL_WORKERS; 0 = envio
+na mesma thread logo após o commit) ou o comando `flask email-worker`.
+Sem transporte configurado (produção sem Resend nem SMTP) nada é enfileirado:
+enqueue devolve False e o chamador avisa o usuário, em vez de o email ficar
+"enviado" para um Maildir local.
+stats() alimenta /admin/system-diagnostics (profundidade e latência).
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Union
+
+from flask import current_app, render_template
+from sqlalchemy import bindparam, event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.services.mail_transports import (
+    RenderedEmail,
+    SendResult,
+    build_transport,
+    default_sender,
+)
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BULK = 9
+STALE_LOCK = timedelta(minutes=10)
+MAX_BACKOFF = timedelta(hours=6)
+INSERT_CHUNK = 1000
+LATENCY_SAMPLE = 1000
+# build_transport ainda não foi chamado (None = sem transporte configurado)
+_NOT_BUILT = object()
+# Marca em Session.info: a transação enfileirou emails
+_PENDING = "outbound_email_pending"
+
+
+@dataclass
+class OutboundEmail:
+    """Mensagem a enfileirar: corpo pronto (`html`) ou template + contexto"""
+
+    to: Union[str, List[str]]
+    subject: str
+    template: Optional[str] = None
+    context: dict = field(default_factory=dict)
+    idempotency_key: Optional[str] = None
+    html: Optional[str] = None
+    text: Optional[str] = None
+    category: str = "transactional"
+    priority: int = PRIORITY_NORMAL
+    sender: Optional[str] = None
+
+    @property
+    def recipients(self) -> List[str]:
+        if not self.to:
+            return []
+        to = [self.to] if isinstance(self.to, str) else self.to
+        return [address.strip() for address in to if address and address.strip()]
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+def _naive(value):
+    # SQLite devolve datetimes sem fuso; comparações em Python usam UTC ingênuo
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _json_safe(context):
+    # Datas e Decimals viram texto: o contexto é gravado como JSON
+    return json.loads(json.dumps(context or {}, default=str))
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, int(round(pct / 100 * len(ordered))) - 1)
+    return round(ordered[index], 2)
+
+
+class OutboundEmailQueue:
+    """Fila persistente de emails com workers de envio em lote"""
+
+    def __init__(self):
+        self._app = None
+        self._transport = _NOT_BUILT
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self.workers = 2
+        self.batch_size = 100
+        self.max_attempts = 6
+        self.retry_seconds = 30
+        self.poll_seconds = 5.0
+        self._stats = self._empty_stats()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    @staticmethod
+    def _empty_stats():
+        return {
+            "enqueued": 0,
+            "duplicates": 0,
+            "sent": 0,
+            "retried": 0,
+            "failed": 0,
+            "batches": 0,
+            "last_batch_ms": None,
+        }
+
+    def init_app(self, app):
+        """Configura limites e transporte; as threads sobem no primeiro envio"""
+        self.shutdown()
+        self._app = app
+        self._transport = _NOT_BUILT
+        self.workers = app.config.get("OUTBOUND_EMAIL_WORKERS", self.workers)
+        self.batch_size = app.config.get("OUTBOUND_EMAIL_BATCH_SIZE", self.batch_size)
+        self.max_attempts = app.config.get(
+            "OUTBOUND_EMAIL_MAX_ATTEMPTS", self.max_attempts
+        )
+        self.retry_seconds = app.config.get(
+            "OUTBOUND_EMAIL_RETRY_SECONDS", self.retry_seconds
+        )
+        self.poll_seconds = app.config.get(
+            "OUTBOUND_EMAIL_POLL_SECONDS", self.poll_seconds
+        )
+        self._stats = self._empty_stats()
+        self._stopped = False
+        _register_listeners()
+        app.extensions["outbound_email"] = self
+
+    def _after_fork(self):
+        # Threads não sobrevivem ao fork (gunicorn --preload)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = []
+
+    @property
+    def transport(self):
+        if self._transport is _NOT_BUILT:
+            self._transport = build_transport(self._app or current_app)
+        return self._transport
+
+    @property
+    def available(self) -> bool:
+        """Há um transporte para entregar os emails"""
+        return self.transport is not None
+
+    # -------------------------------------------------------------------------
+    # Enfileiramento
+    # -------------------------------------------------------------------------
+
+    def enqueue(
+        self,
+        to,
+        subject,
+        template=None,
+        html=None,
+        text=None,
+        category="transactional",
+        priority=PRIORITY_NORMAL,
+        idempotency_key=None,
+        sender=None,
+        **context,
+    ) -> bool:
+        """
+        Enfileira uma mensagem.
+
+        Returns:
+            bool: True se a mensagem entrou na fila (ou já estava, pela chave);
+            False sem destinatário ou sem transporte configurado
+        """
+        message = OutboundEmail(
+            to=to,
+            subject=subject,
+            template=template,
+            context=context,
+            idempotency_key=idempotency_key,
+            html=html,
+            text=text,
+            category=category,
+            priority=priority,
+            sender=sender,
+        )
+        if not message.recipients or not self.available:
+            return False
+        self.enqueue_many([message])
+        return True
+
+    def enqueue_many(self, messages: Iterable[OutboundEmail]) -> int:
+        """
+        Grava várias mensagens de uma vez na transação do chamador (db.session,
+        sem commit): a entrega começa quando o chamador efetivar a sessão.
+
+        Returns:
+            int: mensagens novas na fila (repetidas pela chave não contam)
+        """
+        from app import db
+        from app.models import EmailOutbox
+
+        now = _utcnow()
+        rows = [
+            {
+                "idempotency_key": message.idempotency_key,
+                "recipients": message.recipients,
+                "sender": message.sender,
+                "subject": message.subject[:500],
+                "html": message.html,
+                "text_body": message.text,
+                "template": None if message.html else message.template,
+                "context": None if message.html else _json_safe(message.context),
+                "category": message.category,
+                "priority": message.priority,
+                "status": "queued",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+            }
+            for message in messages
+            if message.recipients
+        ]
+        if not rows:
+            return 0
+        if not self.available:
+            logger.error(
+                f"Fila de email: sem transporte configurado, "
+                f"{len(rows)} mensagem(ns) descartada(s)"
+            )
+            return 0
+
+        table = EmailOutbox.__table__
+        session = db.session()
+        statement = self._insert(session.get_bind().dialect.name, table)
+        inserted = 0
+        for start in range(0, len(rows), INSERT_CHUNK):
+            chunk = self._without_duplicates(
+                session, table, rows[start : start + INSERT_CHUNK]
+            )
+            if chunk:
+                session.execute(statement, chunk)
+            inserted += len(chunk)
+
+        self._count("enqueued", inserted)
+        self._count("duplicates", len(rows) - inserted)
+        if inserted:
+            # Os workers só enxergam as linhas depois do commit do chamador
+            session.info[_PENDING] = True
+        return inserted
+
+    @staticmethod
+    def _without_duplicates(connection, table, rows):
+        keys = {row["idempotency_key"] for row in rows if row["idempotency_key"]}
+        existing = set()
+        if keys:
+            existing = set(
+                connection.execute(
+                    select(table.c.idempotency_key).where(
+                        table.c.idempotency_key.in_(keys)
+                    )
+                ).scalars()
+            )
+        unique, seen = [], set()
+        for row in rows:
+            key = row["idempotency_key"]
+            if key and (key in existing or key in seen):
+                continue
+            seen.add(key)
+            unique.append(row)
+        return unique
+
+    @staticmethod
+    def _insert(dialect, table):
+        # Corrida entre dois enfileiramentos da mesma chave: o segundo é ignorado
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            return insert(table)
+        return dialect_insert(table).on_conflict_do_nothing(
+            index_elements=["idempotency_key"]
+        )
+
+    def _dispatch_after_enqueue(self):
+        if self.workers <= 0:
+            # Testes e CLI: entrega na mesma thread
+            self.dispatch()
+            return
+        self._ensure_threads()
+        self._wake.set()
+
+    # -------------------------------------------------------------------------
+    # Entrega
+    # -------------------------------------------------------------------------
+
+    def dispatch(self, max_batches=None) -> int:
+        """
+        Entrega as mensagens vencidas até esvaziar a fila (ou `max_batches`).
+
+        Returns:
+            int: mensagens processadas (enviadas, reagendadas ou com falha)
+        """
+        processed = batches = 0
+        while max_batches is None or batches < max_batches:
+            count = self.process_batch()
+            if not count:
+                break
+            processed += count
+            batches += 1
+        return processed
+
+    def process_batch(self) -> int:
+        """Reserva, renderiza e envia um lote; retorna o tamanho do lote"""
+        from app import db
+        from app.models import EmailOutbox
+
+        table = EmailOutbox.__table__
+        app = self._app or current_app._get_current_object()
+        with app.app_context():
+            if not self.available:
+                return 0
+            claimed = self._claim(db, table)
+            if not claimed:
+                return 0
+
+            started = time.perf_counter()
+            transport = self.transport
+            messages, failures = self._render(claimed, app)
+            results = dict(failures)
+            for start in range(0, len(messages), transport.batch_size):
+                chunk = messages[start : start + transport.batch_size]
+                try:
+                    sent = transport.send_batch(chunk)
+                except Exception as e:
+                    logger.error(f"Fila de email: transporte {transport.name} ({e})")
+                    sent = [SendResult(False, error=str(e))] * len(chunk)
+                for message, result in zip(chunk, sent):
+                    results[message.id] = result
+
+            self._record(db, table, claimed, results, transport.name)
+
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["last_batch_ms"] = round(
+                (time.perf_counter() - started) * 1000, 2
+            )
+        return len(claimed)
+
+    def _claim(self, db, table):
+        now = _utcnow()
+        with db.engine.begin() as connection:
+            # Reservas de workers que morreram no meio do envio
+            connection.execute(
+                update(table)
+                .where(
+                    table.c.status == "sending",
+                    table.c.locked_at < now - STALE_LOCK,
+                )
+                .values(status="queued")
+            )
+            ids = (
+                connection.execute(
+                    select(table.c.id)
+                    .where(table.c.status == "queued", table.c.next_attempt_at <= now)
+                    .order_by(table.c.priority, table.c.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                .scalars()
+                .all()
+            )
+            if not ids:
+                return []
+            statement = (
+                update(table)
+                .where(table.c.id.in_(ids), table.c.status == "queued")
+                .values(
+                    status="sending",
+                    locked_at=now,
+                    attempts=func.coalesce(table.c.attempts, 0) + 1,
+                )
+            )
+            if connection.dialect.update_returning:
+                statement = statement.returning(table.c.id)
+                ids = connection.execute(statement).scalars().all()
+            else:
+                connection.execute(statement)
+            if not ids:
+                return []
+            return connection.execute(
+                select(table).where(table.c.id.in_(ids)).order_by(table.c.priority)
+            ).all()
+
+    def _render(self, rows, app):
+        sender = default_sender(app)
+        messages, failures = [], {}
+        for row in rows:
+            html = row.html
+            if html is None and row.template:
+                try:
+                    html = render_template(row.template, **(row.context or {}))
+                except Exception as e:
+                    failures[row.id] = SendResult(
+                        False, error=f"Template: {e}", permanent=True
+                    )
+                    continue
+            messages.append(
+                RenderedEmail(
+                    id=row.id,
+                    recipients=list(row.recipients or []),
+                    subject=row.subject,
+                    html=html or "",
+                    sender=row.sender or sender,
+                    text=row.text_body,
+                    idempotency_key=row.idempotency_key,
+                )
+            )
+        return messages, failures
+
+    def _backoff(self, attempts):
+        # Limita em segundos: 2 ** attempts estoura o timedelta antes do min()
+        seconds = self.retry_seconds * 2 ** max(attempts - 1, 0)
+        seconds = min(seconds, MAX_BACKOFF.total_seconds())
+        return timedelta(seconds=seconds) * random.uniform(0.8, 1.2)
+
+    def _record(self, db, table, rows, results, provider):
+        now = _utcnow()
+        sent, retry, failed = [], [], []
+        for row in rows:
+            result = results.get(row.id)
+            if result is not None and result.ok:
+                sent.append({"_id": row.id, "_message_id": result.message_id})
+                continue
+            error = result.error if result else "Sem resultado do transporte"
+            permanent = result.permanent if result else False
+            if permanent or (row.attempts or 0) >= self.max_attempts:
+                failed.append({"_id": row.id, "_error": error})
+            else:
+                retry.append(
+                    {
+                        "_id": row.id,
+                        "_error": error,
+                        "_next_attempt_at": now + self._backoff(row.attempts or 0),
+                    }
+                )
+
+        by_id = table.c.id == bindparam("_id")
+        with db.engine.begin() as connection:
+            if sent:
+                connection.execute(
+                    update(table)
+                    .where(by_id)
+                    .values(
+                        status="sent",
+                        sent_at=now,
+                        locked_at=None,
+                        last_error=None,
+                        provider=provider,
+                        provider_message_id=bindparam("_message_id"),
+                    ),
+                    sent,
+                )
+            if retry:
+                connection.execute(
+                    update(table)
+                    .where(by_id)
+                    .values(
+                        status="queued",
+                        locked_at=None,
+                        provider=provider,
+                        last_error=bindparam("_error"),
+                        next_attempt_at=bindparam("_next_attempt_at"),
+                    ),
+                    retry,
+                )
+            if failed:
+                connection.execute(
+                    update(table)
+                    .where(by_id)
+                    .values(
+                        status="failed",
+                        locked_at=None,
+                        provider=provider,
+                        last_error=bindparam("_error"),
+                    ),
+                    failed,
+                )
+
+        for item in failed:
+            logger.error(f"Email {item['_id']} descartado: {item['_error']}")
+        self._count("sent", len(sent))
+        self._count("retried", len(retry))
+        self._count("failed", len(failed))
+
+    # -------------------------------------------------------------------------
+    # Workers
+    # -------------------------------------------------------------------------
+
+    def _ensure_threads(self):
+        with self._lock:
+            if self._stopped:
+                return
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for index in range(len(self._threads), max(self.workers, 1)):
+                thread = threading.Thread(
+                    target=self.run_forever,
+                    name=f"outbound-email-{index}",
+                    daemon=True,
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def run_forever(self, stop: Optional[threading.Event] = None):
+        """Laço do worker (threads do processo ou `flask email-worker`)"""
+        while not self._stopped and not (stop and stop.is_set()):
+            try:
+                processed = self.process_batch()
+            except Exception as e:
+                logger.error(f"Fila de email: erro no worker ({e})")
+                processed = 0
+            if not processed:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def shutdown(self, timeout=30):
+        """Encerra as threads (o que ficou na fila é enviado depois)"""
+        with self._lock:
+            self._stopped = True
+            threads, self._threads = self._threads, []
+        self._wake.set()
+        for thread in threads:
+            thread.join(timeout)
+        self._wake = threading.Event()
+
+    # -------------------------------------------------------------------------
+    # Diagnóstico
+    # -------------------------------------------------------------------------
+
+    def stats(self):
+        """Profundidade da fila, idade do mais antigo e latência de envio"""
+        from app import db
+        from app.models import EmailOutbox
+
+        with self._lock:
+            stats = dict(self._stats)
+        stats["workers"] = self.workers
+        stats["transport"] = self.transport.name if self.transport else None
+
+        table = EmailOutbox.__table__
+        now = _naive(_utcnow())
+        with db.engine.connect() as connection:
+            stats["depth"] = dict(
+                connection.execute(
+                    select(table.c.status, func.count()).group_by(table.c.status)
+                ).all()
+            )
+            oldest = connection.execute(
+                select(func.min(table.c.created_at)).where(
+                    table.c.status.in_(["queued", "sending"])
+                )
+            ).scalar()
+            latencies = [
+                (_naive(sent_at) - _naive(created_at)).total_seconds()
+                for created_at, sent_at in connection.execute(
+                    select(table.c.created_at, table.c.sent_at)
+                    .where(
+                        table.c.status == "sent",
+                        table.c.sent_at >= now - timedelta(hours=24),
+                    )
+                    .order_by(table.c.sent_at.desc())
+                    .limit(LATENCY_SAMPLE)
+                )
+            ]
+        stats["oldest_queued_seconds"] = (
+            round((now - _naive(oldest)).total_seconds(), 1) if oldest else None
+        )
+        stats["latency_seconds"] = {
+            "sample": len(latencies),
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+        }
+        return stats
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+
+outbound_email = OutboundEmailQueue()
+
+
+# =============================================================================
+# Eventos do SQLAlchemy
+# =============================================================================
+
+_listeners_registered = False
+
+
+def _register_listeners():
+    global _listeners_registered
+    if _listeners_registered:
+        return
+
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _discard_pending)
+    _listeners_registered = True
+
+
+def _after_commit(session):
+    if not session.info.pop(_PENDING, False):
+        return
+    try:
+        outbound_email._dispatch_after_enqueue()
+    except Exception as e:
+        # O commit do chamador já aconteceu: as mensagens continuam na fila
+        logger.error(f"Fila de email: falha ao acordar os workers ({e})")
+
+
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
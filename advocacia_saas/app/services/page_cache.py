@@ -0,0 +1,266 @@
+"""
+Cache das páginas públicas para visitantes anônimos.
+
+A landing (main.index) fazia seis queries por visita, e o sitemap.xml e o
+roadmap público eram montados de novo a cada acesso, inclusive de crawlers.
+Aqui, sobre o Flask-Caching (`app.cache`: Redis em REDIS_CACHE_DB ou
+SimpleCache):
+
+- `cached_page(tags)`: guarda a resposta inteira (corpo + Content-Type) por
+  PUBLIC_PAGE_CACHE_TTL segundos, só para GET anônimo sem mensagens flash
+  pendentes. Respostas saem com ETag fraco e Last-Modified, e
+  If-None-Match/If-Modified-Since devolvem 304;
+- `fragment(name, tags, builder)`: guarda um valor serializável (estatísticas,
+  listas de dicts) usado também por usuários logados.
+
+O token CSRF do `<meta name="csrf-token">` é de cada sessão: a página vai ao
+cache com um marcador no lugar dele, trocado pelo token da sessão atual a cada
+resposta. Nesse caso o ETag também depende da sessão e a página é `private`.
+
+Invalidação por tags: cada tag tem uma versão guardada no cache, que entra na
+chave das páginas e fragmentos. Commits que gravam planos/features, tipos de
+petição, depoimentos ou itens/categorias do roadmap trocam a versão da tag
+(eventos do SQLAlchemy), e as entradas antigas expiram sozinhas. Escritas sem
+ORM devem chamar `page_cache.invalidate(tag)`.
+"""
+
+import hashlib
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, g, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app import cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 600
+
+TAG_PLANS = "plans"
+TAG_PETITION_TYPES = "petition_types"
+TAG_TESTIMONIALS = "testimonials"
+TAG_ROADMAP = "roadmap"
+
+_CSRF_PLACEHOLDER = b"__PAGE_CACHE_CSRF_TOKEN__"
+_SESSION_TAGS = "page_cache_tags"
+
+
+class PageCache:
+    """Respostas e fragmentos das páginas públicas em cache, invalidados por tag"""
+
+    PREFIX = "page_cache:"
+
+    def __init__(self):
+        self.ttl = DEFAULT_TTL
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """Lê a configuração e registra os eventos de invalidação"""
+        self.ttl = app.config.get("PUBLIC_PAGE_CACHE_TTL", DEFAULT_TTL)
+        _register_listeners()
+        app.extensions["page_cache"] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    # -------------------------------------------------------------------------
+    # Tags
+    # -------------------------------------------------------------------------
+
+    def _tag_key(self, tag):
+        return f"{self.PREFIX}tag:{tag}"
+
+    def _versions(self, tags) -> str:
+        """Versões atuais das tags (cria as que ainda não existem)"""
+        keys = [self._tag_key(tag) for tag in tags]
+        values = list(cache.get_many(*keys)) if keys else []
+        for index, value in enumerate(values):
+            if value is None:
+                # add() não sobrescreve a versão criada por outro worker
+                cache.add(keys[index], uuid.uuid4().hex[:12], timeout=0)
+                values[index] = cache.get(keys[index]) or "0"
+        return ".".join(values)
+
+    def invalidate(self, *tags):
+        """Troca a versão das tags; páginas e fragmentos antigos deixam de ser lidos"""
+        if not tags:
+            return
+        try:
+            cache.set_many(
+                {self._tag_key(tag): uuid.uuid4().hex[:12] for tag in tags},
+                timeout=0,
+            )
+        except Exception as e:
+            logger.warning(f"Page cache: falha ao invalidar {tags} ({e})")
+
+    # -------------------------------------------------------------------------
+    # Fragmentos
+    # -------------------------------------------------------------------------
+
+    def fragment(self, name, tags, builder, timeout=None):
+        """
+        Valor montado por `builder()`, em cache até expirar ou uma tag mudar.
+
+        O valor precisa ser serializável (dicts, listas, números, strings):
+        nada de objetos do ORM.
+        """
+        if not self.enabled:
+            return builder()
+        key = f"{self.PREFIX}fragment:{name}:{self._versions(tags)}"
+        value = cache.get(key)
+        if value is None:
+            value = builder()
+            cache.set(key, value, timeout=timeout or self.ttl)
+        return value
+
+    # -------------------------------------------------------------------------
+    # Páginas inteiras
+    # -------------------------------------------------------------------------
+
+    def _cacheable_request(self) -> bool:
+        return (
+            self.enabled
+            and request.method == "GET"
+            and not current_user.is_authenticated
+            and not session.get("_flashes")
+        )
+
+    def cached_page(self, tags, timeout=None):
+        """Decorator: resposta inteira em cache para visitantes anônimos"""
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self._cacheable_request():
+                    return view(*args, **kwargs)
+
+                key = f"{self.PREFIX}page:{request.path}:{self._versions(tags)}"
+                entry = cache.get(key)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.direct_passthrough:
+                        return response
+                    entry = self._make_entry(response)
+                    cache.set(key, entry, timeout=timeout or self.ttl)
+                    self.misses += 1
+                    status = "MISS"
+                else:
+                    self.hits += 1
+                    status = "HIT"
+                return self._serve(entry, status, timeout or self.ttl)
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def _make_entry(response):
+        body = response.get_data()
+        field_name = current_app.config.get("WTF_CSRF_FIELD_NAME", "csrf_token")
+        token = g.get(field_name)
+        has_csrf = bool(token) and token.encode() in body
+        if has_csrf:
+            body = body.replace(token.encode(), _CSRF_PLACEHOLDER)
+        return {
+            "body": body,
+            "content_type": response.headers.get("Content-Type"),
+            "created_at": int(time.time()),
+            "etag": hashlib.sha1(body).hexdigest()[:20],
+            "has_csrf": has_csrf,
+        }
+
+    @staticmethod
+    def _serve(entry, status, timeout):
+        body = entry["body"]
+        etag = entry["etag"]
+        response = current_app.response_class(content_type=entry["content_type"])
+
+        if entry["has_csrf"]:
+            from flask_wtf.csrf import generate_csrf
+
+            field_name = current_app.config.get("WTF_CSRF_FIELD_NAME", "csrf_token")
+            body = body.replace(_CSRF_PLACEHOLDER, generate_csrf().encode())
+            # 304 só para a mesma sessão: o token da página guardada no
+            # navegador continua válido (a entrada vive menos que o token)
+            secret = str(session.get(field_name, ""))
+            etag = hashlib.sha1(f"{etag}:{secret}".encode()).hexdigest()[:20]
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+        else:
+            response.cache_control.public = True
+            response.cache_control.max_age = timeout
+
+        response.set_data(body)
+        response.set_etag(etag, weak=True)
+        response.last_modified = datetime.fromtimestamp(
+            entry["created_at"], timezone.utc
+        )
+        response.headers["X-Page-Cache"] = status
+        return response.make_conditional(request)
+
+
+page_cache = PageCache()
+
+
+# =============================================================================
+# Eventos do SQLAlchemy
+# =============================================================================
+
+_listeners_registered = False
+
+
+def _register_listeners():
+    global _listeners_registered
+    if _listeners_registered:
+        return
+
+    from app.models import (
+        BillingPlan,
+        Feature,
+        PetitionType,
+        RoadmapCategory,
+        RoadmapItem,
+        Testimonial,
+    )
+
+    tags_by_model = {
+        BillingPlan: TAG_PLANS,
+        Feature: TAG_PLANS,
+        PetitionType: TAG_PETITION_TYPES,
+        Testimonial: TAG_TESTIMONIALS,
+        RoadmapItem: TAG_ROADMAP,
+        RoadmapCategory: TAG_ROADMAP,
+    }
+    for model, tag in tags_by_model.items():
+        for name in ("after_insert", "after_update", "after_delete"):
+            event.listen(model, name, _changed(tag))
+    event.listen(Session, "after_commit", _invalidate_pending)
+    event.listen(Session, "after_rollback", _discard_pending)
+    _listeners_registered = True
+
+
+def _changed(tag):
+    def listener(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(_SESSION_TAGS, set()).add(tag)
+
+    return listener
+
+
+def _invalidate_pending(session):
+    tags = session.info.pop(_SESSION_TAGS, None)
+    if tags:
+        page_cache.invalidate(*tags)
+
+
+def _discard_pending(session):
+    session.info.pop(_SESSION_TAGS, None)
@@ -4,10 +4,10 @@ Suporta: imagens (PNG, JPG, JPEG), TXT, DOCX, XLSX
 """
 
 import io
-import os
-import subprocess
-import tempfile
-from typing import Tuple
+from typing import List, Tuple
+
+# Formatos convertidos pelo LibreOffice (DOCX usa python-docx primeiro)
+OFFICE_EXTENSIONS = {"doc", "xls", "xlsx", "ppt", "pptx"}
 
 
 def convert_to_pdf(file_data: bytes, filename: str) -> Tuple[bytes, str]:
@@ -272,98 +272,72 @@ def _convert_office_to_pdf(
 ) -> Tuple[bytes, str]:
     """
     Converte arquivos Office (DOC, XLS, PPT) para PDF usando LibreOffice.
-    Requer LibreOffice instalado no servidor.
+    Requer LibreOffice instalado no servidor; a conversão roda no pool de
+    workers mantidos aquecidos (ver app/services/office_converter.py).
     """
-    try:
-        # Criar arquivo temporário
-        ext = (
-            original_filename.rsplit(".", 1)[-1].lower()
-            if "." in original_filename
-            else "tmp"
-        )
+    from app.services.office_converter import OfficeConversionError, office_converter
 
-        with tempfile.NamedTemporaryFile(suffix=f".{ext}", delete=False) as tmp_in:
-            tmp_in.write(file_data)
-            tmp_in_path = tmp_in.name
+    ext = (
+        original_filename.rsplit(".", 1)[-1].lower()
+        if "." in original_filename
+        else "tmp"
+    )
 
-        try:
-            # Diretório de saída
-            tmp_dir = tempfile.mkdtemp()
-
-            # Tentar diferentes caminhos do LibreOffice
-            libreoffice_paths = [
-                "libreoffice",  # Linux (PATH)
-                "soffice",  # Alternativo
-                "/usr/bin/libreoffice",
-                "/usr/bin/soffice",
-                "/Applications/LibreOffice.app/Contents/MacOS/soffice",  # macOS
-                r"C:\Program Files\LibreOffice\program\soffice.exe",  # Windows
-                r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
-            ]
-
-            libreoffice_cmd = None
-            for path in libreoffice_paths:
-                try:
-                    # Verificar se existe
-                    result = subprocess.run(
-                        [path, "--version"], capture_output=True, timeout=5
-                    )
-                    if result.returncode == 0:
-                        libreoffice_cmd = path
-                        break
-                except (subprocess.SubprocessError, FileNotFoundError, OSError):
-                    continue
-
-            if not libreoffice_cmd:
-                print("LibreOffice não encontrado - retornando arquivo original")
-                return file_data, original_filename
-
-            # Converter para PDF
-            result = subprocess.run(
-                [
-                    libreoffice_cmd,
-                    "--headless",
-                    "--convert-to",
-                    "pdf",
-                    "--outdir",
-                    tmp_dir,
-                    tmp_in_path,
-                ],
-                capture_output=True,
-                timeout=60,  # 60 segundos de timeout
-            )
-
-            if result.returncode != 0:
-                print(f"Erro LibreOffice: {result.stderr.decode()}")
-                return file_data, original_filename
-
-            # Encontrar arquivo PDF gerado
-            base_name = os.path.splitext(os.path.basename(tmp_in_path))[0]
-            pdf_path = os.path.join(tmp_dir, f"{base_name}.pdf")
-
-            if os.path.exists(pdf_path):
-                with open(pdf_path, "rb") as f:
-                    pdf_data = f.read()
-
-                # Limpar arquivos temporários
-                os.unlink(pdf_path)
-                os.rmdir(tmp_dir)
-
-                return pdf_data, new_filename
-            else:
-                print(f"PDF não gerado: {pdf_path}")
-                return file_data, original_filename
-
-        finally:
-            # Limpar arquivo de entrada temporário
-            if os.path.exists(tmp_in_path):
-                os.unlink(tmp_in_path)
+    if not office_converter.available:
+        print("LibreOffice não encontrado - retornando arquivo original")
+        return file_data, original_filename
 
-    except Exception as e:
+    try:
+        return office_converter.convert(file_data, ext), new_filename
+    except OfficeConversionError as e:
         print(f"Erro na conversão Office para PDF: {e}")
         return file_data, original_filename
 
 
+def convert_many_to_pdf(files: List[Tuple[bytes, str]]) -> List[Tuple[bytes, str]]:
+    """
+    Converte vários arquivos de uma vez (uploads com múltiplos anexos).
+
+    Os documentos Office são enfileirados juntos no pool do LibreOffice e
+    convertidos em paralelo pelos workers; os demais formatos são convertidos
+    enquanto isso. A ordem do resultado é a mesma da entrada.
+
+    Args:
+        files: Lista de (conteúdo, nome do arquivo)
+
+    Returns:
+        Lista de (dados, nome) como em convert_to_pdf
+    """
+    from app.services.office_converter import OfficeConversionError, office_converter
+
+    results = [None] * len(files)
+    pending = []
+
+    for index, (file_data, filename) in enumerate(files):
+        ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        if ext in OFFICE_EXTENSIONS and office_converter.available:
+            try:
+                pending.append(
+                    (index, office_converter.submit(file_data, ext), filename)
+                )
+                continue
+            except OfficeConversionError as e:
+                print(f"Erro na conversão Office para PDF: {e}")
+        results[index] = convert_to_pdf(file_data, filename)
+
+    for index, future, filename in pending:
+        base_name = filename.rsplit(".", 1)[0]
+        try:
+            pdf_data = future.result(timeout=office_converter.timeout * 2)
+            results[index] = (pdf_data, f"{base_name}.pdf")
+        except Exception as e:
+            future.cancel()
+            print(f"Erro na conversão Office para PDF ({filename}): {e}")
+            results[index] = files[index]
+
+    return results
+
+
 def is_pdf_conversion_available() -> dict:
     """
     Verifica quais conversões estão disponíveis no servidor.
@@ -391,15 +365,10 @@ def is_pdf_conversion_available() -> dict:
     except ImportError:
         pass
 
-    # Verificar LibreOffice
-    try:
-        result = subprocess.run(
-            ["libreoffice", "--version"], capture_output=True, timeout=5
-        )
-        if result.returncode == 0:
-            status["office"] = True
-    except (subprocess.SubprocessError, FileNotFoundError):
-        pass
+    # Verificar LibreOffice (binário localizado uma vez por processo)
+    from app.services.office_converter import office_converter
+
+    status["office"] = office_converter.available
 
     return status
 
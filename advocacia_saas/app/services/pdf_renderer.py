@@ -0,0 +1,426 @@
+"""
+Renderização de PDFs (xhtml2pdf/reportlab) fora do worker HTTP.
+
+A conversão HTML -> PDF roda em um pool de processos limitado
+(PDF_RENDER_WORKERS), então uma petição longa não prende o worker do
+gunicorn nem disputa o GIL com as demais requisições. Os processos usam
+"spawn" (seguro com threads e conexões de banco abertas) e só sobem na
+primeira renderização.
+
+O resultado fica em cache no disco (PDF_CACHE_DIR), endereçado pelo hash do
+HTML final. Como o HTML é função do template (e sua versão) e do form_data,
+regerar uma petição sem alterações devolve o arquivo já renderizado.
+
+Dois modos de uso:
+- render(): síncrono (cache -> pool -> cache), para rotas que devolvem o PDF
+  na mesma requisição;
+- submit(): registra um job e devolve o id; a UI consulta
+  /petitions/api/pdf-jobs/<id> e baixa o arquivo quando ficar pronto.
+  O `on_complete` opcional (ex: cobrança da petição) roda com app context
+  só depois que o PDF foi gerado e gravado; se falhar, o job falha.
+  Só faz sentido com o estado dos jobs no Redis (shared_jobs): com o
+  MemoryJobStore e vários workers, a consulta pode cair em outro processo.
+
+Com fallback=False, HTML que o xhtml2pdf não consegue renderizar levanta
+PDFRenderError em vez de virar o PDF de texto simples do reportlab (as rotas
+de geração de petição respondem 500, como antes do pool).
+
+Uma renderização síncrona que passa de PDF_RENDER_TIMEOUT levanta
+PDFRenderTimeout.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from io import BytesIO
+
+from flask import has_app_context
+
+from app.services.job_store import MemoryJobStore, RedisJobStore
+
+logger = logging.getLogger(__name__)
+
+# Incrementar ao alterar a renderização (fallback, fontes...) para invalidar
+# os PDFs já guardados em cache
+RENDERER_VERSION = "1"
+
+
+class PDFRenderTimeout(Exception):
+    """A renderização passou de PDF_RENDER_TIMEOUT"""
+
+
+class PDFRenderError(Exception):
+    """O xhtml2pdf não conseguiu renderizar o HTML (chamadas sem fallback)"""
+
+
+def render_html_to_pdf(html_content: str, title: str, fallback: bool = True) -> bytes:
+    """
+    Converte HTML em PDF com xhtml2pdf, caindo para texto simples com
+    reportlab se o HTML não puder ser renderizado (ou levantando
+    PDFRenderError, com fallback=False).
+
+    Executa dentro do processo do pool: não usa app context nem banco.
+    """
+    from xhtml2pdf import pisa
+
+    buffer = BytesIO()
+    pisa_status = pisa.CreatePDF(src=html_content, dest=buffer, encoding="UTF-8")
+
+    if pisa_status.err and not fallback:
+        raise PDFRenderError("Erro ao gerar PDF")
+
+    if pisa_status.err:
+        # Fallback para texto simples
+        buffer = BytesIO()
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import cm
+        from reportlab.pdfgen import canvas as reportlab_canvas
+
+        pdf = reportlab_canvas.Canvas(buffer, pagesize=A4)
+        width, height = A4
+        x_margin = 2 * cm
+        y = height - 2 * cm
+
+        pdf.setTitle(title)
+        pdf.setFont("Helvetica", 11)
+
+        plain_text = re.sub("<[^<]+?>", "", html_content)
+        for raw_line in plain_text.splitlines():
+            line = raw_line.rstrip()
+            if not line:
+                y -= 12
+            else:
+                pdf.drawString(x_margin, y, line)
+                y -= 14
+
+            if y <= 2 * cm:
+                pdf.showPage()
+                pdf.setFont("Helvetica", 11)
+                y = height - 2 * cm
+
+        pdf.showPage()
+        pdf.save()
+
+    return buffer.getvalue()
+
+
+def make_render_key(html_content: str, title: str, fallback: bool = True) -> str:
+    """Chave do cache: versão do renderizador + modo + título + HTML final"""
+    digest = hashlib.sha256()
+    mode = "fallback" if fallback else "strict"
+    for part in (RENDERER_VERSION, mode, title or "", html_content):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class PDFOutputCache:
+    """Cache de PDFs renderizados no disco, com limite total de bytes (LRU)"""
+
+    def __init__(self, directory, max_bytes=500 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.pdf")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # marca como usado recentemente
+        except OSError:
+            pass
+        return data
+
+    def set(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Escrita atômica: outros workers nunca leem um arquivo pela metade
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % 50 == 0
+        if should_prune:
+            self.prune()
+
+    def prune(self):
+        """Remove os PDFs menos usados até caber em max_bytes"""
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".pdf"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        files.sort()
+        removed = 0
+        while total > self.max_bytes and files:
+            _, size, path = files.pop(0)
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+class PDFRenderService:
+    """Pool de renderização de PDF com cache de saída e jobs assíncronos"""
+
+    def __init__(self):
+        self._executor = None
+        self._workers = 0
+        self._timeout = 120
+        self._cache = None
+        self._store = None
+        self._app = None
+        self._lock = threading.Lock()
+        self.shared_jobs = False
+
+    def init_app(self, app):
+        """Configura pool, cache em disco e armazenamento de jobs"""
+        self._app = app
+        self._workers = app.config.get("PDF_RENDER_WORKERS", 2)
+        self._timeout = app.config.get("PDF_RENDER_TIMEOUT", 120)
+        self._cache = PDFOutputCache(
+            app.config["PDF_CACHE_DIR"],
+            max_bytes=app.config.get("PDF_CACHE_MAX_BYTES", 500 * 1024 * 1024),
+        )
+        with app.app_context():
+            from app.utils.redis_client import get_redis
+
+            client = get_redis("REDIS_CACHE_DB")
+            self._store = (
+                RedisJobStore(client, prefix="petitio:pdf_job")
+                if client
+                else MemoryJobStore()
+            )
+            self.shared_jobs = client is not None
+        app.extensions["pdf_renderer"] = self
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            self._cache = PDFOutputCache(
+                os.path.join(tempfile.gettempdir(), "petitio_pdf_cache")
+            )
+        return self._cache
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = MemoryJobStore()
+        return self._store
+
+    @property
+    def executor(self):
+        # Criado sob demanda: comandos CLI e testes não sobem processos
+        with self._lock:
+            if self._executor is None:
+                if self._workers > 0:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self._workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=2, thread_name_prefix="pdf-render"
+                    )
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _store_output(self, key, data):
+        try:
+            self.cache.set(key, data)
+            return True
+        except OSError as e:
+            logger.warning(f"Falha ao gravar PDF em cache: {e}")
+            return False
+
+    def render(self, html_content: str, title: str, fallback: bool = True) -> bytes:
+        """
+        Renderiza (ou reaproveita do cache) e devolve os bytes do PDF.
+
+        Bloqueia a requisição até o fim da renderização, mas o trabalho de CPU
+        acontece no pool.
+        """
+        key = make_render_key(html_content, title, fallback)
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+
+        try:
+            future = self.executor.submit(
+                render_html_to_pdf, html_content, title, fallback
+            )
+            data = future.result(timeout=self._timeout)
+        except BrokenProcessPool:
+            logger.error("Pool de renderização de PDF caiu; recriando")
+            self._reset_executor()
+            data = render_html_to_pdf(html_content, title, fallback)
+        except FutureTimeoutError:
+            # Renderizar de novo aqui dobraria a espera: o erro vai para a rota
+            future.cancel()
+            logger.error(f"Renderização de PDF passou de {self._timeout}s: {title}")
+            raise PDFRenderTimeout(
+                f"A geração do PDF passou de {self._timeout} segundos"
+            )
+
+        self._store_output(key, data)
+        return data
+
+    def render_to_buffer(
+        self, html_content: str, title: str, fallback: bool = True
+    ) -> BytesIO:
+        """Como render(), mas devolve um BytesIO pronto para send_file"""
+        return BytesIO(self.render(html_content, title, fallback))
+
+    def submit(
+        self,
+        user_id: int,
+        html_content: str,
+        title: str,
+        filename: str,
+        on_complete=None,
+        fallback: bool = True,
+    ):
+        """
+        Registra um job de renderização em background.
+
+        Args:
+            on_complete: chamado sem argumentos, com app context, depois que o
+                PDF foi gerado e gravado; uma exceção marca o job como failed
+            fallback: se False, HTML inválido para o xhtml2pdf falha o job
+
+        Returns:
+            dict: job registrado (id, status, filename, ...)
+        """
+        key = make_render_key(html_content, title, fallback)
+        job = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "status": "queued",
+            "filename": filename,
+            "cache_key": key,
+            "cached": False,
+            "error": None,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_ts": time.time(),
+            "completed_at": None,
+        }
+
+        if self.cache.get(key) is not None:
+            job["cached"] = True
+            self.store.create(job)
+            self._complete(job["id"], on_complete)
+            return self.store.get(job["id"])
+
+        self.store.create(job)
+        try:
+            future = self.executor.submit(
+                render_html_to_pdf, html_content, title, fallback
+            )
+        except BrokenProcessPool:
+            self._reset_executor()
+            future = self.executor.submit(
+                render_html_to_pdf, html_content, title, fallback
+            )
+        job["status"] = "running"
+        self.store.update(job["id"], status="running")
+        future.add_done_callback(
+            lambda f: self._on_done(job["id"], key, f, on_complete)
+        )
+        return job
+
+    def _on_done(self, job_id, key, future, on_complete=None):
+        try:
+            data = future.result()
+        except Exception as e:
+            logger.error(f"Renderização de PDF {job_id} falhou: {e}")
+            self.store.update(job_id, status="failed", error=str(e))
+            return
+
+        if not self._store_output(key, data):
+            self.store.update(
+                job_id, status="failed", error="Falha ao armazenar o PDF gerado"
+            )
+            return
+
+        self._complete(job_id, on_complete)
+
+    def _complete(self, job_id, on_complete):
+        """Roda o on_complete (com app context) e marca o job como concluído"""
+        if on_complete is not None:
+            try:
+                if has_app_context() or self._app is None:
+                    on_complete()
+                else:
+                    with self._app.app_context():
+                        on_complete()
+            except Exception as e:
+                logger.error(f"Conclusão do job de PDF {job_id} falhou: {e}")
+                self.store.update(job_id, status="failed", error=str(e))
+                return
+
+        self.store.update(
+            job_id,
+            status="completed",
+            completed_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+    def get(self, job_id, user_id):
+        """Retorna o job se pertencer ao usuário"""
+        job = self.store.get(job_id)
+        if not job or job["user_id"] != user_id:
+            return None
+        return job
+
+    def read_output(self, job):
+        """Bytes do PDF de um job concluído (None se saiu do cache)"""
+        if job.get("status") != "completed":
+            return None
+        return self.cache.get(job["cache_key"])
+
+    def shutdown(self, wait=True):
+        """Encerra o pool (usado em testes e no desligamento do processo)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+
+pdf_render_service = PDFRenderService()
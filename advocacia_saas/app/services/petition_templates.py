@@ -0,0 +1,249 @@
+"""
+Templates Jinja2 dos modelos de petição (PetitionModel.template_content).
+
+Os templates são editados por administradores e renderizados com dados do
+usuário, então rodam em um SandboxedEnvironment (sem acesso a atributos
+internos do Python nem aos globais do Flask). O resultado vira HTML para o
+gerador de PDF, por isso as variáveis são escapadas (autoescape), como no
+render_template_string usado antes. A exceção é a formatação dos editores
+ricos (Quill): os valores do formulário passam por um allowlist do bleach
+(RICH_TEXT_TAGS) e entram como Markup, então <p>/<strong> continuam
+formatando o PDF e qualquer outra marcação sai como texto.
+
+Compilar um template custa bem mais que renderizá-lo, por isso:
+- templates compilados ficam em um LRU no processo, chaveados por
+  (origem, id, hash do conteúdo) - editar o modelo muda o hash e a versão
+  antiga simplesmente deixa de ser usada;
+- o bytecode gerado vai para um FileSystemBytecodeCache
+  (TEMPLATE_BYTECODE_CACHE_DIR), aproveitado por todos os workers e após
+  reinícios.
+
+validate_template() é usado no salvamento do modelo para recusar templates
+com erro de sintaxe ou que violem o sandbox antes que cheguem ao usuário.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import bleach
+from jinja2 import (
+    ChainableUndefined,
+    FileSystemBytecodeCache,
+    TemplateSyntaxError,
+    nodes,
+)
+from jinja2.sandbox import SandboxedEnvironment, SecurityError
+from markupsafe import Markup
+
+logger = logging.getLogger(__name__)
+
+MAX_COMPILED_TEMPLATES = 256
+# Entra no nome do bucket do cache de bytecode: troque ao mudar opções do
+# ambiente que alteram o código compilado (ex: autoescape)
+BYTECODE_VERSION = 2
+
+# Formatação produzida pela toolbar dos editores Quill do formulário dinâmico
+RICH_TEXT_TAGS = [
+    "p",
+    "br",
+    "strong",
+    "b",
+    "em",
+    "i",
+    "u",
+    "s",
+    "h1",
+    "h2",
+    "h3",
+    "ol",
+    "ul",
+    "li",
+    "span",
+]
+RICH_TEXT_ATTRIBUTES = {"*": ["class"]}
+
+
+def sanitize_form_data(value):
+    """
+    Prepara os dados do formulário para o template.
+
+    Textos passam pelo allowlist de RICH_TEXT_TAGS e viram Markup (o
+    autoescape não os escapa de novo); tags fora da lista são escapadas pelo
+    bleach. Listas e dicionários são tratados recursivamente.
+    """
+    if isinstance(value, str):
+        return Markup(
+            bleach.clean(
+                value, tags=RICH_TEXT_TAGS, attributes=RICH_TEXT_ATTRIBUTES
+            )
+        )
+    if isinstance(value, dict):
+        return {key: sanitize_form_data(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [sanitize_form_data(item) for item in value]
+    return value
+
+
+class PetitionTemplateEngine:
+    """Ambiente Jinja2 sandboxed com cache de templates compilados"""
+
+    def __init__(self, max_templates=MAX_COMPILED_TEMPLATES):
+        self.max_templates = max_templates
+        self._environment = None
+        self._bytecode_cache = None
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """Configura o cache de bytecode a partir da configuração do app"""
+        directory = app.config.get("TEMPLATE_BYTECODE_CACHE_DIR")
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                self._bytecode_cache = FileSystemBytecodeCache(directory)
+            except OSError as e:
+                logger.warning(f"Cache de bytecode Jinja indisponível: {e}")
+        self._environment = None
+        self.clear()
+        app.extensions["petition_templates"] = self
+
+    @property
+    def environment(self):
+        if self._environment is None:
+            if self._bytecode_cache is None:
+                directory = os.path.join(tempfile.gettempdir(), "petitio_jinja")
+                os.makedirs(directory, exist_ok=True)
+                self._bytecode_cache = FileSystemBytecodeCache(directory)
+            self._environment = SandboxedEnvironment(
+                autoescape=True, bytecode_cache=self._bytecode_cache
+            )
+        return self._environment
+
+    @staticmethod
+    def content_hash(source):
+        return hashlib.sha256((source or "").encode("utf-8")).hexdigest()
+
+    def _compile(self, source, name):
+        """Compila usando o cache de bytecode (mesmo fluxo de BaseLoader.load)"""
+        env = self.environment
+        bucket = self._bytecode_cache.get_bucket(
+            env, f"v{BYTECODE_VERSION}:{name}", None, source
+        )
+        code = bucket.code
+        if code is None:
+            code = env.compile(source, name)
+            bucket.code = code
+            try:
+                self._bytecode_cache.set_bucket(bucket)
+            except OSError as e:
+                logger.warning(f"Falha ao gravar bytecode do template {name}: {e}")
+        return env.template_class.from_code(env, code, env.make_globals(None), None)
+
+    def get_template(self, source, origin="adhoc", object_id=None):
+        """
+        Retorna o template compilado para o conteúdo informado.
+
+        Args:
+            source: conteúdo Jinja2
+            origin: tipo do dono do template ("petition_model", "fee_contract"...)
+            object_id: id do dono (para invalidação explícita)
+        """
+        digest = self.content_hash(source)
+        key = (origin, object_id, digest)
+
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        template = self._compile(source, f"{origin}:{object_id}:{digest[:16]}")
+
+        with self._lock:
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+        return template
+
+    def render_petition_model(self, petition_model, context):
+        """Renderiza o template de um PetitionModel com os dados do formulário"""
+        return self.get_template(
+            petition_model.template_content,
+            origin="petition_model",
+            object_id=petition_model.id,
+        ).render(**sanitize_form_data(context))
+
+    def render_string(self, source, context):
+        """Renderiza conteúdo avulso no sandbox (previews), sem guardar no LRU"""
+        return self.environment.from_string(source).render(
+            **sanitize_form_data(context)
+        )
+
+    def invalidate(self, origin, object_id):
+        """Descarta as versões compiladas de um template (ex: modelo editado)"""
+        with self._lock:
+            for key in [k for k in self._templates if k[:2] == (origin, object_id)]:
+                del self._templates[key]
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def validate(self, source):
+        """
+        Pré-compila o template e faz uma renderização de teste sem dados.
+
+        Returns:
+            list[str]: erros encontrados (vazia se o template é válido)
+        """
+        if not source or not source.strip():
+            return []
+
+        # Ambiente próprio: variáveis ausentes viram vazio. Só violações do
+        # sandbox reprovam aqui, pois erros de dados (ex: divisão por campo
+        # vazio) dependem do que o usuário preencher no formulário
+        env = SandboxedEnvironment(autoescape=True, undefined=ChainableUndefined)
+        try:
+            ast = env.parse(source)
+            template = env.from_string(source)
+        except TemplateSyntaxError as e:
+            return [f"Erro de sintaxe na linha {e.lineno}: {e.message}"]
+
+        # O sandbox devolve vazio para atributos internos em vez de falhar;
+        # aqui eles são apontados para o administrador corrigir o template
+        errors = []
+        for node in ast.find_all((nodes.Getattr, nodes.Getitem)):
+            name = node.attr if isinstance(node, nodes.Getattr) else None
+            if isinstance(node, nodes.Getitem) and isinstance(node.arg, nodes.Const):
+                name = node.arg.value
+            if isinstance(name, str) and name.startswith("_"):
+                errors.append(f"Acesso não permitido a '{name}' na linha {node.lineno}")
+        if errors:
+            return errors
+
+        try:
+            template.render()
+        except SecurityError as e:
+            return [f"Operação não permitida no template: {e}"]
+        except Exception:
+            pass
+        return []
+
+
+petition_template_engine = PetitionTemplateEngine()
+
+
+def validate_template(source):
+    """Atalho para PetitionTemplateEngine.validate no engine compartilhado"""
+    return petition_template_engine.validate(source)
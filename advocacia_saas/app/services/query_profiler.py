@@ -0,0 +1,315 @@
+"""
+Contagem de queries por requisição, endpoint e tenant, com detector de N+1.
+
+Eventos before/after_cursor_execute do SQLAlchemy (em todas as engines)
+alimentam os perfis ativos na thread: o da requisição (aberto no
+before_request, fechado no teardown) e os de `profile()`, usado em testes,
+benchmarks e comandos. Cada perfil guarda número de queries, tempo total no
+banco e a contagem por impressão digital (SQL com literais e parâmetros
+trocados por `?`).
+
+Um SELECT com a mesma impressão digital repetido QUERY_PROFILER_N_PLUS_ONE
+vezes ou mais numa requisição é marcado como provável N+1 (uma query por item
+de uma lista) e registrado no log uma vez por endpoint.
+
+Ao fim de cada requisição o perfil é somado às estatísticas do endpoint e do
+tenant (escritório do usuário, ou o próprio usuário sem escritório). As
+estatísticas ficam na memória do worker e aparecem em
+/admin/system-diagnostics. Com QUERY_PROFILER_HEADER (padrão: modo debug)
+a resposta leva o cabeçalho X-DB-Queries.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_N_PLUS_ONE = 5
+# Impressões digitais guardadas por endpoint/tenants guardados (as mais
+# frequentes ficam quando o limite estoura)
+MAX_TRACKED = 200
+KEEP_TRACKED = 100
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_NAMED_PARAM = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s|\?")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """SQL normalizado: literais e parâmetros viram `?`, listas IN viram (?)"""
+    text = _STRING_LITERAL.sub("?", statement)
+    text = _NAMED_PARAM.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _IN_LIST.sub("IN (?)", text)
+    return _WHITESPACE.sub(" ", text).strip()[:500]
+
+
+class QueryProfile:
+    """Queries de uma requisição (ou de um bloco `profile()`)"""
+
+    def __init__(self, label=None, n_plus_one=DEFAULT_N_PLUS_ONE):
+        self.label = label
+        self.n_plus_one_threshold = n_plus_one
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def n_plus_one(self):
+        """SELECTs repetidos além do limite: [(impressão digital, vezes)]"""
+        return [
+            (sql, times)
+            for sql, times in self.fingerprints.most_common()
+            if times >= self.n_plus_one_threshold and sql[:6].upper() == "SELECT"
+        ]
+
+    def header(self) -> str:
+        value = f"{self.count}; time={self.duration * 1000:.1f}ms"
+        suspects = self.n_plus_one()
+        if suspects:
+            value += f"; n+1={len(suspects)}"
+        return value
+
+    def to_dict(self):
+        return {
+            "queries": self.count,
+            "db_ms": round(self.duration * 1000, 1),
+            "n_plus_one": [
+                {"sql": sql, "times": times} for sql, times in self.n_plus_one()
+            ],
+        }
+
+
+class _Aggregate:
+    """Somatório de perfis de um endpoint ou tenant"""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.duration = 0.0
+        self.n_plus_one_requests = 0
+        self.repeated = Counter()
+
+    def add(self, profile):
+        self.requests += 1
+        self.queries += profile.count
+        self.max_queries = max(self.max_queries, profile.count)
+        self.duration += profile.duration
+        suspects = profile.n_plus_one()
+        if suspects:
+            self.n_plus_one_requests += 1
+            for sql, times in suspects:
+                self.repeated[sql] += times
+            _trim(self.repeated)
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "avg_queries": round(self.queries / self.requests, 1)
+            if self.requests
+            else 0,
+            "max_queries": self.max_queries,
+            "db_ms": round(self.duration * 1000, 1),
+            "n_plus_one_requests": self.n_plus_one_requests,
+            "top_repeated": [
+                {"sql": sql, "times": times}
+                for sql, times in self.repeated.most_common(3)
+            ],
+        }
+
+
+def _trim(counter):
+    if len(counter) > MAX_TRACKED:
+        kept = counter.most_common(KEEP_TRACKED)
+        counter.clear()
+        counter.update(dict(kept))
+
+
+class QueryProfiler:
+    """Perfis de queries por requisição e estatísticas por endpoint/tenant"""
+
+    def __init__(self):
+        self.enabled = False
+        self.header_enabled = False
+        self.n_plus_one_threshold = DEFAULT_N_PLUS_ONE
+        self.started_at = datetime.now(timezone.utc)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._tenants = {}
+        self._warned = set()
+
+    def init_app(self, app):
+        """Registra os eventos do SQLAlchemy e os hooks de requisição"""
+        self.enabled = app.config.get("QUERY_PROFILER_ENABLED", True)
+        header = app.config.get("QUERY_PROFILER_HEADER")
+        self.header_enabled = app.debug if header is None else header
+        self.n_plus_one_threshold = app.config.get(
+            "QUERY_PROFILER_N_PLUS_ONE", DEFAULT_N_PLUS_ONE
+        )
+        _register_listeners()
+        app.before_request(self._start_request)
+        app.after_request(self._add_header)
+        app.teardown_request(self._finish_request)
+        app.extensions["query_profiler"] = self
+
+    # -------------------------------------------------------------------------
+    # Perfis ativos
+    # -------------------------------------------------------------------------
+
+    @property
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @property
+    def active(self) -> bool:
+        return bool(getattr(self._local, "stack", None))
+
+    def record(self, statement, duration):
+        for profile in self._stack:
+            profile.record(statement, duration)
+
+    @contextmanager
+    def profile(self, label=None):
+        """Conta as queries do bloco (mesmo com o profiler desligado)"""
+        profile = QueryProfile(label, self.n_plus_one_threshold)
+        self._stack.append(profile)
+        try:
+            yield profile
+        finally:
+            self._stack.remove(profile)
+
+    # -------------------------------------------------------------------------
+    # Requisições
+    # -------------------------------------------------------------------------
+
+    def _start_request(self):
+        if not self.enabled:
+            return
+        profile = QueryProfile(request.endpoint, self.n_plus_one_threshold)
+        g._query_profile = profile
+        self._stack.append(profile)
+
+    def _add_header(self, response):
+        profile = g.get("_query_profile")
+        if profile is not None and self.header_enabled:
+            response.headers["X-DB-Queries"] = profile.header()
+        return response
+
+    def _finish_request(self, exc=None):
+        profile = g.pop("_query_profile", None) if has_request_context() else None
+        if profile is None:
+            return
+        if profile in self._stack:
+            self._stack.remove(profile)
+        self._collect(profile, _tenant_of(g.get("_login_user")))
+
+    def _collect(self, profile, tenant):
+        endpoint = profile.label or "<sem endpoint>"
+        with self._lock:
+            self._endpoints.setdefault(endpoint, _Aggregate()).add(profile)
+            self._tenants.setdefault(tenant, _Aggregate()).add(profile)
+            if len(self._tenants) > MAX_TRACKED:
+                busiest = sorted(
+                    self._tenants.items(), key=lambda item: -item[1].queries
+                )[:KEEP_TRACKED]
+                self._tenants = dict(busiest)
+            new_suspects = [
+                sql
+                for sql, _ in profile.n_plus_one()
+                if (endpoint, sql) not in self._warned
+            ]
+            self._warned.update((endpoint, sql) for sql in new_suspects)
+        for sql in new_suspects:
+            logger.warning(f"Provável N+1 em {endpoint}: {sql}")
+
+    # -------------------------------------------------------------------------
+    # Relatório
+    # -------------------------------------------------------------------------
+
+    def stats(self, limit=20):
+        """Endpoints e tenants com mais queries desde o início do worker"""
+        with self._lock:
+            endpoints = sorted(
+                self._endpoints.items(), key=lambda item: -item[1].queries
+            )[:limit]
+            tenants = sorted(
+                self._tenants.items(), key=lambda item: -item[1].queries
+            )[:limit]
+            return {
+                "enabled": self.enabled,
+                "since": self.started_at.isoformat(),
+                "n_plus_one_threshold": self.n_plus_one_threshold,
+                "endpoints": {name: data.to_dict() for name, data in endpoints},
+                "tenants": {name: data.to_dict() for name, data in tenants},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._tenants.clear()
+            self._warned.clear()
+            self.started_at = datetime.now(timezone.utc)
+
+
+def _tenant_of(user):
+    """Escritório do usuário, o próprio usuário, ou anônimo"""
+    if user is None or not getattr(user, "is_authenticated", False):
+        return "anonymous"
+    office_id = getattr(user, "office_id", None)
+    if office_id:
+        return f"office:{office_id}"
+    return f"user:{user.id}"
+
+
+query_profiler = QueryProfiler()
+
+
+# =============================================================================
+# Eventos do SQLAlchemy
+# =============================================================================
+
+_listeners_registered = False
+_START_TIMES = "query_profiler_start"
+
+
+def _register_listeners():
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _listeners_registered = True
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if query_profiler.active:
+        conn.info.setdefault(_START_TIMES, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get(_START_TIMES)
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    query_profiler.record(statement, duration)
@@ -0,0 +1,289 @@
+"""
+Canal de eventos em tempo real para o navegador.
+
+Substitui o polling de 30s do badge de notificações, do contador do chat e o
+de 3s do status do PIX: o servidor empurra o evento para a sala do usuário
+(`user_<id>`) assim que o dado muda.
+
+- Socket.IO (Flask-SocketIO) com a fila de mensagens no Redis
+  (REALTIME_MESSAGE_QUEUE ou REDIS_URL/REDIS_REALTIME_DB): um evento
+  publicado em qualquer worker, job ou comando CLI chega ao worker que segura
+  a conexão do usuário. O cliente usa só o transporte websocket, que dispensa
+  sessão fixa (sticky session) entre workers.
+- Fallback de long-poll (`GET /api/realtime/poll`): cada evento também entra
+  numa caixa por usuário (stream no Redis ou memória do processo, com os
+  últimos REALTIME_BACKLOG eventos); a requisição espera até
+  REALTIME_POLL_TIMEOUT segundos por algo depois do cursor.
+
+Eventos: notification_count {count}, chat_message {room_id, message, unread}
+e payment_status {payment_id, status}. A contagem de notificações sai sozinha
+no commit de qualquer sessão que criou, leu ou apagou uma Notification (eventos
+do SQLAlchemy); INSERTs em lote chamam notification_counts diretamente.
+"""
+
+import json
+import logging
+import threading
+from collections import defaultdict, deque
+
+from flask import has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, object_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKLOG = 50
+DEFAULT_POLL_TIMEOUT = 25
+# Caixas no Redis expiram se o usuário some (sem long-poll nem eventos)
+MAILBOX_TTL = 3600
+
+_SESSION_USERS = "realtime_notification_users"
+
+
+def user_room(user_id) -> str:
+    """Sala Socket.IO de um usuário"""
+    return f"user_{user_id}"
+
+
+class MemoryMailbox:
+    """Caixa de eventos no processo (desenvolvimento, testes, um só worker)"""
+
+    def __init__(self, backlog=DEFAULT_BACKLOG):
+        self.backlog = backlog
+        self._events = defaultdict(lambda: deque(maxlen=self.backlog))
+        self._sequence = 0
+        self._changed = threading.Condition()
+
+    def append(self, user_id, payload) -> str:
+        with self._changed:
+            self._sequence += 1
+            self._events[user_id].append((self._sequence, payload))
+            self._changed.notify_all()
+            return str(self._sequence)
+
+    def _after(self, user_id, cursor):
+        events = self._events.get(user_id, ())
+        return [(seq, payload) for seq, payload in events if seq > cursor]
+
+    def read(self, user_id, cursor, timeout):
+        """Eventos depois do cursor, esperando até `timeout` segundos"""
+        with self._changed:
+            if cursor is None:
+                return str(self._sequence), []
+            try:
+                position = int(cursor)
+            except ValueError:
+                position = self._sequence
+            self._changed.wait_for(lambda: self._after(user_id, position), timeout)
+            events = self._after(user_id, position)
+            if events:
+                position = events[-1][0]
+            return str(position), [payload for _, payload in events]
+
+
+class RedisMailbox:
+    """Caixa de eventos num stream Redis por usuário (vários workers)"""
+
+    def __init__(self, client, prefix="petitio", backlog=DEFAULT_BACKLOG):
+        self.client = client
+        self.prefix = prefix
+        self.backlog = backlog
+
+    def _key(self, user_id):
+        return f"{self.prefix}:realtime:{user_id}"
+
+    def append(self, user_id, payload) -> str:
+        key = self._key(user_id)
+        pipe = self.client.pipeline()
+        pipe.xadd(
+            key,
+            {"payload": json.dumps(payload, default=str)},
+            maxlen=self.backlog,
+            approximate=True,
+        )
+        pipe.expire(key, MAILBOX_TTL)
+        entry_id = pipe.execute()[0]
+        return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+
+    def read(self, user_id, cursor, timeout):
+        key = self._key(user_id)
+        if cursor is None:
+            last = self.client.xrevrange(key, count=1)
+            position = last[0][0] if last else "0-0"
+            return (
+                position.decode() if isinstance(position, bytes) else position,
+                [],
+            )
+        response = self.client.xread(
+            {key: cursor}, count=self.backlog, block=int(timeout * 1000)
+        )
+        if not response:
+            return cursor, []
+        entries = response[0][1]
+        position = entries[-1][0]
+        events = [json.loads(fields[b"payload"]) for _, fields in entries]
+        if isinstance(position, bytes):
+            position = position.decode()
+        return position, events
+
+
+class RealtimeBus:
+    """Publica eventos por usuário no Socket.IO e na caixa do long-poll"""
+
+    def __init__(self):
+        self.enabled = False
+        self.poll_timeout = DEFAULT_POLL_TIMEOUT
+        self.mailbox = MemoryMailbox()
+
+    def init_app(self, app):
+        """Inicializa o Socket.IO e a caixa de eventos"""
+        from app import socketio
+
+        self.poll_timeout = app.config.get(
+            "REALTIME_POLL_TIMEOUT", DEFAULT_POLL_TIMEOUT
+        )
+        backlog = app.config.get("REALTIME_BACKLOG", DEFAULT_BACKLOG)
+        redis_url = app.config.get("REDIS_URL")
+        message_queue = app.config.get("REALTIME_MESSAGE_QUEUE")
+        if not message_queue and redis_url:
+            message_queue = f"{redis_url}/{app.config.get('REDIS_REALTIME_DB', 3)}"
+
+        self.mailbox = MemoryMailbox(backlog)
+        if message_queue:
+            try:
+                import redis
+
+                self.mailbox = RedisMailbox(
+                    redis.from_url(message_queue),
+                    prefix=app.config.get("CACHE_KEY_PREFIX", "petitio"),
+                    backlog=backlog,
+                )
+            except ImportError:
+                logger.warning("redis não instalado; long-poll só no processo local")
+
+        _register_listeners()
+        self.enabled = app.config.get("REALTIME_ENABLED", True)
+        if self.enabled:
+            socketio.init_app(
+                app,
+                message_queue=message_queue,
+                # None = só a própria origem
+                cors_allowed_origins=app.config.get("REALTIME_CORS_ORIGINS") or None,
+                async_mode=app.config.get("REALTIME_ASYNC_MODE"),
+            )
+        app.extensions["realtime"] = self
+
+    # -------------------------------------------------------------------------
+    # Publicação
+    # -------------------------------------------------------------------------
+
+    def publish(self, user_id, event, data):
+        """
+        Entrega `event` às abas abertas do usuário.
+
+        Falhas são registradas e ignoradas: o evento é um atalho, o estado
+        continua no banco e a página o recarrega ao reconectar.
+        """
+        if not user_id:
+            return
+        # Metadados de gateway trazem o id como texto
+        user_id = int(user_id)
+        try:
+            self.mailbox.append(user_id, {"event": event, "data": data})
+        except Exception as e:
+            logger.warning(f"Realtime: falha ao gravar evento {event} ({e})")
+        if not self.enabled:
+            return
+        from app import socketio
+
+        try:
+            socketio.emit(event, data, to=user_room(user_id))
+        except Exception as e:
+            logger.warning(f"Realtime: falha ao emitir {event} ({e})")
+
+    def notification_counts(self, user_ids):
+        """Publica a contagem de não lidas de vários usuários (uma consulta)"""
+        from app import db
+        from app.models import Notification
+
+        user_ids = {user_id for user_id in user_ids if user_id}
+        if not user_ids:
+            return
+        # Conexão própria: também roda no after_commit, sem transação ativa
+        with db.engine.connect() as connection:
+            counts = dict(
+                connection.execute(
+                    select(Notification.user_id, func.count())
+                    .where(
+                        Notification.user_id.in_(user_ids),
+                        Notification.read.is_(False),
+                    )
+                    .group_by(Notification.user_id)
+                ).all()
+            )
+        for user_id in user_ids:
+            self.publish(
+                user_id, "notification_count", {"count": int(counts.get(user_id, 0))}
+            )
+
+    # -------------------------------------------------------------------------
+    # Long-poll
+    # -------------------------------------------------------------------------
+
+    def poll(self, user_id, cursor=None, timeout=None):
+        """
+        Eventos do usuário depois do cursor (espera até `timeout` segundos).
+
+        Sem cursor, retorna na hora só o cursor atual: o cliente começa a
+        esperar a partir dele.
+
+        Returns:
+            tuple: (cursor, [{"event": ..., "data": ...}])
+        """
+        timeout = self.poll_timeout if timeout is None else timeout
+        timeout = max(0, min(timeout, self.poll_timeout))
+        return self.mailbox.read(user_id, cursor, timeout)
+
+
+realtime = RealtimeBus()
+
+
+# =============================================================================
+# Eventos do SQLAlchemy
+# =============================================================================
+
+_listeners_registered = False
+
+
+def _register_listeners():
+    global _listeners_registered
+    if _listeners_registered:
+        return
+
+    from app.models import Notification
+
+    for name in ("after_insert", "after_update", "after_delete"):
+        event.listen(Notification, name, _notification_changed)
+    event.listen(Session, "after_commit", _publish_pending)
+    event.listen(Session, "after_rollback", _discard_pending)
+    _listeners_registered = True
+
+
+def _notification_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_SESSION_USERS, set()).add(target.user_id)
+
+
+def _publish_pending(session):
+    user_ids = session.info.pop(_SESSION_USERS, None)
+    if not user_ids or not has_app_context():
+        return
+    try:
+        realtime.notification_counts(user_ids)
+    except Exception as e:
+        logger.warning(f"Realtime: falha ao publicar contagens ({e})")
+
+
+def _discard_pending(session):
+    session.info.pop(_SESSION_USERS, None)
@@ -0,0 +1,348 @@
+"""
+Índice de busca global - Petitio
+
+Mantém a tabela `search_index` sincronizada com clientes, processos, petições
+salvas e documentos, e executa a busca em uma única consulta ranqueada.
+
+- PostgreSQL: tsvector com stemming em português + trigram (pg_trgm). Como
+  o search_text junta título, subtítulo e conteúdo, a tolerância a erros usa
+  a similaridade por palavra (`%>` e `<->>`, ou seja word_similarity): o
+  termo é comparado ao trecho mais parecido do texto, não ao texto inteiro
+- SQLite (dev/testes): FTS5 com tokenizer unicode61 sem acentos
+
+O texto é normalizado em Python (minúsculo, sem acentos), então a busca é
+insensível a acentos nos dois bancos.
+"""
+
+import logging
+import re
+import unicodedata
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, event, insert, text
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import (
+    Client,
+    Document,
+    PetitionType,
+    Process,
+    SavedPetition,
+    SearchIndexEntry,
+)
+
+logger = logging.getLogger(__name__)
+
+# Metadados exibidos no modal de busca para cada tipo de entidade
+ENTITY_META = {
+    "client": {"type_label": "Cliente", "icon": "fa-user"},
+    "process": {"type_label": "Processo", "icon": "fa-gavel"},
+    "petition": {"type_label": "Petição", "icon": "fa-file-alt"},
+    "document": {"type_label": "Documento", "icon": "fa-file-pdf"},
+}
+
+
+def normalize_text(value) -> str:
+    """Normaliza texto para indexação: minúsculo, sem acentos e sem pontuação"""
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKD", str(value))
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    value = re.sub(r"[^0-9a-zA-Z]+", " ", value).lower()
+    return " ".join(value.split())
+
+
+def _digits(value) -> str:
+    """Versão só com dígitos (CPF, telefone, número de processo)"""
+    return re.sub(r"\D", "", value or "")
+
+
+def _client_entry(client):
+    return {
+        "entity_type": "client",
+        "user_id": client.lawyer_id,
+        "title": client.full_name,
+        "subtitle": client.email or client.mobile_phone or "",
+        "url": f"/clients/{client.id}",
+        "fields": [
+            client.full_name,
+            client.email,
+            client.cpf_cnpj,
+            _digits(client.cpf_cnpj),
+            client.mobile_phone,
+            _digits(client.mobile_phone),
+        ],
+    }
+
+
+def _process_entry(process):
+    return {
+        "entity_type": "process",
+        "user_id": process.user_id,
+        "title": process.process_number or process.title,
+        "subtitle": process.title
+        if process.process_number
+        else (process.court or ""),
+        "url": f"/processes/{process.id}",
+        "fields": [
+            process.process_number,
+            _digits(process.process_number),
+            process.title,
+            process.court,
+            process.plaintiff,
+            process.defendant,
+        ],
+    }
+
+
+def _petition_entry(petition):
+    tipo_peticao = ""
+    if petition.petition_type_id:
+        petition_type = db.session.get(PetitionType, petition.petition_type_id)
+        tipo_peticao = petition_type.name if petition_type else ""
+    return {
+        "entity_type": "petition",
+        "user_id": petition.user_id,
+        "title": petition.title or "Petição sem título",
+        "subtitle": tipo_peticao or petition.process_number or "",
+        "url": f"/petitions/saved/{petition.id}",
+        "fields": [
+            petition.title,
+            petition.process_number,
+            _digits(petition.process_number),
+            petition.notes,
+        ],
+    }
+
+
+def _document_entry(doc):
+    return {
+        "entity_type": "document",
+        "user_id": doc.user_id,
+        "title": doc.title or doc.filename,
+        "subtitle": doc.description[:50] if doc.description else "",
+        "url": f"/documents/{doc.id}",
+        "fields": [doc.title, doc.description, doc.filename],
+    }
+
+
+# Modelos indexados -> função que extrai a entrada do índice
+INDEXED_MODELS = {
+    Client: _client_entry,
+    Process: _process_entry,
+    SavedPetition: _petition_entry,
+    Document: _document_entry,
+}
+
+_ENTITY_TYPES = {
+    Client: "client",
+    Process: "process",
+    SavedPetition: "petition",
+    Document: "document",
+}
+
+
+class SearchIndexService:
+    """Serviço de indexação e busca global"""
+
+    @staticmethod
+    def build_row(obj) -> dict:
+        """Monta a linha de `search_index` para uma entidade indexada"""
+        entry = INDEXED_MODELS[type(obj)](obj)
+        fields = entry.pop("fields")
+        entry["entity_id"] = obj.id
+        entry["title"] = (entry["title"] or "")[:300]
+        entry["subtitle"] = (entry["subtitle"] or "")[:300]
+        entry["title_key"] = normalize_text(entry["title"])[:300]
+        entry["search_text"] = " ".join(
+            normalize_text(field) for field in fields if field
+        )
+        entry["updated_at"] = datetime.now(timezone.utc)
+        return entry
+
+    @staticmethod
+    def upsert_rows(connection, rows):
+        """Substitui as linhas do índice (delete + insert portável)"""
+        if not rows:
+            return
+        table = SearchIndexEntry.__table__
+        for entity_type in {row["entity_type"] for row in rows}:
+            ids = [row["entity_id"] for row in rows if row["entity_type"] == entity_type]
+            connection.execute(
+                delete(table).where(
+                    table.c.entity_type == entity_type, table.c.entity_id.in_(ids)
+                )
+            )
+        connection.execute(insert(table), rows)
+
+    @staticmethod
+    def remove_rows(connection, keys):
+        """Remove linhas do índice a partir de pares (entity_type, entity_id)"""
+        table = SearchIndexEntry.__table__
+        for entity_type, entity_id in keys:
+            connection.execute(
+                delete(table).where(
+                    table.c.entity_type == entity_type,
+                    table.c.entity_id == entity_id,
+                )
+            )
+
+    @staticmethod
+    def rebuild(batch_size=1000):
+        """
+        Reconstrói o índice inteiro a partir das tabelas de origem.
+
+        Returns:
+            dict: quantidade de linhas indexadas por tipo
+        """
+        connection = db.session.connection()
+        connection.execute(delete(SearchIndexEntry.__table__))
+        totals = {}
+
+        for model, entity_type in _ENTITY_TYPES.items():
+            batch = []
+            count = 0
+            for obj in model.query.order_by(model.id).yield_per(batch_size):
+                batch.append(SearchIndexService.build_row(obj))
+                if len(batch) >= batch_size:
+                    connection.execute(insert(SearchIndexEntry.__table__), batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                connection.execute(insert(SearchIndexEntry.__table__), batch)
+                count += len(batch)
+            totals[entity_type] = count
+
+        if db.engine.dialect.name == "sqlite":
+            connection.execute(
+                text("INSERT INTO search_index_fts(search_index_fts) VALUES ('rebuild')")
+            )
+        db.session.commit()
+        return totals
+
+    @staticmethod
+    def search(user_id, query, limit=5):
+        """
+        Busca em todas as entidades do usuário em uma única consulta.
+
+        Resultados são ranqueados por: título exato, prefixo do título e,
+        por fim, relevância textual (ts_rank + word_similarity no PostgreSQL,
+        bm25 no SQLite). Cada tipo de entidade retorna no máximo `limit` itens.
+
+        Returns:
+            list[dict]: resultados no formato da API de busca global
+        """
+        normalized = normalize_text(query)
+        tokens = normalized.split()
+        if not tokens:
+            return []
+
+        params = {
+            "user_id": user_id,
+            "limit": limit,
+            "title_exact": normalized,
+            "title_prefix": f"{normalized}%",
+        }
+
+        if db.engine.dialect.name == "postgresql":
+            params["tsquery"] = " & ".join(f"{token}:*" for token in tokens)
+            params["raw"] = normalized
+            sql = """
+                SELECT entity_type, entity_id, title, subtitle, url FROM (
+                    SELECT si.entity_type, si.entity_id, si.title, si.subtitle,
+                           si.url, b.boost, b.score,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY si.entity_type
+                               ORDER BY b.boost, b.score DESC
+                           ) AS rn
+                    FROM search_index si
+                    CROSS JOIN to_tsquery('portuguese', :tsquery) AS q
+                    CROSS JOIN LATERAL (
+                        SELECT CASE
+                                   WHEN si.title_key = :title_exact THEN 0
+                                   WHEN si.title_key LIKE :title_prefix THEN 1
+                                   ELSE 2
+                               END AS boost,
+                               ts_rank_cd(si.search_vector, q)
+                               + (1 - (si.search_text <->> :raw)) AS score
+                    ) b
+                    WHERE si.user_id = :user_id
+                      AND (si.search_vector @@ q OR si.search_text %> :raw)
+                ) ranked
+                WHERE rn <= :limit
+                ORDER BY boost, score DESC
+            """
+        else:
+            params["match"] = " AND ".join(f'"{token}"*' for token in tokens)
+            sql = """
+                SELECT entity_type, entity_id, title, subtitle, url FROM (
+                    SELECT *, ROW_NUMBER() OVER (
+                               PARTITION BY entity_type ORDER BY boost, score
+                           ) AS rn
+                    FROM (
+                        SELECT si.entity_type, si.entity_id, si.title, si.subtitle,
+                               si.url, bm25(search_index_fts) AS score,
+                               CASE
+                                   WHEN si.title_key = :title_exact THEN 0
+                                   WHEN si.title_key LIKE :title_prefix THEN 1
+                                   ELSE 2
+                               END AS boost
+                        FROM search_index_fts
+                        JOIN search_index si ON si.id = search_index_fts.rowid
+                        WHERE search_index_fts MATCH :match
+                          AND si.user_id = :user_id
+                    )
+                )
+                WHERE rn <= :limit
+                ORDER BY boost, score
+            """
+
+        rows = db.session.execute(text(sql), params).all()
+        return [
+            {
+                "type": row.entity_type,
+                "type_label": ENTITY_META[row.entity_type]["type_label"],
+                "icon": ENTITY_META[row.entity_type]["icon"],
+                "id": row.entity_id,
+                "title": row.title,
+                "subtitle": row.subtitle or "",
+                "url": row.url,
+            }
+            for row in rows
+        ]
+
+
+def _sync_search_index(session, flush_context):
+    """Atualiza o índice com as entidades inseridas/alteradas/removidas no flush"""
+    rows = []
+    removed = []
+
+    for obj in list(session.new) + list(session.dirty):
+        if type(obj) in INDEXED_MODELS and obj.id is not None:
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            rows.append(SearchIndexService.build_row(obj))
+
+    for obj in session.deleted:
+        if type(obj) in INDEXED_MODELS and obj.id is not None:
+            removed.append((_ENTITY_TYPES[type(obj)], obj.id))
+
+    if not rows and not removed:
+        return
+
+    try:
+        connection = session.connection()
+        with connection.begin_nested():
+            SearchIndexService.remove_rows(connection, removed)
+            SearchIndexService.upsert_rows(connection, rows)
+    except Exception as exc:
+        # Índice desatualizado não pode derrubar a operação principal;
+        # `flask search-reindex` corrige eventuais divergências.
+        logger.warning(f"Falha ao atualizar índice de busca: {exc}")
+
+
+def register_search_index_listeners():
+    """Registra o listener que mantém o índice de busca atualizado"""
+    if not event.contains(Session, "after_flush", _sync_search_index):
+        event.listen(Session, "after_flush", _sync_search_index)
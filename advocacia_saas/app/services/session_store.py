@@ -0,0 +1,414 @@
+"""
+Sessão do Flask guardada no servidor.
+
+O cookie assinado do Flask carregava a sessão inteira (inclusive o texto do
+último documento analisado, até 20 KB), estourava o limite de 4 KB dos
+navegadores e viajava em toda requisição. Aqui o cookie leva só o id da
+sessão, assinado com a SECRET_KEY; os dados ficam no backend:
+
+- RedisKeyValueStore (REDIS_URL/REDIS_SESSION_DB), compartilhado entre workers;
+- FilesystemKeyValueStore (SESSION_FILE_DIR), para desenvolvimento e testes.
+
+A sessão é lida só quando alguém acessa `session` na requisição (arquivos
+estáticos e health checks não tocam o backend) e gravada só quando muda. O
+prazo é deslizante: toda requisição que lê a sessão renova o TTL
+(SESSION_IDLE_TIMEOUT, ou PERMANENT_SESSION_LIFETIME para sessões
+permanentes). Os dados vão em JSON compacto (o mesmo serializador com tags do
+cookie do Flask), comprimidos com zlib acima de COMPRESS_MIN_BYTES.
+
+Artefatos grandes (texto e análise de documentos) não entram na sessão: vão
+para o cache de blobs (`put_blob`/`get_blob`) e a sessão guarda só a chave.
+
+SESSION_BACKEND=cookie mantém a sessão no cookie do Flask (o cache de blobs
+continua no servidor). Sem SESSION_BACKEND, o padrão é redis com REDIS_URL;
+sem ele, filesystem só em debug/testes - em produção a sessão fica no cookie,
+porque um diretório local não é compartilhado entre workers nem sobrevive ao
+deploy (todos seriam deslogados). Para o disco em produção, defina
+SESSION_BACKEND=filesystem com um SESSION_FILE_DIR persistente.
+"""
+
+import logging
+import os
+import secrets
+import tempfile
+import threading
+import time
+import zlib
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IDLE_TIMEOUT = 24 * 3600
+DEFAULT_BLOB_TTL = 24 * 3600
+COMPRESS_MIN_BYTES = 1024
+
+# Primeiro byte do valor gravado: JSON puro ou JSON comprimido
+_PLAIN = b"j"
+_COMPRESSED = b"z"
+
+_serializer = TaggedJSONSerializer()
+
+
+def dumps(data) -> bytes:
+    """Serializa a sessão (ou um blob) em JSON compacto, comprimido se grande"""
+    raw = _serializer.dumps(data).encode("utf-8")
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        return _COMPRESSED + zlib.compress(raw, 6)
+    return _PLAIN + raw
+
+
+def loads(payload: bytes):
+    if payload[:1] == _COMPRESSED:
+        return _serializer.loads(zlib.decompress(payload[1:]).decode("utf-8"))
+    return _serializer.loads(payload[1:].decode("utf-8"))
+
+
+class FilesystemKeyValueStore:
+    """Um arquivo por chave; o mtime do arquivo é o instante em que expira"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if os.stat(path).st_mtime < time.time():
+                self.delete(key)
+                return None
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, key, value: bytes, ttl):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Escrita atômica: outros workers nunca leem um arquivo pela metade
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(value)
+        expires_at = time.time() + ttl
+        os.utime(tmp_path, (expires_at, expires_at))
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % 100 == 0
+        if should_prune:
+            self.prune()
+
+    def touch(self, key, ttl):
+        expires_at = time.time() + ttl
+        try:
+            os.utime(self._path(key), (expires_at, expires_at))
+        except OSError:
+            pass
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def prune(self):
+        """Remove os arquivos expirados"""
+        now = time.time()
+        removed = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    if os.stat(path).st_mtime < now:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    continue
+        return removed
+
+
+class RedisKeyValueStore:
+    """Chaves com TTL no Redis (SETEX/EXPIRE)"""
+
+    def __init__(self, client, prefix):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key):
+        return f"{self.prefix}:{key}"
+
+    def get(self, key):
+        return self.client.get(self._key(key))
+
+    def set(self, key, value: bytes, ttl):
+        self.client.setex(self._key(key), int(ttl), value)
+
+    def touch(self, key, ttl):
+        self.client.expire(self._key(key), int(ttl))
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+
+    def prune(self):
+        return 0  # o Redis expira as chaves sozinho
+
+
+class ServerSideSession(SessionMixin):
+    """Sessão carregada do backend no primeiro acesso"""
+
+    def __init__(self, sid, loader=None, new=False):
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.accessed = False
+        # Id anterior, apagado no save depois de regenerate()
+        self.previous_sid = None
+        self._loader = loader
+        self._data = None if loader else {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    @property
+    def data(self) -> dict:
+        self.accessed = True
+        if self._data is None:
+            try:
+                self._data = self._loader() or {}
+            except Exception as e:
+                logger.warning(f"Falha ao carregar sessão: {e}")
+                self._data = {}
+            self._loader = None
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def regenerate(self):
+        """Troca o id mantendo os dados (evita fixação de sessão no login)"""
+        if not self.loaded:
+            self.data  # carrega antes de perder o id antigo
+        if not self.new:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.new = True
+        self.modified = True
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """SessionInterface que guarda os dados no backend e só o id no cookie"""
+
+    def __init__(self, store, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.store = store
+        self.idle_timeout = idle_timeout
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt="petitio-session")
+
+    def _ttl(self, app, session):
+        if session.permanent:
+            return int(app.permanent_session_lifetime.total_seconds())
+        return self.idle_timeout
+
+    def _load(self, sid):
+        payload = self.store.get(sid)
+        return loads(payload) if payload else None
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode("ascii")
+            except BadSignature:
+                sid = None
+            if sid:
+                return ServerSideSession(sid, loader=lambda: self._load(sid))
+        return ServerSideSession(secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        if session.accessed:
+            response.vary.add("Cookie")
+        if not session.loaded:
+            return  # ninguém leu a sessão nesta requisição
+
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.previous_sid:
+            self.store.delete(session.previous_sid)
+            session.previous_sid = None
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(
+                    name,
+                    domain=domain,
+                    path=path,
+                    secure=secure,
+                    samesite=samesite,
+                    httponly=httponly,
+                )
+            return
+
+        ttl = self._ttl(app, session)
+        if session.modified:
+            self.store.set(session.sid, dumps(dict(session)), ttl)
+        else:
+            self.store.touch(session.sid, ttl)
+
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid).decode("ascii"),
+                expires=self.get_expiration_time(app, session),
+                httponly=httponly,
+                domain=domain,
+                path=path,
+                secure=secure,
+                samesite=samesite,
+            )
+
+
+class SessionStoreService:
+    """Configura a sessão no servidor e o cache de blobs referenciados por ela"""
+
+    def __init__(self):
+        self.interface = None
+        self.blob_ttl = DEFAULT_BLOB_TTL
+        self._blobs = None
+
+    def init_app(self, app):
+        """Escolhe o backend (Redis, disco ou cookie) e instala a SessionInterface"""
+        local = app.debug or app.testing
+        backend = app.config.get("SESSION_BACKEND")
+        if not backend:
+            if app.config.get("REDIS_URL"):
+                backend = "redis"
+            elif local:
+                backend = "filesystem"
+            else:
+                logger.warning(
+                    "Sessão: REDIS_URL não configurado; usando o cookie do Flask. "
+                    "Defina SESSION_BACKEND=filesystem e SESSION_FILE_DIR para "
+                    "guardar a sessão em disco"
+                )
+                backend = "cookie"
+        directory = app.config.get("SESSION_FILE_DIR") or os.path.join(
+            tempfile.gettempdir(), "petitio_sessions"
+        )
+        self.blob_ttl = app.config.get("SESSION_BLOB_TTL", DEFAULT_BLOB_TTL)
+
+        client = None
+        if backend != "filesystem":
+            with app.app_context():
+                from app.utils.redis_client import get_redis
+
+                client = get_redis("REDIS_SESSION_DB")
+        if client:
+            session_store = RedisKeyValueStore(client, "petitio:session")
+            self._blobs = RedisKeyValueStore(client, "petitio:session_blob")
+        else:
+            if backend == "redis" and not local:
+                # Disco local deslogaria todos a cada deploy
+                logger.warning("Sessão: Redis indisponível; usando o cookie do Flask")
+                backend = "cookie"
+            session_store = FilesystemKeyValueStore(os.path.join(directory, "data"))
+            self._blobs = FilesystemKeyValueStore(os.path.join(directory, "blobs"))
+
+        if backend != "cookie":
+            self.interface = ServerSideSessionInterface(
+                session_store,
+                idle_timeout=app.config.get(
+                    "SESSION_IDLE_TIMEOUT", DEFAULT_IDLE_TIMEOUT
+                ),
+            )
+            app.session_interface = self.interface
+            _register_login_listener()
+        app.extensions["session_store"] = self
+
+    @property
+    def blobs(self):
+        if self._blobs is None:
+            self._blobs = FilesystemKeyValueStore(
+                os.path.join(tempfile.gettempdir(), "petitio_sessions", "blobs")
+            )
+        return self._blobs
+
+    def put_blob(self, value, ttl=None) -> str:
+        """Guarda um valor grande e devolve a chave para guardar na sessão"""
+        key = secrets.token_urlsafe(24)
+        self.blobs.set(key, dumps(value), ttl or self.blob_ttl)
+        return key
+
+    def get_blob(self, key):
+        if not key:
+            return None
+        payload = self.blobs.get(key)
+        return loads(payload) if payload else None
+
+    def delete_blob(self, key):
+        if key:
+            self.blobs.delete(key)
+
+    def prune(self) -> int:
+        """Remove sessões e blobs expirados (só faz algo no backend em disco)"""
+        removed = self.blobs.prune()
+        if self.interface:
+            removed += self.interface.store.prune()
+        return removed
+
+
+session_store = SessionStoreService()
+
+_listener_registered = False
+
+
+def _register_login_listener():
+    """Gera um id de sessão novo a cada login"""
+    global _listener_registered
+    if _listener_registered:
+        return
+    _listener_registered = True
+
+    from flask_login import user_logged_in
+
+    user_logged_in.connect(_regenerate_session_id)
+
+
+def _regenerate_session_id(sender, user, **extra):
+    from flask import session
+
+    if isinstance(session._get_current_object(), ServerSideSession):
+        session.regenerate()
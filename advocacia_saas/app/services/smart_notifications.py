@@ -203,7 +203,9 @@ def _send_email_notification(user_id, notification_type, title, message, link=No
         </div>
         """
 
-        return send_email_notification(user, title, html_content)
+        sent = send_email_notification(user, title, html_content)
+        db.session.commit()
+        return sent
     except Exception as e:
         print(f"Erro ao enviar email de notificação: {e}")
         return False
@@ -232,6 +234,7 @@ def send_digest(user_id):
     """
     try:
         from app.processes.email_notifications import send_email_notification
+        from app.services.digest_builder import digest_subject, render_digest_html
 
         prefs = NotificationPreferences.get_or_create(user_id)
         if not prefs.digest_enabled:
@@ -246,69 +249,22 @@ def send_digest(user_id):
         if not user or not user.email:
             return False
 
-        # Agrupar por categoria
-        grouped = {}
-        for item in pending:
-            category = get_notification_category(item.notification_type)
-            if category not in grouped:
-                grouped[category] = []
-            grouped[category].append(item)
-
-        # Construir HTML do digest
-        category_names = {
-            "deadline": "Prazos",
-            "movement": "Movimentações",
-            "payment": "Pagamentos",
-            "petition": "Petições/IA",
-            "system": "Sistema",
-        }
-
-        items_html = ""
-        for category, items in grouped.items():
-            items_html += f"""
-            <div style="margin-bottom: 20px;">
-                <h3 style="color: #2563eb; border-bottom: 2px solid #2563eb; padding-bottom: 10px;">
-                    {category_names.get(category, category)} ({len(items)})
-                </h3>
-                <ul style="list-style: none; padding: 0;">
-            """
-            for item in items[:5]:  # Limitar a 5 por categoria
-                items_html += f"""
-                <li style="padding: 10px; background: #fff; margin-bottom: 5px; border-radius: 4px;">
-                    <strong>{item.title}</strong><br>
-                    <span style="color: #666; font-size: 14px;">{item.message[:100]}{"..." if len(item.message) > 100 else ""}</span>
-                </li>
-                """
-            if len(items) > 5:
-                items_html += f'<li style="color: #999;">+ {len(items) - 5} notificações adicionais</li>'
-            items_html += "</ul></div>"
-
-        html_content = f"""
-        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-            <div style="background: #2563eb; color: white; padding: 20px; text-align: center;">
-                <h1 style="margin: 0;">📬 Resumo de Notificações</h1>
-                <p style="margin: 5px 0 0 0; opacity: 0.9;">Petitio - {datetime.now().strftime("%d/%m/%Y")}</p>
-            </div>
-            <div style="padding: 30px; background: #f8f9fa;">
-                <p style="color: #666;">Olá {user.full_name or user.username},</p>
-                <p style="color: #666;">Aqui está o resumo das suas notificações:</p>
-                {items_html}
-                <div style="text-align: center; margin-top: 30px;">
-                    <a href="#" style="display: inline-block; background: #2563eb; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px;">
-                        Ver Todas as Notificações
-                    </a>
-                </div>
-            </div>
-            <div style="padding: 20px; text-align: center; color: #999; font-size: 12px;">
-                <p>Você recebeu este resumo porque ativou o digest no Petitio.</p>
-                <p><a href="#">Gerenciar preferências de notificação</a></p>
-            </div>
-        </div>
-        """
+        today = datetime.now(timezone.utc).date()
+        html_content = render_digest_html(
+            user.full_name or user.username,
+            [
+                {
+                    "notification_type": item.notification_type,
+                    "title": item.title,
+                    "message": item.message,
+                }
+                for item in pending
+            ],
+            today,
+        )
 
         # Enviar email
-        title = f"📬 Resumo de Notificações - {datetime.now().strftime('%d/%m/%Y')}"
-        success = send_email_notification(user, title, html_content)
+        success = send_email_notification(user, digest_subject(today), html_content)
 
         if success:
             # Marcar como enviadas
@@ -328,34 +284,15 @@ def send_digest(user_id):
 def process_pending_digests():
     """
     Processa todos os digests pendentes (para ser chamado via cron/scheduler).
-    Deve ser executado a cada hora para verificar horários de envio.
+    Deve ser executado a cada hora: envia para quem está no horário do digest
+    no próprio fuso (ver app/services/digest_builder.py).
+
+    Returns:
+        int: digests enfileirados
     """
-    now = datetime.now(timezone.utc)
-    current_hour = now.hour
-
-    # Buscar usuários com digest ativo e horário correspondente
-    prefs_list = NotificationPreferences.query.filter_by(digest_enabled=True).all()
-
-    for prefs in prefs_list:
-        # Verificar horário de envio
-        if prefs.digest_time:
-            send_hour = prefs.digest_time.hour
-            if current_hour != send_hour:
-                continue
-
-        # Verificar frequência
-        if prefs.digest_frequency == "weekly":
-            # Semanal: enviar apenas às segundas-feiras
-            if now.weekday() != 0:
-                continue
-
-        # Verificar se já enviou hoje
-        if prefs.last_digest_sent:
-            if prefs.last_digest_sent.date() == now.date():
-                continue
-
-        # Enviar digest
-        send_digest(prefs.user_id)
+    from app.services.digest_builder import build_digests
+
+    return build_digests().emails
 
 
 def create_deadline_notification(process, notification_type):
@@ -0,0 +1,102 @@
+/**
+ * Exportações do painel admin (app/services/export_engine.py)
+ *
+ * Links com data-export="true" são baixados via fetch: a resposta pode ser o
+ * arquivo em streaming (200) ou um job em background (202). No segundo caso o
+ * status do job é consultado até a conclusão e o arquivo é baixado em
+ * seguida.
+ */
+
+(function(){
+    'use strict';
+
+    var POLL_INTERVAL = 2000;
+    var POLL_TIMEOUT = 30 * 60 * 1000;
+
+    function notify(message, type){
+        if(typeof window.showToast === 'function'){
+            window.showToast(message, type);
+        } else {
+            alert(message);
+        }
+    }
+
+    function filenameFrom(response, fallback){
+        var disposition = response.headers.get('Content-Disposition') || '';
+        var match = disposition.match(/filename="?([^";]+)"?/);
+        return match ? match[1] : fallback;
+    }
+
+    function saveBlob(blob, filename){
+        var url = window.URL.createObjectURL(blob);
+        var a = document.createElement('a');
+        a.href = url;
+        a.download = filename;
+        document.body.appendChild(a);
+        a.click();
+        window.URL.revokeObjectURL(url);
+        a.remove();
+    }
+
+    function sleep(ms){
+        return new Promise(function(resolve){ setTimeout(resolve, ms); });
+    }
+
+    async function errorMessage(response, fallback){
+        try {
+            var data = await response.json();
+            return data.error || fallback;
+        } catch(e){
+            return fallback;
+        }
+    }
+
+    async function waitForJob(job){
+        var deadline = Date.now() + POLL_TIMEOUT;
+        while(job.status !== 'completed'){
+            if(job.status === 'failed'){
+                throw new Error(job.error || 'Falha ao gerar a exportação');
+            }
+            if(Date.now() > deadline){
+                throw new Error('Tempo esgotado ao gerar a exportação');
+            }
+            await sleep(POLL_INTERVAL);
+            var response = await fetch(job.status_url, {credentials: 'same-origin'});
+            if(!response.ok){
+                throw new Error(await errorMessage(response, 'Falha ao consultar a exportação'));
+            }
+            job = await response.json();
+        }
+        return job;
+    }
+
+    async function runExport(link){
+        var response = await fetch(link.href, {credentials: 'same-origin'});
+        if(response.status === 202){
+            notify('Exportação grande: o arquivo está sendo gerado e será baixado ao concluir.', 'info');
+            var job = await waitForJob(await response.json());
+            window.location.href = job.download_url;
+        } else if(response.ok){
+            saveBlob(await response.blob(), filenameFrom(response, 'exportacao'));
+        } else {
+            throw new Error(await errorMessage(response, 'Erro ao exportar'));
+        }
+    }
+
+    document.addEventListener('click', function(event){
+        var link = event.target.closest('a[data-export]');
+        if(!link) return;
+        event.preventDefault();
+        if(link.dataset.exporting) return;
+
+        link.dataset.exporting = '1';
+        link.classList.add('disabled');
+        runExport(link).catch(function(error){
+            console.error('[export]', error);
+            notify(error.message || 'Erro ao exportar', 'error');
+        }).finally(function(){
+            delete link.dataset.exporting;
+            link.classList.remove('disabled');
+        });
+    });
+})();
@@ -438,11 +438,16 @@ document.addEventListener('alpine:init', () => {
                     },
                     body: JSON.stringify({
                         petition_model_id: window.PETITION_MODEL.id,
-                        form_data: this.formData
+                        form_data: this.formData,
+                        background: window.PDF_BACKGROUND_JOBS
                     })
                 });
 
-                if (response.ok) {
+                if (response.status === 202) {
+                    // PDF renderizado em background: aguardar e baixar
+                    const job = await this.waitForPdfJob(await response.json());
+                    window.location.href = job.download_url;
+                } else if (response.ok) {
                     const blob = await response.blob();
                     const url = window.URL.createObjectURL(blob);
                     const a = document.createElement('a');
@@ -464,6 +469,26 @@ document.addEventListener('alpine:init', () => {
             }
         },
 
+        async waitForPdfJob(job) {
+            const deadline = Date.now() + 180000;
+            while (job.status !== 'completed') {
+                if (job.status === 'failed') {
+                    throw new Error(job.error || 'Falha ao gerar PDF');
+                }
+                if (Date.now() > deadline) {
+                    throw new Error('Tempo esgotado ao gerar PDF');
+                }
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                const response = await fetch(job.status_url);
+                const data = await response.json();
+                if (!response.ok) {
+                    throw new Error(data.error || 'Falha ao consultar o PDF');
+                }
+                job = data;
+            }
+            return job;
+        },
+
         scheduleAutoSave() {
             if (this.autoSaveTimeout) {
                 clearTimeout(this.autoSaveTimeout);
@@ -1,6 +1,6 @@
 /**
  * Sistema de Notificações no Navbar
- * Gerencia dropdown, badge e polling de notificações
+ * Gerencia dropdown e badge; a contagem chega por realtime.js
  */
 
 class NotificationSystem {
@@ -40,8 +40,8 @@ class NotificationSystem {
         // Carregar notificações iniciais
         this.loadNotifications();
         
-        // Polling a cada 30 segundos
-        this.startPolling();
+        // Contagem empurrada pelo servidor
+        this.subscribe();
     }
     
     toggle(e) {
@@ -199,11 +199,20 @@ class NotificationSystem {
         }
     }
     
-    startPolling() {
-        // Atualizar badge a cada 30 segundos
-        this.pollInterval = setInterval(() => {
-            this.updateUnreadCount();
-        }, 30000);
+    subscribe() {
+        if (!window.petitioRealtime) {
+            // Página sem o canal em tempo real: polling antigo
+            this.pollInterval = setInterval(() => this.updateUnreadCount(), 30000);
+            return;
+        }
+        window.petitioRealtime.on('notification_count', (data) => {
+            this.updateBadge(data.count);
+            if (this.isOpen) {
+                this.loadNotifications();
+            }
+        });
+        // Eventos perdidos durante a queda da conexão
+        window.petitioRealtime.on('realtime-reconnected', () => this.updateUnreadCount());
     }
     
     stopPolling() {
@@ -0,0 +1,123 @@
+/**
+ * Canal de eventos em tempo real
+ *
+ * Conecta ao Socket.IO (só websocket, sem sessão fixa entre workers) e, se
+ * não conseguir, cai para long-poll em /api/realtime/poll. Cada evento do
+ * servidor vira um CustomEvent em window:
+ *
+ *   petitio:notification_count  { count }
+ *   petitio:chat_message        { room_id, message, unread }
+ *   petitio:payment_status      { payment_id, status }
+ *   petitio:realtime-reconnected  (recarregar o estado perdido na queda)
+ */
+
+class RealtimeChannel {
+    constructor() {
+        this.events = ['notification_count', 'chat_message', 'payment_status'];
+        this.socket = null;
+        this.mode = null;
+        this.cursor = null;
+        this.pollBackoff = 1000;
+        this.socketFailures = 0;
+        this.stopped = false;
+    }
+
+    start() {
+        if (typeof io === 'function') {
+            this.connectSocket();
+        } else {
+            this.startLongPoll();
+        }
+    }
+
+    stop() {
+        this.stopped = true;
+        if (this.socket) {
+            this.socket.disconnect();
+        }
+    }
+
+    on(event, handler) {
+        window.addEventListener(`petitio:${event}`, (e) => handler(e.detail));
+    }
+
+    dispatch(event, data) {
+        window.dispatchEvent(new CustomEvent(`petitio:${event}`, { detail: data || {} }));
+    }
+
+    // ----- Socket.IO -------------------------------------------------------
+
+    connectSocket() {
+        this.mode = 'socket';
+        this.socket = io({ transports: ['websocket'], reconnectionDelayMax: 30000 });
+
+        this.events.forEach((event) => {
+            this.socket.on(event, (data) => this.dispatch(event, data));
+        });
+
+        let connectedOnce = false;
+        this.socket.on('connect', () => {
+            this.socketFailures = 0;
+            if (connectedOnce) {
+                this.dispatch('realtime-reconnected');
+            }
+            connectedOnce = true;
+        });
+
+        this.socket.on('connect_error', () => {
+            // Proxy sem websocket ou Socket.IO desativado: long-poll
+            this.socketFailures += 1;
+            if (!connectedOnce && this.socketFailures >= 3) {
+                this.socket.disconnect();
+                this.socket = null;
+                this.startLongPoll();
+            }
+        });
+    }
+
+    // ----- Long-poll -------------------------------------------------------
+
+    startLongPoll() {
+        if (this.mode === 'poll') return;
+        this.mode = 'poll';
+        this.pollLoop();
+    }
+
+    async pollLoop() {
+        while (!this.stopped) {
+            try {
+                const params = this.cursor ? `?cursor=${encodeURIComponent(this.cursor)}` : '';
+                const response = await fetch(`/api/realtime/poll${params}`, {
+                    credentials: 'same-origin',
+                    headers: { 'Accept': 'application/json' }
+                });
+                if (response.status === 401) {
+                    return; // Sessão encerrada
+                }
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+
+                const data = await response.json();
+                const resumed = this.cursor !== null && data.cursor === null;
+                this.cursor = data.cursor;
+                (data.events || []).forEach((item) => this.dispatch(item.event, item.data));
+                if (resumed) {
+                    this.dispatch('realtime-reconnected');
+                }
+                this.pollBackoff = 1000;
+            } catch (error) {
+                await new Promise((resolve) => setTimeout(resolve, this.pollBackoff));
+                this.pollBackoff = Math.min(this.pollBackoff * 2, 60000);
+            }
+        }
+    }
+}
+
+window.petitioRealtime = new RealtimeChannel();
+
+document.addEventListener('DOMContentLoaded', () => {
+    window.petitioRealtime.start();
+});
+
+window.addEventListener('beforeunload', () => {
+    window.petitioRealtime.stop();
+});
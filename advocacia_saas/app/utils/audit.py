@@ -1,6 +1,9 @@
 """
 Sistema de Auditoria para rastreamento de alterações
 Registra todas as modificações importantes no sistema
+
+Os registros são gravados em lote, fora da transação do chamador, por
+app/services/audit_writer.py.
 """
 
 import json
@@ -10,8 +13,8 @@ from typing import Any, Dict, List, Optional
 from flask import request, session
 from flask_login import current_user
 
-from app import db
 from app.models import AuditLog
+from app.services.audit_writer import audit_writer, build_audit_row
 
 
 class AuditManager:
@@ -53,29 +56,26 @@ class AuditManager:
         user_agent = AuditManager._get_user_agent()
         session_id = AuditManager._get_session_id()
 
-        # Criar log de auditoria
-        audit_log = AuditLog(
-            user_id=user_id,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            action=action,
-            old_values=old_values,
-            new_values=new_values,
-            changed_fields=changed_fields,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            session_id=session_id,
-            description=description,
-            additional_metadata=additional_metadata,
-        )
-
+        # Criar log de auditoria (gravado em lote; não usa a sessão do chamador)
         try:
-            db.session.add(audit_log)
-            db.session.commit()
+            row = build_audit_row(
+                user_id=user_id,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                action=action,
+                old_values=old_values,
+                new_values=new_values,
+                changed_fields=changed_fields,
+                ip_address=ip_address,
+                user_agent=user_agent,
+                session_id=session_id,
+                description=description,
+                additional_metadata=additional_metadata,
+            )
+            audit_writer.write(row)
         except Exception as e:
             # Log do erro mas não falha a operação principal
             print(f"Erro ao registrar log de auditoria: {e}")
-            db.session.rollback()
 
     @staticmethod
     def log_user_change(
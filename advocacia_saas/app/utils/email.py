@@ -3,16 +3,16 @@ Utilitários de email
 """
 
 from flask import current_app, render_template, url_for
-from flask_mail import Mail, Message
 
-mail = Mail()
+from app.services.outbound_email import outbound_email
 
 
 def send_email(to, subject, template, **kwargs):
     """
-    Envia email usando template
+    Renderiza o template e entrega o email à fila de saída
+    (app/services/outbound_email.py); o envio acontece nos workers da fila.
     """
-    if not current_app.config.get("MAIL_SERVER"):
+    if not outbound_email.available:
         # Email não configurado, skip silenciosamente
         current_app.logger.info(
             f"Email não enviado (não configurado): {subject} para {to}"
@@ -20,18 +20,14 @@ def send_email(to, subject, template, **kwargs):
         return False
 
     try:
-        msg = Message(
-            subject=subject,
-            recipients=[to] if isinstance(to, str) else to,
-            sender=current_app.config.get("MAIL_DEFAULT_SENDER"),
-        )
-        msg.html = render_template(template, **kwargs)
-        mail.send(msg)
-        current_app.logger.info(f"Email enviado: {subject} para {to}")
-        return True
+        html = render_template(template, **kwargs)
+        queued = outbound_email.enqueue(to, subject, html=html)
     except Exception as e:
-        current_app.logger.error(f"Erro ao enviar email: {e}")
+        current_app.logger.error(f"Erro ao enfileirar email: {e}")
         return False
+    if queued:
+        current_app.logger.info(f"Email enfileirado: {subject} para {to}")
+    return queued
 
 
 def send_office_invite_email(invite):
@@ -46,6 +42,7 @@ def send_office_invite_email(invite):
     """
     from datetime import datetime, timezone
 
+    from app import db
     from app.models import OFFICE_ROLES, User
     from app.services.email_service import EmailService
 
@@ -67,8 +64,8 @@ def send_office_invite_email(invite):
         "office.accept_invite_page", token=invite.token, _external=True
     )
 
-    # Enviar email via Resend (EmailService)
-    return EmailService.send_office_invite(
+    # Enfileirar o email e confirmar; o convite já foi gravado pelo repositório
+    sent = EmailService.send_office_invite(
         invite_email=invite.email,
         invite_url=invite_url,
         office_name=office.name,
@@ -81,3 +78,5 @@ def send_office_invite_email(invite):
         expires_at=invite.expires_at.strftime("%d/%m/%Y às %H:%M"),
         has_account=existing_user is not None,
     )
+    db.session.commit()
+    return sent
@@ -7,6 +7,7 @@ Oferece um helper para padronizar paginação em todas as listagens.
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from flask import request
+from sqlalchemy import and_, or_
 
 
 class PaginationHelper:
@@ -232,3 +233,67 @@ def build_pagination_context(
         context["filters"] = extra_filters
 
     return context
+
+
+def keyset_page(
+    query,
+    model,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: int = PaginationHelper.DEFAULT_PER_PAGE,
+) -> Tuple[List[Any], bool]:
+    """
+    Paginação por cursor (keyset) em ordem cronológica.
+
+    Ordena por (created_at, id) e usa o id de um item já exibido como cursor,
+    então o custo não depende de quantos itens ficaram para trás (sem OFFSET
+    nem COUNT). Sem cursor traz os `limit` mais recentes; `before_id` traz os
+    anteriores ao item (histórico) e `after_id` os posteriores (sincronização
+    incremental).
+
+    Args:
+        query: SQLAlchemy Query já filtrada
+        model: Modelo com colunas `id` e `created_at`
+        before_id: Id do item mais antigo já carregado
+        after_id: Id do item mais novo já carregado
+        limit: Máximo de itens retornados
+
+    Returns:
+        Tupla (items em ordem crescente, has_more)
+    """
+    cursor_id = after_id if after_id is not None else before_id
+    if cursor_id is not None:
+        anchor = (
+            model.query.with_entities(model.created_at)
+            .filter(model.id == cursor_id)
+            .scalar()
+        )
+        if anchor is None:
+            # Item do cursor apagado: o id ainda segue a ordem de inserção
+            if after_id is not None:
+                cursor = model.id > cursor_id
+            else:
+                cursor = model.id < cursor_id
+        elif after_id is not None:
+            cursor = and_(
+                model.created_at >= anchor,
+                or_(model.created_at > anchor, model.id > cursor_id),
+            )
+        else:
+            cursor = and_(
+                model.created_at <= anchor,
+                or_(model.created_at < anchor, model.id < cursor_id),
+            )
+        query = query.filter(cursor)
+
+    if after_id is not None:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+    else:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+
+    items = query.limit(limit + 1).all()
+    has_more = len(items) > limit
+    items = items[:limit]
+    if after_id is None:
+        items.reverse()
+    return items, has_more
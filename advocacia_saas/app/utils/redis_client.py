@@ -0,0 +1,47 @@
+"""
+Acesso compartilhado ao Redis.
+
+Retorna None quando REDIS_URL não está configurado, para que cada recurso
+possa cair no seu backend local (memória, disco, etc).
+"""
+
+import logging
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+_clients = {}
+
+
+def get_redis(db_config_key=None, default_db=0):
+    """
+    Obtém um cliente Redis reutilizável para o DB configurado.
+
+    Args:
+        db_config_key: chave de configuração com o número do DB
+            (ex: "REDIS_CACHE_DB"). Sem chave, usa `default_db`.
+        default_db: DB usado quando a chave não está configurada
+
+    Returns:
+        redis.Redis | None: cliente ou None se Redis não estiver configurado
+    """
+    redis_url = current_app.config.get("REDIS_URL")
+    if not redis_url:
+        return None
+
+    db_number = (
+        current_app.config.get(db_config_key, default_db)
+        if db_config_key
+        else default_db
+    )
+    key = (redis_url, db_number)
+    if key not in _clients:
+        try:
+            import redis
+
+            _clients[key] = redis.Redis.from_url(f"{redis_url.rstrip('/')}/{db_number}")
+        except Exception as e:
+            logger.warning(f"Redis indisponível ({e}); usando backend local")
+            return None
+    return _clients[key]
@@ -53,6 +53,78 @@ class Config:
     UPLOAD_FOLDER = os.path.join(basedir, "app", "static", "uploads")
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
 
+    # Renderização de PDF: processos do pool (0 = threads no próprio processo),
+    # timeout da renderização síncrona e cache em disco dos PDFs gerados
+    PDF_RENDER_WORKERS = int(os.environ.get("PDF_RENDER_WORKERS", "2"))
+    PDF_RENDER_TIMEOUT = int(os.environ.get("PDF_RENDER_TIMEOUT", "120"))
+    PDF_CACHE_DIR = os.environ.get(
+        "PDF_CACHE_DIR", os.path.join(basedir, "instance", "pdf_cache")
+    )
+    PDF_CACHE_MAX_BYTES = int(
+        os.environ.get("PDF_CACHE_MAX_BYTES", str(500 * 1024 * 1024))
+    )
+    # Extração de texto de uploads: processos do pool (0 = no próprio processo),
+    # a partir de quantas páginas o PDF é dividido em faixas paralelas, páginas
+    # por faixa, timeout por faixa e cache do texto pelo SHA-256 do arquivo
+    DOCUMENT_EXTRACT_WORKERS = int(os.environ.get("DOCUMENT_EXTRACT_WORKERS", "2"))
+    DOCUMENT_EXTRACT_PARALLEL_PAGES = int(
+        os.environ.get("DOCUMENT_EXTRACT_PARALLEL_PAGES", "60")
+    )
+    DOCUMENT_EXTRACT_CHUNK_PAGES = int(
+        os.environ.get("DOCUMENT_EXTRACT_CHUNK_PAGES", "25")
+    )
+    DOCUMENT_EXTRACT_TIMEOUT = int(os.environ.get("DOCUMENT_EXTRACT_TIMEOUT", "120"))
+    DOCUMENT_TEXT_CACHE_DIR = os.environ.get(
+        "DOCUMENT_TEXT_CACHE_DIR", os.path.join(basedir, "instance", "doc_text_cache")
+    )
+    DOCUMENT_TEXT_CACHE_TTL = int(
+        os.environ.get("DOCUMENT_TEXT_CACHE_TTL", str(7 * 24 * 3600))
+    )
+    # Exportações CSV/XLSX: linhas por lote lidas do cursor, a partir de quantas
+    # linhas a exportação vira job em background e onde os arquivos ficam
+    EXPORT_YIELD_PER = int(os.environ.get("EXPORT_YIELD_PER", "1000"))
+    EXPORT_ASYNC_ROWS = int(os.environ.get("EXPORT_ASYNC_ROWS", "50000"))
+    EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", "2"))
+    EXPORT_DIR = os.environ.get(
+        "EXPORT_DIR", os.path.join(basedir, "instance", "exports")
+    )
+    # Fila de saída de emails: threads de envio (0 = envio na própria thread),
+    # mensagens por lote, tentativas, base do backoff e espera sem trabalho
+    OUTBOUND_EMAIL_WORKERS = int(os.environ.get("OUTBOUND_EMAIL_WORKERS", "2"))
+    OUTBOUND_EMAIL_BATCH_SIZE = int(os.environ.get("OUTBOUND_EMAIL_BATCH_SIZE", "100"))
+    OUTBOUND_EMAIL_MAX_ATTEMPTS = int(
+        os.environ.get("OUTBOUND_EMAIL_MAX_ATTEMPTS", "6")
+    )
+    OUTBOUND_EMAIL_RETRY_SECONDS = int(
+        os.environ.get("OUTBOUND_EMAIL_RETRY_SECONDS", "30")
+    )
+    OUTBOUND_EMAIL_POLL_SECONDS = int(
+        os.environ.get("OUTBOUND_EMAIL_POLL_SECONDS", "5")
+    )
+    # Threads que montam o HTML dos digests de notificação na execução horária
+    DIGEST_RENDER_WORKERS = int(os.environ.get("DIGEST_RENDER_WORKERS", "4"))
+    # Mensagens por página no chat (advogado e portal do cliente)
+    CHAT_PAGE_SIZE = int(os.environ.get("CHAT_PAGE_SIZE", "50"))
+    # Créditos de IA: aviso de saldo baixo, validade das reservas dos jobs
+    # (segundos) e cache do saldo (segundos, 0 desliga)
+    CREDIT_LOW_THRESHOLD = int(os.environ.get("CREDIT_LOW_THRESHOLD", "10"))
+    CREDIT_RESERVATION_TTL = int(os.environ.get("CREDIT_RESERVATION_TTL", "3600"))
+    CREDIT_BALANCE_CACHE_TTL = int(os.environ.get("CREDIT_BALANCE_CACHE_TTL", "30"))
+    # Conversão Office -> PDF: workers LibreOffice mantidos por processo,
+    # timeout por documento e conversões antes de reciclar cada worker
+    SOFFICE_PATH = os.environ.get("SOFFICE_PATH")
+    OFFICE_CONVERTER_WORKERS = int(os.environ.get("OFFICE_CONVERTER_WORKERS", "2"))
+    OFFICE_CONVERTER_TIMEOUT = int(os.environ.get("OFFICE_CONVERTER_TIMEOUT", "60"))
+    OFFICE_CONVERTER_MAX_JOBS = int(os.environ.get("OFFICE_CONVERTER_MAX_JOBS", "200"))
+    OFFICE_CONVERTER_PROFILE_DIR = os.environ.get(
+        "OFFICE_CONVERTER_PROFILE_DIR",
+        os.path.join(basedir, "instance", "soffice_profiles"),
+    )
+    # Bytecode compilado dos templates Jinja2 dos modelos de petição
+    TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get(
+        "TEMPLATE_BYTECODE_CACHE_DIR", os.path.join(basedir, "instance", "jinja_cache")
+    )
+
     # CSRF Protection - Habilitado em produção, desabilitado em desenvolvimento
     WTF_CSRF_ENABLED = os.environ.get("WTF_CSRF_ENABLED", "True").lower() in [
         "true",
@@ -70,6 +142,20 @@ class Config:
     MAIL_DEFAULT_SENDER = os.environ.get(
         "MAIL_DEFAULT_SENDER", "noreply@advocaciasaas.com"
     )
+    # Transporte da fila de saída: auto (resend > smtp > maildir), resend, smtp
+    # ou maildir; limites em requisições/s por provedor ("resend=2,smtp=10")
+    MAIL_TRANSPORT = os.environ.get("MAIL_TRANSPORT", "auto")
+    MAIL_MAILDIR = os.environ.get(
+        "MAIL_MAILDIR", os.path.join(basedir, "instance", "maildir")
+    )
+    MAIL_RATE_LIMITS = {
+        name.strip(): float(rate)
+        for name, _, rate in (
+            item.partition("=")
+            for item in os.environ.get("MAIL_RATE_LIMITS", "").split(",")
+            if "=" in item
+        )
+    }
 
     # CEP API
     CEP_API_URL = "https://viacep.com.br/ws/{}/json/"
@@ -90,13 +176,50 @@ class Config:
     )  # DB para rate limiting
     REDIS_SESSION_DB = int(
         os.environ.get("REDIS_SESSION_DB", "2")
-    )  # DB para sessões (futuro)
+    )  # DB das sessões e do cache de blobs da sessão
+    REDIS_REALTIME_DB = int(
+        os.environ.get("REDIS_REALTIME_DB", "3")
+    )  # DB da fila do Socket.IO e das caixas de long-poll
+
+    # Eventos em tempo real (Socket.IO + long-poll): fila de mensagens entre
+    # workers (padrão: REDIS_URL/REDIS_REALTIME_DB), origens extras permitidas,
+    # espera máxima do long-poll e eventos guardados por usuário
+    REALTIME_ENABLED = os.environ.get("REALTIME_ENABLED", "true").lower() in [
+        "true",
+        "on",
+        "1",
+    ]
+    REALTIME_MESSAGE_QUEUE = os.environ.get("REALTIME_MESSAGE_QUEUE")
+    REALTIME_CORS_ORIGINS = [
+        origin.strip()
+        for origin in os.environ.get("REALTIME_CORS_ORIGINS", "").split(",")
+        if origin.strip()
+    ]
+    REALTIME_ASYNC_MODE = os.environ.get("REALTIME_ASYNC_MODE") or None
+    REALTIME_POLL_TIMEOUT = int(os.environ.get("REALTIME_POLL_TIMEOUT", "25"))
+    REALTIME_BACKLOG = int(os.environ.get("REALTIME_BACKLOG", "50"))
+
+    # Perfil de queries por requisição (contagem, tempo no banco e N+1):
+    # cabeçalho X-DB-Queries (padrão: só em debug) e quantas repetições do
+    # mesmo SELECT numa requisição contam como provável N+1
+    QUERY_PROFILER_ENABLED = os.environ.get(
+        "QUERY_PROFILER_ENABLED", "true"
+    ).lower() in ["true", "on", "1"]
+    QUERY_PROFILER_HEADER = (
+        os.environ["QUERY_PROFILER_HEADER"].lower() in ["true", "on", "1"]
+        if os.environ.get("QUERY_PROFILER_HEADER")
+        else None
+    )
+    QUERY_PROFILER_N_PLUS_ONE = int(os.environ.get("QUERY_PROFILER_N_PLUS_ONE", "5"))
 
     # Cache settings
     CACHE_DEFAULT_TIMEOUT = int(
         os.environ.get("CACHE_DEFAULT_TIMEOUT", "300")
     )  # 5 minutos
     CACHE_KEY_PREFIX = os.environ.get("CACHE_KEY_PREFIX", "petitio")
+    # Landing, sitemap e roadmap público em cache para visitantes anônimos
+    # (0 desliga); edições de planos, depoimentos e roadmap invalidam na hora
+    PUBLIC_PAGE_CACHE_TTL = int(os.environ.get("PUBLIC_PAGE_CACHE_TTL", "600"))
 
     # Rate limiting - Habilitado por padrão em produção
     RATELIMIT_ENABLED = os.environ.get("RATELIMIT_ENABLED", "True").lower() in [
@@ -108,6 +231,13 @@ class Config:
 
     # OpenAI API
     OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+    # Threads que executam jobs assíncronos de IA (por processo)
+    AI_JOB_WORKERS = int(os.environ.get("AI_JOB_WORKERS", "4"))
+    # Cache de completions (backend em memória, usado quando não há Redis)
+    AI_CACHE_MAX_ENTRIES = int(os.environ.get("AI_CACHE_MAX_ENTRIES", "1000"))
+    AI_CACHE_MAX_BYTES = int(
+        os.environ.get("AI_CACHE_MAX_BYTES", str(50 * 1024 * 1024))
+    )
 
     # DataJud API (CNJ - Consulta de Processos Judiciais)
     # Documentação: https://datajud-wiki.cnj.jus.br/
@@ -115,6 +245,54 @@ class Config:
         "DATAJUD_API_KEY",
         "cDZHYzlZa0JadVREZDJCendQbXY6SkJlTzNjLV9TRENyQk1RdnFKZGRQdw==",
     )
+    DATAJUD_BASE_URL = os.environ.get(
+        "DATAJUD_BASE_URL", "https://api-publica.datajud.cnj.jus.br"
+    )
+    DATAJUD_CONNECT_TIMEOUT = int(os.environ.get("DATAJUD_CONNECT_TIMEOUT", "5"))
+    DATAJUD_TIMEOUT = int(os.environ.get("DATAJUD_TIMEOUT", "30"))
+    # Cache de respostas por (tribunal, número); "não encontrado" expira antes
+    DATAJUD_CACHE_TTL = int(os.environ.get("DATAJUD_CACHE_TTL", str(6 * 3600)))
+    DATAJUD_NEGATIVE_CACHE_TTL = int(
+        os.environ.get("DATAJUD_NEGATIVE_CACHE_TTL", "3600")
+    )
+    # Consultas simultâneas (fan-out entre tribunais e atualização em lote)
+    DATAJUD_MAX_WORKERS = int(os.environ.get("DATAJUD_MAX_WORKERS", "8"))
+
+    # Séries de índices do BCB (cópia local usada pela calculadora)
+    BCB_SERIES_START = os.environ.get("BCB_SERIES_START", "1995-01-01")
+    # Intervalo para cada worker recarregar as séries do banco
+    BCB_SERIES_RELOAD_SECONDS = int(os.environ.get("BCB_SERIES_RELOAD_SECONDS", "900"))
+
+    # Calendário forense (contagem de prazos em dias úteis): intervalo para
+    # cada worker reler judicial_holidays e se o recesso de 20/12 a 20/01
+    # suspende os prazos (CPC, art. 220)
+    BUSINESS_CALENDAR_RELOAD_SECONDS = int(
+        os.environ.get("BUSINESS_CALENDAR_RELOAD_SECONDS", "900")
+    )
+    BUSINESS_CALENDAR_RECESS = os.environ.get(
+        "BUSINESS_CALENDAR_RECESS", "True"
+    ).lower() in ["true", "on", "1"]
+
+    # Fatos diários dos dashboards administrativos (flask analytics-refresh):
+    # dias anteriores ao último processado que são sempre reconstruídos
+    ANALYTICS_REFRESH_LOOKBACK_DAYS = int(
+        os.environ.get("ANALYTICS_REFRESH_LOOKBACK_DAYS", "3")
+    )
+
+    # Snapshot de features/limites por usuário e plano no cache compartilhado
+    # (Redis ou memória); 0 = apenas cache por requisição
+    ENTITLEMENTS_CACHE_TTL = int(os.environ.get("ENTITLEMENTS_CACHE_TTL", "300"))
+
+    # Logs de auditoria: gravação em lote por thread (False = síncrona),
+    # tamanho do lote, intervalo máximo entre gravações e limite da fila antes
+    # de desviar para o spool em disco
+    AUDIT_ASYNC = os.environ.get("AUDIT_ASYNC", "True").lower() in ["true", "on", "1"]
+    AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "100"))
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", "2.0"))
+    AUDIT_QUEUE_MAX = int(os.environ.get("AUDIT_QUEUE_MAX", "10000"))
+    AUDIT_SPOOL_DIR = os.environ.get(
+        "AUDIT_SPOOL_DIR", os.path.join(basedir, "instance", "audit_spool")
+    )
 
     # Environment settings
     DEBUG = os.environ.get("FLASK_DEBUG", "False").lower() in ["true", "on", "1"]
@@ -161,6 +339,19 @@ class Config:
     SESSION_COOKIE_SAMESITE = "Lax"  # CSRF protection - "Strict" for maximum security
     SESSION_COOKIE_NAME = "petitio_session"  # Custom name to avoid fingerprinting
 
+    # Sessão no servidor: o cookie leva só o id. Backend "redis"
+    # (REDIS_URL/REDIS_SESSION_DB), "filesystem" (SESSION_FILE_DIR) ou "cookie"
+    # (sessão inteira no cookie). Padrão: redis se REDIS_URL existir; senão
+    # filesystem em debug/testes e cookie em produção (disco só explícito). O
+    # TTL é renovado a cada requisição; blobs (texto de documentos) expiram à
+    # parte.
+    SESSION_BACKEND = os.environ.get("SESSION_BACKEND")
+    SESSION_FILE_DIR = os.environ.get(
+        "SESSION_FILE_DIR", os.path.join(basedir, "instance", "sessions")
+    )
+    SESSION_IDLE_TIMEOUT = int(os.environ.get("SESSION_IDLE_TIMEOUT", 24 * 3600))
+    SESSION_BLOB_TTL = int(os.environ.get("SESSION_BLOB_TTL", 24 * 3600))
+
     # Remember Me cookie security
     REMEMBER_COOKIE_SECURE = _SECURE_COOKIES  # HTTPS only when secure
     REMEMBER_COOKIE_HTTPONLY = True  # Prevent JavaScript access
@@ -0,0 +1,20 @@
+"""
+Configuração do gunicorn (carregada automaticamente do diretório atual).
+
+Dockerfile, Procfile e render.yaml rodam só `gunicorn run:app`; os números
+ficam aqui e podem ser ajustados por variável de ambiente sem novo deploy.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+
+# Cada websocket aberto (app.services.realtime) e cada long-poll em
+# /api/realtime/poll (até REALTIME_POLL_TIMEOUT s) prende uma thread. Com 4
+# threads, quatro abas abertas travavam o worker; 32 por worker cobre as abas
+# simultâneas de um escritório pequeno por worker. As requisições comuns mal
+# disputam o pool: o long-poll devolve a conexão do banco antes de esperar.
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
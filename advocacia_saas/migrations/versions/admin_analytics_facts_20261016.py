@@ -0,0 +1,108 @@
+"""add daily analytics fact tables for the admin dashboards
+
+Revision ID: admin_analytics_facts_20261016
+Revises: petition_usage_rollups_20261016
+Create Date: 2026-10-16
+
+Após aplicar, popular os fatos com `flask analytics-refresh`.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "admin_analytics_facts_20261016"
+down_revision = "petition_usage_rollups_20261016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "analytics_revenue_daily",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("plan_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("uf", sa.String(length=2), nullable=False, server_default=""),
+        sa.Column("payment_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "amount", sa.Numeric(precision=12, scale=2), nullable=False, server_default="0"
+        ),
+        sa.UniqueConstraint("day", "user_id", name="uq_analytics_revenue_day_user"),
+    )
+    op.create_index(
+        "ix_analytics_revenue_daily_user_id", "analytics_revenue_daily", ["user_id"]
+    )
+
+    op.create_table(
+        "analytics_petition_daily",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("petition_type_id", sa.Integer(), nullable=False),
+        sa.Column("plan_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("uf", sa.String(length=2), nullable=False, server_default=""),
+        sa.Column("petition_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("billable_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "amount", sa.Numeric(precision=12, scale=2), nullable=False, server_default="0"
+        ),
+        sa.Column("last_generated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint(
+            "day",
+            "user_id",
+            "petition_type_id",
+            "plan_id",
+            name="uq_analytics_petition_day_user_type_plan",
+        ),
+    )
+    op.create_index(
+        "ix_analytics_petition_daily_user_id", "analytics_petition_daily", ["user_id"]
+    )
+
+    op.create_table(
+        "analytics_petition_hourly",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("hour", sa.Integer(), nullable=False),
+        sa.Column("petition_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("day", "hour", name="uq_analytics_petition_day_hour"),
+    )
+
+    op.create_table(
+        "analytics_ai_daily",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("generation_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("tokens_total", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column(
+            "cost_usd", sa.Numeric(precision=14, scale=6), nullable=False, server_default="0"
+        ),
+        sa.Column("credits_purchased", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("day", "user_id", name="uq_analytics_ai_day_user"),
+    )
+    op.create_index("ix_analytics_ai_daily_user_id", "analytics_ai_daily", ["user_id"])
+
+    op.create_table(
+        "analytics_refresh_state",
+        sa.Column("name", sa.String(length=50), primary_key=True),
+        sa.Column("refreshed_through", sa.Date(), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("analytics_refresh_state")
+    op.drop_index("ix_analytics_ai_daily_user_id", table_name="analytics_ai_daily")
+    op.drop_table("analytics_ai_daily")
+    op.drop_table("analytics_petition_hourly")
+    op.drop_index(
+        "ix_analytics_petition_daily_user_id", table_name="analytics_petition_daily"
+    )
+    op.drop_table("analytics_petition_daily")
+    op.drop_index(
+        "ix_analytics_revenue_daily_user_id", table_name="analytics_revenue_daily"
+    )
+    op.drop_table("analytics_revenue_daily")
@@ -0,0 +1,52 @@
+"""add AI completion cache settings and is_cached flag
+
+Revision ID: ai_completion_cache_20261016
+Revises: search_index_20261016
+Create Date: 2026-10-16
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "ai_completion_cache_20261016"
+down_revision = "search_index_20261016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("ai_credit_configs", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "cache_enabled",
+                sa.Boolean(),
+                nullable=True,
+                server_default=sa.false(),
+            )
+        )
+        batch_op.add_column(
+            sa.Column(
+                "cache_ttl_seconds",
+                sa.Integer(),
+                nullable=True,
+                server_default="86400",
+            )
+        )
+
+    with op.batch_alter_table("ai_generations", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "is_cached", sa.Boolean(), nullable=True, server_default=sa.false()
+            )
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("ai_generations", schema=None) as batch_op:
+        batch_op.drop_column("is_cached")
+
+    with op.batch_alter_table("ai_credit_configs", schema=None) as batch_op:
+        batch_op.drop_column("cache_ttl_seconds")
+        batch_op.drop_column("cache_enabled")
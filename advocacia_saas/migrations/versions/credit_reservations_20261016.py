@@ -0,0 +1,53 @@
+"""add credit_reservations (credits held by running AI jobs)
+
+Revision ID: credit_reservations_20261016
+Revises: messages_conversation_index_20261016
+Create Date: 2026-10-16
+
+Jobs de IA retêm o custo ao entrar na fila e só lançam o uso no diário
+(credit_transactions) ao terminar; reservas vencidas voltam ao saldo com
+`flask credits-release-expired`.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "credit_reservations_20261016"
+down_revision = "messages_conversation_index_20261016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "credit_reservations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("description", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("settled_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "ix_credit_reservations_status_expires",
+        "credit_reservations",
+        ["status", "expires_at"],
+    )
+    op.create_index(
+        "ix_credit_reservations_user_status",
+        "credit_reservations",
+        ["user_id", "status"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_credit_reservations_user_status", table_name="credit_reservations"
+    )
+    op.drop_index(
+        "ix_credit_reservations_status_expires", table_name="credit_reservations"
+    )
+    op.drop_table("credit_reservations")
@@ -0,0 +1,38 @@
+"""add indexes for the batch deadline scanner
+
+Revision ID: deadline_scan_indexes_20261016
+Revises: judicial_holidays_20261016
+Create Date: 2026-10-16
+
+Candidatos de alerta (deadlines pendentes sem alerta, por vencimento) e o NOT
+EXISTS que evita avisos de prazo repetidos no mesmo dia.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "deadline_scan_indexes_20261016"
+down_revision = "judicial_holidays_20261016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_deadlines_alert_scan",
+        "deadlines",
+        ["status", "alert_sent", "deadline_date"],
+    )
+    op.create_index(
+        "ix_process_notifications_process_type_created",
+        "process_notifications",
+        ["process_id", "notification_type", "created_at"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_process_notifications_process_type_created",
+        table_name="process_notifications",
+    )
+    op.drop_index("ix_deadlines_alert_scan", table_name="deadlines")
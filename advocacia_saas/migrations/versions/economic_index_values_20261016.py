@@ -0,0 +1,35 @@
+"""add economic_index_values (local copy of BCB series)
+
+Revision ID: economic_index_values_20261016
+Revises: ai_completion_cache_20261016
+Create Date: 2026-10-16
+
+Após aplicar, carregar as séries com `flask bcb-sync`.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "economic_index_values_20261016"
+down_revision = "ai_completion_cache_20261016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "economic_index_values",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("indice", sa.String(length=10), nullable=False),
+        sa.Column("reference_month", sa.Date(), nullable=False),
+        sa.Column("value", sa.Numeric(precision=12, scale=6), nullable=False),
+        sa.Column("fetched_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint(
+            "indice", "reference_month", name="uq_economic_index_month"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table("economic_index_values")
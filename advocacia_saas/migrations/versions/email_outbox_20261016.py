@@ -0,0 +1,55 @@
+"""add email_outbox (persistent outbound email queue)
+
+Revision ID: email_outbox_20261016
+Revises: deadline_scan_indexes_20261016
+Create Date: 2026-10-16
+
+Os emails passam a ser enfileirados e entregues em lote pelos workers
+(threads do processo web ou `flask email-worker`).
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "email_outbox_20261016"
+down_revision = "deadline_scan_indexes_20261016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("idempotency_key", sa.String(length=200), nullable=True),
+        sa.Column("recipients", sa.JSON(), nullable=False),
+        sa.Column("sender", sa.String(length=200), nullable=True),
+        sa.Column("subject", sa.String(length=500), nullable=False),
+        sa.Column("html", sa.Text(), nullable=True),
+        sa.Column("text_body", sa.Text(), nullable=True),
+        sa.Column("template", sa.String(length=200), nullable=True),
+        sa.Column("context", sa.JSON(), nullable=True),
+        sa.Column("category", sa.String(length=50), nullable=True),
+        sa.Column("priority", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=True),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=True),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("provider", sa.String(length=20), nullable=True),
+        sa.Column("provider_message_id", sa.String(length=200), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("idempotency_key"),
+    )
+    op.create_index(
+        "ix_email_outbox_dispatch",
+        "email_outbox",
+        ["status", "priority", "next_attempt_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_email_outbox_dispatch", table_name="email_outbox")
+    op.drop_table("email_outbox")
@@ -0,0 +1,37 @@
+"""add judicial_holidays (state, municipal and court holidays for deadlines)
+
+Revision ID: judicial_holidays_20261016
+Revises: admin_analytics_facts_20261016
+Create Date: 2026-10-16
+
+Feriados nacionais e o recesso forense são calculados no código; importar os
+estaduais e de tribunal com `flask holidays-import`.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "judicial_holidays_20261016"
+down_revision = "admin_analytics_facts_20261016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "judicial_holidays",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("name", sa.String(length=150), nullable=False),
+        sa.Column("uf", sa.String(length=2), nullable=False, server_default=""),
+        sa.Column("court", sa.String(length=100), nullable=False, server_default=""),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("day", "uf", "court", name="uq_judicial_holiday"),
+    )
+    op.create_index("ix_judicial_holidays_day", "judicial_holidays", ["day"])
+
+
+def downgrade():
+    op.drop_index("ix_judicial_holidays_day", table_name="judicial_holidays")
+    op.drop_table("judicial_holidays")
@@ -0,0 +1,28 @@
+"""add composite index for paginated chat history
+
+Revision ID: messages_conversation_index_20261016
+Revises: notification_queue_digest_index_20261016
+Create Date: 2026-10-16
+
+Páginas do chat buscadas por (remetente, destinatário) em ordem de criação.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "messages_conversation_index_20261016"
+down_revision = "notification_queue_digest_index_20261016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_messages_sender_recipient_created",
+        "messages",
+        ["sender_id", "recipient_id", "created_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_messages_sender_recipient_created", table_name="messages")
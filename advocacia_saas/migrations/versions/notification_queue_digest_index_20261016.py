@@ -0,0 +1,30 @@
+"""add index for the batch digest builder
+
+Revision ID: notification_queue_digest_index_20261016
+Revises: email_outbox_20261016
+Create Date: 2026-10-16
+
+Itens de digest (status "digest") buscados por lote de usuários.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "notification_queue_digest_index_20261016"
+down_revision = "email_outbox_20261016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_notification_queue_user_status",
+        "notification_queue",
+        ["user_id", "status"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_notification_queue_user_status", table_name="notification_queue"
+    )
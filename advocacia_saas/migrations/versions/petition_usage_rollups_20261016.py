@@ -0,0 +1,43 @@
+"""add petition_usage_rollups (usage totals per user and billing cycle)
+
+Revision ID: petition_usage_rollups_20261016
+Revises: economic_index_values_20261016
+Create Date: 2026-10-16
+
+Após aplicar, popular os totais com `flask usage-rollup-backfill`.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "petition_usage_rollups_20261016"
+down_revision = "economic_index_values_20261016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "petition_usage_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("billing_cycle", sa.String(length=7), nullable=False),
+        sa.Column("total_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("billable_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "billable_amount",
+            sa.Numeric(precision=10, scale=2),
+            nullable=False,
+            server_default="0",
+        ),
+        sa.Column("daily_billable", sa.JSON(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint(
+            "user_id", "billing_cycle", name="uq_petition_usage_rollup_cycle"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table("petition_usage_rollups")
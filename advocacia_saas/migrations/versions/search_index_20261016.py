@@ -0,0 +1,60 @@
+"""add search_index for global search
+
+Revision ID: search_index_20261016
+Revises: fee_contract_templates_20260127
+Create Date: 2026-10-16
+
+Após aplicar, popular o índice com `flask search-reindex`.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "search_index_20261016"
+down_revision = "fee_contract_templates_20260127"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "search_index",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("entity_type", sa.String(length=20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("title", sa.String(length=300), nullable=False),
+        sa.Column("subtitle", sa.String(length=300), nullable=True),
+        sa.Column("url", sa.String(length=300), nullable=False),
+        sa.Column("title_key", sa.String(length=300), nullable=False),
+        sa.Column("search_text", sa.Text(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("entity_type", "entity_id", name="uq_search_index_entity"),
+    )
+    op.create_index(
+        "ix_search_index_user_type", "search_index", ["user_id", "entity_type"]
+    )
+
+    # Estruturas específicas do banco (tsvector/trigram ou FTS5), as mesmas
+    # criadas por db.create_all()
+    from app.models import SEARCH_INDEX_PG_DDL, SEARCH_INDEX_SQLITE_DDL
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for statement in SEARCH_INDEX_PG_DDL:
+            op.execute(statement)
+    elif dialect == "sqlite":
+        for statement in SEARCH_INDEX_SQLITE_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_search_index_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_search_index_vector")
+    elif dialect == "sqlite":
+        op.execute("DROP TABLE IF EXISTS search_index_fts")
+    op.drop_index("ix_search_index_user_type", table_name="search_index")
+    op.drop_table("search_index")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark da extração de texto de PDFs enviados.
+
+Gera PDFs sintéticos com centenas de páginas e mede, para cada tamanho:
+- legado: um PdfReader para o documento inteiro, página a página na thread
+  da requisição (o antigo extract_text_from_pdf);
+- faixas: DocumentTextService sem pool (faixas de páginas no processo);
+- pool:   DocumentTextService com o pool de processos;
+- cache:  o mesmo arquivo enviado de novo (texto já em cache).
+
+Para legado e faixas mostra também o pico de memória alocada (tracemalloc).
+
+Uso:
+    python scripts/benchmark_document_text.py
+    python scripts/benchmark_document_text.py --pages 200,500 --workers 4
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+LINE = (
+    "O autor, já qualificado nos autos, vem respeitosamente à presença de "
+    "Vossa Excelência expor e requerer o que segue."
+)
+
+
+def build_pdf(pages):
+    """PDF com `pages` páginas de ~40 linhas cada"""
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for page in range(pages):
+        y = 800
+        pdf.drawString(72, y, f"PÁGINA {page + 1}")
+        for _ in range(40):
+            y -= 18
+            pdf.drawString(40, y, LINE[:95])
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def legacy_extract(data):
+    """Um único PdfReader segurando o documento inteiro"""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(BytesIO(data))
+    parts = []
+    for page_num, page in enumerate(reader.pages, 1):
+        page_text = page.extract_text()
+        if page_text:
+            parts.append(f"--- Página {page_num} ---\n{page_text}")
+    return "\n\n".join(parts)
+
+
+def upload(data):
+    from werkzeug.datastructures import FileStorage
+
+    return FileStorage(stream=BytesIO(data), filename="benchmark.pdf")
+
+
+def measure(func, trace_memory=False):
+    """Devolve (segundos, pico de memória em MB ou None, resultado)"""
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - started
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extração de texto")
+    parser.add_argument("--pages", default="200,500", help="Tamanhos em páginas (CSV)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--chunk-pages", type=int, default=25)
+    args = parser.parse_args()
+
+    from flask import Flask
+
+    from app.services.document_text import DocumentTextService
+
+    cache_dir = tempfile.mkdtemp(prefix="doc_text_bench_")
+    services = {}
+    for name, workers in (("faixas", 0), ("pool", args.workers)):
+        app = Flask(__name__)
+        app.config.update(
+            DOCUMENT_EXTRACT_WORKERS=workers,
+            DOCUMENT_EXTRACT_PARALLEL_PAGES=1,
+            DOCUMENT_EXTRACT_CHUNK_PAGES=args.chunk_pages,
+            DOCUMENT_TEXT_CACHE_DIR=os.path.join(cache_dir, name),
+        )
+        services[name] = DocumentTextService()
+        services[name].init_app(app)
+
+    try:
+        # Aquece o pool (importação do PyPDF2 nos processos)
+        services["pool"]._extract_pdf(upload(build_pdf(args.workers * 2)))
+
+        print(
+            f"\nPool com {args.workers} processos | {args.chunk_pages} páginas por faixa\n"
+        )
+        print(
+            f"{'páginas':>8} {'legado':>9} {'faixas':>9} {'pool':>9} {'cache':>9}"
+            f" {'mem legado':>11} {'mem faixas':>11}"
+        )
+        for pages in [int(p) for p in args.pages.split(",")]:
+            data = build_pdf(pages)
+            legacy_s, legacy_mb, expected = measure(
+                lambda: legacy_extract(data), trace_memory=True
+            )
+            chunked_s, chunked_mb, (chunked_text, _) = measure(
+                lambda: services["faixas"]._extract_pdf(upload(data)),
+                trace_memory=True,
+            )
+            pool_s, _, (pool_text, _) = measure(
+                lambda: services["pool"].extract(upload(data))
+            )
+            cache_s, _, (_, metadata) = measure(
+                lambda: services["pool"].extract(upload(data))
+            )
+            assert chunked_text == expected and pool_text == expected
+            assert metadata["cached"]
+            print(
+                f"{pages:>8} {legacy_s:>8.2f}s {chunked_s:>8.2f}s {pool_s:>8.2f}s"
+                f" {cache_s * 1000:>7.1f}ms {legacy_mb:>9.1f}MB {chunked_mb:>9.1f}MB"
+            )
+    finally:
+        services["pool"].shutdown()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
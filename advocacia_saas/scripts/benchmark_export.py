@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória das exportações CSV/XLSX.
+
+Cria um SQLite temporário com `--rows` linhas sintéticas (padrão: 1 milhão) e
+exporta a tabela inteira em processos separados, medindo o pico de RSS de
+cada cenário:
+- buffered: `.all()` + StringIO (comportamento antigo das exportações);
+- csv:      export_engine com yield_per + CSV em pedaços;
+- xlsx:     export_engine com yield_per + openpyxl write-only.
+
+Termina com código 1 se algum cenário em streaming passar de `--max-rss-mb`.
+
+Uso:
+    python scripts/benchmark_export.py --rows 1000000 --max-rss-mb 150
+    python scripts/benchmark_export.py --scenarios csv,xlsx
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+HEADER = ["ID", "Nome", "Email", "Valor (R$)", "Criado em"]
+STREAMING = {"csv", "xlsx"}
+
+
+def _table():
+    import sqlalchemy as sa
+
+    metadata = sa.MetaData()
+    return sa.Table(
+        "export_bench",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(120)),
+        sa.Column("email", sa.String(120)),
+        sa.Column("amount", sa.Numeric(10, 2)),
+        sa.Column("created_at", sa.DateTime),
+    )
+
+
+def populate(db_path, rows, batch=20000):
+    """Grava `rows` linhas sintéticas no SQLite"""
+    import sqlalchemy as sa
+
+    engine = sa.create_engine(f"sqlite:///{db_path}")
+    table = _table()
+    table.metadata.create_all(engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch):
+            conn.execute(
+                table.insert(),
+                [
+                    {
+                        "id": i + 1,
+                        "name": f"Usuário Sintético {i}",
+                        "email": f"usuario{i}@example.com",
+                        "amount": f"{(i % 10000) / 100:.2f}",
+                        "created_at": start + timedelta(minutes=i),
+                    }
+                    for i in range(offset, min(offset + batch, rows))
+                ],
+            )
+    engine.dispose()
+
+
+def peak_rss_mb():
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(scenario, db_path, out_path, yield_per):
+    """Executa um cenário (no processo filho); retorna (s, pico MB, bytes)"""
+    import csv
+    from io import StringIO
+
+    import sqlalchemy as sa
+    from sqlalchemy.orm import Session
+
+    from app.services import export_engine
+
+    engine = sa.create_engine(f"sqlite:///{db_path}")
+    table = _table()
+    started = time.perf_counter()
+    with Session(engine) as session:
+        query = session.query(*table.c).order_by(table.c.id)
+        if scenario == "buffered":
+            output = StringIO()
+            writer = csv.writer(output)
+            writer.writerow(HEADER)
+            for row in query.all():
+                writer.writerow(row)
+            with open(out_path, "wb") as f:
+                f.write(output.getvalue().encode("utf-8"))
+        else:
+            rows = export_engine.iter_query(query, yield_per)
+            with open(out_path, "wb") as f:
+                for chunk in export_engine.export_chunks(scenario, HEADER, rows):
+                    f.write(chunk)
+    elapsed = time.perf_counter() - started
+    return elapsed, peak_rss_mb(), os.path.getsize(out_path)
+
+
+def _child(queue, *args):
+    queue.put(run_scenario(*args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memória de exportação")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--yield-per", type=int, default=1000)
+    parser.add_argument("--max-rss-mb", type=float, default=150.0)
+    parser.add_argument(
+        "--scenarios", default="buffered,csv,xlsx", help="Cenários (CSV)"
+    )
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="export_bench_")
+    db_path = os.path.join(workdir, "bench.db")
+    context = multiprocessing.get_context("spawn")
+    failed = []
+
+    try:
+        started = time.perf_counter()
+        populate(db_path, args.rows)
+        print(
+            f"\n{args.rows} linhas sintéticas em {time.perf_counter() - started:.1f}s"
+            f" | yield_per={args.yield_per} | teto de RSS {args.max_rss_mb:.0f} MB\n"
+        )
+        print(f"{'cenário':>10} {'tempo':>10} {'pico RSS':>12} {'arquivo':>12}")
+        for scenario in args.scenarios.split(","):
+            out_path = os.path.join(workdir, f"export_{scenario}.out")
+            queue = context.Queue()
+            process = context.Process(
+                target=_child,
+                args=(queue, scenario, db_path, out_path, args.yield_per),
+            )
+            process.start()
+            elapsed, peak, size = queue.get()
+            process.join()
+            os.remove(out_path)
+
+            flag = ""
+            if scenario in STREAMING and peak > args.max_rss_mb:
+                failed.append(scenario)
+                flag = "  <- acima do teto"
+            print(
+                f"{scenario:>10} {elapsed:>9.1f}s {peak:>9.1f} MB"
+                f" {size / 1024 / 1024:>9.1f} MB{flag}"
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if failed:
+        print(f"\nFALHOU: {', '.join(failed)} passou de {args.max_rss_mb:.0f} MB")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark da renderização de PDF.
+
+Mede renders por segundo com 1, 4 e 8 requisições simultâneas em três
+cenários:
+- inline: xhtml2pdf na própria thread da requisição (comportamento antigo);
+- pool:   PDFRenderService com pool de processos, HTML sempre diferente;
+- cache:  PDFRenderService com o mesmo HTML (PDF já em cache).
+
+Uso:
+    python scripts/benchmark_pdf_render.py --pages 30 --renders 16 --workers 4
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+PARAGRAPH = (
+    "<p>O autor, já qualificado nos autos, vem respeitosamente à presença de "
+    "Vossa Excelência, com fundamento nos artigos 319 e seguintes do Código de "
+    "Processo Civil, expor e requerer o que segue, nos termos da legislação "
+    "vigente e da jurisprudência consolidada dos tribunais superiores.</p>\n"
+)
+
+
+def build_petition_html(pages, seed):
+    """HTML de uma petição com ~`pages` páginas (≈ 6 parágrafos por página)"""
+    body = []
+    for page in range(pages):
+        body.append(f"<h2>{page + 1}. DOS FATOS ({seed})</h2>\n")
+        body.extend([PARAGRAPH] * 6)
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <style>
+            @page {{ margin: 2.5cm 3cm; }}
+            body {{ font-family: 'Times New Roman', serif; font-size: 12pt;
+                    line-height: 1.5; text-align: justify; }}
+            p {{ text-indent: 2cm; margin-bottom: 12pt; }}
+        </style>
+    </head>
+    <body>
+        <h1>PETIÇÃO INICIAL</h1>
+        {"".join(body)}
+    </body>
+    </html>
+    """
+
+
+def run(render, concurrency, renders, html_for):
+    """Executa `renders` renderizações com `concurrency` threads; retorna renders/s"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda i: render(html_for(i), "Benchmark"), range(renders)))
+    return renders / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de renderização de PDF")
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--renders", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument(
+        "--concurrency", default="1,4,8", help="Níveis de concorrência (CSV)"
+    )
+    args = parser.parse_args()
+
+    from flask import Flask
+
+    from app.services.pdf_renderer import PDFRenderService, render_html_to_pdf
+
+    cache_dir = tempfile.mkdtemp(prefix="pdf_bench_")
+    app = Flask(__name__)
+    app.config.update(PDF_RENDER_WORKERS=args.workers, PDF_CACHE_DIR=cache_dir)
+    service = PDFRenderService()
+    service.init_app(app)
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    counter = iter(range(10**9))
+
+    try:
+        # Aquece o pool (importação do xhtml2pdf nos processos)
+        list(
+            ThreadPoolExecutor(args.workers).map(
+                lambda i: service.render(build_petition_html(1, f"w{i}"), "w"),
+                range(args.workers),
+            )
+        )
+        same_html = build_petition_html(args.pages, "cache")
+        service.render(same_html, "Benchmark")
+
+        print(
+            f"\nPetição de ~{args.pages} páginas | {args.renders} renders por nível"
+            f" | pool com {args.workers} processos\n"
+        )
+        print(f"{'concorrência':>12} {'inline':>12} {'pool':>12} {'cache':>12}")
+        for level in levels:
+            inline = run(
+                render_html_to_pdf,
+                level,
+                args.renders,
+                lambda i: build_petition_html(args.pages, f"i{next(counter)}"),
+            )
+            pooled = run(
+                service.render,
+                level,
+                args.renders,
+                lambda i: build_petition_html(args.pages, f"p{next(counter)}"),
+            )
+            cached = run(service.render, level, args.renders, lambda i: same_html)
+            print(f"{level:>12} {inline:>9.2f}/s {pooled:>9.2f}/s {cached:>9.1f}/s")
+    finally:
+        service.shutdown()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
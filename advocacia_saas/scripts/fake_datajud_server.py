@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Servidor fake da API pública do DataJud para desenvolvimento e testes offline.
+
+Implementa POST /<endpoint>/_search (ex: /api_publica_tjsp/_search) com a
+mesma estrutura de resposta do Elasticsearch do CNJ. Um processo "existe"
+apenas no tribunal indicado pelo próprio número CNJ; --miss-rate faz uma
+fração dos números não existir em lugar nenhum.
+
+GET /_stats devolve quantas buscas cada endpoint recebeu (útil para conferir
+o cache do cliente).
+
+Uso:
+    python scripts/fake_datajud_server.py --port 8766 --delay-ms 300
+
+Depois, rode o app com:
+    DATAJUD_BASE_URL=http://127.0.0.1:8766 flask run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.datajud_service import (  # noqa: E402
+    TRIBUNAL_ENDPOINTS,
+    detect_tribunal_from_number,
+)
+
+MOVIMENTOS = [
+    (26, "Distribuição"),
+    (123, "Remessa"),
+    (60, "Expedição de documento"),
+    (11010, "Mero expediente"),
+    (85, "Petição"),
+    (970, "Audiência"),
+    (193, "Julgamento"),
+]
+
+
+def build_processo(numero, tribunal):
+    """Documento _source sintético, estável para o mesmo número"""
+    seed = int(hashlib.sha256(numero.encode()).hexdigest()[:8], 16)
+    ajuizamento = datetime(2020, 1, 1) + timedelta(days=seed % 1500)
+    movimentos = []
+    for index in range(1 + seed % len(MOVIMENTOS)):
+        codigo, nome = MOVIMENTOS[index]
+        data = ajuizamento + timedelta(days=index * 30, hours=index)
+        movimentos.append(
+            {"codigo": codigo, "nome": nome, "dataHora": data.isoformat() + ".000Z"}
+        )
+    movimentos.reverse()  # mais recentes primeiro, como na API
+
+    return {
+        "numeroProcesso": numero,
+        "tribunal": tribunal,
+        "grau": "G1",
+        "dataAjuizamento": ajuizamento.isoformat() + ".000Z",
+        "dataHoraUltimaAtualizacao": movimentos[0]["dataHora"],
+        "classe": {"codigo": 7, "nome": "Procedimento Comum Cível"},
+        "assuntos": [{"codigo": 7780, "nome": "Indenização por Dano Moral"}],
+        "orgaoJulgador": {
+            "codigo": seed % 9999,
+            "nome": f"{seed % 40 + 1}ª Vara Cível",
+        },
+        "formato": {"codigo": 1, "nome": "Eletrônico"},
+        "sistema": {"codigo": 1, "nome": "PJe"},
+        "nivelSigilo": 0,
+        "movimentos": movimentos,
+    }
+
+
+class FakeDataJudHandler(BaseHTTPRequestHandler):
+    """Handler que simula /<endpoint>/_search"""
+
+    delay = 0.2
+    miss_rate = 0.0
+    endpoints = {endpoint: sigla for sigla, endpoint in TRIBUNAL_ENDPOINTS.items()}
+    stats = Counter()
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):  # noqa: A002 - assinatura da base
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/_stats":
+            self.send_error(404)
+            return
+        with self.stats_lock:
+            self._send_json(200, dict(self.stats))
+
+    def do_POST(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 2 or parts[1] != "_search" or parts[0] not in self.endpoints:
+            self.send_error(404)
+            return
+        if not self.headers.get("Authorization", "").startswith("ApiKey "):
+            self._send_json(401, {"error": "unauthorized"})
+            return
+
+        tribunal = self.endpoints[parts[0]]
+        with self.stats_lock:
+            self.stats[tribunal] += 1
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        numero = str(body.get("query", {}).get("match", {}).get("numeroProcesso", ""))
+
+        time.sleep(self.delay)
+
+        hits = []
+        missing = int(hashlib.md5(numero.encode()).hexdigest()[:4], 16) < (
+            self.miss_rate * 0x10000
+        )
+        if not missing and detect_tribunal_from_number(numero) == tribunal:
+            hits.append(
+                {
+                    "_index": parts[0],
+                    "_id": f"{tribunal}_{numero}",
+                    "_score": 1.0,
+                    "_source": build_processo(numero, tribunal),
+                }
+            )
+
+        self._send_json(
+            200,
+            {
+                "took": int(self.delay * 1000),
+                "timed_out": False,
+                "hits": {
+                    "total": {"value": len(hits), "relation": "eq"},
+                    "max_score": 1.0 if hits else None,
+                    "hits": hits,
+                },
+            },
+        )
+
+    def _send_json(self, status, data):
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor fake da API DataJud")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument(
+        "--delay-ms", type=float, default=200, help="Latência por busca"
+    )
+    parser.add_argument(
+        "--miss-rate", type=float, default=0.0, help="Fração de números inexistentes"
+    )
+    args = parser.parse_args()
+
+    FakeDataJudHandler.delay = args.delay_ms / 1000
+    FakeDataJudHandler.miss_rate = args.miss_rate
+
+    server = ThreadingHTTPServer((args.host, args.port), FakeDataJudHandler)
+    print(f"⚖️  Fake DataJud em http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
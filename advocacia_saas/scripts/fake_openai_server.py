@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Servidor fake da API da OpenAI para desenvolvimento e testes de carga offline.
+
+Implementa POST /v1/chat/completions (com e sem stream=True), devolvendo um
+texto jurídico sintético com latência configurável por token.
+
+Uso:
+    python scripts/fake_openai_server.py --port 8765 --tokens 400 --delay-ms 20
+
+Depois, rode o app com:
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:8765/v1 flask run
+"""
+
+import argparse
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "Excelentíssimo Senhor Doutor Juiz de Direito, o autor vem respeitosamente "
+    "à presença de Vossa Excelência, com fundamento no art. 319 do CPC, "
+    "propor a presente ação pelos fatos e fundamentos a seguir expostos."
+).split()
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Handler que simula /v1/chat/completions"""
+
+    tokens = 200
+    delay = 0.01
+
+    def log_message(self, format, *args):  # noqa: A002 - assinatura da base
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        model = body.get("model", "gpt-4o-mini")
+        max_tokens = min(int(body.get("max_tokens") or self.tokens), self.tokens)
+        prompt_tokens = sum(
+            len(str(m.get("content", "")).split()) for m in body.get("messages", [])
+        )
+        words = [WORDS[i % len(WORDS)] for i in range(max_tokens)]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": max_tokens,
+            "total_tokens": prompt_tokens + max_tokens,
+        }
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for index, word in enumerate(words):
+                time.sleep(self.delay)
+                self._send_event(
+                    {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": {"content": (" " if index else "") + word},
+                                "finish_reason": None,
+                            }
+                        ],
+                    }
+                )
+            self._send_event(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                }
+            )
+            self._send_event(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [],
+                    "usage": usage,
+                }
+            )
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            return
+
+        time.sleep(self.delay * max_tokens)
+        payload = json.dumps(
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": " ".join(words)},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_event(self, data):
+        self.wfile.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor fake da API OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tokens", type=int, default=200, help="Tokens por resposta")
+    parser.add_argument("--delay-ms", type=float, default=10, help="Atraso por token")
+    args = parser.parse_args()
+
+    FakeOpenAIHandler.tokens = args.tokens
+    FakeOpenAIHandler.delay = args.delay_ms / 1000
+
+    server = ThreadingHTTPServer((args.host, args.port), FakeOpenAIHandler)
+    print(f"🤖 Fake OpenAI em http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
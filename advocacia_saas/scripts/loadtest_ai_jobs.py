@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Teste de carga offline da fila de jobs de IA.
+
+Submete N jobs simultâneos contra o servidor fake da OpenAI e mede o tempo
+até o primeiro token e até a conclusão de cada job.
+
+Uso:
+    python scripts/fake_openai_server.py --port 8765 &
+    python scripts/loadtest_ai_jobs.py --jobs 50 --workers 8
+
+ATENÇÃO: usa um banco SQLite temporário; não aponte para um banco real.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def percentile(values, pct):
+    """Percentil simples (nearest-rank)"""
+    ordered = sorted(values)
+    index = max(0, int(round(pct / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga dos jobs de IA")
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8765/v1")
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    os.environ["OPENAI_BASE_URL"] = args.base_url
+    os.environ["AI_JOB_WORKERS"] = str(args.workers)
+
+    from config import Config
+
+    class LoadTestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(
+            tempfile.mkdtemp(), "loadtest_ai_jobs.db"
+        )
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        RATELIMIT_ENABLED = False
+        AI_JOB_WORKERS = args.workers
+
+    from app import create_app, db
+    from app.models import User, UserCredits
+    from app.services.ai_jobs import ai_job_manager
+    from app.services.job_store import FINAL_STATUSES
+
+    app = create_app(LoadTestConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(
+            username="loadtest",
+            email="loadtest@example.com",
+            full_name="Load Test",
+            user_type="advogado",
+        )
+        user.set_password("LoadTest123!", skip_history_check=True)
+        db.session.add(user)
+        db.session.commit()
+        db.session.add(UserCredits(user_id=user.id, balance=args.jobs))
+        db.session.commit()
+
+        started = time.perf_counter()
+        submitted = {}
+        for _ in range(args.jobs):
+            job = ai_job_manager.submit(
+                app,
+                user,
+                "improve",
+                {"text": "Texto de teste para melhoria."},
+                1,
+            )
+            submitted[job["id"]] = time.perf_counter()
+        submit_ms = (time.perf_counter() - started) * 1000
+
+        first_token, completed = {}, {}
+        while len(completed) < len(submitted):
+            now = time.perf_counter()
+            for job_id, t0 in submitted.items():
+                if job_id in completed:
+                    continue
+                if job_id not in first_token and ai_job_manager.store.read_chunks(
+                    job_id, 0
+                ):
+                    first_token[job_id] = (now - t0) * 1000
+                job = ai_job_manager.store.get(job_id)
+                if job["status"] in FINAL_STATUSES:
+                    completed[job_id] = ((now - t0) * 1000, job["status"])
+            time.sleep(0.01)
+
+        ai_job_manager.shutdown()
+        db.session.remove()
+        balance = UserCredits.query.filter_by(user_id=user.id).first().balance
+
+    durations = [d for d, _ in completed.values()]
+    ttft = list(first_token.values()) or [0]
+    failures = sum(1 for _, status in completed.values() if status != "completed")
+
+    print(f"\nJobs: {args.jobs} | workers: {args.workers}")
+    print(f"Submissão (total): {submit_ms:.1f} ms")
+    print(
+        f"Primeiro token  p50={percentile(ttft, 50):.0f} ms  p95={percentile(ttft, 95):.0f} ms"
+    )
+    print(
+        f"Conclusão       p50={percentile(durations, 50):.0f} ms  "
+        f"p95={percentile(durations, 95):.0f} ms  média={statistics.mean(durations):.0f} ms"
+    )
+    print(f"Falhas: {failures} | saldo final: {balance} (esperado {failures})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Testes para os fatos diários dos dashboards administrativos
+"""
+
+from datetime import datetime, time, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from app.models import (
+    AnalyticsPetitionDaily,
+    AnalyticsRevenueDaily,
+    Payment,
+    PetitionType,
+    PetitionUsage,
+    User,
+)
+from app.services import admin_analytics
+from app.services.admin_analytics import AnalyticsFilters
+
+TODAY = datetime.now(timezone.utc).date()
+YESTERDAY = TODAY - timedelta(days=1)
+
+
+def _at(day, hour=10):
+    return datetime.combine(day, time(hour))
+
+
+@pytest.fixture
+def events(db_session):
+    """Dois usuários (SP e RJ) com pagamentos e petições em dias distintos"""
+    users = {}
+    for uf, active in (("SP", True), ("RJ", False)):
+        user = User(
+            username=f"user_{uf.lower()}",
+            email=f"{uf.lower()}@example.com",
+            full_name=f"Usuário {uf}",
+            password_hash="x",
+            user_type="advogado",
+            uf=uf,
+            is_active=active,
+        )
+        db_session.add(user)
+        users[uf] = user
+    civel = PetitionType(slug="civel", name="Cível")
+    trabalhista = PetitionType(slug="trabalhista", name="Trabalhista")
+    db_session.add_all([civel, trabalhista])
+    db_session.flush()
+
+    # SP: 2 pagamentos e 3 petições - um JOIN ingênuo contaria 6 de cada
+    for amount in ("100.00", "50.00"):
+        db_session.add(
+            Payment(
+                user_id=users["SP"].id,
+                amount=Decimal(amount),
+                payment_status="completed",
+                paid_at=_at(YESTERDAY),
+            )
+        )
+    db_session.add(
+        Payment(
+            user_id=users["RJ"].id,
+            amount=Decimal("30.00"),
+            payment_status="pending",
+            paid_at=_at(YESTERDAY),
+        )
+    )
+    for hour, petition_type in ((9, civel), (9, civel), (15, trabalhista)):
+        db_session.add(
+            PetitionUsage(
+                user_id=users["SP"].id,
+                petition_type_id=petition_type.id,
+                generated_at=_at(YESTERDAY, hour),
+                billable=True,
+                amount=Decimal("10.00"),
+            )
+        )
+    db_session.add(
+        PetitionUsage(
+            user_id=users["RJ"].id,
+            petition_type_id=civel.id,
+            generated_at=_at(TODAY, 8),
+            amount=Decimal("0.00"),
+        )
+    )
+    db_session.commit()
+    return users
+
+
+class TestRefresh:
+    """Testes para a reconstrução dos fatos"""
+
+    def test_facts_are_not_multiplied_by_joins(self, events):
+        admin_analytics.refresh(full=True)
+
+        [sp] = admin_analytics.revenue_by_uf(None)
+        assert (sp.uf, sp.total_revenue, sp.payment_count) == ("SP", 150, 2)
+
+        by_uf = {row.uf: row for row in admin_analytics.petitions_by_uf(None)}
+        assert by_uf["SP"].petition_count == 3
+        assert by_uf["SP"].total_value == 30
+        assert by_uf["RJ"].petition_count == 1
+
+    def test_refresh_is_idempotent(self, events):
+        admin_analytics.refresh(full=True)
+        admin_analytics.refresh()
+        admin_analytics.refresh(since=YESTERDAY)
+
+        assert AnalyticsRevenueDaily.query.count() == 1
+        assert admin_analytics.window_totals(
+            AnalyticsPetitionDaily.petition_count, fact=AnalyticsPetitionDaily
+        ) == (4,)
+
+    def test_incremental_refresh_picks_up_new_events(self, db_session, events):
+        admin_analytics.refresh(full=True)
+        db_session.add(
+            Payment(
+                user_id=events["RJ"].id,
+                amount=Decimal("70.00"),
+                payment_status="completed",
+                paid_at=_at(TODAY),
+            )
+        )
+        db_session.commit()
+
+        result = admin_analytics.refresh()
+
+        assert result["since"] == TODAY - timedelta(
+            days=admin_analytics.DEFAULT_LOOKBACK_DAYS
+        )
+        rows = admin_analytics.revenue_by_uf(None)
+        assert {row.uf: row.total_revenue for row in rows} == {"SP": 150, "RJ": 70}
+        assert admin_analytics.refreshed_at() is not None
+
+
+class TestReads:
+    """Testes para as leituras dos dashboards"""
+
+    def test_petitions_by_type_counts_unique_users(self, events):
+        admin_analytics.refresh(full=True)
+
+        rows = {
+            row.petition_type: row for row in admin_analytics.petitions_by_type(None)
+        }
+
+        assert (rows["Cível"].count, rows["Cível"].unique_users) == (3, 2)
+        assert (rows["Trabalhista"].count, rows["Trabalhista"].unique_users) == (1, 1)
+
+    def test_status_filter_joins_current_user(self, events):
+        admin_analytics.refresh(full=True)
+
+        active = AnalyticsFilters(status="active")
+        series = admin_analytics.daily_series(
+            AnalyticsPetitionDaily.petition_count,
+            fact=AnalyticsPetitionDaily,
+            filters=active,
+        )
+
+        assert series == {YESTERDAY: (3,)}
+        assert admin_analytics.sum_window(series, YESTERDAY, TODAY) == 3
+
+    def test_petitions_by_hour(self, events):
+        admin_analytics.refresh(full=True)
+
+        hours = admin_analytics.petitions_by_hour(None)
+
+        assert len(hours) == 24
+        assert {h["hour"]: h["count"] for h in hours if h["count"]} == {
+            8: 1,
+            9: 2,
+            15: 1,
+        }
+
+    def test_lifetime_value(self, events):
+        admin_analytics.refresh(full=True)
+
+        ltv = admin_analytics.lifetime_value(None)
+
+        assert (ltv.total_payments, ltv.unique_users) == (2, 1)
+        assert ltv.avg_payment == 75.0
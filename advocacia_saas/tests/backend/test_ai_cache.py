@@ -0,0 +1,112 @@
+"""
+Testes para o cache de completions da IA
+"""
+
+import pytest
+from app.models import AICreditConfig
+from app.services import ai_service as ai_service_module
+from app.services.ai_cache import completion_cache, make_cache_key
+from app.services.ai_service import ai_service, get_cache_ttl
+from sqlalchemy.exc import OperationalError
+
+MESSAGES = [
+    {"role": "system", "content": "Você é um advogado."},
+    {"role": "user", "content": "Melhore:  o   texto\n da petição"},
+]
+
+
+@pytest.fixture
+def fake_openai(monkeypatch, db_session):
+    """OpenAI falsa; `calls` conta as chamadas que chegaram à API"""
+    calls = []
+
+    def complete(messages, model, temperature, max_tokens):
+        calls.append(messages)
+        return f"Resposta {len(calls)}", {"model": model, "tokens_total": 10}
+
+    monkeypatch.setattr(ai_service, "client", object())
+    monkeypatch.setattr(ai_service, "_complete_openai", complete)
+    completion_cache.reset()
+    yield calls
+    completion_cache.reset()
+
+
+def _enable_cache(db_session, operation_key="improve", enabled=True):
+    db_session.add(
+        AICreditConfig(
+            operation_key=operation_key,
+            name="Melhorar texto",
+            credit_cost=1,
+            cache_enabled=enabled,
+            cache_ttl_seconds=600,
+        )
+    )
+    db_session.commit()
+
+
+class TestCacheKey:
+    """Testes para make_cache_key"""
+
+    def test_whitespace_does_not_change_key(self):
+        spaced = [dict(m, content=f"  {m['content']}  ") for m in MESSAGES]
+        assert make_cache_key("gpt-4o-mini", MESSAGES, 0.7, 2000) == make_cache_key(
+            "gpt-4o-mini", spaced, 0.7, 2000
+        )
+
+    def test_request_parameters_change_key(self):
+        key = make_cache_key("gpt-4o-mini", MESSAGES, 0.7, 2000)
+
+        assert key != make_cache_key("gpt-4o", MESSAGES, 0.7, 2000)
+        assert key != make_cache_key("gpt-4o-mini", MESSAGES, 0.2, 2000)
+        assert key != make_cache_key("gpt-4o-mini", MESSAGES, 0.7, 500)
+        assert key != make_cache_key("gpt-4o-mini", MESSAGES[1:], 0.7, 2000)
+
+
+class TestCompletionCache:
+    """Testes para o caminho de cache de _call_openai"""
+
+    def test_second_call_is_a_hit(self, db_session, fake_openai):
+        _enable_cache(db_session)
+
+        first, first_meta = ai_service._call_openai(MESSAGES, operation="improve")
+        second, second_meta = ai_service._call_openai(MESSAGES, operation="improve")
+
+        assert first == second == "Resposta 1"
+        assert len(fake_openai) == 1
+        assert "cached" not in first_meta and second_meta["cached"] is True
+        assert completion_cache.stats()["improve"] == {"hits": 1, "misses": 1}
+
+    def test_disabled_operation_always_calls_api(self, db_session, fake_openai):
+        _enable_cache(db_session, enabled=False)
+
+        ai_service._call_openai(MESSAGES, operation="improve")
+        ai_service._call_openai(MESSAGES, operation="improve")
+
+        assert len(fake_openai) == 2
+
+    def test_ttl_comes_from_config(self, db_session):
+        _enable_cache(db_session)
+
+        assert get_cache_ttl("improve") == 600
+        assert get_cache_ttl("section") is None
+
+    def test_database_error_disables_cache(self, monkeypatch):
+        warnings = []
+
+        def broken(operation_key):
+            raise OperationalError("SELECT", {}, Exception("tabela ausente"))
+
+        monkeypatch.setattr(AICreditConfig, "get_cache_ttl", broken)
+        monkeypatch.setattr(ai_service_module.logger, "warning", warnings.append)
+
+        assert get_cache_ttl("improve") is None
+        assert "Cache de IA desligado para improve" in warnings[0]
+
+    def test_other_errors_propagate(self, monkeypatch):
+        def broken(operation_key):
+            raise TypeError("bug no modelo")
+
+        monkeypatch.setattr(AICreditConfig, "get_cache_ttl", broken)
+
+        with pytest.raises(TypeError):
+            get_cache_ttl("improve")
@@ -0,0 +1,138 @@
+"""
+Testes para os jobs assíncronos de IA (enfileiramento, status e stream SSE)
+"""
+
+import json
+import time
+
+import pytest
+from app.models import AICreditConfig, AIGeneration
+from app.services.ai_cache import completion_cache
+from app.services.ai_jobs import ai_job_manager
+from app.services.ai_service import ai_service
+from app.services.job_store import FINAL_STATUSES
+
+TOKENS = ["Texto ", "melhorado ", "pela IA."]
+
+
+@pytest.fixture
+def fake_openai(monkeypatch, db_session):
+    """OpenAI falsa que publica TOKENS; `calls` conta as chamadas à API"""
+    calls = []
+
+    def stream(messages, model, temperature, max_tokens, on_token):
+        calls.append(messages)
+        for token in TOKENS:
+            on_token(token)
+        return "".join(TOKENS), {"model": model, "tokens_total": 12}
+
+    monkeypatch.setattr(ai_service, "client", object())
+    monkeypatch.setattr(ai_service, "_stream_openai", stream)
+    db_session.add(
+        AICreditConfig(
+            operation_key="improve",
+            name="Melhorar texto",
+            credit_cost=1,
+            cache_enabled=True,
+            cache_ttl_seconds=600,
+        )
+    )
+    db_session.commit()
+    completion_cache.reset()
+    yield calls
+    completion_cache.reset()
+
+
+def _submit(client, text="texto original"):
+    response = client.post(
+        "/ai/api/jobs", json={"operation": "improve", "params": {"text": text}}
+    )
+    assert response.status_code == 202
+    return response.get_json()
+
+
+def _wait(job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = ai_job_manager.store.get(job_id)
+        if job["status"] in FINAL_STATUSES:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} não terminou")
+
+
+class TestSubmit:
+    """Testes para POST /ai/api/jobs"""
+
+    def test_returns_job_urls(self, admin_client, fake_openai):
+        data = _submit(admin_client)
+
+        assert data["status_url"].endswith(f"/ai/api/jobs/{data['job_id']}")
+        assert data["stream_url"].endswith(f"/ai/api/jobs/{data['job_id']}/stream")
+
+    def test_unknown_operation_is_rejected(self, admin_client, fake_openai):
+        response = admin_client.post("/ai/api/jobs", json={"operation": "hack"})
+        assert response.status_code == 400
+
+    def test_job_runs_inside_app_context(self, admin_client, fake_openai):
+        job = _wait(_submit(admin_client)["job_id"])
+
+        assert job["status"] == "completed", job["error"]
+        assert job["content"] == "".join(TOKENS)
+        assert AIGeneration.query.filter_by(status="completed").count() == 1
+
+    def test_repeated_job_hits_completion_cache(self, admin_client, fake_openai):
+        _wait(_submit(admin_client)["job_id"])
+        job = _wait(_submit(admin_client)["job_id"])
+
+        assert job["status"] == "completed"
+        assert len(fake_openai) == 1
+        assert completion_cache.stats()["improve"]["hits"] == 1
+
+
+class TestStatus:
+    """Testes para GET /ai/api/jobs/<id>"""
+
+    def test_returns_chunks_from_offset(self, admin_client, fake_openai):
+        job_id = _submit(admin_client)["job_id"]
+        _wait(job_id)
+
+        data = admin_client.get(f"/ai/api/jobs/{job_id}?offset=1").get_json()
+
+        assert data["job"]["status"] == "completed"
+        assert data["chunks"] == TOKENS[1:]
+        assert data["next_offset"] == len(TOKENS)
+
+
+class TestStream:
+    """Testes para o stream SSE /ai/api/jobs/<id>/stream"""
+
+    def test_emits_tokens_then_done(self, admin_client, fake_openai):
+        job_id = _submit(admin_client)["job_id"]
+
+        response = admin_client.get(f"/ai/api/jobs/{job_id}/stream")
+        events = [
+            block.split("\n")
+            for block in response.get_data(as_text=True).split("\n\n")
+            if block.startswith("id:") or block.startswith("event:")
+        ]
+
+        assert response.mimetype == "text/event-stream"
+        tokens = [e for e in events if "event: token" in e]
+        assert [json.loads(e[-1][6:])["delta"] for e in tokens] == TOKENS
+        assert events[-1][0] == "event: done"
+        assert json.loads(events[-1][1][6:])["status"] == "completed"
+
+    def test_failed_job_emits_error(self, admin_client, fake_openai, monkeypatch):
+        def broken(*args, **kwargs):
+            raise RuntimeError("OpenAI fora do ar")
+
+        monkeypatch.setattr(ai_service, "_stream_openai", broken)
+        job_id = _submit(admin_client, text="outro texto")["job_id"]
+
+        body = admin_client.get(f"/ai/api/jobs/{job_id}/stream").get_data(
+            as_text=True
+        )
+
+        assert "event: error" in body
+        assert "OpenAI fora do ar" in body
@@ -0,0 +1,106 @@
+"""
+Testes para a gravação em lote dos logs de auditoria
+"""
+
+import threading
+
+import pytest
+from app.models import AuditLog
+from app.services.audit_writer import AuditLogWriter, build_audit_row
+from app.utils.audit import AuditManager
+
+
+@pytest.fixture
+def writer(app, db_session, tmp_path):
+    """Writer assíncrono isolado (o da aplicação roda síncrono nos testes)"""
+    previous = app.extensions.get("audit_writer")
+    writer = AuditLogWriter()
+    writer.init_app(app)
+    writer.enabled = True
+    writer.batch_size = 50
+    writer.flush_interval = 60  # só grava por tamanho de lote ou no shutdown
+    writer.spool_dir = str(tmp_path / "spool")
+    yield writer
+    writer.shutdown()
+    app.extensions["audit_writer"] = previous
+
+
+def _row(index):
+    return build_audit_row(
+        entity_type="user",
+        entity_id=index,
+        action="login_success",
+        description=f"evento {index}",
+        additional_metadata={"index": index},
+    )
+
+
+class TestAuditLogWriter:
+    """Testes para o AuditLogWriter"""
+
+    def test_no_events_lost_on_graceful_shutdown(self, writer):
+        """Tudo o que foi enfileirado é gravado ao encerrar"""
+        threads = [
+            threading.Thread(
+                target=lambda base: [writer.write(_row(base + i)) for i in range(130)],
+                args=(t * 1000,),
+            )
+            for t in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        writer.shutdown()
+
+        assert AuditLog.query.count() == 520
+        stats = writer.stats()
+        assert stats["enqueued"] == 520
+        assert stats["written"] == 520
+        assert stats["queue_depth"] == 0
+        assert stats["spool_files"] == 0
+
+    def test_full_queue_spills_to_spool_and_replays(self, writer):
+        """Backpressure: fila cheia vai para o spool, regravado no shutdown"""
+        writer.max_queue = 5
+        writer._queue = writer._queue.__class__(maxsize=5)
+        writer._ensure_thread = lambda: None  # thread parada: a fila enche
+
+        for i in range(20):
+            writer.write(_row(i))
+
+        stats = writer.stats()
+        assert stats["spooled"] == 15
+        assert stats["spool_files"] == 15
+        assert AuditLog.query.count() == 0
+
+        writer.shutdown()
+
+        assert AuditLog.query.count() == 20
+        assert writer.stats()["spool_files"] == 0
+
+    def test_does_not_commit_caller_session(
+        self, writer, db_session, sample_user, monkeypatch
+    ):
+        """log_change não efetiva alterações pendentes do chamador"""
+        monkeypatch.setattr("app.utils.audit.audit_writer", writer)
+
+        sample_user.full_name = "Nome Pendente"
+        AuditManager.log_change(
+            entity_type="user", entity_id=sample_user.id, action="update"
+        )
+        db_session.rollback()
+        assert writer.flush()
+
+        assert db_session.get(type(sample_user), sample_user.id).full_name == "Test User"
+        assert AuditLog.query.filter_by(entity_id=sample_user.id).count() == 1
+
+    def test_flush_writes_pending_events(self, writer):
+        """flush() grava o que ainda não completou um lote"""
+        for i in range(7):
+            writer.write(_row(i))
+
+        assert writer.flush()
+        assert AuditLog.query.count() == 7
+        assert writer.stats()["last_batch_size"] == 7
@@ -0,0 +1,106 @@
+"""
+Testes para a cópia local das séries do BCB usada pela calculadora
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from app.models import EconomicIndexValue
+from app.services import bcb_api, bcb_series
+from app.services.bcb_api import calcular_fator_correcao, obter_ultimo_indice
+from app.services.bcb_series import bcb_series_store
+
+IPCA_2024 = {
+    date(2024, 1, 1): "0.42",
+    date(2024, 2, 1): "0.83",
+    date(2024, 3, 1): "0.16",
+    date(2024, 4, 1): "0.38",
+}
+
+
+@pytest.fixture
+def store(db_session, monkeypatch):
+    """Série IPCA de jan-abr/2024 no banco; a API do BCB não pode ser chamada"""
+    for month, value in IPCA_2024.items():
+        db_session.add(
+            EconomicIndexValue(indice="IPCA", reference_month=month, value=value)
+        )
+    db_session.commit()
+
+    def offline(*args, **kwargs):
+        raise AssertionError("a API do BCB não deveria ser consultada")
+
+    monkeypatch.setattr(bcb_api.requests, "get", offline)
+    bcb_series_store.load()
+    yield bcb_series_store
+    bcb_series_store._series = {}
+    bcb_series_store._loaded_at = 0.0
+
+
+def _product(values):
+    fator = Decimal("1")
+    for value in values:
+        fator *= 1 + Decimal(value) / 100
+    return fator
+
+
+class TestLocalFactor:
+    """Testes para BCBSeriesStore.fator"""
+
+    def test_factor_matches_monthly_product(self, store):
+        window = store.fator("IPCA", date(2024, 2, 1), date(2024, 3, 31))
+
+        assert window.fator == _product(["0.83", "0.16"])
+        assert window.meses == 2
+        assert [v["data"] for v in window.valores_mensais] == [
+            "01/02/2024",
+            "01/03/2024",
+        ]
+        assert window.atualizado_ate == date(2024, 4, 1)
+
+    def test_period_before_series_is_not_covered(self, store):
+        assert store.fator("IPCA", date(2023, 12, 1), date(2024, 3, 1)) is None
+        assert store.fator("INPC", date(2024, 1, 1), date(2024, 3, 1)) is None
+
+    def test_calculator_reads_local_series(self, store):
+        result = calcular_fator_correcao(
+            "IPCA", datetime(2024, 1, 1), datetime(2024, 4, 30)
+        )
+
+        assert result["sucesso"] is True
+        assert result["periodo"]["meses"] == 4
+        assert result["fator_correcao"] == float(
+            _product(IPCA_2024.values()).quantize(Decimal("0.000001"))
+        )
+        assert "atualizada até 04/2024" in result["observacao"]
+
+    def test_latest_value_from_local_series(self, store):
+        assert obter_ultimo_indice("IPCA")["data"] == "01/04/2024"
+
+
+class TestSync:
+    """Testes para a sincronização incremental (flask bcb-sync)"""
+
+    def test_only_months_after_last_are_fetched(self, store, monkeypatch):
+        requests = []
+
+        def fake_sgs(codigo, data_inicio, data_fim, timeout=5):
+            requests.append(data_inicio)
+            return [
+                {"data": "01/04/2024", "valor": "0.38"},
+                {"data": "01/05/2024", "valor": "0,46"},
+            ]
+
+        monkeypatch.setattr(bcb_series, "buscar_serie_bcb", fake_sgs)
+
+        assert store.sync(["IPCA"]) == {"IPCA": 1}
+        assert requests == ["01/05/2024"]
+        assert EconomicIndexValue.query.filter_by(indice="IPCA").count() == 5
+        assert store.ultimo("IPCA") == (date(2024, 5, 1), Decimal("0.46"))
+
+    def test_api_failure_keeps_series(self, store, monkeypatch):
+        monkeypatch.setattr(bcb_series, "buscar_serie_bcb", lambda *a, **k: None)
+
+        assert store.sync(["IPCA"]) == {"IPCA": None}
+        assert store.ultimo("IPCA")[0] == date(2024, 4, 1)
@@ -0,0 +1,106 @@
+"""
+Testes para o benchmark de endpoints (scripts/benchmark_endpoints.py)
+"""
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+SCRIPT = os.path.join(
+    os.path.dirname(__file__), "..", "..", "scripts", "benchmark_endpoints.py"
+)
+
+_spec = importlib.util.spec_from_file_location("benchmark_endpoints", SCRIPT)
+benchmark = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(benchmark)
+
+
+def _summary(p95_ms=10.0, queries_max=3, n_plus_one=0):
+    return {"p95_ms": p95_ms, "queries_max": queries_max, "n_plus_one": n_plus_one}
+
+
+class TestStatistics:
+    """Testes para percentis e resumo das amostras"""
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+
+        assert benchmark.percentile(values, 50) == 50
+        assert benchmark.percentile(values, 95) == 95
+        assert benchmark.percentile([7], 99) == 7
+
+    def test_summarize(self):
+        # (ms, queries, provável N+1, erro)
+        samples = [
+            (10.0, 2, False, False),
+            (30.0, 4, True, False),
+            (20.0, 3, False, True),
+        ]
+
+        summary = benchmark.summarize(samples, wall_seconds=0.5)
+
+        assert summary["p50_ms"] == 20.0
+        assert summary["queries_max"] == 4
+        assert (summary["n_plus_one"], summary["errors"]) == (1, 1)
+        assert summary["rps"] == 6.0
+
+
+class TestCompare:
+    """Testes para a comparação com o baseline"""
+
+    def test_within_tolerance(self):
+        baseline = {"results": {"sequential": {"/dashboard": _summary()}}}
+        results = {"sequential": {"/dashboard": _summary(p95_ms=12.0)}}
+
+        assert benchmark.compare(results, baseline, tolerance=0.25) == []
+
+    def test_regressions(self):
+        baseline = {"results": {"sequential": {"/dashboard": _summary()}}}
+        results = {
+            "sequential": {
+                "/dashboard": _summary(p95_ms=13.0, queries_max=4, n_plus_one=1)
+            }
+        }
+
+        regressions = benchmark.compare(results, baseline, tolerance=0.25)
+
+        assert len(regressions) == 3
+        assert regressions[0].startswith("sequential /dashboard: p95 13.0ms")
+
+    def test_new_endpoint_is_not_a_regression(self):
+        results = {"load": {"/novo": _summary(p95_ms=999.0)}}
+        assert benchmark.compare(results, {"results": {}}, tolerance=0) == []
+
+
+@pytest.mark.slow
+def test_smoke_run_has_no_errors(tmp_path):
+    """Volumes mínimos: todos os endpoints respondem sem erro"""
+    output = tmp_path / "resultado.json"
+    # fmt: off
+    args = [
+        "--offices", "1", "--lawyers", "2", "--clients", "20",
+        "--processes", "20", "--deadlines", "20", "--petitions", "5",
+        "--messages", "20", "--iterations", "2", "--warmup", "0",
+        "--workers", "2", "--baseline", str(tmp_path / "baseline.json"),
+        "--output", str(output),
+    ]
+    # fmt: on
+
+    completed = subprocess.run(
+        [sys.executable, SCRIPT, *args], capture_output=True, text=True, timeout=300
+    )
+
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    results = json.loads(output.read_text())["results"]
+    errors = {
+        f"{mode} {name}": data["errors"]
+        for mode, endpoints in results.items()
+        for name, data in endpoints.items()
+        if data["errors"]
+    }
+    assert errors == {}
+    assert set(results["sequential"]) == set(benchmark.build_endpoints({}))
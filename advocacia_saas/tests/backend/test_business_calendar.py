@@ -0,0 +1,100 @@
+"""
+Testes para o calendário forense (dias úteis, feriados e recesso)
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+from app.models import Deadline, JudicialHoliday
+from app.services.business_calendar import (
+    BusinessCalendarStore,
+    business_calendar,
+    easter,
+)
+
+
+@pytest.fixture
+def store(db_session):
+    store = BusinessCalendarStore()
+    store.reload_interval = 0
+    return store
+
+
+class TestBusinessCalendar:
+    """Testes para app/services/business_calendar.py"""
+
+    def test_easter_and_movable_holidays(self, store):
+        assert easter(2026) == date(2026, 4, 5)
+        # Sexta-feira Santa e Carnaval
+        assert not store.is_business_day(date(2026, 4, 3))
+        assert not store.is_business_day(date(2026, 2, 16))
+        assert store.is_business_day(date(2026, 2, 18))
+
+    def test_counts_exclude_start_and_include_end(self, store):
+        # 16/10/2026 é sexta; 12/10 (N. Sra. Aparecida) não conta
+        assert store.business_days_between(date(2026, 10, 16), date(2026, 10, 23)) == 5
+        assert store.business_days_between(date(2026, 10, 16), date(2026, 10, 9)) == -4
+        assert store.add_business_days(date(2026, 10, 16), 5) == date(2026, 10, 23)
+
+    def test_recess_suspends_deadlines(self, store):
+        # 3 dias úteis antes do recesso e o restante a partir de 21/01
+        assert store.add_business_days(date(2026, 12, 15), 5) == date(2027, 1, 22)
+
+    def test_calendar_days_are_extended_to_next_business_day(self, store):
+        # 15/11/2026 é domingo e feriado
+        due = store.due_date(date(2026, 11, 10), 5, business_days=False)
+        assert due == date(2026, 11, 16)
+
+    def test_state_and_court_holidays(self, db_session, store):
+        db_session.add_all(
+            [
+                JudicialHoliday(
+                    day=date(2026, 7, 9), name="Revolução Constitucionalista", uf="SP"
+                ),
+                JudicialHoliday(
+                    day=date(2026, 8, 11),
+                    name="Dia do Advogado",
+                    court="Justiça Federal",
+                ),
+            ]
+        )
+        db_session.commit()
+
+        assert not store.is_business_day(date(2026, 7, 9), uf="SP")
+        assert store.is_business_day(date(2026, 7, 9), uf="RJ")
+        assert not store.is_business_day(date(2026, 8, 11), court="Justiça Federal")
+        assert store.is_business_day(date(2026, 8, 11), uf="SP")
+
+    def test_bulk_api_matches_single_calls(self, store):
+        today = date(2026, 10, 16)
+        items = [
+            (today + timedelta(days=offset), uf, None)
+            for offset in range(-40, 400, 7)
+            for uf in ("SP", "MG")
+        ]
+
+        bulk = store.business_days_until_many(items, today=today)
+
+        assert bulk == [
+            store.business_days_between(today, due, uf, court)
+            for due, uf, court in items
+        ]
+        assert store.add_business_days_many([(today, 15, "RJ", None)]) == [
+            date(2026, 11, 9)
+        ]
+
+    def test_deadline_days_until_uses_business_days(self, db_session, sample_user):
+        today = datetime.now(timezone.utc).date()
+        deadline = Deadline(
+            user_id=sample_user.id,
+            title="Contestação",
+            deadline_date=datetime.combine(today + timedelta(days=30), time(18, 0)),
+            count_business_days=True,
+        )
+        db_session.add(deadline)
+        db_session.commit()
+
+        assert deadline.days_until() == business_calendar.business_days_between(
+            today, today + timedelta(days=30)
+        )
+        assert deadline.days_until(use_business_days=False) == 30
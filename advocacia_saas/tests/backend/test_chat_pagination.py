@@ -0,0 +1,160 @@
+"""
+Testes para a paginação por cursor do chat (advogado e portal do cliente)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from app.chat.repository import MessageRepository
+from app.models import ChatRoom, Client, Message, User
+
+START = datetime(2026, 10, 1, 12, 0)
+
+
+@pytest.fixture
+def conversation(db_session, sample_user):
+    """Cliente com acesso ao portal, sala de chat e 7 mensagens alternadas"""
+    client_user = User(
+        username="cliente",
+        email="cliente@example.com",
+        full_name="Cliente Teste",
+        user_type="cliente",
+    )
+    client_user.set_password("StrongPass123!", skip_history_check=True)
+    db_session.add(client_user)
+    db_session.flush()
+    client = Client(
+        lawyer_id=sample_user.id,
+        user_id=client_user.id,
+        full_name="Cliente Teste",
+        cpf_cnpj="12345678901",
+        email="cliente@example.com",
+        mobile_phone="(11) 99999-0000",
+    )
+    db_session.add(client)
+    db_session.flush()
+    room = ChatRoom(lawyer_id=sample_user.id, client_id=client.id)
+    db_session.add(room)
+
+    messages = []
+    for index in range(7):
+        from_lawyer = index % 2 == 0
+        message = Message(
+            sender_id=sample_user.id if from_lawyer else client_user.id,
+            recipient_id=client_user.id if from_lawyer else sample_user.id,
+            client_id=client.id,
+            content=f"Mensagem {index}",
+            created_at=START + timedelta(minutes=index),
+        )
+        db_session.add(message)
+        messages.append(message)
+    db_session.commit()
+    return room, client_user, messages
+
+
+def _ids(messages):
+    return [message.id for message in messages]
+
+
+class TestMessagePage:
+    """Testes para MessageRepository.get_messages_page"""
+
+    def test_latest_page_then_history(self, conversation, sample_user):
+        _, client_user, messages = conversation
+
+        page, has_more = MessageRepository.get_messages_page(
+            sample_user.id, client_user.id, limit=3
+        )
+        assert _ids(page) == _ids(messages[4:])
+        assert has_more
+
+        page, has_more = MessageRepository.get_messages_page(
+            sample_user.id, client_user.id, before_id=page[0].id, limit=3
+        )
+        assert _ids(page) == _ids(messages[1:4])
+        assert has_more
+
+        page, has_more = MessageRepository.get_messages_page(
+            sample_user.id, client_user.id, before_id=page[0].id, limit=3
+        )
+        assert _ids(page) == _ids(messages[:1])
+        assert not has_more
+
+    def test_after_id_returns_only_new_messages(self, conversation, sample_user):
+        _, client_user, messages = conversation
+
+        page, has_more = MessageRepository.get_messages_page(
+            sample_user.id, client_user.id, after_id=messages[4].id
+        )
+        assert _ids(page) == _ids(messages[5:])
+        assert not has_more
+
+    def test_ties_on_created_at_are_ordered_by_id(
+        self, db_session, conversation, sample_user
+    ):
+        _, client_user, messages = conversation
+        for message in messages:
+            message.created_at = START
+        db_session.commit()
+
+        first, _ = MessageRepository.get_messages_page(
+            sample_user.id, client_user.id, limit=4
+        )
+        rest, has_more = MessageRepository.get_messages_page(
+            sample_user.id, client_user.id, before_id=first[0].id, limit=4
+        )
+        assert _ids(rest + first) == _ids(messages)
+        assert not has_more
+
+    def test_deleted_cursor_falls_back_to_id(
+        self, db_session, conversation, sample_user
+    ):
+        _, client_user, messages = conversation
+        cursor_id = messages[3].id
+        db_session.delete(messages[3])
+        db_session.commit()
+
+        page, _ = MessageRepository.get_messages_page(
+            sample_user.id, client_user.id, after_id=cursor_id
+        )
+        assert _ids(page) == _ids(messages[4:])
+
+
+class TestChatPaginationApi:
+    """Testes para as APIs paginadas do chat"""
+
+    def test_lawyer_messages_api(self, authenticated_client, conversation):
+        room, _, messages = conversation
+
+        data = authenticated_client.get(
+            f"/chat/api/messages/{room.id}?limit=2"
+        ).get_json()
+        assert [m["id"] for m in data["messages"]] == _ids(messages[5:])
+        assert data["has_more"] is True
+
+        data = authenticated_client.get(
+            f"/chat/api/messages/{room.id}?after_id={messages[6].id}"
+        ).get_json()
+        assert data == {"messages": [], "has_more": False}
+
+    def test_portal_messages_api(self, client, conversation):
+        _, client_user, messages = conversation
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(client_user.id)
+            sess["_fresh"] = True
+
+        data = client.get(
+            f"/portal/api/chat/messages?before_id={messages[2].id}"
+        ).get_json()
+        assert [m["id"] for m in data["messages"]] == _ids(messages[:2])
+        assert [m["sender_type"] for m in data["messages"]] == ["lawyer", "client"]
+        assert data["has_more"] is False
+
+    def test_mark_conversation_as_read(self, conversation, sample_user):
+        _, client_user, _ = conversation
+
+        assert MessageRepository.mark_conversation_as_read(
+            sample_user.id, client_user.id
+        ) == 3
+        assert MessageRepository.count_unread(sample_user.id) == 0
+        assert MessageRepository.count_unread(client_user.id) == 4
@@ -0,0 +1,139 @@
+"""
+Testes para o ledger de créditos de IA (débitos atômicos e reservas)
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.models import (
+    CreditReservation,
+    CreditTransaction,
+    Notification,
+    UserCredits,
+)
+from app.services.credit_ledger import credit_ledger
+from sqlalchemy import update
+
+
+@pytest.fixture
+def account(db_session, sample_user):
+    """Conta com 20 créditos lançados no diário"""
+    credit_ledger.credit(sample_user.id, 20, "purchase", description="Compra")
+    db_session.commit()
+    return sample_user.id
+
+
+def _balance(user_id):
+    return UserCredits.query.filter_by(user_id=user_id).one().balance
+
+
+class TestDebitCredit:
+    """Testes para debit/credit/adjust"""
+
+    def test_credit_creates_account(self, account):
+        credits = UserCredits.query.filter_by(user_id=account).one()
+        assert credits.balance == 20
+        assert credits.total_purchased == 20
+
+    def test_debit_journals_balance_after(self, db_session, account):
+        transaction = credit_ledger.debit(account, 7, description="Seção")
+        db_session.commit()
+
+        assert transaction.amount == -7
+        assert transaction.balance_after == 13
+        assert _balance(account) == 13
+        assert UserCredits.query.filter_by(user_id=account).one().total_used == 7
+
+    def test_debit_without_balance_changes_nothing(self, db_session, account):
+        assert credit_ledger.debit(account, 21) is None
+        db_session.commit()
+
+        assert _balance(account) == 20
+        assert CreditTransaction.query.filter_by(transaction_type="usage").count() == 0
+
+    def test_stale_object_cannot_overdraw(self, db_session, account):
+        credits = UserCredits.query.filter_by(user_id=account).one()
+        # Outro worker gastou o saldo depois que este objeto foi carregado
+        db_session.execute(
+            update(UserCredits)
+            .where(UserCredits.user_id == account)
+            .values(balance=2)
+            .execution_options(synchronize_session=False)
+        )
+
+        assert credits.use_credits(3) is False
+        assert credits.use_credits(2) is True
+        db_session.commit()
+        assert _balance(account) == 0
+
+
+class TestReservations:
+    """Testes para reserve/commit/release"""
+
+    def test_commit_charges_actual_cost_and_refunds_rest(self, db_session, account):
+        reservation = credit_ledger.reserve(account, 10, description="Job")
+        db_session.commit()
+        assert _balance(account) == 10
+
+        transaction = credit_ledger.commit(reservation.id, 4)
+        db_session.commit()
+
+        assert transaction.amount == -4
+        assert transaction.description == "Job"
+        assert _balance(account) == 16
+        assert credit_ledger.verify(account) == (16, 16)
+        # Efetivar de novo não cobra duas vezes
+        assert credit_ledger.commit(reservation.id) is None
+
+    def test_release_returns_credits_once(self, db_session, account):
+        reservation = credit_ledger.reserve(account, 15)
+        db_session.commit()
+        assert credit_ledger.verify(account) == (5, 5)
+
+        assert credit_ledger.release(reservation.id) is True
+        assert credit_ledger.release(reservation.id) is False
+        db_session.commit()
+
+        assert _balance(account) == 20
+        assert credit_ledger.commit(reservation.id) is None
+
+    def test_reserve_without_balance(self, db_session, account):
+        assert credit_ledger.reserve(account, 25) is None
+        assert CreditReservation.query.count() == 0
+
+    def test_release_expired(self, db_session, account):
+        credit_ledger.reserve(account, 5, ttl=60)
+        credit_ledger.reserve(account, 5, ttl=3600)
+        db_session.commit()
+
+        later = datetime.now(timezone.utc) + timedelta(minutes=5)
+        assert credit_ledger.release_expired(now=later) == 1
+        assert _balance(account) == 15
+
+
+class TestLowBalanceNotification:
+    """Testes para o aviso de saldo baixo depois do commit"""
+
+    def _low_notifications(self, user_id):
+        return Notification.query.filter_by(user_id=user_id, type="credit_low").count()
+
+    def test_notifies_once_when_crossing_threshold(self, db_session, account):
+        credit_ledger.debit(account, 5)
+        db_session.commit()
+        assert self._low_notifications(account) == 0
+
+        credit_ledger.debit(account, 6)
+        assert self._low_notifications(account) == 0  # só depois do commit
+        db_session.commit()
+        assert self._low_notifications(account) == 1
+
+        credit_ledger.debit(account, 1)
+        db_session.commit()
+        assert self._low_notifications(account) == 1
+
+    def test_rollback_does_not_notify(self, db_session, account):
+        credit_ledger.debit(account, 15)
+        db_session.rollback()
+
+        assert self._low_notifications(account) == 0
+        assert _balance(account) == 20
@@ -0,0 +1,129 @@
+"""
+Testes para o cliente DataJud (cache, fan-out paralelo e refresh em lote),
+contra o servidor fake de scripts/fake_datajud_server.py
+"""
+
+import importlib.util
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+from app.models import Process, ProcessMovement
+from app.services.datajud_service import (
+    DataJudResponseCache,
+    DataJudService,
+    datajud_client,
+    detect_tribunal_from_number,
+)
+
+# O servidor fake só encontra o processo no tribunal indicado pelo número
+NUMERO_CNJ = "0001234-56.2024.8.26.0100"
+NUMERO = "00012345620248260100"
+TRIBUNAL = detect_tribunal_from_number(NUMERO)
+
+_spec = importlib.util.spec_from_file_location(
+    "fake_datajud_server",
+    os.path.join(
+        os.path.dirname(__file__), "..", "..", "scripts", "fake_datajud_server.py"
+    ),
+)
+fake_datajud_server = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(fake_datajud_server)
+FakeDataJudHandler = fake_datajud_server.FakeDataJudHandler
+
+
+@pytest.fixture
+def datajud(monkeypatch):
+    """Servidor fake sem latência; devolve o contador de buscas por tribunal"""
+    monkeypatch.setattr(FakeDataJudHandler, "delay", 0)
+    FakeDataJudHandler.stats.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeDataJudHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setattr(
+        datajud_client, "base_url", f"http://127.0.0.1:{server.server_port}"
+    )
+    monkeypatch.setattr(datajud_client, "_cache", DataJudResponseCache())
+    yield FakeDataJudHandler.stats
+    server.shutdown()
+    server.server_close()
+
+
+class TestFetch:
+    """Testes para DataJudClient.fetch e o cache de respostas"""
+
+    def test_hit_is_cached(self, datajud):
+        first = datajud_client.fetch(TRIBUNAL, NUMERO, "chave")
+        second = datajud_client.fetch(TRIBUNAL, NUMERO, "chave")
+
+        assert first["status"] == second["status"] == "hit"
+        assert (first["cached"], second["cached"]) == (False, True)
+        assert second["processo"] == first["processo"]
+        assert datajud[TRIBUNAL] == 1
+
+    def test_expired_miss_is_fetched_again(self, datajud, monkeypatch):
+        monkeypatch.setattr(datajud_client, "negative_cache_ttl", -1)
+        assert datajud_client.fetch("TJRJ", NUMERO, "chave")["status"] == "miss"
+
+        # TTL negativo já venceu: a segunda consulta volta ao servidor
+        result = datajud_client.fetch("TJRJ", NUMERO, "chave")
+        assert result == {"status": "miss", "processo": None, "cached": False}
+        assert datajud["TJRJ"] == 2
+
+    def test_repeated_miss_comes_from_cache(self, datajud):
+        datajud_client.fetch("TJRJ", NUMERO, "chave")
+        result = datajud_client.fetch("TJRJ", NUMERO, "chave")
+
+        assert result == {"status": "miss", "processo": None, "cached": True}
+        assert datajud["TJRJ"] == 1
+
+    def test_errors_are_not_cached(self, datajud, monkeypatch):
+        monkeypatch.setattr(datajud_client, "base_url", "http://127.0.0.1:1")
+
+        assert datajud_client.fetch(TRIBUNAL, NUMERO, "chave")["status"] == "error"
+        assert datajud_client.cache.get(TRIBUNAL, NUMERO) == (False, None)
+
+
+class TestFanOut:
+    """Testes para a busca paralela em vários tribunais"""
+
+    def test_first_hit_wins(self, datajud):
+        tribunal, result = datajud_client.fetch_first(
+            ["TJRJ", "TJMG", TRIBUNAL], NUMERO, "chave"
+        )
+
+        assert tribunal == TRIBUNAL
+        assert result["status"] == "hit"
+
+    def test_no_tribunal_found(self, datajud):
+        result = datajud_client.fetch_first(["TJRJ", "TJMG"], NUMERO, "chave")
+        assert result == (None, None)
+
+    def test_search_multiple_tribunals(self, app, datajud):
+        response = DataJudService.search_multiple_tribunals(NUMERO_CNJ, ["TJRJ"])
+
+        assert response["success"] is True
+        assert response["raw"]["numeroProcesso"] == NUMERO
+
+
+class TestRefreshProcesses:
+    """Testes para o refresh em lote do job noturno"""
+
+    def test_refresh_is_idempotent(self, datajud, db_session, sample_user):
+        process = Process(
+            user_id=sample_user.id,
+            title="Processo DataJud",
+            process_number=NUMERO_CNJ,
+        )
+        db_session.add(process)
+        db_session.commit()
+
+        first = DataJudService.refresh_processes([process])
+        second = DataJudService.refresh_processes([process])
+
+        assert first["found"] == 1 and first["movements"] >= 1
+        assert second["movements"] == 0
+        assert ProcessMovement.query.count() == first["movements"]
+        # O refresh ignora o cache: as duas rodadas consultaram o tribunal
+        assert datajud[TRIBUNAL] == 2
@@ -0,0 +1,146 @@
+"""
+Testes para a varredura em lote de prazos (alertas e avisos de processos)
+"""
+
+from datetime import date, datetime, time
+
+from app.models import (
+    Deadline,
+    EmailOutbox,
+    Notification,
+    Process,
+    ProcessAutomation,
+    ProcessNotification,
+)
+from app.services.deadline_scanner import (
+    scan_deadline_alerts,
+    scan_process_deadlines,
+)
+
+# Sexta-feira
+TODAY = date(2026, 10, 16)
+
+
+def _queued_alerts():
+    """Contexto dos alertas gravados na fila de saída"""
+    return [
+        {"to": row.recipients[0], "subject": row.subject, **row.context}
+        for row in EmailOutbox.query.filter_by(category="deadline_alert")
+        .order_by(EmailOutbox.id)
+        .all()
+    ]
+
+
+def _deadline(user, title, day, **fields):
+    return Deadline(
+        user_id=user.id,
+        title=title,
+        deadline_date=datetime.combine(day, time(18, 0)),
+        **fields,
+    )
+
+
+class TestDeadlineAlertScanner:
+    """Testes para scan_deadline_alerts"""
+
+    def test_alerts_only_deadlines_inside_window(self, db_session, sample_user):
+        db_session.add_all(
+            [
+                # 2 dias úteis
+                _deadline(sample_user, "Contestação", date(2026, 10, 20)),
+                # Fora dos 7 dias úteis padrão
+                _deadline(sample_user, "Réplica", date(2026, 11, 20)),
+                # Mesma data, mas com antecedência de 30 dias úteis
+                _deadline(
+                    sample_user, "Apelação", date(2026, 11, 20), alert_days_before=30
+                ),
+            ]
+        )
+        db_session.commit()
+
+        result = scan_deadline_alerts(today=TODAY)
+
+        assert result.notifications == 2
+        alerted = {
+            d.title for d in Deadline.query.filter_by(alert_sent=True).all()
+        }
+        assert alerted == {"Contestação", "Apelação"}
+        messages = {n.message for n in Notification.query.all()}
+        assert "Contestação vence em 2 dias" in messages
+        sent_emails = _queued_alerts()
+        assert sorted(email["deadline"]["title"] for email in sent_emails) == [
+            "Apelação",
+            "Contestação",
+        ]
+        assert sent_emails[0]["deadline"]["user"]["name"] == "Test User"
+
+    def test_second_run_does_not_duplicate(self, db_session, sample_user):
+        db_session.add(_deadline(sample_user, "Embargos", date(2026, 10, 19)))
+        db_session.commit()
+
+        assert scan_deadline_alerts(today=TODAY).notifications == 1
+        assert scan_deadline_alerts(today=TODAY).notifications == 0
+        assert Notification.query.count() == 1
+        assert len(_queued_alerts()) == 1
+
+    def test_runs_prefetched_automations(self, db_session, sample_user):
+        db_session.add_all(
+            [
+                _deadline(sample_user, "Recurso", date(2026, 10, 21)),
+                ProcessAutomation(
+                    user_id=sample_user.id,
+                    name="Avisar equipe",
+                    trigger_type="deadline",
+                    action_type="notification",
+                    action_config={"title": "Automação", "message": "Prazo"},
+                    applies_to_all_processes=True,
+                ),
+            ]
+        )
+        db_session.commit()
+
+        result = scan_deadline_alerts(today=TODAY)
+
+        assert result.automations == 1
+        assert Notification.query.filter_by(type="automation").count() == 1
+
+
+class TestProcessDeadlineScanner:
+    """Testes para scan_process_deadlines"""
+
+    def test_buckets_and_daily_dedupe(self, db_session, sample_user):
+        for number, day in [
+            ("overdue", date(2026, 10, 14)),
+            ("today", TODAY),
+            ("urgent", date(2026, 10, 20)),
+            ("warning", date(2026, 10, 26)),
+            ("far", date(2026, 12, 1)),
+        ]:
+            db_session.add(
+                Process(
+                    user_id=sample_user.id,
+                    title=f"Processo {number}",
+                    process_number=number,
+                    next_deadline=day,
+                )
+            )
+        db_session.commit()
+
+        assert scan_process_deadlines(today=TODAY).notifications == 4
+        types = {
+            n.process.process_number: n.notification_type
+            for n in ProcessNotification.query.all()
+        }
+        assert types == {
+            "overdue": "deadline_overdue",
+            "today": "deadline_today",
+            "urgent": "deadline_urgent",
+            "warning": "deadline_warning",
+        }
+        overdue = ProcessNotification.query.filter_by(
+            notification_type="deadline_overdue"
+        ).one()
+        assert overdue.extra_data["days_overdue"] == 2
+
+        # Mesmo dia: o NOT EXISTS descarta os processos já avisados
+        assert scan_process_deadlines(today=TODAY).notifications == 0
@@ -0,0 +1,104 @@
+"""
+Testes para o digest de notificações em lote
+"""
+
+from datetime import datetime, time, timezone
+
+from app.models import EmailOutbox, NotificationPreferences, NotificationQueue, User
+from app.services.digest_builder import build_digests
+
+# Segunda-feira, 08:30 em São Paulo e 12:30 em Lisboa
+NOW = datetime(2026, 10, 19, 11, 30, tzinfo=timezone.utc)
+
+
+def _user(db_session, name, tz="America/Sao_Paulo", items=1, **prefs):
+    user = User(
+        username=name,
+        email=f"{name}@example.com",
+        full_name=name.title(),
+        password_hash="x",
+        user_type="advogado",
+        timezone=tz,
+    )
+    db_session.add(user)
+    db_session.flush()
+    db_session.add(
+        NotificationPreferences(
+            user_id=user.id,
+            digest_enabled=True,
+            digest_time=time(8, 0),
+            **prefs,
+        )
+    )
+    for index in range(items):
+        db_session.add(
+            NotificationQueue(
+                user_id=user.id,
+                notification_type="process_update",
+                channel="email",
+                title=f"Movimentação {index}",
+                message="Juntada de petição",
+                status="digest",
+            )
+        )
+    db_session.commit()
+    return user
+
+
+def _digest_recipients():
+    return sorted(
+        row.recipients[0] for row in EmailOutbox.query.filter_by(category="digest")
+    )
+
+
+class TestDigestBuilder:
+    """Testes para build_digests"""
+
+    def test_sends_only_users_due_in_their_timezone(self, db_session):
+        ana = _user(db_session, "ana", items=2)
+        _user(db_session, "bia", tz="Europe/Lisbon")
+        _user(db_session, "caio", digest_frequency="weekly")
+        _user(
+            db_session,
+            "duda",
+            last_digest_sent=datetime(2026, 10, 19, 3, 30),
+        )
+        _user(db_session, "eva", items=0)
+
+        run = build_digests(now=NOW)
+
+        assert run.users == 2
+        assert run.emails == 2
+        assert run.items == 3
+        assert _digest_recipients() == ["ana@example.com", "caio@example.com"]
+        assert {
+            item.status for item in NotificationQueue.query.filter_by(user_id=ana.id)
+        } == {"sent"}
+        assert NotificationQueue.query.filter_by(status="digest").count() == 2
+        prefs = NotificationPreferences.query.filter_by(user_id=ana.id).one()
+        assert prefs.last_digest_sent is not None
+
+    def test_second_run_same_day_sends_nothing(self, db_session):
+        _user(db_session, "ana")
+
+        assert build_digests(now=NOW).emails == 1
+        db_session.expire_all()
+        assert build_digests(now=NOW.replace(minute=45)).emails == 0
+        assert len(_digest_recipients()) == 1
+
+    def test_weekly_digest_waits_for_monday(self, db_session):
+        _user(db_session, "caio", digest_frequency="weekly")
+
+        tuesday = NOW.replace(day=20)
+        assert build_digests(now=tuesday).users == 0
+        assert build_digests(now=NOW).emails == 1
+
+    def test_digest_html_groups_by_category(self, db_session):
+        _user(db_session, "ana", items=7)
+
+        build_digests(now=NOW)
+
+        html = EmailOutbox.query.filter_by(category="digest").one().html
+        assert "Movimentações (7)" in html
+        assert "+ 2 notificações adicionais" in html
+        assert "19/10/2026" in html
@@ -0,0 +1,97 @@
+"""
+Testes para a extração de texto de uploads (cache por hash e faixas de páginas)
+"""
+
+import uuid
+from io import BytesIO
+
+import pytest
+from app.services.document_service import extract_text_from_pdf, iter_pdf_pages
+from app.services.document_text import DocumentTextService, document_text_service
+from werkzeug.datastructures import FileStorage
+
+
+def build_pdf(pages, tag=""):
+    """PDF sintético com uma linha de texto por página"""
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for page in range(1, pages + 1):
+        pdf.drawString(72, 720, f"Conteudo da pagina {page} do processo {tag}")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def upload(data, filename="documento.pdf"):
+    return FileStorage(stream=BytesIO(data), filename=filename)
+
+
+@pytest.fixture(scope="module")
+def pdf_bytes():
+    return build_pdf(30)
+
+
+class TestPdfPages:
+    """Testes para a leitura do PDF em faixas de páginas"""
+
+    def test_iter_pages_in_order_across_chunks(self, pdf_bytes):
+        pages = list(iter_pdf_pages(BytesIO(pdf_bytes), chunk_pages=7))
+
+        assert [number for number, _ in pages] == list(range(1, 31))
+        assert "pagina 30" in pages[-1][1]
+
+
+class TestDocumentTextService:
+    """Testes para o cache do texto extraído"""
+
+    def test_same_text_as_sequential_extraction(self, app, pdf_bytes):
+        expected, _ = extract_text_from_pdf(upload(pdf_bytes))
+
+        text, metadata = document_text_service.extract(upload(pdf_bytes))
+
+        assert text == expected
+        assert metadata["pages"] == 30
+        assert len(metadata["sha256"]) == 64
+
+    def test_second_upload_comes_from_cache(self, app):
+        # Conteúdo único: o cache em disco sobrevive entre execuções
+        data = build_pdf(3, tag=uuid.uuid4().hex)
+
+        _, first = document_text_service.extract(upload(data))
+        text, second = document_text_service.extract(upload(data))
+
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert second["sha256"] == first["sha256"]
+        assert "pagina 3" in text
+
+    def test_txt_is_cached_by_content(self, app):
+        first = upload("Contrato de locação".encode("utf-8"), "a.txt")
+        second = upload("Contrato de locação".encode("utf-8"), "b.txt")
+
+        document_text_service.extract(first)
+        text, metadata = document_text_service.extract(second)
+
+        assert text == "Contrato de locação"
+        assert metadata["cached"] is True
+
+    def test_unsupported_format(self, app):
+        with pytest.raises(ValueError):
+            document_text_service.extract(upload(b"x", "peticao.doc"))
+
+    def test_parallel_ranges_keep_page_order(self, pdf_bytes):
+        service = DocumentTextService()
+        service._workers = 2
+        service._parallel_pages = 10
+        service._chunk_pages = 4
+        expected, _ = extract_text_from_pdf(upload(pdf_bytes))
+
+        try:
+            text, metadata = service._extract_pdf(upload(pdf_bytes))
+        finally:
+            service.shutdown()
+
+        assert text == expected
+        assert metadata["pages"] == 30
@@ -0,0 +1,119 @@
+"""
+Testes para o EntitlementResolver (cache de direitos por plano e usuário)
+"""
+
+import pytest
+from app.models import BillingPlan, Feature, UserPlan
+from app.services.entitlements import entitlement_resolver
+from app.services.query_profiler import query_profiler
+
+
+@pytest.fixture
+def resolver(db_session):
+    """Liga o cache entre requisições só neste teste (desligado no TestConfig)"""
+    entitlement_resolver.invalidate_all()
+    entitlement_resolver.ttl = 300
+    entitlement_resolver.hits = entitlement_resolver.misses = 0
+    yield entitlement_resolver
+    entitlement_resolver.ttl = 0
+    entitlement_resolver.invalidate_all()
+
+
+@pytest.fixture
+def plans(db_session, sample_user):
+    portal = Feature(slug="portal_cliente", name="Portal do Cliente")
+    basic = BillingPlan(slug="basico", name="Básico")
+    pro = BillingPlan(slug="pro", name="Pro", features=[portal])
+    db_session.add_all([portal, basic, pro])
+    db_session.flush()
+    db_session.add(UserPlan(user_id=sample_user.id, plan_id=basic.id))
+    db_session.commit()
+    return {"basico": basic, "pro": pro, "portal": portal}
+
+
+def _entitlements(app, user):
+    # Cada chamada num app context próprio, como requisições separadas
+    with app.app_context():
+        return entitlement_resolver.for_user(user)
+
+
+class TestCache:
+    """Snapshots compartilhados entre requisições"""
+
+    def test_second_request_is_a_hit(self, app, resolver, plans, sample_user):
+        first = _entitlements(app, sample_user)
+        second = _entitlements(app, sample_user)
+
+        assert first == second
+        assert (resolver.misses, resolver.hits) == (1, 1)
+
+    def test_plan_change_invalidates_user(
+        self, app, db_session, resolver, plans, sample_user
+    ):
+        assert not _entitlements(app, sample_user).has_feature("portal_cliente")
+
+        current = UserPlan.query.filter_by(user_id=sample_user.id).one()
+        current.is_current = False
+        db_session.add(UserPlan(user_id=sample_user.id, plan_id=plans["pro"].id))
+        db_session.commit()
+
+        snapshot = _entitlements(app, sample_user)
+        assert snapshot.plan.plan_slug == "pro"
+        assert snapshot.has_feature("portal_cliente")
+        assert resolver.misses == 2
+
+    def test_canceled_subscription_invalidates_user(
+        self, app, db_session, resolver, plans, sample_user
+    ):
+        assert _entitlements(app, sample_user).plan is not None
+
+        UserPlan.query.filter_by(user_id=sample_user.id).one().status = "canceled"
+        db_session.commit()
+
+        assert _entitlements(app, sample_user).plan is None
+
+    def test_plan_edit_invalidates_everyone(
+        self, app, db_session, resolver, plans, sample_user
+    ):
+        assert not _entitlements(app, sample_user).has_feature("portal_cliente")
+
+        plans["basico"].features.append(plans["portal"])
+        db_session.commit()
+
+        assert _entitlements(app, sample_user).has_feature("portal_cliente")
+
+
+class TestRequestMemo:
+    """Snapshot memoizado em flask.g durante a requisição"""
+
+    def test_same_request_reuses_snapshot(self, app, resolver, plans, sample_user):
+        with app.app_context():
+            first = entitlement_resolver.for_user(sample_user)
+            with query_profiler.profile() as profile:
+                second = entitlement_resolver.for_user(sample_user)
+
+        assert second is first
+        assert profile.count == 0
+        assert (resolver.misses, resolver.hits) == (1, 0)
+
+    def test_memo_without_shared_cache(self, app, db_session, plans, sample_user):
+        # ENTITLEMENTS_CACHE_TTL = 0: só o memo evita as queries repetidas
+        sample_user.is_master  # recarrega o usuário fora do perfil
+        with app.app_context():
+            with query_profiler.profile() as profile:
+                for _ in range(5):
+                    entitlement_resolver.for_user(sample_user)
+
+        assert profile.count == 2
+
+    def test_plan_change_clears_request_memo(
+        self, app, db_session, plans, sample_user
+    ):
+        basic_id, pro_id = plans["basico"].id, plans["pro"].id
+        with app.app_context():
+            assert entitlement_resolver.for_user(sample_user).plan_id == basic_id
+
+            UserPlan.query.filter_by(user_id=sample_user.id).one().plan_id = pro_id
+            db_session.commit()
+
+            assert entitlement_resolver.for_user(sample_user).plan_id == pro_id
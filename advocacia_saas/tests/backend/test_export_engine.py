@@ -0,0 +1,124 @@
+"""
+Testes para as exportações CSV/XLSX em streaming
+"""
+
+import csv
+from io import BytesIO, StringIO
+
+import pytest
+from app.models import User
+from app.services import export_engine
+from app.services.export_engine import export_service
+from openpyxl import load_workbook
+
+
+def _users(db_session, count):
+    for index in range(count):
+        db_session.add(
+            User(
+                username=f"export{index}",
+                email=f"export{index}@example.com",
+                full_name=f"Usuário Exportação {index}",
+                user_type="advogado",
+                is_active=True,
+                password_hash="x",
+            )
+        )
+    db_session.commit()
+
+
+def _csv_rows(data):
+    return list(csv.reader(StringIO(data.decode("utf-8"))))
+
+
+class TestExportWriters:
+    """Testes para os geradores de CSV e XLSX"""
+
+    def test_csv_is_emitted_in_chunks(self):
+        rows = ([i, "ação " * 20] for i in range(2000))
+
+        chunks = list(export_engine.csv_chunks(["ID", "Texto"], rows, chunk_size=4096))
+
+        assert len(chunks) > 1
+        parsed = _csv_rows(b"".join(chunks))
+        assert parsed[0] == ["ID", "Texto"]
+        assert len(parsed) == 2001
+        assert parsed[-1][0] == "1999"
+
+    def test_xlsx_round_trip(self):
+        rows = ([i, f"linha {i}\x01"] for i in range(10))
+
+        data = b"".join(export_engine.xlsx_chunks([("Dados", ["ID", "Texto"], rows)]))
+
+        sheet = load_workbook(BytesIO(data)).active
+        values = list(sheet.iter_rows(values_only=True))
+        assert values[0] == ("ID", "Texto")
+        assert values[10] == (9, "linha 9")
+
+    def test_unknown_format_is_rejected(self):
+        with pytest.raises(export_engine.ExportError):
+            export_engine.parse_format("pdf")
+
+
+class TestAdminExports:
+    """Testes para as rotas de exportação do admin"""
+
+    def test_users_csv_is_streamed(self, admin_client, db_session):
+        _users(db_session, 3)
+
+        response = admin_client.get("/admin/api/users/export?format=csv")
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.content_type == "text/csv; charset=utf-8"
+        rows = _csv_rows(response.data)
+        assert rows[0][0] == "ID"
+        assert sorted(row[2] for row in rows[1:]) == [
+            f"export{i}@example.com" for i in range(3)
+        ]
+
+    def test_users_json_keeps_previous_format(self, admin_client, db_session):
+        _users(db_session, 2)
+
+        response = admin_client.get("/admin/api/users/export")
+
+        data = response.get_json()
+        assert len(data) == 2
+        assert data[0]["metrics"]["petitions_total"] == 0
+        assert data[0]["metrics"]["plan_name"] == "Sem plano"
+
+    def test_large_export_runs_as_job(self, admin_client, db_session, monkeypatch):
+        _users(db_session, 5)
+        monkeypatch.setattr(export_service, "async_rows", 3)
+        # Simula o estado dos jobs compartilhado entre workers (Redis)
+        monkeypatch.setattr(export_service, "shared_jobs", True)
+
+        response = admin_client.get("/admin/api/users/export?format=xlsx")
+
+        assert response.status_code == 202
+        job = response.get_json()
+        status = admin_client.get(job["status_url"]).get_json()
+        assert status["status"] == "completed"
+        assert status["rows"] == 5
+
+        download = admin_client.get(status["download_url"])
+        assert download.status_code == 200
+        sheet = load_workbook(BytesIO(download.data)).active
+        assert sheet.max_row == 6
+
+    def test_large_export_streams_without_shared_store(
+        self, admin_client, db_session, monkeypatch
+    ):
+        _users(db_session, 5)
+        monkeypatch.setattr(export_service, "async_rows", 3)
+
+        response = admin_client.get("/admin/api/users/export?format=csv&async=1")
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert len(_csv_rows(response.data)) == 6
+
+    def test_lgpd_audit_log_rejects_invalid_date(self, admin_client, db_session):
+        response = admin_client.get("/lgpd/admin/audit-log/export?date=ontem")
+
+        assert response.status_code == 400
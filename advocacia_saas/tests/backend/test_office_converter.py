@@ -0,0 +1,249 @@
+"""
+Testes para o pool de conversão do LibreOffice (soffice e UNO simulados) e o
+limite de tamanho dos anexos da petição
+"""
+
+import os
+import subprocess
+from io import BytesIO
+
+import app.services.office_converter as office_module
+import pytest
+from app.petitions import routes as petition_routes
+from app.services.office_converter import (
+    OfficeConversionError,
+    OfficeConversionPool,
+    OfficeConversionTimeout,
+    OfficeWorker,
+)
+from app.services.pdf_converter import convert_many_to_pdf
+from werkzeug.datastructures import FileStorage
+
+
+class FakeProcess:
+    """`soffice --convert-to pdf`: o conteúdo do arquivo decide o resultado"""
+
+    def __init__(self, args, calls):
+        self.args = args
+        self.calls = calls
+        self.returncode = None
+        self.pid = -1
+
+    def communicate(self, timeout=None):
+        self.calls["timeouts"].append(timeout)
+        input_path = self.args[-1]
+        out_dir = self.args[self.args.index("--outdir") + 1]
+        with open(input_path, "rb") as f:
+            data = f.read()
+        if data == b"trava":
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        if data == b"falha":
+            self.returncode = 1
+            return b"", b"documento corrompido"
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, "input.pdf"), "wb") as f:
+            f.write(b"%PDF-" + data)
+        self.returncode = 0
+        return b"", b""
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+
+@pytest.fixture
+def calls():
+    return {"popen": [], "timeouts": [], "killed": [], "profiles": []}
+
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path, calls):
+    """Pool com 1 worker no modo CLI e o soffice simulado"""
+
+    def fake_popen(args, **kwargs):
+        calls["popen"].append(args)
+        return FakeProcess(args, calls)
+
+    monkeypatch.setattr(office_module, "find_soffice", lambda path=None: "soffice")
+    monkeypatch.setattr(office_module, "_uno_available", lambda: False)
+    monkeypatch.setattr(office_module, "_popen", fake_popen)
+    monkeypatch.setattr(office_module, "_kill", calls["killed"].append)
+
+    pool = OfficeConversionPool()
+    pool.size = 1
+    pool.timeout = 7
+    pool.profile_dir = str(tmp_path / "profiles")
+    yield pool
+    pool.shutdown()
+
+
+class TestConversion:
+    """Testes para a conversão via soffice --convert-to"""
+
+    def test_converts_and_reports_stats(self, pool, calls):
+        assert pool.convert(b"planilha", "XLSX") == b"%PDF-planilha"
+        assert pool.convert(b"texto", ".doc") == b"%PDF-texto"
+
+        stats = pool.stats()
+        assert (stats["submitted"], stats["completed"], stats["failed"]) == (2, 2, 0)
+        assert stats["mode"] == "cli"
+        assert (stats["workers"], stats["workers_alive"]) == (1, 1)
+        assert stats["in_flight"] == 0
+        assert stats["queue_depth"] == 0
+        assert stats["latency_ms"]["count"] == 2
+        assert stats["queue_wait_ms"]["count"] == 2
+        # Mesmo perfil nas duas conversões: o LibreOffice não começa a frio
+        profiles = {args[1] for args in calls["popen"]}
+        assert len(profiles) == 1
+
+    def test_timeout_kills_soffice_and_recycles_worker(self, pool, calls):
+        with pytest.raises(OfficeConversionTimeout):
+            pool.convert(b"trava", "doc")
+
+        assert calls["timeouts"] == [7]
+        assert len(calls["killed"]) == 1
+        # O worker reciclado continua atendendo
+        assert pool.convert(b"depois", "doc") == b"%PDF-depois"
+        pool.shutdown()
+        stats = pool.stats()
+        assert (stats["timeouts"], stats["failed"], stats["restarts"]) == (1, 1, 1)
+
+    def test_soffice_error_keeps_healthy_worker(self, pool):
+        with pytest.raises(OfficeConversionError, match="documento corrompido"):
+            pool.convert(b"falha", "xls")
+
+        pool.shutdown()
+        stats = pool.stats()
+        assert (stats["failed"], stats["restarts"]) == (1, 0)
+
+    def test_worker_is_recycled_after_max_jobs(self, pool):
+        pool.max_jobs = 2
+
+        for index in range(5):
+            pool.convert(f"doc {index}".encode(), "doc")
+
+        pool.shutdown()
+        assert pool.stats()["restarts"] == 2
+
+    def test_unavailable_without_soffice(self, pool, monkeypatch):
+        monkeypatch.setattr(office_module, "find_soffice", lambda path=None: None)
+
+        assert pool.available is False
+        with pytest.raises(OfficeConversionError):
+            pool.convert(b"x", "doc")
+
+
+class TestUnoWorker:
+    """Testes para o modo UNO (listener e chamada UNO simulados)"""
+
+    @pytest.fixture
+    def uno_pool(self, pool, monkeypatch, calls):
+        def start_listener(worker):
+            calls["profiles"].append(worker.profile_dir)
+            worker.process = FakeProcess(["soffice"], calls)
+
+        def convert_uno(worker, input_path, ext, work_dir):
+            with open(input_path, "rb") as f:
+                data = f.read()
+            if data == b"falha":
+                worker.process.returncode = 1  # soffice morreu
+                raise OfficeConversionError("Falha UNO: conexão perdida")
+            output_path = os.path.join(work_dir, "output.pdf")
+            with open(output_path, "wb") as f:
+                f.write(b"%PDF-" + data + ext.encode())
+            return output_path
+
+        monkeypatch.setattr(office_module, "_uno_available", lambda: True)
+        monkeypatch.setattr(OfficeWorker, "_start_listener", start_listener)
+        monkeypatch.setattr(OfficeWorker, "_convert_uno", convert_uno)
+        return pool
+
+    def test_converts_through_listener(self, uno_pool, calls):
+        assert uno_pool.convert(b"a", "docx") == b"%PDF-adocx"
+        assert uno_pool.convert(b"b", "pptx") == b"%PDF-bpptx"
+
+        assert uno_pool.stats()["mode"] == "uno"
+        # Um único soffice atende as duas conversões
+        assert len(calls["profiles"]) == 1
+
+    def test_dead_soffice_is_recycled(self, uno_pool, calls):
+        with pytest.raises(OfficeConversionError):
+            uno_pool.convert(b"falha", "doc")
+
+        assert uno_pool.convert(b"c", "doc") == b"%PDF-cdoc"
+        uno_pool.shutdown()
+        assert uno_pool.stats()["restarts"] == 1
+        assert len(calls["profiles"]) == 2
+
+
+class TestConvertMany:
+    """Testes para convert_many_to_pdf"""
+
+    def test_office_files_share_the_pool(self, pool, monkeypatch):
+        monkeypatch.setattr(office_module, "office_converter", pool)
+        files = [
+            (b"planilha", "custas.xlsx"),
+            (b"%PDF-1.4", "procuracao.pdf"),
+            (b"falha", "slides.ppt"),
+        ]
+
+        results = convert_many_to_pdf(files)
+
+        assert results == [
+            (b"%PDF-planilha", "custas.pdf"),
+            (b"%PDF-1.4", "procuracao.pdf"),
+            (b"falha", "slides.ppt"),
+        ]
+        assert pool.stats()["submitted"] == 2
+
+
+def _upload(name, size):
+    return FileStorage(stream=BytesIO(b"x" * size), filename=name)
+
+
+class TestExtractAttachments:
+    """Testes para o limite de tamanho dos anexos da petição"""
+
+    @pytest.fixture(autouse=True)
+    def limits(self, monkeypatch):
+        monkeypatch.setattr(petition_routes, "MAX_ATTACHMENT_SIZE", 6)
+        monkeypatch.setattr(petition_routes, "MAX_TOTAL_SIZE_PER_PETITION", 10)
+
+    def test_total_size_is_accumulated(self):
+        files = [_upload("a.pdf", 4), _upload("b.pdf", 4), _upload("c.pdf", 4)]
+
+        with pytest.raises(ValueError, match="Total de arquivos"):
+            petition_routes._extract_attachments(files, convert_to_pdf_enabled=False)
+
+    def test_total_size_at_the_limit(self):
+        files = [_upload("a.pdf", 5), _upload("", 5), _upload("b.pdf", 5)]
+
+        attachments = petition_routes._extract_attachments(
+            files, convert_to_pdf_enabled=False
+        )
+
+        assert [a["filename"] for a in attachments] == ["a.pdf", "b.pdf"]
+        assert [len(a["data"]) for a in attachments] == [5, 5]
+
+    def test_file_over_the_limit(self):
+        with pytest.raises(ValueError, match="excede o limite"):
+            petition_routes._extract_attachments(
+                [_upload("a.pdf", 7)], convert_to_pdf_enabled=False
+            )
+
+    def test_conversion_runs_in_one_batch(self, app, monkeypatch):
+        batches = []
+
+        def fake_convert_many(files):
+            batches.append([name for _, name in files])
+            return [(b"%PDF-", name.rsplit(".", 1)[0] + ".pdf") for _, name in files]
+
+        monkeypatch.setattr(petition_routes, "convert_many_to_pdf", fake_convert_many)
+        files = [_upload("a.xlsx", 3), _upload("b.pdf", 3), _upload("c.txt", 3)]
+
+        attachments = petition_routes._extract_attachments(files)
+
+        assert batches == [["a.xlsx", "c.txt"]]
+        assert [a["filename"] for a in attachments] == ["a.pdf", "b.pdf", "c.pdf"]
@@ -0,0 +1,263 @@
+"""
+Testes para a fila de saída de emails (outbound_email)
+"""
+
+import mailbox
+import shutil
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from app.models import EmailOutbox
+from app.services.email_service import EmailService
+from app.services.mail_transports import (
+    MaildirTransport,
+    MailTransport,
+    SendResult,
+    build_transport,
+)
+from app.services.outbound_email import (
+    PRIORITY_BULK,
+    PRIORITY_HIGH,
+    outbound_email,
+)
+from app.utils.email import send_email
+
+
+class FakeTransport(MailTransport):
+    """Transporte que falha nas primeiras `failures` chamadas"""
+
+    def __init__(self, failures=0, permanent=False):
+        super().__init__("fake")
+        self.failures = failures
+        self.permanent = permanent
+        self.sent = []
+
+    def send_batch(self, messages):
+        if self.failures:
+            self.failures -= 1
+            return [
+                SendResult(False, error="indisponível", permanent=self.permanent)
+                for _ in messages
+            ]
+        self.sent.extend(messages)
+        return [SendResult(True, message_id=f"fake-{m.id}") for m in messages]
+
+
+@pytest.fixture
+def maildir(app, db_session):
+    path = app.config["MAIL_MAILDIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    yield mailbox.Maildir(path, create=True)
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture
+def fake_transport(monkeypatch, db_session):
+    def install(**kwargs):
+        transport = FakeTransport(**kwargs)
+        monkeypatch.setattr(outbound_email, "_transport", transport)
+        return transport
+
+    return install
+
+
+class TestEnqueue:
+    """Testes de enfileiramento e entrega"""
+
+    def test_delivers_to_maildir(self, maildir, db_session):
+        assert outbound_email.enqueue(
+            "cliente@example.com", "Bem-vindo", html="<p>Olá</p>", text="Olá"
+        )
+        db_session.commit()
+
+        row = EmailOutbox.query.one()
+        assert row.status == "sent"
+        assert row.provider == "maildir"
+        assert row.attempts == 1
+        messages = list(maildir)
+        assert len(messages) == 1
+        assert messages[0]["To"] == "cliente@example.com"
+        assert messages[0]["Subject"] == "Bem-vindo"
+
+    def test_renders_template_from_json_context(self, maildir, db_session):
+        outbound_email.enqueue(
+            "adv@example.com",
+            "Prazo próximo",
+            template="emails/deadline_alert.html",
+            deadline={
+                "title": "Contestação",
+                "description": None,
+                "due_date": "20/10/2026",
+                "client": None,
+                "user": {"name": "Dra. Ana"},
+            },
+            days_until=2,
+        )
+        db_session.commit()
+
+        row = EmailOutbox.query.one()
+        assert row.status == "sent"
+        body = list(maildir)[0].get_payload()[1].get_payload(decode=True).decode()
+        assert "Contestação" in body
+        assert "20/10/2026" in body
+
+    def test_idempotency_key_enqueues_once(self, fake_transport, db_session):
+        transport = fake_transport()
+
+        for _ in range(3):
+            outbound_email.enqueue(
+                "adv@example.com",
+                "Prazo",
+                html="<p>Prazo</p>",
+                idempotency_key="deadline_alert:1",
+            )
+            db_session.commit()
+
+        assert EmailOutbox.query.count() == 1
+        assert len(transport.sent) == 1
+
+    def test_blank_recipient_is_ignored(self, db_session):
+        assert outbound_email.enqueue("", "Sem destinatário", html="<p></p>") is False
+        assert EmailOutbox.query.count() == 0
+
+
+class TestTransaction:
+    """A mensagem segue a transação do chamador"""
+
+    def test_sent_only_after_commit(self, fake_transport, db_session):
+        transport = fake_transport()
+
+        outbound_email.enqueue("adv@example.com", "Convite", html="<p>x</p>")
+
+        assert EmailOutbox.query.one().status == "queued"
+        assert transport.sent == []
+        db_session.commit()
+        assert [m.subject for m in transport.sent] == ["Convite"]
+
+    def test_rollback_discards_message(self, fake_transport, db_session):
+        transport = fake_transport()
+
+        outbound_email.enqueue("adv@example.com", "Convite", html="<p>x</p>")
+        db_session.rollback()
+        db_session.commit()
+
+        assert EmailOutbox.query.count() == 0
+        assert transport.sent == []
+
+
+class TestDelivery:
+    """Testes de retentativa, falha permanente e prioridade"""
+
+    def test_transient_failure_is_retried(self, fake_transport, db_session):
+        transport = fake_transport(failures=2)
+
+        outbound_email.enqueue("adv@example.com", "Retry", html="<p>x</p>")
+        db_session.commit()
+
+        row = EmailOutbox.query.one()
+        assert row.status == "sent"
+        assert row.attempts == 3
+        assert row.provider_message_id == f"fake-{row.id}"
+        assert len(transport.sent) == 1
+
+    def test_gives_up_after_max_attempts(self, fake_transport, db_session, monkeypatch):
+        monkeypatch.setattr(outbound_email, "max_attempts", 3)
+        fake_transport(failures=10)
+
+        outbound_email.enqueue("adv@example.com", "Falha", html="<p>x</p>")
+        db_session.commit()
+
+        row = EmailOutbox.query.one()
+        assert row.status == "failed"
+        assert row.attempts == 3
+        assert row.last_error == "indisponível"
+
+    def test_permanent_failure_is_not_retried(self, fake_transport, db_session):
+        fake_transport(failures=1, permanent=True)
+
+        outbound_email.enqueue("invalido@example", "Falha", html="<p>x</p>")
+        db_session.commit()
+
+        row = EmailOutbox.query.one()
+        assert row.status == "failed"
+        assert row.attempts == 1
+
+    def test_backoff_grows_exponentially(self, monkeypatch):
+        monkeypatch.setattr(outbound_email, "retry_seconds", 30)
+
+        first = outbound_email._backoff(1)
+        third = outbound_email._backoff(3)
+
+        assert timedelta(seconds=24) <= first <= timedelta(seconds=36)
+        assert timedelta(seconds=96) <= third <= timedelta(seconds=144)
+        assert outbound_email._backoff(50) <= timedelta(hours=6) * 1.2
+        assert outbound_email._backoff(10_000) >= timedelta(hours=6) * 0.8
+
+    def test_high_priority_goes_first(self, fake_transport, db_session, monkeypatch):
+        transport = fake_transport()
+        monkeypatch.setattr(outbound_email, "_dispatch_after_enqueue", lambda: None)
+        monkeypatch.setattr(outbound_email, "batch_size", 1)
+
+        outbound_email.enqueue(
+            "a@example.com", "Digest", html="<p>x</p>", priority=PRIORITY_BULK
+        )
+        outbound_email.enqueue(
+            "b@example.com", "Código 2FA", html="<p>x</p>", priority=PRIORITY_HIGH
+        )
+        db_session.commit()
+
+        assert outbound_email.process_batch() == 1
+        assert [m.subject for m in transport.sent] == ["Código 2FA"]
+        assert outbound_email.dispatch() == 1
+
+    def test_stats_report_depth_and_latency(self, fake_transport, db_session):
+        fake_transport()
+        outbound_email.enqueue("adv@example.com", "Stats", html="<p>x</p>")
+        db_session.commit()
+
+        stats = outbound_email.stats()
+
+        assert stats["depth"] == {"sent": 1}
+        assert stats["oldest_queued_seconds"] is None
+        assert stats["latency_seconds"]["sample"] == 1
+
+
+def _app(debug=False, **config):
+    return SimpleNamespace(
+        config=config, debug=debug, testing=False, instance_path="/tmp/petitio"
+    )
+
+
+class TestTransportSelection:
+    """Maildir só quando pedido ou em debug/testes"""
+
+    def test_production_without_provider_has_no_transport(self, monkeypatch):
+        monkeypatch.delenv("RESEND_API_KEY", raising=False)
+
+        assert build_transport(_app(MAIL_TRANSPORT="auto")) is None
+        assert build_transport(_app(MAIL_TRANSPORT="resend")) is None
+
+    def test_debug_falls_back_to_maildir(self, monkeypatch):
+        monkeypatch.delenv("RESEND_API_KEY", raising=False)
+
+        transport = build_transport(_app(debug=True, MAIL_TRANSPORT="auto"))
+        assert isinstance(transport, MaildirTransport)
+
+    def test_explicit_maildir_in_production(self):
+        transport = build_transport(_app(MAIL_TRANSPORT="maildir"))
+        assert isinstance(transport, MaildirTransport)
+
+    def test_smtp_when_mail_server_is_set(self, monkeypatch):
+        monkeypatch.delenv("RESEND_API_KEY", raising=False)
+
+        transport = build_transport(_app(MAIL_SERVER="smtp.example.com"))
+        assert transport.name == "smtp"
+
+    def test_2fa_code_reports_failure_without_transport(self, db_session, monkeypatch):
+        monkeypatch.setattr(outbound_email, "_transport", None)
+
+        assert EmailService.send_2fa_code_email("adv@example.com", "123456") is False
+        sent = send_email("adv@example.com", "Teste", "emails/deadline_alert.html")
+        assert sent is False
+        assert EmailOutbox.query.count() == 0
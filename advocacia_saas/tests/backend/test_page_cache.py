@@ -0,0 +1,136 @@
+"""
+Testes para o cache das páginas públicas (sitemap, roadmap, fragmentos)
+"""
+
+import pytest
+from app import cache
+from app.models import RoadmapCategory, RoadmapItem
+from app.services.page_cache import TAG_ROADMAP, page_cache
+
+
+@pytest.fixture
+def page_cache_on(app):
+    """Liga o cache só neste teste (desligado no TestConfig)"""
+    with app.app_context():
+        cache.clear()
+    page_cache.ttl = 600
+    yield page_cache
+    page_cache.ttl = 0
+
+
+@pytest.fixture
+def roadmap_category(db_session):
+    category = RoadmapCategory(name="Petições", slug="peticoes")
+    db_session.add(category)
+    db_session.commit()
+    return category
+
+
+def _add_item(db_session, category, slug, status="planned"):
+    db_session.add(
+        RoadmapItem(
+            category_id=category.id,
+            title=f"Item {slug}",
+            slug=slug,
+            description="Descrição",
+            status=status,
+            visible_to_users=True,
+        )
+    )
+    db_session.commit()
+
+
+class TestCachedPage:
+    """Testes para respostas inteiras em cache"""
+
+    def test_second_hit_and_conditional_request(self, client, page_cache_on):
+        first = client.get("/sitemap.xml")
+        second = client.get("/sitemap.xml")
+
+        assert first.headers["X-Page-Cache"] == "MISS"
+        assert second.headers["X-Page-Cache"] == "HIT"
+        assert second.data == first.data
+        assert second.content_type.startswith("application/xml")
+        assert second.last_modified is not None
+
+        etag = second.headers["ETag"]
+        not_modified = client.get("/sitemap.xml", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.data == b""
+
+    def test_authenticated_user_bypasses_cache(
+        self, authenticated_client, page_cache_on
+    ):
+        response = authenticated_client.get("/sitemap.xml")
+        assert "X-Page-Cache" not in response.headers
+
+    def test_disabled_cache(self, client):
+        assert "X-Page-Cache" not in client.get("/sitemap.xml").headers
+
+    def test_csrf_token_is_per_session(self, app, page_cache_on):
+        # Cada visitante com seu app context: a fixture `app` mantém um aberto
+        # e o token gerado fica em g.csrf_token, que seria compartilhado
+        with app.app_context():
+            first = app.test_client().get("/roadmap")
+        with app.app_context():
+            second = app.test_client().get("/roadmap")
+
+        assert second.headers["X-Page-Cache"] == "HIT"
+        assert b"__PAGE_CACHE_CSRF_TOKEN__" not in second.data
+        assert first.data != second.data
+        assert first.headers["ETag"] != second.headers["ETag"]
+        assert "private" in second.headers["Cache-Control"]
+
+    def test_roadmap_edit_invalidates_page(
+        self, client, db_session, roadmap_category, page_cache_on
+    ):
+        client.get("/roadmap")
+        assert client.get("/roadmap").headers["X-Page-Cache"] == "HIT"
+
+        _add_item(db_session, roadmap_category, "novo-item")
+
+        response = client.get("/roadmap")
+        assert response.headers["X-Page-Cache"] == "MISS"
+        assert b"Item novo-item" in response.data
+
+    def test_not_found_is_not_cached(self, client, page_cache_on):
+        assert client.get("/roadmap/nao-existe").status_code == 404
+        response = client.get("/roadmap/nao-existe")
+        assert response.status_code == 404
+        assert "X-Page-Cache" not in response.headers
+
+
+class TestFragment:
+    """Testes para fragmentos em cache"""
+
+    def test_fragment_rebuilt_after_invalidate(self, app, page_cache_on):
+        calls = []
+
+        def build():
+            calls.append(1)
+            return {"total": len(calls)}
+
+        with app.app_context():
+            assert page_cache.fragment("stats", (TAG_ROADMAP,), build) == {"total": 1}
+            assert page_cache.fragment("stats", (TAG_ROADMAP,), build) == {"total": 1}
+
+            page_cache.invalidate(TAG_ROADMAP)
+            assert page_cache.fragment("stats", (TAG_ROADMAP,), build) == {"total": 2}
+
+    def test_rollback_keeps_cached_version(
+        self, app, db_session, roadmap_category, page_cache_on
+    ):
+        with app.app_context():
+            before = page_cache._versions((TAG_ROADMAP,))
+            db_session.add(
+                RoadmapItem(
+                    category_id=roadmap_category.id,
+                    title="Descartado",
+                    slug="descartado",
+                    description="x",
+                )
+            )
+            db_session.flush()
+            db_session.rollback()
+
+            assert page_cache._versions((TAG_ROADMAP,)) == before
@@ -0,0 +1,260 @@
+"""
+Testes para o pool de renderização de PDF, o cache de saída, os jobs em
+background (cobrança só depois do PDF gerado) e o schema de
+/petitions/generate-dynamic
+"""
+
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from app.models import (
+    PetitionModel,
+    PetitionModelSection,
+    PetitionSection,
+    PetitionType,
+    PetitionUsage,
+)
+from app.services import pdf_renderer
+from app.services.job_store import FINAL_STATUSES
+from app.schemas import GenerateDynamicSchema
+from app.services.pdf_renderer import (
+    PDFOutputCache,
+    PDFRenderError,
+    PDFRenderTimeout,
+    pdf_render_service,
+)
+from marshmallow import ValidationError
+
+
+@pytest.fixture
+def renderer(monkeypatch, tmp_path):
+    """Renderizador falso e cache vazio; `calls` conta as renderizações"""
+    state = {"calls": 0, "error": None, "release": None}
+
+    def fake_render(html_content, title, fallback=True):
+        state["calls"] += 1
+        if state["release"] is not None:
+            state["release"].wait(5)
+        if state["error"]:
+            raise state["error"]
+        return b"%PDF-fake " + html_content.encode()
+
+    monkeypatch.setattr(pdf_renderer, "render_html_to_pdf", fake_render)
+    monkeypatch.setattr(pdf_render_service, "_cache", PDFOutputCache(str(tmp_path)))
+    yield state
+    if state["release"] is not None:
+        state["release"].set()
+
+
+def _wait(job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = pdf_render_service.store.get(job_id)
+        if job["status"] in FINAL_STATUSES:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} não terminou")
+
+
+class TestRender:
+    """Testes para a renderização síncrona"""
+
+    def test_output_is_cached(self, renderer):
+        first = pdf_render_service.render("<p>a</p>", "Título")
+        second = pdf_render_service.render("<p>a</p>", "Título")
+
+        assert first == second == b"%PDF-fake <p>a</p>"
+        assert renderer["calls"] == 1
+
+    def test_fallback_mode_has_its_own_cache_entry(self, renderer):
+        pdf_render_service.render("<p>f</p>", "Título")
+        pdf_render_service.render("<p>f</p>", "Título", fallback=False)
+
+        assert renderer["calls"] == 2
+
+    def test_strict_render_does_not_fall_back_to_plain_text(self, monkeypatch):
+        from xhtml2pdf import pisa
+
+        monkeypatch.setattr(pisa, "CreatePDF", lambda **kwargs: SimpleNamespace(err=1))
+
+        with pytest.raises(PDFRenderError):
+            pdf_renderer.render_html_to_pdf("<p>g</p>", "Título", fallback=False)
+        assert pdf_renderer.render_html_to_pdf("<p>g</p>", "Título").startswith(b"%PDF")
+
+    def test_timeout_raises_clear_error(self, renderer, monkeypatch):
+        renderer["release"] = threading.Event()
+        monkeypatch.setattr(pdf_render_service, "_timeout", 0.05)
+
+        with pytest.raises(PDFRenderTimeout):
+            pdf_render_service.render("<p>lento</p>", "Título")
+
+
+class TestBackgroundJobs:
+    """Testes para submit() e o on_complete"""
+
+    def test_on_complete_runs_after_render(self, app, renderer):
+        completed = []
+        job = pdf_render_service.submit(
+            1, "<p>b</p>", "Título", "b.pdf", on_complete=lambda: completed.append(1)
+        )
+
+        job = _wait(job["id"])
+        assert job["status"] == "completed"
+        assert completed == [1]
+        assert pdf_render_service.read_output(job) == b"%PDF-fake <p>b</p>"
+
+    def test_cache_hit_completes_immediately(self, app, renderer):
+        pdf_render_service.render("<p>c</p>", "Título")
+        completed = []
+
+        job = pdf_render_service.submit(
+            1, "<p>c</p>", "Título", "c.pdf", on_complete=lambda: completed.append(1)
+        )
+
+        assert job["status"] == "completed" and job["cached"]
+        assert completed == [1]
+        assert renderer["calls"] == 1
+
+    def test_failed_render_skips_on_complete(self, app, renderer):
+        renderer["error"] = RuntimeError("xhtml2pdf falhou")
+        completed = []
+
+        job = pdf_render_service.submit(
+            1, "<p>d</p>", "Título", "d.pdf", on_complete=lambda: completed.append(1)
+        )
+
+        job = _wait(job["id"])
+        assert job["status"] == "failed"
+        assert completed == []
+
+    def test_on_complete_error_fails_job(self, app, renderer):
+        def refuse():
+            raise RuntimeError("Saldo insuficiente")
+
+        job = pdf_render_service.submit(1, "<p>e</p>", "Título", "e.pdf", refuse)
+
+        job = _wait(job["id"])
+        assert job["status"] == "failed"
+        assert job["error"] == "Saldo insuficiente"
+
+
+@pytest.fixture
+def petition_model(db_session):
+    section = PetitionSection(
+        slug="fatos",
+        name="Dos Fatos",
+        fields_schema=[{"name": "texto", "label": "Texto", "type": "textarea"}],
+        is_active=True,
+    )
+    petition_type = PetitionType(
+        slug="peticao-pdf", name="Petição PDF", use_dynamic_form=True
+    )
+    db_session.add_all([section, petition_type])
+    db_session.flush()
+    model = PetitionModel(
+        name="Modelo PDF",
+        slug="modelo-pdf",
+        petition_type_id=petition_type.id,
+        use_dynamic_form=True,
+    )
+    db_session.add(model)
+    db_session.flush()
+    db_session.add(
+        PetitionModelSection(petition_model_id=model.id, section_id=section.id, order=1)
+    )
+    db_session.commit()
+    return model
+
+
+def _generate(client, model, background):
+    return client.post(
+        "/petitions/generate-dynamic",
+        json={
+            "petition_model_id": model.id,
+            "background": background,
+            "form_data": {"fatos_texto": f"Fatos {uuid.uuid4().hex}"},
+        },
+    )
+
+
+@pytest.fixture
+def shared_jobs(monkeypatch):
+    """Simula o estado dos jobs compartilhado entre workers (Redis)"""
+    monkeypatch.setattr(pdf_render_service, "shared_jobs", True)
+
+
+class TestGenerateDynamicSchema:
+    """O formulário dinâmico envia petition_model_id"""
+
+    def test_model_id_is_required(self):
+        data = GenerateDynamicSchema().load(
+            {"petition_model_id": 3, "petition_type_id": 1, "form_data": {}}
+        )
+        assert data["petition_model_id"] == 3
+
+        with pytest.raises(ValidationError) as error:
+            GenerateDynamicSchema().load({"petition_type_id": 1, "form_data": {}})
+        assert "petition_model_id" in error.value.messages
+
+
+class TestGenerateDynamicBilling:
+    """O uso da petição só é registrado quando o PDF existe"""
+
+    def test_background_render_is_billed_when_completed(
+        self, authenticated_client, petition_model, renderer, shared_jobs
+    ):
+        renderer["release"] = threading.Event()
+
+        response = _generate(authenticated_client, petition_model, background=True)
+        assert response.status_code == 202
+        assert PetitionUsage.query.count() == 0
+
+        renderer["release"].set()
+        job = _wait(response.get_json()["job_id"])
+        assert job["status"] == "completed"
+        assert PetitionUsage.query.count() == 1
+
+    def test_failed_background_render_is_not_billed(
+        self, authenticated_client, petition_model, renderer, shared_jobs
+    ):
+        renderer["error"] = RuntimeError("xhtml2pdf falhou")
+
+        response = _generate(authenticated_client, petition_model, background=True)
+        job = _wait(response.get_json()["job_id"])
+
+        assert job["status"] == "failed"
+        assert PetitionUsage.query.count() == 0
+
+    def test_sync_timeout_returns_504_and_is_not_billed(
+        self, authenticated_client, petition_model, renderer, monkeypatch
+    ):
+        renderer["release"] = threading.Event()
+        monkeypatch.setattr(pdf_render_service, "_timeout", 0.05)
+
+        response = _generate(authenticated_client, petition_model, background=False)
+
+        assert response.status_code == 504
+        assert PetitionUsage.query.count() == 0
+
+    def test_background_without_shared_store_is_synchronous(
+        self, authenticated_client, petition_model, renderer
+    ):
+        response = _generate(authenticated_client, petition_model, background=True)
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/pdf"
+        assert PetitionUsage.query.count() == 1
+
+    def test_render_error_returns_500_and_is_not_billed(
+        self, authenticated_client, petition_model, renderer
+    ):
+        renderer["error"] = PDFRenderError("Erro ao gerar PDF")
+
+        response = _generate(authenticated_client, petition_model, background=False)
+
+        assert response.status_code == 500
+        assert response.get_json()["error"] == "Erro ao gerar PDF"
+        assert PetitionUsage.query.count() == 0
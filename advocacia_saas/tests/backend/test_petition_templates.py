@@ -0,0 +1,79 @@
+"""
+Testes para o engine de templates dos modelos de petição
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from app.services.petition_templates import PetitionTemplateEngine
+from jinja2 import FileSystemBytecodeCache
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = PetitionTemplateEngine()
+    engine._bytecode_cache = FileSystemBytecodeCache(str(tmp_path))
+    return engine
+
+
+def _model(content, model_id=1):
+    return SimpleNamespace(id=model_id, template_content=content)
+
+
+class TestAutoescape:
+    """Formatação do editor rico passa; outra marcação sai como texto"""
+
+    def test_rich_text_is_not_escaped(self, engine):
+        rendered = engine.render_petition_model(
+            _model("<div>{{ fatos }}</div>"),
+            {"fatos": "<p>O autor <strong>contratou</strong> o serviço</p>"},
+        )
+
+        assert rendered == (
+            "<div><p>O autor <strong>contratou</strong> o serviço</p></div>"
+        )
+
+    def test_other_markup_is_escaped(self, engine):
+        rendered = engine.render_petition_model(
+            _model("<p>Autor: {{ autor_nome }}</p>"),
+            {"autor_nome": '<script>x()</script><a href="#">João</a> & Cia'},
+        )
+
+        assert rendered == (
+            "<p>Autor: &lt;script&gt;x()&lt;/script&gt;"
+            '&lt;a href="#"&gt;João&lt;/a&gt; &amp; Cia</p>'
+        )
+
+    def test_nested_values_are_sanitized(self, engine):
+        rendered = engine.render_petition_model(
+            _model("{% for parte in partes %}{{ parte.nome }};{% endfor %}"),
+            {"partes": [{"nome": "<em>A</em>"}, {"nome": "<img src=x>"}]},
+        )
+
+        assert rendered == "<em>A</em>;&lt;img src=x&gt;;"
+
+    def test_preview_is_escaped(self, engine):
+        rendered = engine.render_string("{{ fatos }}", {"fatos": "<b>x</b><i"})
+        assert rendered == "<b>x</b>&lt;i"
+
+
+class TestCompiledCache:
+    """Testes para o LRU de templates compilados"""
+
+    def test_same_content_is_compiled_once(self, engine):
+        model = _model("{{ nome }}")
+        engine.render_petition_model(model, {"nome": "a"})
+        engine.render_petition_model(model, {"nome": "b"})
+
+        assert (engine.misses, engine.hits) == (1, 1)
+
+    def test_edited_content_is_recompiled(self, engine):
+        engine.render_petition_model(_model("A {{ nome }}"), {"nome": "x"})
+        rendered = engine.render_petition_model(_model("B {{ nome }}"), {"nome": "x"})
+
+        assert rendered == "B x"
+        assert engine.misses == 2
+
+    def test_validate_rejects_private_attributes(self, engine):
+        assert engine.validate("{{ nome.__class__ }}")
+        assert engine.validate("{{ nome }}") == []
@@ -0,0 +1,106 @@
+"""
+Testes para o perfil de queries por requisição e o detector de N+1
+"""
+
+import pytest
+from app.models import User
+from app.services.query_profiler import fingerprint, query_profiler
+
+
+@pytest.fixture
+def users(db_session):
+    for index in range(6):
+        db_session.add(
+            User(
+                username=f"user{index}",
+                email=f"user{index}@example.com",
+                full_name=f"User {index}",
+                password_hash="x",
+                user_type="advogado",
+            )
+        )
+    db_session.commit()
+    return [user.id for user in User.query.all()]
+
+
+def _unread_count(app, client):
+    # App context próprio, como num worker: o da fixture `app` já tem o
+    # usuário em g e a requisição não faria a query de login
+    with app.app_context():
+        return client.get("/api/notifications/unread-count")
+
+
+class TestFingerprint:
+    """Testes para a normalização do SQL"""
+
+    def test_literals_and_params_collapse(self):
+        first = fingerprint("SELECT * FROM user WHERE id = 10 AND name = 'Ana'")
+        second = fingerprint("SELECT *  FROM user\n WHERE id = ? AND name = :name_1")
+
+        assert first == second == "SELECT * FROM user WHERE id = ? AND name = ?"
+
+    def test_in_lists_of_any_size(self):
+        assert fingerprint("SELECT 1 WHERE id IN (%(a)s, %(b)s)") == fingerprint(
+            "SELECT 1 WHERE id IN (?)"
+        )
+
+
+class TestQueryProfile:
+    """Testes para perfis e N+1"""
+
+    def test_loop_of_selects_is_flagged(self, db_session, users):
+        db_session.expire_all()
+        with query_profiler.profile() as profile:
+            for user_id in users:
+                User.query.filter_by(id=user_id).first()
+
+        assert profile.count == len(users)
+        [(sql, times)] = profile.n_plus_one()
+        assert times == len(users)
+        assert sql.startswith("SELECT")
+        assert "n+1=1" in profile.header()
+
+    def test_single_query_is_not_flagged(self, db_session, users):
+        with query_profiler.profile() as profile:
+            User.query.filter(User.id.in_(users)).all()
+
+        assert profile.count == 1
+        assert profile.n_plus_one() == []
+
+    def test_request_header_and_endpoint_stats(
+        self, app, authenticated_client, sample_user
+    ):
+        query_profiler.reset()
+        query_profiler.header_enabled = True
+        try:
+            response = _unread_count(app, authenticated_client)
+        finally:
+            query_profiler.header_enabled = False
+
+        # Carregar o usuário da sessão + a contagem
+        assert response.headers["X-DB-Queries"].split(";")[0] == "2"
+        stats = query_profiler.stats()
+        endpoint = stats["endpoints"]["notifications_api.get_unread_count"]
+        assert (endpoint["requests"], endpoint["queries"]) == (1, 2)
+        assert stats["tenants"][f"user:{sample_user.id}"]["requests"] == 1
+
+
+class TestQueryBudget:
+    """Testes para a fixture query_budget"""
+
+    def test_endpoint_within_budget(self, app, authenticated_client, query_budget):
+        with query_budget(2) as profile:
+            _unread_count(app, authenticated_client)
+        assert profile.count == 2
+
+    def test_over_budget_fails(self, db_session, query_budget):
+        with pytest.raises(pytest.fail.Exception):
+            with query_budget(0):
+                User.query.count()
+
+    def test_n_plus_one_fails(self, db_session, users, query_budget):
+        db_session.expire_all()
+        with pytest.raises(pytest.fail.Exception, match="N\\+1"):
+            with query_budget(50):
+                for user_id in users:
+                    User.query.filter_by(id=user_id).first()
@@ -0,0 +1,75 @@
+"""
+Testes para o canal de eventos em tempo real (publicação e long-poll)
+"""
+
+from app.models import Notification
+from app.services.realtime import MemoryMailbox, realtime
+
+
+def _events(user_id, cursor):
+    _, events = realtime.poll(user_id, cursor, timeout=0)
+    return events
+
+
+class TestMemoryMailbox:
+    """Testes para a caixa de eventos em memória"""
+
+    def test_reads_only_events_after_cursor(self):
+        mailbox = MemoryMailbox(backlog=2)
+        cursor, events = mailbox.read(1, None, timeout=0)
+        assert events == []
+
+        mailbox.append(1, {"event": "a"})
+        mailbox.append(2, {"event": "outro usuário"})
+        mailbox.append(1, {"event": "b"})
+        mailbox.append(1, {"event": "c"})
+
+        cursor, events = mailbox.read(1, cursor, timeout=0)
+        # Só os últimos `backlog` eventos ficam guardados
+        assert [e["event"] for e in events] == ["b", "c"]
+        assert mailbox.read(1, cursor, timeout=0) == (cursor, [])
+
+
+class TestRealtimeBus:
+    """Testes para os eventos publicados pela aplicação"""
+
+    def test_notification_commit_publishes_unread_count(self, db_session, sample_user):
+        cursor, _ = realtime.poll(sample_user.id)
+
+        Notification.create_notification(
+            user_id=sample_user.id,
+            notification_type="system",
+            title="Aviso",
+            message="Teste",
+        )
+
+        events = _events(sample_user.id, cursor)
+        assert events == [{"event": "notification_count", "data": {"count": 1}}]
+
+    def test_rollback_publishes_nothing(self, db_session, sample_user):
+        cursor, _ = realtime.poll(sample_user.id)
+
+        db_session.add(
+            Notification(user_id=sample_user.id, type="system", title="x", message="x")
+        )
+        db_session.flush()
+        db_session.rollback()
+
+        assert _events(sample_user.id, cursor) == []
+
+    def test_long_poll_endpoint(self, authenticated_client, sample_user):
+        response = authenticated_client.get("/api/realtime/poll")
+        cursor = response.get_json()["cursor"]
+
+        realtime.publish(
+            sample_user.id, "payment_status", {"payment_id": 7, "status": "paid"}
+        )
+
+        response = authenticated_client.get(
+            f"/api/realtime/poll?cursor={cursor}&timeout=0"
+        )
+        data = response.get_json()
+        assert data["events"] == [
+            {"event": "payment_status", "data": {"payment_id": 7, "status": "paid"}}
+        ]
+        assert data["cursor"] != cursor
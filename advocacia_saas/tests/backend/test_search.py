@@ -0,0 +1,111 @@
+"""
+Testes para o índice de busca global
+"""
+
+from app.models import Client, Process, SearchIndexEntry
+from app.services.search_index import SearchIndexService, normalize_text
+
+
+def _make_client(user, name, email="cliente@example.com"):
+    return Client(
+        lawyer_id=user.id,
+        full_name=name,
+        cpf_cnpj="123.456.789-00",
+        email=email,
+        mobile_phone="(11) 99999-0000",
+    )
+
+
+class TestSearchIndex:
+    """Testes para indexação e busca"""
+
+    def test_normalize_text_removes_accents(self):
+        """Normalização remove acentos, pontuação e caixa"""
+        assert normalize_text("  João da CONCEIÇÃO-Silva ") == "joao da conceicao silva"
+        assert normalize_text(None) == ""
+
+    def test_index_follows_model_events(self, db_session, sample_user):
+        """Inserção, edição e remoção atualizam o índice"""
+        client = _make_client(sample_user, "José Antônio")
+        db_session.add(client)
+        db_session.commit()
+
+        entry = SearchIndexEntry.query.filter_by(
+            entity_type="client", entity_id=client.id
+        ).one()
+        assert entry.title == "José Antônio"
+        assert "jose antonio" in entry.search_text
+
+        client.full_name = "Maria Aparecida"
+        db_session.commit()
+        results = SearchIndexService.search(sample_user.id, "aparecida")
+        assert [r["id"] for r in results] == [client.id]
+        assert SearchIndexService.search(sample_user.id, "antonio") == []
+
+        db_session.delete(client)
+        db_session.commit()
+        assert SearchIndexEntry.query.count() == 0
+
+    def test_search_is_accent_insensitive_and_scoped(self, db_session, sample_user):
+        """Busca ignora acentos e não vaza dados de outros usuários"""
+        db_session.add(_make_client(sample_user, "Conceição Souza"))
+        db_session.add(
+            Process(
+                user_id=sample_user.id,
+                process_number="0001234-56.2024.8.26.0100",
+                title="Ação de cobrança",
+            )
+        )
+        db_session.commit()
+
+        results = SearchIndexService.search(sample_user.id, "conceicao")
+        assert len(results) == 1
+        assert results[0]["type"] == "client"
+        assert results[0]["type_label"] == "Cliente"
+
+        results = SearchIndexService.search(sample_user.id, "00012345620248260100")
+        assert [r["type"] for r in results] == ["process"]
+
+        assert SearchIndexService.search(sample_user.id + 1, "conceicao") == []
+
+    def test_exact_title_ranks_first(self, db_session, sample_user):
+        """Título exato vem antes de prefixo e de outras correspondências"""
+        db_session.add(_make_client(sample_user, "Ana Paula", email="x@ana.com"))
+        db_session.add(_make_client(sample_user, "Ana"))
+        db_session.add(_make_client(sample_user, "Mariana", email="ana@example.com"))
+        db_session.commit()
+
+        titles = [r["title"] for r in SearchIndexService.search(sample_user.id, "ana")]
+        assert titles[:2] == ["Ana", "Ana Paula"]
+
+    def test_limit_per_entity_type(self, db_session, sample_user):
+        """Cada tipo de entidade respeita o limite"""
+        for i in range(4):
+            db_session.add(_make_client(sample_user, f"Carlos {i}"))
+        db_session.commit()
+
+        assert len(SearchIndexService.search(sample_user.id, "carlos", limit=2)) == 2
+
+    def test_rebuild(self, db_session, sample_user):
+        """Reconstrução recria todas as entradas"""
+        db_session.add(_make_client(sample_user, "Pedro"))
+        db_session.commit()
+        SearchIndexEntry.query.delete()
+        db_session.commit()
+
+        totals = SearchIndexService.rebuild()
+
+        assert totals["client"] == 1
+        assert SearchIndexService.search(sample_user.id, "pedro")[0]["title"] == "Pedro"
+
+    def test_global_search_endpoint(self, authenticated_client, sample_user, db_session):
+        """Endpoint retorna resultados do índice no formato esperado"""
+        db_session.add(_make_client(sample_user, "Fernanda Lima"))
+        db_session.commit()
+
+        response = authenticated_client.get("/api/search/global?q=fernanda")
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["total"] == 1
+        assert data["results"][0]["url"].startswith("/clients/")
@@ -0,0 +1,152 @@
+"""
+Testes para a sessão no servidor e o cache de blobs da sessão
+"""
+
+from app.ai.services import LastDocumentService
+from app.services import session_store as session_store_module
+from app.services.session_store import (
+    FilesystemKeyValueStore,
+    ServerSideSession,
+    ServerSideSessionInterface,
+    SessionStoreService,
+    dumps,
+    loads,
+    session_store,
+)
+from flask import Flask, session
+
+
+class TestSerialization:
+    """Testes para dumps/loads"""
+
+    def test_roundtrip_small_and_compressed(self):
+        small = {"_user_id": "1", "_fresh": True}
+        large = {"text": "Cláusula primeira. " * 500}
+
+        assert dumps(small)[:1] == b"j"
+        assert loads(dumps(small)) == small
+        assert dumps(large)[:1] == b"z"
+        assert len(dumps(large)) < len(large["text"])
+        assert loads(dumps(large)) == large
+
+
+class TestFilesystemStore:
+    """Testes para o backend em disco"""
+
+    def test_expired_key_is_gone(self, tmp_path):
+        store = FilesystemKeyValueStore(str(tmp_path))
+        store.set("abc123", b"j{}", ttl=60)
+        store.set("def456", b"j{}", ttl=-1)
+
+        assert store.get("abc123") == b"j{}"
+        assert store.get("def456") is None
+
+    def test_touch_extends_expiry(self, tmp_path):
+        store = FilesystemKeyValueStore(str(tmp_path))
+        store.set("abc123", b"j{}", ttl=-1)
+        store.touch("abc123", ttl=60)
+
+        assert store.get("abc123") == b"j{}"
+        assert store.prune() == 0
+
+
+def _init(tmp_path, debug=False, **config):
+    app = Flask("petitio_teste")
+    app.debug = debug
+    app.config.update(SESSION_FILE_DIR=str(tmp_path), **config)
+    SessionStoreService().init_app(app)
+    return app
+
+
+class TestBackendSelection:
+    """Disco só em debug/testes ou quando pedido explicitamente"""
+
+    def test_production_without_redis_uses_cookie(self, tmp_path, monkeypatch):
+        warnings = []
+        monkeypatch.setattr(session_store_module.logger, "warning", warnings.append)
+
+        app = _init(tmp_path)
+
+        assert not isinstance(app.session_interface, ServerSideSessionInterface)
+        assert "REDIS_URL não configurado" in warnings[0]
+
+    def test_debug_uses_filesystem(self, tmp_path):
+        app = _init(tmp_path, debug=True)
+
+        assert isinstance(app.session_interface, ServerSideSessionInterface)
+        assert isinstance(app.session_interface.store, FilesystemKeyValueStore)
+
+    def test_explicit_filesystem_in_production(self, tmp_path):
+        app = _init(tmp_path, SESSION_BACKEND="filesystem")
+
+        assert isinstance(app.session_interface.store, FilesystemKeyValueStore)
+
+
+class TestServerSideSession:
+    """Testes para a sessão carregada sob demanda"""
+
+    def test_loads_only_on_first_access(self):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return {"a": 1}
+
+        sess = ServerSideSession("sid", loader=loader)
+        assert not sess.loaded and not sess.accessed
+        assert sess["a"] == 1
+        assert sess.get("b") is None
+        assert len(calls) == 1
+        assert not sess.modified
+
+        sess["b"] = 2
+        assert sess.modified
+
+    def _save(self, app, data):
+        """Grava a sessão como no fim de uma requisição e devolve o cookie"""
+        with app.test_request_context():
+            session.update(data)
+            response = app.response_class()
+            app.session_interface.save_session(
+                app, session._get_current_object(), response
+            )
+        return response.headers["Set-Cookie"].split(";")[0].split("=", 1)[1]
+
+    def _open(self, app, cookie):
+        with app.test_request_context(headers={"Cookie": f"petitio_session={cookie}"}):
+            return dict(session)
+
+    def test_cookie_carries_only_signed_id(self, app):
+        cookie = self._save(app, {"_user_id": "1", "payload": "x" * 10000})
+
+        assert len(cookie) < 100
+        assert "xxxx" not in cookie
+        assert self._open(app, cookie)["payload"] == "x" * 10000
+
+    def test_tampered_cookie_starts_new_session(self, app):
+        cookie = self._save(app, {"payload": "segredo"})
+
+        assert self._open(app, cookie[:-2] + "xx") == {}
+
+
+class TestLastDocument:
+    """Testes para o último documento analisado"""
+
+    def test_remember_keeps_text_out_of_session(self, app):
+        with app.test_request_context():
+            LastDocumentService.remember("Texto " * 5000, "Análise", "contrato.pdf")
+            reference = session["last_document"]
+            assert set(reference) == {"blob", "name"}
+
+            text, analysis = LastDocumentService.recall()
+            assert len(text) == LastDocumentService.MAX_TEXT_CHARS
+            assert analysis == "Análise"
+
+            first_blob = reference["blob"]
+            LastDocumentService.remember("Outro " * 20, "Outra", "peticao.pdf")
+            assert session_store.get_blob(first_blob) is None
+            assert LastDocumentService.recall() == ("Outro " * 20, "Outra")
+
+    def test_recall_without_document(self, app):
+        with app.test_request_context():
+            assert LastDocumentService.recall() == (None, None)
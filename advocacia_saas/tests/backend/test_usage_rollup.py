@@ -0,0 +1,111 @@
+"""
+Testes para os totais pré-agregados de uso de petições
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from app import db
+from app.billing import usage_rollup
+from app.models import PetitionType, PetitionUsage, PetitionUsageRollup
+from sqlalchemy import event
+
+
+@pytest.fixture
+def petition_type(db_session):
+    petition_type = PetitionType(
+        slug="rollup-test", name="Rollup Test", base_price=Decimal("20.00")
+    )
+    db_session.add(petition_type)
+    db_session.commit()
+    return petition_type
+
+
+def _usage(db_session, user, petition_type, cycle, day, billable=True):
+    usage = PetitionUsage(
+        user_id=user.id,
+        petition_type_id=petition_type.id,
+        billing_cycle=cycle,
+        generated_at=datetime.fromisoformat(f"{day}T10:00:00"),
+        billable=billable,
+        amount=Decimal("20.00") if billable else Decimal("0.00"),
+    )
+    db_session.add(usage)
+    return usage
+
+
+class TestUsageRollup:
+    """Testes para app/billing/usage_rollup.py"""
+
+    def test_missing_cycle_is_built_from_raw_usage(
+        self, db_session, sample_user, petition_type
+    ):
+        _usage(db_session, sample_user, petition_type, "2026-09", "2026-09-02")
+        _usage(db_session, sample_user, petition_type, "2026-09", "2026-09-02")
+        _usage(db_session, sample_user, petition_type, "2026-09", "2026-09-05", False)
+        db_session.commit()
+
+        totals = usage_rollup.get_cycle_totals(sample_user.id, ["2026-09", "2026-08"])
+
+        assert totals["2026-09"].total == 3
+        assert totals["2026-09"].billable == 2
+        assert totals["2026-09"].free == 1
+        assert totals["2026-09"].billable_amount == Decimal("40.00")
+        assert totals["2026-09"].peak_day()[1] == 2
+        assert totals["2026-08"].total == 0
+        assert PetitionUsageRollup.query.filter_by(user_id=sample_user.id).count() == 2
+
+    def test_new_cycles_are_not_reloaded_after_commit(
+        self, db_session, sample_user, petition_type
+    ):
+        cycles = ["2026-05", "2026-06", "2026-07"]
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            totals = usage_rollup.get_cycle_totals(sample_user.id, cycles)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        assert [totals[c].total for c in cycles] == [0, 0, 0]
+        selects = [
+            sql
+            for sql in statements
+            if sql.lstrip().upper().startswith("SELECT")
+            and "petition_usage_rollup" in sql
+        ]
+        assert len(selects) == 1
+
+    def test_apply_usage_keeps_rollup_consistent(
+        self, db_session, sample_user, petition_type
+    ):
+        rollup = usage_rollup.lock_cycle(sample_user.id, "2026-10")
+        for day in ("2026-10-01", "2026-10-01", "2026-10-03"):
+            usage = _usage(db_session, sample_user, petition_type, "2026-10", day)
+            usage_rollup.apply_usage(rollup, usage)
+        db_session.commit()
+
+        assert rollup.billable_count == 3
+        assert rollup.daily_billable == {"2026-10-01": 2, "2026-10-03": 1}
+        assert usage_rollup.find_drift(cycles=["2026-10"]) == []
+
+    def test_drift_is_detected_and_fixed(self, db_session, sample_user, petition_type):
+        _usage(db_session, sample_user, petition_type, "2026-10", "2026-10-01")
+        db_session.commit()
+        usage_rollup.backfill()
+
+        # Uso gravado sem passar por record_petition_usage
+        _usage(db_session, sample_user, petition_type, "2026-10", "2026-10-02")
+        db_session.commit()
+
+        drifts = usage_rollup.find_drift(cycles=["2026-10"])
+        assert len(drifts) == 1
+        assert drifts[0].actual.billable == 1
+        assert drifts[0].expected.billable == 2
+
+        assert usage_rollup.fix_drift(drifts) == 1
+        assert usage_rollup.find_drift(cycles=["2026-10"]) == []
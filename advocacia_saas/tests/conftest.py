@@ -3,6 +3,8 @@ Configuração de testes para o Petitio.
 """
 
 import os
+import tempfile
+from contextlib import contextmanager
 
 import pytest
 from app import create_app, db
@@ -21,6 +23,31 @@ class TestConfig(Config):
     SQLALCHEMY_ENGINE_OPTIONS = {}
     # Disable rate limiting in tests
     RATELIMIT_ENABLED = False
+    # Auditoria gravada na hora (sem thread) para os testes serem determinísticos
+    AUDIT_ASYNC = False
+    # O banco é recriado entre testes sem passar pelo ORM: sem cache de
+    # direitos, de saldo de créditos nem de páginas públicas entre requisições
+    # (ids reaproveitados ficariam com o plano/saldo/página antigos)
+    ENTITLEMENTS_CACHE_TTL = 0
+    CREDIT_BALANCE_CACHE_TTL = 0
+    PUBLIC_PAGE_CACHE_TTL = 0
+    # Jobs de exportação gerados na própria thread, fora da árvore do projeto
+    EXPORT_WORKERS = 0
+    EXPORT_DIR = os.path.join(tempfile.gettempdir(), "petitio_test_exports")
+    # Emails da fila de saída enviados na própria thread, gravados num Maildir
+    OUTBOUND_EMAIL_WORKERS = 0
+    OUTBOUND_EMAIL_RETRY_SECONDS = 0
+    MAIL_TRANSPORT = "maildir"
+    MAIL_MAILDIR = os.path.join(tempfile.gettempdir(), "petitio_test_maildir")
+    # Texto de uploads extraído no próprio processo, cache fora do projeto
+    DOCUMENT_EXTRACT_WORKERS = 0
+    DOCUMENT_TEXT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "petitio_test_doc_text")
+    # Sessões e blobs da sessão em disco, fora da árvore do projeto
+    SESSION_BACKEND = "filesystem"
+    SESSION_FILE_DIR = os.path.join(tempfile.gettempdir(), "petitio_test_sessions")
+    # PDFs renderizados em threads (sem subir processos), cache fora do projeto
+    PDF_RENDER_WORKERS = 0
+    PDF_CACHE_DIR = os.path.join(tempfile.gettempdir(), "petitio_test_pdf_cache")
 
 
 @pytest.fixture(scope="session")
@@ -119,3 +146,39 @@ def admin_client(client, admin_user):
         sess["_fresh"] = True
 
     return client
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Falha o teste se o bloco fizer mais queries que o orçamento.
+
+    Uso:
+        with query_budget(8):
+            authenticated_client.get("/dashboard")
+
+    Prováveis N+1 (o mesmo SELECT repetido) também falham o teste, a menos
+    que allow_n_plus_one=True.
+    """
+    from app.services.query_profiler import query_profiler
+
+    @contextmanager
+    def budget(max_queries, allow_n_plus_one=False):
+        with query_profiler.profile() as profile:
+            yield profile
+        if profile.count > max_queries:
+            repeated = "\n".join(
+                f"  {times}x {sql}"
+                for sql, times in profile.fingerprints.most_common(5)
+            )
+            pytest.fail(
+                f"{profile.count} queries (orçamento: {max_queries}). "
+                f"Mais frequentes:\n{repeated}"
+            )
+        if not allow_n_plus_one and profile.n_plus_one():
+            suspects = "\n".join(
+                f"  {times}x {sql}" for sql, times in profile.n_plus_one()
+            )
+            pytest.fail(f"Provável N+1:\n{suspects}")
+
+    return budget